@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Event-loop lag under concurrent searches: blocking calls vs the async facade.
+
+A ticker coroutine sleeps 1 ms in a loop and records how late it wakes up
+while a burst of searches is served, first by calling search_similar
+directly from coroutines, then through AsyncVectorDBService.
+
+Usage:
+    python backend/benchmarks/bench_async_search.py --chunks 20000 --concurrency 64 --synthetic
+"""
+
+import argparse
+import asyncio
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from common import make_embedding_service, synthetic_chunks
+
+import backend.src.services.embeddings as embeddings_module
+from backend.src.services.async_vector_db import AsyncVectorDBService
+from backend.src.services.embeddings import EmbeddingModelRegistry
+from backend.src.services.vector_db import VectorDBService
+
+CATEGORIES = ["microcontroller", "sensor", "regulator", "connector"]
+
+
+async def measure(search, queries):
+    """Serve the queries concurrently; return (wall seconds, loop lag samples in ms)."""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+    ticker_task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await asyncio.gather(*(search(query) for query in queries))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await ticker_task
+    return elapsed, lags
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--backend", default="chroma", choices=["chroma", "numpy"])
+    parser.add_argument("--synthetic", action="store_true", help="Use a synthetic model")
+    args = parser.parse_args()
+
+    registry = EmbeddingModelRegistry()
+    registry._services[registry.default_model_name] = make_embedding_service(
+        args.synthetic, query_cache_bytes=0
+    )
+    embeddings_module._embedding_registry = registry
+
+    directory = tempfile.mkdtemp()
+    try:
+        service = VectorDBService(persist_directory=directory, backend=args.backend,
+                                  result_cache_entries=0)
+        chunks = synthetic_chunks(args.chunks)
+        service.add_document_chunks(
+            chunks, [{"category": CATEGORIES[i % len(CATEGORIES)], "chunk_index": i} for i in range(len(chunks))]
+        )
+        facade = AsyncVectorDBService(service, search_workers=args.workers)
+        queries = [f"sensor query {i}" for i in range(args.concurrency)]
+
+        async def blocking(query):
+            return service.search_similar(query, 10)
+
+        async def non_blocking(query):
+            return await facade.asearch_similar(query, 10)
+
+        print(f"{len(chunks)} chunks, {args.concurrency} concurrent searches, backend={args.backend} "
+              f"(synthetic={args.synthetic})")
+        print(f"{'mode':>12} {'wall ms':>8} {'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11}")
+        for name, search in (("blocking", blocking), ("facade", non_blocking)):
+            elapsed, lags = asyncio.run(measure(search, queries))
+            lags = np.array(lags or [0.0])
+            print(f"{name:>12} {elapsed * 1000:>8.1f} {np.percentile(lags, 50):>11.2f} "
+                  f"{np.percentile(lags, 99):>11.2f} {lags.max():>11.2f}")
+        stats = facade.get_stats()["search"]
+        print(f"facade: max_in_flight={stats['max_in_flight']} mean_queue_ms={stats['mean_queue_ms']:.1f} "
+              f"mean_run_ms={stats['mean_run_ms']:.1f}")
+        facade.shutdown()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark bulk writes into Chroma: one add() call vs the pipelined batched path.
+
+The single-call path lets Chroma embed every chunk inside one blocking add().
+The pipelined path embeds batch N+1 while batch N is being persisted; with
+--workers the embedding runs in an EmbeddingWorkerPool (real model only).
+
+Usage:
+    python backend/benchmarks/bench_bulk_write.py --chunks 5000 --synthetic
+    python backend/benchmarks/bench_bulk_write.py --chunks 5000 --workers 2
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+from common import make_embedding_service, synthetic_chunks
+
+import backend.src.services.embeddings as embeddings_module
+from backend.src.services.embedding_pool import EmbeddingWorkerPool
+from backend.src.services.embeddings import EmbeddingModelRegistry
+from backend.src.services.vector_db import VectorDBService
+
+
+def run(chunks, write_batch_size, worker_pool=None):
+    directory = tempfile.mkdtemp()
+    try:
+        service = VectorDBService(persist_directory=directory, write_batch_size=write_batch_size)
+        metadata = [{"chunk_index": i} for i in range(len(chunks))]
+        start = time.perf_counter()
+        service.add_document_chunks(chunks, metadata, worker_pool=worker_pool)
+        return time.perf_counter() - start, service.get_write_stats()
+    finally:
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--synthetic", action="store_true", help="Use a synthetic model")
+    parser.add_argument("--workers", type=int, default=0, help="Embed in a worker pool")
+    args = parser.parse_args()
+
+    # Route the vector DB through an uncached service so every run embeds
+    registry = EmbeddingModelRegistry()
+    registry._services[registry.default_model_name] = make_embedding_service(
+        args.synthetic, query_cache_bytes=0
+    )
+    embeddings_module._embedding_registry = registry
+
+    chunks = synthetic_chunks(args.chunks)
+    registry.get().generate_embeddings_array(chunks[:8])
+
+    print(f"Writing {len(chunks)} chunks (synthetic={args.synthetic})")
+    single, _ = run(chunks, write_batch_size=len(chunks))
+    print(f"{'single add':<12} {single:>8.2f} s {len(chunks) / single:>10.0f} chunks/s")
+    pipelined, stats = run(chunks, write_batch_size=args.batch_size)
+    print(f"{'pipelined':<12} {pipelined:>8.2f} s {stats['chunks_per_second']:>10.0f} chunks/s "
+          f"(embed {stats['embed_seconds']:.2f} s, write {stats['write_seconds']:.2f} s, "
+          f"{stats['batches']} batches)")
+
+    if args.workers and not args.synthetic:
+        with EmbeddingWorkerPool(num_workers=args.workers) as pool:
+            pool.generate_embeddings_array(chunks[:8])
+            pooled, stats = run(chunks, write_batch_size=args.batch_size, worker_pool=pool)
+        print(f"{'worker pool':<12} {pooled:>8.2f} s {stats['chunks_per_second']:>10.0f} chunks/s "
+              f"(embed {stats['embed_seconds']:.2f} s, write {stats['write_seconds']:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Distinct components per query: raw chunk search, widening retries and search_components.
+
+Each datasheet's chunks sit close together, as overlapping chunks do, and
+every query has many relevant datasheets. Compared are the distinct parts in
+a top-k chunk search, the queries and time needed to reach k distinct parts by
+doubling n_results, and one over-fetched search_components call. Uses the
+synthetic model and the NumPy backend.
+
+Usage:
+    python backend/benchmarks/bench_component_search.py --datasheets 1000 --chunks-per-datasheet 40
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from common import make_embedding_service
+
+import backend.src.services.embeddings as embeddings_module
+from backend.src.services.embeddings import EmbeddingModelRegistry
+from backend.src.services.vector_db import VectorDBService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--datasheets", type=int, default=1000)
+    parser.add_argument("--chunks-per-datasheet", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    embedding_service = make_embedding_service(True)
+    registry = EmbeddingModelRegistry()
+    registry._services[registry.default_model_name] = embedding_service
+    embeddings_module._embedding_registry = registry
+
+    rng = np.random.default_rng(0)
+    queries = [f"query {i}" for i in range(args.queries)]
+    query_vectors = embedding_service.generate_embeddings_array(queries)
+    dimension = query_vectors.shape[1]
+    # Datasheets cluster around the queries; chunks cluster tightly around their datasheet
+    centers = query_vectors[np.arange(args.datasheets) % args.queries] + \
+        0.5 * rng.standard_normal((args.datasheets, dimension), dtype=np.float32)
+    vectors = np.repeat(centers, args.chunks_per_datasheet, axis=0) + \
+        0.05 * rng.standard_normal((args.datasheets * args.chunks_per_datasheet, dimension), dtype=np.float32)
+    chunks = [f"PART{d} section {c}" for d in range(args.datasheets) for c in range(args.chunks_per_datasheet)]
+    metadata = [{"mpn": f"PART{d}", "file_hash": f"h{d}", "chunk_index": c}
+                for d in range(args.datasheets) for c in range(args.chunks_per_datasheet)]
+
+    directory = tempfile.mkdtemp()
+    try:
+        service = VectorDBService(persist_directory=directory, backend="numpy", result_cache_entries=0)
+        service.add_document_chunks(chunks, metadata, embeddings=vectors)
+
+        searches = []
+        search_similar = service.search_similar
+
+        def counted_search(*args, **kwargs):
+            searches.append(1)
+            return search_similar(*args, **kwargs)
+
+        service.search_similar = counted_search
+
+        def distinct(metadatas):
+            return len({metadata["mpn"] for metadata in metadatas})
+
+        def raw():
+            return [distinct(service.search_similar(query, args.k)[1]) for query in queries]
+
+        def widening():
+            found = []
+            for query in queries:
+                n_results = args.k
+                while True:
+                    parts = distinct(service.search_similar(query, n_results)[1])
+                    if parts >= args.k or n_results >= len(chunks):
+                        break
+                    n_results *= 2
+                found.append(parts)
+            return found
+
+        def grouped():
+            return [len(service.search_components(query, args.k)) for query in queries]
+
+        print(f"{len(chunks)} chunks in {args.datasheets} datasheets, {args.queries} queries, k={args.k}")
+        print(f"{'strategy':>18} {'distinct parts':>15} {'searches':>9} {'ms/query':>9}")
+        for name, run in (("top-k chunks", raw), ("widening retries", widening), ("search_components", grouped)):
+            run()
+            searches.clear()
+            start = time.perf_counter()
+            parts = run()
+            milliseconds = (time.perf_counter() - start) / len(queries) * 1000
+            print(f"{name:>18} {np.mean(parts):>15.1f} {len(searches) / len(queries):>9.1f} {milliseconds:>9.2f}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Constrained category search: filtering hits afterwards vs filtering inside the store.
+
+Each synthetic part gets a supply voltage range and supply current; the
+constraints are those of a 3.3 V, 10 mA budget. Post-filtering searches the
+category, drops infeasible hits and doubles the fetch until k remain (or the
+category is exhausted); push-down passes the constraints as a where filter.
+Uses the synthetic model.
+
+Usage:
+    python backend/benchmarks/bench_constraints.py --chunks 20000
+"""
+
+import argparse
+import shutil
+import tempfile
+
+import numpy as np
+
+from common import best_of, make_embedding_service
+
+import backend.src.services.embeddings as embeddings_module
+from backend.src.services.embeddings import EmbeddingModelRegistry
+from backend.src.services.vector_db import VectorDBService
+
+CONSTRAINTS = {"target_voltage": 3.3, "max_current_ma": 10}
+
+
+def feasible(metadata):
+    return (metadata["supply_voltage_min"] <= CONSTRAINTS["target_voltage"] <= metadata["supply_voltage_max"]
+            and metadata["supply_current_ma"] <= CONSTRAINTS["max_current_ma"])
+
+
+def post_filtered(service, query, k, counts):
+    n_hits = k
+    while True:
+        counts["searches"] += 1
+        documents, metadatas, _ = service.search_by_category(query, "sensor", n_hits)
+        counts["fetched"] += len(documents)
+        kept = [document for document, metadata in zip(documents, metadatas) if feasible(metadata)]
+        if len(kept) >= k or len(documents) < n_hits:
+            return kept[:k]
+        n_hits *= 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backend", default="numpy", choices=["chroma", "numpy"])
+    args = parser.parse_args()
+
+    embedding_service = make_embedding_service(True)
+    registry = EmbeddingModelRegistry()
+    registry._services[registry.default_model_name] = embedding_service
+    embeddings_module._embedding_registry = registry
+
+    rng = np.random.default_rng(0)
+    low = rng.choice([1.8, 2.7, 3.0, 4.5], size=args.chunks)
+    metadata = [
+        {
+            "category": "sensor",
+            "chunk_index": i,
+            "supply_voltage_min": float(low[i]),
+            "supply_voltage_max": float(low[i] + rng.choice([0.9, 2.0, 3.0])),
+            "supply_current_ma": float(np.round(rng.lognormal(1.5, 1.2), 3)),
+        }
+        for i in range(args.chunks)
+    ]
+    chunks = [f"datasheet chunk {i}" for i in range(args.chunks)]
+    vectors = embedding_service.generate_embeddings_array(chunks)
+    queries = [f"query {i}" for i in range(args.queries)]
+    share = np.mean([feasible(m) for m in metadata])
+
+    directory = tempfile.mkdtemp()
+    try:
+        service = VectorDBService(persist_directory=directory, backend=args.backend, result_cache_entries=0)
+        service.add_document_chunks(chunks, metadata, embeddings=vectors)
+
+        print(f"{args.chunks} chunks ({share:.0%} feasible), {args.queries} queries, k={args.k}, "
+              f"backend={args.backend}")
+        counts = {"searches": 0, "fetched": 0}
+        post = [post_filtered(service, query, args.k, counts) for query in queries]
+        pushed = [service.search_by_category(query, "sensor", args.k, constraints=CONSTRAINTS)[0]
+                  for query in queries]
+        overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(post, pushed)])
+
+        seconds = best_of(lambda: [post_filtered(service, query, args.k, {"searches": 0, "fetched": 0})
+                                   for query in queries], repeat=3)
+        print(f"post-filter: {seconds / len(queries) * 1000:.2f} ms/query, "
+              f"{counts['searches'] / len(queries):.1f} searches, "
+              f"{counts['fetched'] / len(queries):.0f} chunks fetched")
+        seconds = best_of(lambda: [service.search_by_category(query, "sensor", args.k, constraints=CONSTRAINTS)
+                                   for query in queries], repeat=3)
+        print(f"push-down:   {seconds / len(queries) * 1000:.2f} ms/query, 1.0 searches, "
+              f"{args.k} chunks fetched, {overlap:.0%} same results")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
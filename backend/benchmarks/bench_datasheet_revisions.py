@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Cost of replacing datasheet revisions in place vs rebuilding the collection.
+
+A NumPy-backed collection holds many datasheets of equal size. A share of them
+is replaced by new revisions, then the collection is compacted. Reported are
+the per-datasheet replace time, the full rebuild time, the stale chunks a
+top-10 query would return had the old revision been kept, and query time and
+disk use before and after compaction. Vectors are precomputed.
+
+Usage:
+    python backend/benchmarks/bench_datasheet_revisions.py --datasheets 500 --chunks-per-datasheet 100
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from common import best_of
+
+from backend.src.services.vector_db import VectorDBService
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def datasheet(index, revision, per_datasheet, rng, dimension):
+    chunks = [f"PART{index} rev {revision} section {i}" for i in range(per_datasheet)]
+    metadata = [{"mpn": f"PART{index}", "file_hash": f"h{index}r{revision}", "chunk_index": i}
+                for i in range(per_datasheet)]
+    return chunks, metadata, rng.standard_normal((per_datasheet, dimension), dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--datasheets", type=int, default=500)
+    parser.add_argument("--chunks-per-datasheet", type=int, default=100)
+    parser.add_argument("--revised", type=float, default=0.2, help="share of datasheets revised")
+    parser.add_argument("--dimension", type=int, default=384)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    sheets = [datasheet(i, 0, args.chunks_per_datasheet, rng, args.dimension) for i in range(args.datasheets)]
+    revised = rng.choice(args.datasheets, int(args.datasheets * args.revised), replace=False)
+    revisions = {i: datasheet(i, 1, args.chunks_per_datasheet, rng, args.dimension) for i in revised}
+    queries = rng.standard_normal((50, args.dimension), dtype=np.float32)
+
+    directory = tempfile.mkdtemp()
+    try:
+        service = VectorDBService(persist_directory=directory, backend="numpy", compaction_threshold=None)
+        for chunks, metadata, vectors in sheets:
+            service.add_document_chunks(chunks, metadata, embeddings=vectors)
+        service.has_component("PART0")
+        service.hybrid_search("PART0")
+        collection = service._get_collection()
+
+        start = time.perf_counter()
+        for i, (chunks, metadata, vectors) in revisions.items():
+            service.replace_datasheet(chunks, metadata, embeddings=vectors, mpn=f"PART{i}")
+        replace_ms = (time.perf_counter() - start) / len(revisions) * 1000
+
+        # Probing with old-revision vectors finds any old chunk still searchable
+        old_vectors = np.concatenate([sheets[i][2] for i in revised])
+        probes = old_vectors[rng.choice(len(old_vectors), 50, replace=False)]
+        hits = collection.query(query_embeddings=probes, n_results=10, include=["documents"])["documents"]
+        stale_prefixes = tuple(f"PART{i} rev 0 " for i in revised)
+        stale = sum(document.startswith(stale_prefixes) for row in hits for document in row)
+
+        def query():
+            collection.query(query_embeddings=queries, n_results=10, include=[])
+
+        dirty_ms = best_of(query, repeat=5) / len(queries) * 1000
+        dirty_mb = directory_size(directory) / 2**20
+        dead_rows = collection.get_stats()["dead_rows"]
+        start = time.perf_counter()
+        reclaimed = service.compact()
+        compact_seconds = time.perf_counter() - start
+        clean_ms = best_of(query, repeat=5) / len(queries) * 1000
+        clean_mb = directory_size(directory) / 2**20
+
+        start = time.perf_counter()
+        service.delete_collection()
+        for i, (chunks, metadata, vectors) in enumerate(sheets):
+            if i in revisions:
+                chunks, metadata, vectors = revisions[i]
+            service.add_document_chunks(chunks, metadata, embeddings=vectors)
+        rebuild_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+
+    total = args.datasheets * args.chunks_per_datasheet
+    print(f"{total} chunks in {args.datasheets} datasheets, {len(revisions)} revised, "
+          f"dimension={args.dimension}")
+    print(f"replace_datasheet: {replace_ms:.1f} ms per datasheet "
+          f"({replace_ms * len(revisions) / 1000:.2f} s total); full rebuild: {rebuild_seconds:.2f} s")
+    print(f"stale old-revision chunks in 50 top-10 probes after replace: {stale}")
+    print(f"dead rows {dead_rows}: query {dirty_ms:.2f} ms, {dirty_mb:.1f} MB on disk")
+    print(f"compact {compact_seconds:.2f} s {reclaimed}: query {clean_ms:.2f} ms, {clean_mb:.1f} MB on disk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Peak memory of a whole-corpus re-embed: list API vs embed_stream.
+
+The list path materializes every chunk and every vector at once. The stream
+path consumes chunks from a generator and only ever holds one batch.
+
+Usage:
+    python backend/benchmarks/bench_embed_stream.py --chunks 50000 --synthetic
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from common import make_embedding_service, synthetic_chunks
+
+
+def chunk_source(count, page_size=1000):
+    """Yield chunks page by page, as a paged collection read would."""
+    for start in range(0, count, page_size):
+        yield from synthetic_chunks(min(page_size, count - start), seed=start)
+
+
+def list_path(service, count, batch_size):
+    chunks = list(chunk_source(count))
+    return len(service.generate_embeddings_array(chunks))
+
+
+def stream_path(service, count, batch_size):
+    total = 0
+    for ids, embeddings in service.embed_stream(chunk_source(count), batch_size):
+        total += len(ids)
+    return total
+
+
+def measure(name, function, service, count, batch_size):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = function(service, count, batch_size)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<8} {rows:>8} rows {elapsed * 1000:>10.1f} ms {peak / 1024 / 1024:>10.1f} MiB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--synthetic", action="store_true", help="Use a synthetic model")
+    args = parser.parse_args()
+
+    service = make_embedding_service(args.synthetic, query_cache_bytes=0)
+    # Warm the model so loading is not counted
+    service.generate_embeddings_array(synthetic_chunks(8))
+
+    print(f"Re-embedding {args.chunks} chunks (synthetic={args.synthetic}, "
+          f"batch_size={args.batch_size})")
+    measure("list", list_path, service, args.chunks, args.batch_size)
+    measure("stream", stream_path, service, args.chunks, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark list-returning vs array-returning embedding APIs on a large ingest.
+
+The list path mirrors what ingestion used to do: generate_embeddings() builds
+Python float lists which Chroma then converts back to a float32 matrix.
+
+Usage:
+    python backend/benchmarks/bench_embedding_array.py --chunks 20000 --synthetic
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from common import best_of, make_embedding_service, synthetic_chunks
+
+
+def list_path(service, chunks):
+    embeddings = service.generate_embeddings(chunks)
+    # Chroma normalizes list embeddings into float32 arrays
+    return np.array(embeddings, dtype=np.float32)
+
+
+def array_path(service, chunks):
+    return list(service.generate_embeddings_array(chunks))
+
+
+def measure(name, function, service, chunks, repeat):
+    elapsed = best_of(lambda: function(service, chunks), repeat)
+
+    tracemalloc.start()
+    function(service, chunks)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<8} {elapsed * 1000:>10.1f} ms {len(chunks) / elapsed:>12.0f} chunks/s "
+          f"{peak / 1024 / 1024:>10.1f} MiB peak")
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--synthetic", action="store_true", help="Use a synthetic model")
+    args = parser.parse_args()
+
+    chunks = synthetic_chunks(args.chunks)
+    service = make_embedding_service(args.synthetic, query_cache_bytes=0)
+    # Warm the model so loading is not counted
+    service.generate_embeddings_array(chunks[:8])
+
+    print(f"Embedding {len(chunks)} chunks (synthetic={args.synthetic})")
+    print(f"{'path':<8} {'time':>13} {'throughput':>19} {'allocations':>15}")
+    start = time.perf_counter()
+    list_time, list_peak = measure("list", list_path, service, chunks, args.repeat)
+    array_time, array_peak = measure("array", array_path, service, chunks, args.repeat)
+
+    print()
+    print(f"Time saved:       {(list_time - array_time) * 1000:.1f} ms "
+          f"({(1 - array_time / list_time) * 100:.1f}%)")
+    print(f"Peak memory saved: {(list_peak - array_peak) / 1024 / 1024:.1f} MiB "
+          f"({(1 - array_peak / list_peak) * 100:.1f}%)")
+    print(f"Total benchmark time: {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Part-number query latency and hit rate: search_similar vs hybrid_search.
+
+Every 50th chunk mentions a unique part number; queries are those part
+numbers. Query caching is disabled so every vector search pays for
+embedding, which hybrid_search skips for part-number queries.
+
+Usage:
+    python backend/benchmarks/bench_hybrid_search.py --chunks 20000 --synthetic
+"""
+
+import argparse
+import shutil
+import tempfile
+
+from common import best_of, make_embedding_service, synthetic_chunks
+
+import backend.src.services.embeddings as embeddings_module
+from backend.src.services.embeddings import EmbeddingModelRegistry
+from backend.src.services.vector_db import VectorDBService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--backend", default="chroma", choices=["chroma", "numpy"])
+    parser.add_argument("--synthetic", action="store_true", help="Use a synthetic model")
+    args = parser.parse_args()
+
+    registry = EmbeddingModelRegistry()
+    registry._services[registry.default_model_name] = make_embedding_service(
+        args.synthetic, query_cache_bytes=0
+    )
+    embeddings_module._embedding_registry = registry
+
+    directory = tempfile.mkdtemp()
+    try:
+        service = VectorDBService(
+            persist_directory=directory, backend=args.backend, result_cache_entries=0
+        )
+        chunks = synthetic_chunks(args.chunks)
+        part_numbers = {}
+        for i in range(0, len(chunks), 50):
+            part_number = f"VF{i:06d}-Q1"
+            chunks[i] = f"{part_number} {chunks[i]}"
+            part_numbers[part_number] = chunks[i]
+        service.add_document_chunks(chunks, [{"chunk_index": i} for i in range(len(chunks))])
+        service.hybrid_search("warm up the lexical index")
+        queries = list(part_numbers)[:args.queries]
+
+        print(f"{len(chunks)} chunks, {len(queries)} part-number queries, backend={args.backend} "
+              f"(synthetic={args.synthetic})")
+        print(f"{'method':>14} {'ms/query':>9} {'hit@1':>6}")
+        for name, search in (("search_similar", service.search_similar),
+                             ("hybrid_search", service.hybrid_search)):
+            hits = sum(search(query, 1)[0][:1] == [part_numbers[query]] for query in queries)
+            seconds = best_of(lambda: [search(query, 10) for query in queries], repeat=3)
+            print(f"{name:>14} {seconds / len(queries) * 1000:>9.2f} {hits / len(queries):>6.2f}")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
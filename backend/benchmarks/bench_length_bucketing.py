@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark length-bucketed encoding against a single fixed-batch encode call.
+
+Point --datasheets at a directory of PDF datasheets to benchmark on a real
+corpus; otherwise chunks with the create_text_chunks length profile are used.
+Throughput numbers are only meaningful with the real model (no --synthetic).
+
+Usage:
+    python backend/benchmarks/bench_length_bucketing.py --datasheets ./data/datasheets
+"""
+
+import argparse
+
+import numpy as np
+
+from common import best_of, load_datasheet_chunks, make_embedding_service, synthetic_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--datasheets", help="Directory of PDF datasheets")
+    parser.add_argument("--chunks", type=int, default=2000, help="Maximum number of chunks")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--tokens-per-batch", type=int, default=8192)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--synthetic", action="store_true", help="Use a synthetic model")
+    args = parser.parse_args()
+
+    chunks = load_datasheet_chunks(args.datasheets, limit=args.chunks) or synthetic_chunks(args.chunks)
+    service = make_embedding_service(
+        args.synthetic,
+        query_cache_bytes=0,
+        batch_size=args.batch_size,
+        tokens_per_batch=args.tokens_per_batch,
+    )
+    model = service._get_model()
+    model.encode(chunks[:8], convert_to_numpy=True)
+
+    source = args.datasheets or "synthetic chunks"
+    print(f"Encoding {len(chunks)} chunks from {source} (synthetic model={args.synthetic})")
+
+    baseline = model.encode(chunks, batch_size=args.batch_size, convert_to_numpy=True)
+    bucketed = service.generate_embeddings_array(chunks)
+    max_error = float(np.abs(baseline - bucketed).max())
+
+    baseline_time = best_of(
+        lambda: model.encode(chunks, batch_size=args.batch_size, convert_to_numpy=True),
+        args.repeat,
+    )
+    bucketed_time = best_of(lambda: service.generate_embeddings_array(chunks), args.repeat)
+
+    print(f"fixed batch ({args.batch_size:>4}): {len(chunks) / baseline_time:>10.1f} chunks/s")
+    print(f"length-bucketed:     {len(chunks) / bucketed_time:>10.1f} chunks/s")
+    print(f"Throughput gain:     {baseline_time / bucketed_time:>10.2f}x")
+    print(f"Max abs difference:  {max_error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
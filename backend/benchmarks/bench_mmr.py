@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Redundancy and cost of MMR re-ranking (search_diverse) vs plain top-k search.
+
+Chunks of a datasheet are near-duplicates, as overlapping chunks are. For each
+lambda, reported are the distinct datasheets in the top-k, the mean pairwise
+cosine similarity of the results, the query time and the time of the MMR step
+alone. Uses the synthetic model and the NumPy backend.
+
+Usage:
+    python backend/benchmarks/bench_mmr.py --datasheets 1000 --chunks-per-datasheet 40
+"""
+
+import argparse
+import shutil
+import tempfile
+
+import numpy as np
+
+from common import best_of, make_embedding_service
+
+import backend.src.services.embeddings as embeddings_module
+from backend.src.services.diversification import maximal_marginal_relevance
+from backend.src.services.embeddings import EmbeddingModelRegistry
+from backend.src.services.vector_db import VectorDBService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--datasheets", type=int, default=1000)
+    parser.add_argument("--chunks-per-datasheet", type=int, default=40)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--fetch-k", type=int, default=100)
+    args = parser.parse_args()
+
+    embedding_service = make_embedding_service(True)
+    registry = EmbeddingModelRegistry()
+    registry._services[registry.default_model_name] = embedding_service
+    embeddings_module._embedding_registry = registry
+
+    rng = np.random.default_rng(0)
+    queries = [f"query {i}" for i in range(args.queries)]
+    query_vectors = embedding_service.generate_embeddings_array(queries)
+    dimension = query_vectors.shape[1]
+    centers = query_vectors[np.arange(args.datasheets) % args.queries] + \
+        0.5 * rng.standard_normal((args.datasheets, dimension), dtype=np.float32)
+    vectors = np.repeat(centers, args.chunks_per_datasheet, axis=0) + \
+        0.05 * rng.standard_normal((args.datasheets * args.chunks_per_datasheet, dimension), dtype=np.float32)
+    chunks = [f"PART{d} section {c}" for d in range(args.datasheets) for c in range(args.chunks_per_datasheet)]
+    metadata = [{"mpn": f"PART{d}", "chunk_index": c}
+                for d in range(args.datasheets) for c in range(args.chunks_per_datasheet)]
+    by_text = dict(zip(chunks, vectors))
+
+    directory = tempfile.mkdtemp()
+    try:
+        service = VectorDBService(persist_directory=directory, backend="numpy", result_cache_entries=0)
+        service.add_document_chunks(chunks, metadata, embeddings=vectors)
+
+        def redundancy(documents):
+            unit = np.array([by_text[document] for document in documents])
+            unit /= np.linalg.norm(unit, axis=1, keepdims=True)
+            similarity = unit @ unit.T
+            return similarity[np.triu_indices(len(documents), 1)].mean()
+
+        print(f"{len(chunks)} chunks in {args.datasheets} datasheets, {args.queries} queries, "
+              f"k={args.k}, fetch_k={args.fetch_k}")
+        print(f"{'ranking':>14} {'distinct parts':>15} {'mean cosine':>12} {'ms/query':>9}")
+        def diverse(lambda_mult):
+            return lambda query: service.search_diverse(query, args.k, lambda_mult=lambda_mult,
+                                                        fetch_k=args.fetch_k)
+
+        strategies = [("top-k", lambda query: service.search_similar(query, args.k))] + [
+            (f"mmr lambda={lambda_mult}", diverse(lambda_mult)) for lambda_mult in (0.9, 0.7, 0.5)
+        ]
+        for name, search in strategies:
+            results = [search(query) for query in queries]
+            parts = np.mean([len({m["mpn"] for m in metadatas}) for _, metadatas, _ in results])
+            cosine = np.mean([redundancy(documents) for documents, _, _ in results])
+            seconds = best_of(lambda: [search(query) for query in queries], repeat=3)
+            print(f"{name:>14} {parts:>15.1f} {cosine:>12.3f} {seconds / len(queries) * 1000:>9.2f}")
+
+        candidates = vectors[:args.fetch_k]
+        seconds = best_of(lambda: maximal_marginal_relevance(query_vectors[0], candidates, args.k), repeat=20)
+        print(f"MMR step alone ({args.fetch_k} candidates): {seconds * 1000:.3f} ms")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Per-category latency and recall@k: one filtered collection vs per-category partitions.
+
+Categories are skewed, as in a real datasheet library, so the sparse ones
+show how post-filtered ANN search loses results. Recall is measured against
+exact filtered search over the same vectors. Uses the synthetic model.
+
+Usage:
+    python backend/benchmarks/bench_partitions.py --chunks 20000
+"""
+
+import argparse
+import shutil
+import tempfile
+
+import numpy as np
+
+from common import best_of, make_embedding_service
+
+import backend.src.services.embeddings as embeddings_module
+from backend.src.services.embeddings import EmbeddingModelRegistry
+from backend.src.services.partitioned_vector_db import PartitionedVectorDBService
+from backend.src.services.vector_db import VectorDBService
+
+CATEGORY_SHARES = {
+    "microcontroller": 0.6,
+    "sensor": 0.25,
+    "power": 0.1,
+    "connector": 0.04,
+    "crystal": 0.01,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backend", default="chroma", choices=["chroma", "numpy"])
+    args = parser.parse_args()
+
+    embedding_service = make_embedding_service(True)
+    registry = EmbeddingModelRegistry()
+    registry._services[registry.default_model_name] = embedding_service
+    embeddings_module._embedding_registry = registry
+
+    rng = np.random.default_rng(0)
+    categories = rng.choice(list(CATEGORY_SHARES), size=args.chunks, p=list(CATEGORY_SHARES.values()))
+    chunks = [f"datasheet chunk {i}" for i in range(args.chunks)]
+    metadata = [{"category": str(category), "chunk_index": i} for i, category in enumerate(categories)]
+    vectors = embedding_service.generate_embeddings_array(chunks)
+    queries = [f"query {i}" for i in range(args.queries)]
+    query_vectors = embedding_service.generate_embeddings_array(queries)
+
+    # Exact filtered top-k per (category, query), by chunk text
+    truth = {}
+    for category in CATEGORY_SHARES:
+        rows = np.flatnonzero(categories == category)
+        for query, query_vector in zip(queries, query_vectors):
+            distances = ((vectors[rows] - query_vector) ** 2).sum(axis=1)
+            truth[category, query] = {chunks[row] for row in rows[np.argsort(distances)[:args.k]]}
+
+    directory = tempfile.mkdtemp()
+    try:
+        single = VectorDBService(persist_directory=f"{directory}/single", backend=args.backend,
+                                 result_cache_entries=0)
+        partitioned = PartitionedVectorDBService(persist_directory=f"{directory}/partitioned",
+                                                 backend=args.backend, result_cache_entries=0)
+        for service in (single, partitioned):
+            service.add_document_chunks(chunks, metadata, embeddings=vectors)
+
+        print(f"{args.chunks} chunks, {args.queries} queries, k={args.k}, backend={args.backend}")
+        print(f"{'category':>16} {'chunks':>6} {'single ms':>10} {'recall':>7} "
+              f"{'partition ms':>13} {'recall':>7}")
+        for category in CATEGORY_SHARES:
+            row = [f"{category:>16}", f"{int((categories == category).sum()):>6}"]
+            for service in (single, partitioned):
+                found = [service.search_by_category(query, category, args.k)[0] for query in queries]
+                recall = np.mean([len(set(documents) & truth[category, query]) / len(truth[category, query])
+                                  for query, documents in zip(queries, found)])
+                seconds = best_of(lambda: [service.search_by_category(query, category, args.k)
+                                           for query in queries], repeat=3)
+                row.append(f"{seconds / len(queries) * 1000:>{10 if service is single else 13}.2f}")
+                row.append(f"{recall:>7.3f}")
+            print(" ".join(row))
+
+        for name, service in (("single", single), ("partitioned", partitioned)):
+            seconds = best_of(lambda: [service.search_similar(query, args.k) for query in queries], repeat=3)
+            print(f"unfiltered {name}: {seconds / len(queries) * 1000:.2f} ms/query")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
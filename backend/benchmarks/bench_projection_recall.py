@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Recall-vs-dimension report for PCA-projected embeddings.
+
+Ground truth is exact search over the full model vectors. The projection is
+fitted on the corpus, as VectorDBService.fit_projection does, and queries are
+held out of the fit. Without --datasheets the corpus has a decaying spectrum
+similar to sentence embeddings; with it, real chunks are embedded.
+
+Usage:
+    python backend/benchmarks/bench_projection_recall.py --vectors 50000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from common import load_datasheet_chunks, make_embedding_service
+
+from backend.src.services.embedding_projection import PCAProjection
+
+
+def spectral_corpus(count, dimension, seed=0):
+    """Random vectors whose variance decays with a power law across directions."""
+    rng = np.random.default_rng(seed)
+    basis, _ = np.linalg.qr(rng.standard_normal((dimension, dimension)))
+    scales = (np.arange(1, dimension + 1) ** -0.8).astype(np.float32)
+    vectors = (rng.standard_normal((count, dimension)).astype(np.float32) * scales) @ basis.T
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def top_k(vectors, queries, k):
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    distances = norms[None, :] - 2.0 * (queries @ vectors.T)
+    return np.argpartition(distances, k, axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--datasheets", help="Directory of PDF datasheets to embed")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--components", type=int, nargs="+", default=[192, 128, 96, 64, 32])
+    args = parser.parse_args()
+
+    if args.datasheets:
+        chunks = load_datasheet_chunks(args.datasheets, limit=args.vectors + args.queries)
+        vectors = make_embedding_service(False, query_cache_bytes=0).generate_embeddings_array(chunks)
+    else:
+        vectors = spectral_corpus(args.vectors + args.queries, args.dimension)
+    corpus, queries = vectors[:-args.queries], vectors[-args.queries:]
+
+    start = time.perf_counter()
+    truth = top_k(corpus, queries, args.k)
+    full_seconds = time.perf_counter() - start
+
+    print(f"{len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} held-out queries, "
+          f"recall@{args.k}")
+    print(f"{'dims':>5} {'variance':>9} {'memory MiB':>11} {'recall':>7} {'search ms':>10}")
+    print(f"{corpus.shape[1]:>5} {1.0:>9.3f} {corpus.nbytes / 2**20:>11.1f} {1.0:>7.3f} "
+          f"{full_seconds * 1000:>10.1f}")
+
+    for n_components in args.components:
+        if n_components >= corpus.shape[1]:
+            continue
+        projection = PCAProjection.fit(corpus, n_components)
+        projected_corpus = projection.transform(corpus)
+        projected_queries = projection.transform(queries)
+
+        start = time.perf_counter()
+        found = top_k(projected_corpus, projected_queries, args.k)
+        seconds = time.perf_counter() - start
+
+        hits = sum(len(set(row) & set(expected)) for row, expected in zip(found, truth))
+        print(f"{n_components:>5} {projection.explained_variance_ratio:>9.3f} "
+              f"{projected_corpus.nbytes / 2**20:>11.1f} "
+              f"{hits / (args.k * len(queries)):>7.3f} {seconds * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
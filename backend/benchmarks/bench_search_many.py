@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Shortlist latency vs number of roles: sequential search_similar vs search_many.
+
+Each role is a query with a category filter, as produced by a parsed prompt.
+Query caching is disabled so every run pays for embedding.
+
+Usage:
+    python backend/benchmarks/bench_search_many.py --chunks 20000 --synthetic
+"""
+
+import argparse
+import shutil
+import tempfile
+
+from common import best_of, make_embedding_service, synthetic_chunks
+
+import backend.src.services.embeddings as embeddings_module
+from backend.src.services.embeddings import EmbeddingModelRegistry
+from backend.src.services.vector_db import VectorDBService
+
+CATEGORIES = ["microcontroller", "sensor", "regulator", "connector"]
+ROLE_QUERIES = [
+    ("low power microcontroller with i2c and spi", "microcontroller"),
+    ("temperature sensor i2c output", "sensor"),
+    ("low dropout regulator thermal shutdown", "regulator"),
+    ("usb connector", "connector"),
+    ("adc resolution accuracy", "sensor"),
+    ("buck regulator efficiency", "regulator"),
+    ("uart gpio interrupt wake", "microcontroller"),
+    ("pin configuration package", "connector"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--precision", default="float32", choices=["float32", "float16", "int8"])
+    parser.add_argument("--synthetic", action="store_true", help="Use a synthetic model")
+    args = parser.parse_args()
+
+    registry = EmbeddingModelRegistry()
+    registry._services[registry.default_model_name] = make_embedding_service(
+        args.synthetic, query_cache_bytes=0
+    )
+    embeddings_module._embedding_registry = registry
+
+    directory = tempfile.mkdtemp()
+    try:
+        service = VectorDBService(persist_directory=directory, vector_precision=args.precision)
+        chunks = synthetic_chunks(args.chunks)
+        metadata = [
+            {"category": CATEGORIES[i % len(CATEGORIES)], "chunk_index": i}
+            for i in range(len(chunks))
+        ]
+        service.add_document_chunks(chunks, metadata)
+
+        print(f"{len(chunks)} chunks, precision={args.precision} (synthetic={args.synthetic})")
+        print(f"{'roles':>5} {'sequential ms':>14} {'search_many ms':>15} {'speedup':>8}")
+        for roles in range(1, len(ROLE_QUERIES) + 1):
+            queries = [(text, {"category": category}, 10) for text, category in ROLE_QUERIES[:roles]]
+            sequential = best_of(lambda: [service.search_similar(*query[:1], query[2], query[1])
+                                          for query in queries], repeat=5)
+            batched = best_of(lambda: service.search_many(queries), repeat=5)
+            print(f"{roles:>5} {sequential * 1000:>14.1f} {batched * 1000:>15.1f} "
+                  f"{sequential / batched:>7.2f}x")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+"No candidate found" detection: L2 distances vs cosine with a calibrated threshold.
+
+Chunks are noisy copies of topic directions with varying vector lengths, as
+unnormalized model output has. Answerable queries lie near a stored topic,
+unanswerable ones near a topic that is not stored; their vectors are planted
+in the query cache. Reports how well each query's best distance separates the
+two kinds (AUC), and what a threshold calibrated on held-out answerable
+queries keeps, rejects and costs per component search.
+
+Usage:
+    python backend/benchmarks/bench_similarity_threshold.py --chunks 20000
+"""
+
+import argparse
+import shutil
+import tempfile
+
+import numpy as np
+
+from common import best_of, make_embedding_service
+
+import backend.src.services.embeddings as embeddings_module
+from backend.src.services.embeddings import EmbeddingModelRegistry
+from backend.src.services.vector_db import VectorDBService
+
+
+def auc(positives, negatives):
+    """Probability that an answerable query's best distance beats an unanswerable one's."""
+    positives, negatives = np.asarray(positives)[:, None], np.asarray(negatives)[None, :]
+    return float(np.mean(positives < negatives) + 0.5 * np.mean(positives == negatives))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--backend", default="numpy", choices=["chroma", "numpy"])
+    args = parser.parse_args()
+
+    embedding_service = make_embedding_service(True)
+    registry = EmbeddingModelRegistry()
+    registry._services[registry.default_model_name] = embedding_service
+    embeddings_module._embedding_registry = registry
+    dimension = embedding_service.get_embedding_dimension()
+
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((2 * args.topics, dimension)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    stored_topics = rng.integers(args.topics, size=args.chunks)
+    lengths = rng.lognormal(0.0, 0.4, size=(args.chunks, 1)).astype(np.float32)
+    noise = 0.9 * rng.standard_normal((args.chunks, dimension)) / np.sqrt(dimension)
+    vectors = lengths * (centers[stored_topics] + noise)
+    chunks = [f"datasheet chunk {i}" for i in range(args.chunks)]
+    metadata = [{"mpn": f"PART-{topic}", "chunk_index": i} for i, topic in enumerate(stored_topics)]
+
+    def plant(name, topics):
+        texts = [f"{name} query {i}" for i in range(len(topics))]
+        noise = 1.1 * rng.standard_normal((len(topics), dimension)) / np.sqrt(dimension)
+        query_lengths = rng.lognormal(0.0, 0.4, size=(len(topics), 1))
+        for text, vector in zip(texts, query_lengths * (centers[topics] + noise)):
+            embedding_service.query_cache.put(text, np.asarray(vector, dtype=np.float32))
+        return texts
+
+    calibration = plant("calibration", rng.integers(args.topics, size=args.queries))
+    answerable = plant("answerable", rng.integers(args.topics, size=args.queries))
+    unanswerable = plant("unanswerable", rng.integers(args.topics, 2 * args.topics, size=args.queries))
+
+    directory = tempfile.mkdtemp()
+    try:
+        print(f"{args.chunks} chunks, {args.queries} answerable and {args.queries} unanswerable queries, "
+              f"k={args.k}, backend={args.backend}")
+        for metric in ("l2", "cosine"):
+            service = VectorDBService(persist_directory=f"{directory}/{metric}", backend=args.backend,
+                                      metric=metric, result_cache_entries=0)
+            service.add_document_chunks(chunks, metadata, embeddings=vectors)
+
+            def best(texts):
+                return [distances[0] for _, _, distances in service.search_many([(t, None, 1) for t in texts])]
+
+            line = f"{metric:>6}: AUC {auc(best(answerable), best(unanswerable)):.3f}"
+            if metric == "cosine":
+                threshold = service.calibrate_similarity_threshold(calibration, args.target_recall)
+                line += f", threshold {threshold:.3f}"
+            kept = np.mean([len(service.search_similar(text, args.k)[0]) > 0 for text in answerable])
+            shipped = np.mean([len(service.search_similar(text, args.k)[0]) for text in unanswerable])
+            seconds = best_of(lambda: [service.search_components(text, args.k) for text in unanswerable], repeat=3)
+            print(f"{line}, answerable kept {kept:.1%}, chunks returned per unanswerable query {shipped:.1f}, "
+                  f"component search on unanswerable {seconds / len(unanswerable) * 1000:.2f} ms")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Replica cold start from a snapshot vs rebuilding the collection from chunks.
+
+A source collection is filled with precomputed vectors and exported. Each
+backend then cold-starts a replica by importing the snapshot, and by
+re-adding the chunks with their vectors (the cheapest possible rebuild, as
+it skips embedding). Times include the first query.
+
+Usage:
+    python backend/benchmarks/bench_snapshot.py --sizes 10000 50000
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import common  # noqa: F401  (puts the repository root on the path)
+
+from backend.src.services.vector_db import VectorDBService
+
+CATEGORIES = ["microcontroller", "sensor", "regulator", "connector"]
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def cold_start(directory, backend, load, query):
+    """Seconds to build a replica with load() and answer one query."""
+    start = time.perf_counter()
+    service = VectorDBService(persist_directory=directory, backend=backend)
+    load(service)
+    service._get_collection().query(query_embeddings=[query], n_results=10, include=[])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--dimension", type=int, default=384)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"dimension={args.dimension}")
+    print(f"{'chunks':>7} {'backend':>7} {'export s':>9} {'snap MB':>8} {'store MB':>9} "
+          f"{'import s':>9} {'rebuild s':>10}")
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, args.dimension), dtype=np.float32)
+        chunks = [f"chunk {i} of a datasheet section with some text" for i in range(size)]
+        metadata = [{"category": CATEGORIES[i % len(CATEGORIES)], "chunk_index": i,
+                     "mpn": f"PART{i // 40}", "manufacturer": "Acme"} for i in range(size)]
+
+        for backend in ("numpy", "chroma"):
+            root = tempfile.mkdtemp()
+            try:
+                source = VectorDBService(persist_directory=os.path.join(root, "source"), backend=backend)
+                source.add_document_chunks(chunks, metadata, embeddings=vectors)
+                snapshot_path = os.path.join(root, "collection.snap")
+                start = time.perf_counter()
+                source.export_snapshot(snapshot_path)
+                export_seconds = time.perf_counter() - start
+
+                import_seconds = cold_start(os.path.join(root, "imported"), backend,
+                                            lambda service: service.import_snapshot(snapshot_path), vectors[0])
+                rebuild_seconds = cold_start(
+                    os.path.join(root, "rebuilt"), backend,
+                    lambda service: service.add_document_chunks(chunks, metadata, embeddings=vectors),
+                    vectors[0]
+                )
+                print(f"{size:>7} {backend:>7} {export_seconds:>9.2f} "
+                      f"{os.path.getsize(snapshot_path) / 2**20:>8.1f} "
+                      f"{directory_size(os.path.join(root, 'source')) / 2**20:>9.1f} "
+                      f"{import_seconds:>9.2f} {rebuild_seconds:>10.2f}")
+            finally:
+                shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Write and query cost of the Chroma and NumPy vector backends vs corpus size.
+
+Vectors are precomputed so only the backends are measured. Queries are timed
+unfiltered and with a category filter; recall@10 is measured against the
+NumPy backend's exact results.
+
+Usage:
+    python backend/benchmarks/bench_vector_backends.py --sizes 1000 10000 50000
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from common import best_of
+
+from backend.src.services.vector_db import VectorDBService
+
+CATEGORIES = ["microcontroller", "sensor", "regulator", "connector"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"dimension={args.dimension}, {args.queries} queries, k=10")
+    print(f"{'chunks':>7} {'backend':>7} {'write s':>8} {'query ms':>9} "
+          f"{'filtered ms':>12} {'recall@10':>10}")
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, args.dimension), dtype=np.float32)
+        queries = vectors[rng.choice(size, args.queries, replace=False)] + \
+            0.1 * rng.standard_normal((args.queries, args.dimension), dtype=np.float32)
+        chunks = [f"chunk {i}" for i in range(size)]
+        metadata = [{"category": CATEGORIES[i % len(CATEGORIES)], "chunk_index": i} for i in range(size)]
+
+        exact = None
+        for backend in ("numpy", "chroma"):
+            directory = tempfile.mkdtemp()
+            try:
+                service = VectorDBService(persist_directory=directory, backend=backend)
+                start = time.perf_counter()
+                service.add_document_chunks(chunks, metadata, embeddings=vectors)
+                write_seconds = time.perf_counter() - start
+                collection = service._get_collection()
+
+                def query(where=None):
+                    return [collection.query(query_embeddings=[q], n_results=10, where=where,
+                                             include=[])["ids"][0] for q in queries]
+
+                results = query()
+                unfiltered = best_of(query, repeat=3) / args.queries
+                filtered = best_of(lambda: query({"category": "sensor"}), repeat=3) / args.queries
+                if exact is None:
+                    exact = results
+                recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(results, exact)])
+                print(f"{size:>7} {backend:>7} {write_seconds:>8.2f} {unfiltered * 1000:>9.2f} "
+                      f"{filtered * 1000:>12.2f} {recall:>10.3f}")
+            finally:
+                shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
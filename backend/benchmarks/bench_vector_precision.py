@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Recall-vs-memory report for reduced-precision vector storage.
+
+Ground truth is exact float32 search. Each precision is measured with several
+rescoring depths (candidate_multiplier) so a deployment can pick a trade-off.
+Without --datasheets the corpus is clustered random vectors shaped like
+sentence embeddings; with it, real chunks are embedded with the model.
+
+Usage:
+    python backend/benchmarks/bench_vector_precision.py --vectors 100000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from common import load_datasheet_chunks, make_embedding_service
+
+from backend.src.services.vector_quantization import QuantizedVectorIndex
+
+
+def clustered_corpus(count, dimension, clusters=200, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    assignment = rng.integers(clusters, size=count)
+    vectors = centers[assignment] + 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def exact_top_k(vectors, queries, k):
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    results = []
+    for query in queries:
+        distances = norms - 2.0 * (vectors @ query)
+        top = np.argpartition(distances, k)[:k]
+        results.append(set(top.tolist()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--datasheets", help="Directory of PDF datasheets to embed")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.datasheets:
+        chunks = load_datasheet_chunks(args.datasheets, limit=args.vectors)
+        vectors = make_embedding_service(False, query_cache_bytes=0).generate_embeddings_array(chunks)
+    else:
+        vectors = clustered_corpus(args.vectors, args.dimension)
+
+    rng = np.random.default_rng(1)
+    query_rows = rng.integers(len(vectors), size=args.queries)
+    queries = vectors[query_rows] + 0.05 * rng.standard_normal(
+        (args.queries, vectors.shape[1])
+    ).astype(np.float32)
+    truth = exact_top_k(vectors, queries, args.k)
+    ids = [str(i) for i in range(len(vectors))]
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {args.queries} queries, recall@{args.k}")
+    print(f"{'precision':<10} {'rescore':>8} {'memory MiB':>11} {'vs f32':>7} {'recall':>7} {'ms/query':>9}")
+    print(f"{'float32':<10} {'-':>8} {vectors.nbytes / 2**20:>11.1f} {1.0:>7.2f} {1.0:>7.3f} {'-':>9}")
+
+    for precision in ("float16", "int8"):
+        index = QuantizedVectorIndex(precision)
+        index.add(ids, vectors)
+        stats = index.get_stats()
+        for multiplier in (1, 2, 4, 8):
+            start = time.perf_counter()
+            hits = 0
+            for query, expected in zip(queries, truth):
+                result_ids, _ = index.search(query, args.k, candidate_multiplier=multiplier)
+                hits += len({int(doc_id) for doc_id in result_ids} & expected)
+            elapsed = (time.perf_counter() - start) / len(queries)
+            print(f"{precision:<10} {multiplier:>7}x {stats['vector_bytes'] / 2**20:>11.1f} "
+                  f"{stats['vector_bytes'] / stats['float32_bytes']:>7.2f} "
+                  f"{hits / (args.k * len(queries)):>7.3f} {elapsed * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
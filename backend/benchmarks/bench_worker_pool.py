@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark EmbeddingWorkerPool scaling with the number of worker processes.
+
+Each configuration keeps workers x threads_per_worker equal to the core count,
+so the numbers show how throughput scales without oversubscription.
+
+Usage:
+    python backend/benchmarks/bench_worker_pool.py --chunks 20000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+from common import load_datasheet_chunks, synthetic_chunks
+
+from backend.src.services.embedding_pool import EmbeddingWorkerPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--datasheets", help="Directory of PDF datasheets")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shard-size", type=int, default=256)
+    args = parser.parse_args()
+
+    chunks = load_datasheet_chunks(args.datasheets, limit=args.chunks) or synthetic_chunks(args.chunks)
+    cores = os.cpu_count() or 1
+    print(f"Embedding {len(chunks)} chunks on {cores} cores")
+    print(f"{'workers':>8} {'threads':>8} {'chunks/s':>10} {'speedup':>8}")
+
+    baseline = None
+    for workers in args.workers:
+        threads = max(1, cores // workers)
+        with EmbeddingWorkerPool(
+            num_workers=workers, threads_per_worker=threads, shard_size=args.shard_size
+        ) as pool:
+            # Load the model in every worker before timing
+            pool.generate_embeddings_array(chunks[:workers * args.shard_size])
+            start = time.perf_counter()
+            pool.generate_embeddings_array(chunks)
+            throughput = len(chunks) / (time.perf_counter() - start)
+
+        baseline = baseline or throughput
+        print(f"{workers:>8} {threads:>8} {throughput:>10.1f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Shared helpers for the VoltForge benchmark scripts.
+
+Benchmarks run against the real sentence-transformers model by default. Pass
+--synthetic to replace the model with a deterministic stand-in, which isolates
+the cost of the code around the model (conversion, batching, storage).
+"""
+
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+
+# Add the repository root to the path
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from backend.src.services.embeddings import EmbeddingService  # noqa: E402
+
+
+class SyntheticModel:
+    """Deterministic stand-in for SentenceTransformer.encode."""
+
+    def __init__(self, dimension: int = 384, max_seq_length: int = 256):
+        self.dimension = dimension
+        self.max_seq_length = max_seq_length
+        self.encode_calls = 0
+
+    def encode(self, texts: List[str], convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        self.encode_calls += 1
+        embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+            embeddings[row] = rng.standard_normal(self.dimension, dtype=np.float32)
+        return embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+
+def make_embedding_service(synthetic: bool, **kwargs) -> EmbeddingService:
+    """Create an embedding service, optionally backed by the synthetic model."""
+    service = EmbeddingService(**kwargs)
+    if synthetic:
+        service._model = SyntheticModel()
+    return service
+
+
+_VOCABULARY = (
+    "supply voltage current consumption operating temperature range package pin "
+    "configuration register address timing diagram typical application output "
+    "input low power mode sleep wake interrupt clock frequency accuracy resolution "
+    "i2c spi uart gpio adc dac pwm regulator dropout thermal shutdown protection"
+).split()
+
+
+def synthetic_chunks(count: int, seed: int = 0, min_chars: int = 1000, max_chars: int = 2000) -> List[str]:
+    """Generate datasheet-like chunks with the length profile of create_text_chunks."""
+    rng = np.random.default_rng(seed)
+    chunks = []
+    for index in range(count):
+        target = int(rng.integers(min_chars, max_chars + 1))
+        # Roughly one in eight chunks is a short document tail
+        if index % 8 == 7:
+            target = int(rng.integers(50, min_chars))
+        words: List[str] = []
+        length = 0
+        while length < target:
+            word = _VOCABULARY[int(rng.integers(len(_VOCABULARY)))]
+            words.append(word)
+            length += len(word) + 1
+        chunks.append(" ".join(words)[:target])
+    return chunks
+
+
+def load_datasheet_chunks(directory: Optional[str], limit: Optional[int] = None) -> List[str]:
+    """Extract and chunk every PDF in a directory with the ingestion pipeline."""
+    if directory is None:
+        return []
+
+    from backend.src.services.datasheet_ingestion import DatasheetIngestionService
+
+    ingestion = DatasheetIngestionService()
+    chunks: List[str] = []
+    for pdf_path in sorted(Path(directory).glob("*.pdf")):
+        text = ingestion.clean_text(ingestion.extract_text_from_pdf(str(pdf_path)))
+        chunks.extend(chunk for chunk, _ in ingestion.create_text_chunks(text, {}))
+        if limit is not None and len(chunks) >= limit:
+            return chunks[:limit]
+    return chunks
+
+
+def best_of(function: Callable[[], object], repeat: int = 3) -> float:
+    """Return the best wall-clock time of calling function() repeat times."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
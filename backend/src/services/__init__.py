@@ -1,15 +1,47 @@
 """Services package for VoltForge business logic."""
 
-from .embeddings import EmbeddingService, get_embedding_service
+from .embeddings import (
+    EmbeddingModelRegistry,
+    EmbeddingService,
+    get_embedding_registry,
+    get_embedding_service,
+)
+from .embedding_cache import EmbeddingCache, EmbeddingLRUCache
+from .embedding_batcher import EmbeddingBatcher, get_embedding_batcher
+from .embedding_pool import EmbeddingWorkerPool
+from .embedding_projection import PCAProjection
+from .vector_quantization import QuantizedVectorIndex
+from .numpy_vector_store import NumpyVectorStore
+from .search_cache import SearchResultCache
+from .lexical_index import BM25Index
+from .component_index import ComponentIndex
 from .vector_db import VectorDBService, get_vector_db_service
+from .partitioned_vector_db import PartitionedVectorDBService
+from .async_vector_db import AsyncVectorDBService, get_async_vector_db_service
 from .datasheet_ingestion import DatasheetIngestionService, get_datasheet_ingestion_service
 from .planner import PlannerService
 
 __all__ = [
     "EmbeddingService",
     "get_embedding_service",
+    "EmbeddingModelRegistry",
+    "get_embedding_registry",
+    "EmbeddingCache",
+    "EmbeddingLRUCache",
+    "EmbeddingBatcher",
+    "get_embedding_batcher",
+    "EmbeddingWorkerPool",
+    "PCAProjection",
+    "QuantizedVectorIndex",
+    "NumpyVectorStore",
+    "SearchResultCache",
+    "BM25Index",
+    "ComponentIndex",
     "VectorDBService", 
     "get_vector_db_service",
+    "PartitionedVectorDBService",
+    "AsyncVectorDBService",
+    "get_async_vector_db_service",
     "DatasheetIngestionService",
     "get_datasheet_ingestion_service",
     "PlannerService",
@@ -0,0 +1,299 @@
+"""
+Non-blocking async facade over VectorDBService.
+
+Vector searches and writes block on the embedding model and the vector store,
+so calling them from an async handler stalls the event loop. The facade runs
+them on dedicated, size-limited thread pools: searches share a small pool,
+writes run on their own thread so long ingestions cannot starve searches,
+and admission is bounded so bursts wait (or are rejected) instead of piling
+up unbounded work.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .vector_db import VectorDBService, get_vector_db_service
+
+logger = logging.getLogger(__name__)
+
+
+class VectorDBOverloadedError(RuntimeError):
+    """Raised when a call cannot be admitted to a saturated pool in time."""
+
+
+class _BoundedPool:
+    """Thread pool with bounded admission and utilization counters."""
+
+    def __init__(self, name: str, max_workers: int, max_queued: int, admission_timeout: Optional[float]):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if max_queued < 0:
+            raise ValueError("max_queued cannot be negative")
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.admission_timeout = admission_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"vector-db-{name}")
+        # Admits running + queued calls; further callers wait on the event loop.
+        # A semaphore belongs to one loop, so each loop gets its own admission limit.
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.active = 0
+        self.queued = 0
+        self.waiting = 0
+        self.max_in_flight = 0
+        self.total_queue_seconds = 0.0
+        self.total_run_seconds = 0.0
+        self.total_admission_seconds = 0.0
+
+    def _get_slots(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        with self._lock:
+            slots = self._slots.get(loop)
+            if slots is None:
+                slots = self._slots[loop] = asyncio.Semaphore(self.max_workers + self.max_queued)
+            return slots
+
+    def _call(self, submitted_at: float, func: Callable[..., Any], args: Tuple, kwargs: Dict[str, Any]) -> Any:
+        """Run one call on a worker thread, timing its queue wait and run time."""
+        started_at = time.perf_counter()
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self.total_queue_seconds += started_at - submitted_at
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.total_run_seconds += time.perf_counter() - started_at
+
+    def _finish(self, future: Future, loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore) -> None:
+        """Count a finished call and free its slot; runs on the thread that finished it."""
+        with self._lock:
+            if future.cancelled():
+                # Cancelled before a worker picked it up, so _call never ran
+                self.queued -= 1
+            elif future.exception() is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        try:
+            loop.call_soon_threadsafe(slots.release)
+        except RuntimeError:
+            # The loop has been closed, and its slots with it
+            pass
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        slots = self._get_slots(loop)
+        admission_start = time.perf_counter()
+        self.waiting += 1
+        try:
+            if self.admission_timeout is None:
+                await slots.acquire()
+            else:
+                await asyncio.wait_for(slots.acquire(), self.admission_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise VectorDBOverloadedError(
+                f"Vector DB {self.name} pool is saturated "
+                f"({self.max_workers} running, {self.max_queued} queued)"
+            ) from None
+        finally:
+            self.waiting -= 1
+            self.total_admission_seconds += time.perf_counter() - admission_start
+
+        with self._lock:
+            self.submitted += 1
+            self.queued += 1
+            self.max_in_flight = max(self.max_in_flight, self.active + self.queued)
+        try:
+            future = self._executor.submit(self._call, time.perf_counter(), func, args, kwargs)
+        except Exception:
+            with self._lock:
+                self.queued -= 1
+                self.failed += 1
+            slots.release()
+            raise
+        # The slot is freed when the call finishes, not when the caller stops
+        # waiting: a cancelled caller's call may still be holding a thread
+        future.add_done_callback(lambda done: self._finish(done, loop, slots))
+        try:
+            return await asyncio.wrap_future(future, loop=loop)
+        except asyncio.CancelledError:
+            with self._lock:
+                self.cancelled += 1
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "max_workers": self.max_workers,
+            "max_queued": self.max_queued,
+            "active": self.active,
+            "queued": self.queued,
+            "waiting": self.waiting,
+            "utilization": self.active / self.max_workers,
+            "max_in_flight": self.max_in_flight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "mean_queue_ms": self.total_queue_seconds / self.submitted * 1000 if self.submitted else 0.0,
+            "mean_run_ms": self.total_run_seconds / finished * 1000 if finished else 0.0,
+            "total_admission_seconds": self.total_admission_seconds,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class AsyncVectorDBService:
+    """Awaitable versions of VectorDBService calls, run on bounded thread pools."""
+
+    def __init__(
+        self,
+        service: VectorDBService,
+        search_workers: int = 4,
+        max_queued_searches: int = 64,
+        max_queued_writes: int = 8,
+        admission_timeout: Optional[float] = None
+    ):
+        """
+        Initialize the facade.
+
+        Args:
+            service: Service whose blocking calls are wrapped
+            search_workers: Threads running searches concurrently
+            max_queued_searches: Searches that may wait for a thread before
+                further callers are held back on the event loop
+            max_queued_writes: Writes that may wait for the write thread
+            admission_timeout: Seconds a held-back caller waits before
+                VectorDBOverloadedError is raised (None waits indefinitely)
+        """
+        self.service = service
+        self._search_pool = _BoundedPool("search", search_workers, max_queued_searches, admission_timeout)
+        # One writer applies writes in submission order; searches run alongside it on their own threads
+        self._write_pool = _BoundedPool("write", 1, max_queued_writes, admission_timeout)
+
+    async def asearch_similar(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[float]]:
+        """Awaitable VectorDBService.search_similar."""
+        return await self._search_pool.run(self.service.search_similar, query, n_results, where)
+
+    async def asearch_by_category(
+        self,
+        query: str,
+        category: str,
+        n_results: int = 5,
+        constraints: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[float]]:
+        """Awaitable VectorDBService.search_by_category."""
+        return await self._search_pool.run(
+            self.service.search_by_category, query, category, n_results, constraints
+        )
+
+    async def asearch_many(
+        self,
+        queries: List[Tuple[str, Optional[Dict[str, Any]], int]]
+    ) -> List[Tuple[List[str], List[Dict[str, Any]], List[float]]]:
+        """Awaitable VectorDBService.search_many."""
+        return await self._search_pool.run(self.service.search_many, queries)
+
+    async def asearch_diverse(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[float]]:
+        """Awaitable VectorDBService.search_diverse."""
+        return await self._search_pool.run(self.service.search_diverse, query, n_results, where, **kwargs)
+
+    async def asearch_components(
+        self,
+        query: str,
+        k: int = 10,
+        category: Optional[str] = None,
+        **kwargs: Any
+    ) -> List[Dict[str, Any]]:
+        """Awaitable VectorDBService.search_components."""
+        return await self._search_pool.run(self.service.search_components, query, k, category, **kwargs)
+
+    async def ahybrid_search(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[float]]:
+        """Awaitable VectorDBService.hybrid_search."""
+        return await self._search_pool.run(self.service.hybrid_search, query, n_results, where)
+
+    async def aadd_document_chunks(
+        self,
+        chunks: List[str],
+        metadata_list: List[Dict[str, Any]],
+        **kwargs: Any
+    ) -> List[str]:
+        """Awaitable VectorDBService.add_document_chunks, run on the write thread."""
+        return await self._write_pool.run(self.service.add_document_chunks, chunks, metadata_list, **kwargs)
+
+    async def adelete_by(
+        self,
+        file_hash: Optional[str] = None,
+        mpn: Optional[str] = None,
+        source_path: Optional[str] = None
+    ) -> int:
+        """Awaitable VectorDBService.delete_by, run on the write thread."""
+        return await self._write_pool.run(self.service.delete_by, file_hash, mpn, source_path)
+
+    async def areplace_datasheet(
+        self,
+        chunks: List[str],
+        metadata_list: List[Dict[str, Any]],
+        **kwargs: Any
+    ) -> List[str]:
+        """Awaitable VectorDBService.replace_datasheet, run on the write thread."""
+        return await self._write_pool.run(self.service.replace_datasheet, chunks, metadata_list, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get utilization, queueing and latency counters for both pools."""
+        return {
+            "search": self._search_pool.get_stats(),
+            "write": self._write_pool.get_stats(),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        self._search_pool.shutdown()
+        self._write_pool.shutdown()
+
+
+# Global async vector database facade
+_async_vector_db_service: Optional[AsyncVectorDBService] = None
+
+
+def get_async_vector_db_service() -> AsyncVectorDBService:
+    """Get the global async facade over the global vector database service."""
+    global _async_vector_db_service
+    if _async_vector_db_service is None:
+        _async_vector_db_service = AsyncVectorDBService(get_vector_db_service())
+    return _async_vector_db_service
@@ -0,0 +1,345 @@
+"""
+Persistent secondary index from component identity to stored chunks.
+
+Maps MPN -> chunk IDs, manufacturer -> MPNs and datasheet file hash -> chunk
+IDs, so exact lookups, datasheet listings and deletes do not need a vector
+query. Like the lexical index, it is persisted as an append-only JSON-lines
+log that is replayed on load. group_by_component and top_components collapse
+chunk search hits into ranked components.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Placeholder recorded by ingestion when a field is not known
+_UNKNOWN = "unknown"
+
+# Ways of scoring a component from the distances of its chunk hits
+AGGREGATIONS = ("max", "mean", "top_n")
+
+
+def _normalize(value: Any) -> Optional[str]:
+    """Lookup key for an MPN or manufacturer name (case- and padding-insensitive)."""
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    if not value or value.lower() == _UNKNOWN:
+        return None
+    return value.casefold()
+
+
+class ComponentIndex:
+    """MPN, manufacturer and datasheet lookups over chunk metadata."""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the index, replaying its log if one exists.
+
+        Args:
+            path: Optional JSON-lines log that persists every write
+        """
+        self.path = path
+        self._lock = threading.Lock()
+
+        self._chunks: Dict[str, Dict[str, Optional[str]]] = {}
+        self._by_mpn: Dict[str, Set[str]] = {}
+        self._by_file_hash: Dict[str, Set[str]] = {}
+        # Chunk counts per (manufacturer, MPN), so an MPN is listed while any chunk remains
+        self._mpns_by_manufacturer: Dict[str, Dict[str, int]] = {}
+        # Display spelling of each normalized MPN
+        self._mpn_names: Dict[str, str] = {}
+        # Records in the log, including ones superseded by later records
+        self._log_records = 0
+
+        if path is not None and os.path.exists(path):
+            self._replay(path)
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    def _replay(self, path: str) -> None:
+        valid_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                valid_bytes += len(line)
+                self._log_records += 1
+                if record.get("deleted"):
+                    self._remove(record["id"])
+                else:
+                    self._add(record["id"], record)
+        if valid_bytes != os.path.getsize(path):
+            logger.warning(f"Truncating torn component index log {path}")
+            with open(path, "ab") as f:
+                f.truncate(valid_bytes)
+        logger.info(f"Loaded component index over {len(self)} chunks from {path}")
+
+    def _remove(self, doc_id: str) -> None:
+        entry = self._chunks.pop(doc_id, None)
+        if entry is None:
+            return
+        mpn, manufacturer, file_hash = entry["mpn"], entry["manufacturer"], entry["file_hash"]
+        if mpn is not None:
+            chunk_ids = self._by_mpn[mpn]
+            chunk_ids.discard(doc_id)
+            if not chunk_ids:
+                del self._by_mpn[mpn]
+                self._mpn_names.pop(mpn, None)
+            if manufacturer is not None:
+                counts = self._mpns_by_manufacturer[manufacturer]
+                counts[mpn] -= 1
+                if counts[mpn] == 0:
+                    del counts[mpn]
+                    if not counts:
+                        del self._mpns_by_manufacturer[manufacturer]
+        if file_hash is not None:
+            chunk_ids = self._by_file_hash[file_hash]
+            chunk_ids.discard(doc_id)
+            if not chunk_ids:
+                del self._by_file_hash[file_hash]
+
+    def _add(self, doc_id: str, record: Dict[str, Any]) -> None:
+        self._remove(doc_id)
+        mpn = _normalize(record.get("mpn"))
+        manufacturer = _normalize(record.get("manufacturer"))
+        file_hash = record.get("file_hash")
+        if not isinstance(file_hash, str) or file_hash == _UNKNOWN:
+            file_hash = None
+        self._chunks[doc_id] = {"mpn": mpn, "manufacturer": manufacturer, "file_hash": file_hash}
+        if mpn is not None:
+            self._by_mpn.setdefault(mpn, set()).add(doc_id)
+            self._mpn_names.setdefault(mpn, record["mpn"].strip())
+            if manufacturer is not None:
+                counts = self._mpns_by_manufacturer.setdefault(manufacturer, {})
+                counts[mpn] = counts.get(mpn, 0) + 1
+        if file_hash is not None:
+            self._by_file_hash.setdefault(file_hash, set()).add(doc_id)
+
+    def _append_log(self, records: List[Dict[str, Any]]) -> None:
+        if self.path is not None and records:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in records))
+            self._log_records += len(records)
+
+    def add(self, doc_ids: Sequence[str], metadata_list: Sequence[Optional[Dict[str, Any]]]) -> None:
+        """
+        Index chunks by their metadata, replacing earlier entries for the same IDs.
+
+        Args:
+            doc_ids: Chunk IDs
+            metadata_list: Chunk metadata with optional mpn, manufacturer and file_hash
+        """
+        records = []
+        for doc_id, metadata in zip(doc_ids, metadata_list):
+            metadata = metadata or {}
+            records.append({
+                "id": doc_id,
+                "mpn": metadata.get("mpn"),
+                "manufacturer": metadata.get("manufacturer"),
+                "file_hash": metadata.get("file_hash"),
+            })
+        with self._lock:
+            self._append_log(records)
+            for record in records:
+                self._add(record["id"], record)
+
+    def remove(self, doc_ids: Sequence[str]) -> None:
+        """Remove chunks from the index; unknown IDs are ignored."""
+        with self._lock:
+            known = [doc_id for doc_id in doc_ids if doc_id in self._chunks]
+            self._append_log([{"id": doc_id, "deleted": True} for doc_id in known])
+            for doc_id in known:
+                self._remove(doc_id)
+
+    def compact(self) -> int:
+        """
+        Rewrite the log with one record per indexed chunk.
+
+        Returns:
+            Number of superseded log records dropped
+        """
+        with self._lock:
+            if self.path is None:
+                return 0
+            dropped = self._log_records - len(self._chunks)
+            if dropped == 0:
+                return 0
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write("".join(
+                    json.dumps({
+                        "id": doc_id,
+                        "mpn": self._mpn_names[entry["mpn"]] if entry["mpn"] is not None else None,
+                        "manufacturer": entry["manufacturer"],
+                        "file_hash": entry["file_hash"],
+                    }) + "\n"
+                    for doc_id, entry in self._chunks.items()
+                ))
+            os.replace(temp_path, self.path)
+            self._log_records = len(self._chunks)
+            logger.info(f"Compacted component index log, dropping {dropped} records")
+            return dropped
+
+    def chunks_for_mpn(self, mpn: str) -> List[str]:
+        """IDs of the chunks of a part, matched case-insensitively."""
+        key = _normalize(mpn)
+        with self._lock:
+            return sorted(self._by_mpn.get(key, ())) if key is not None else []
+
+    def chunks_for_file(self, file_hash: str) -> List[str]:
+        """IDs of the chunks ingested from one datasheet file."""
+        with self._lock:
+            return sorted(self._by_file_hash.get(file_hash, ()))
+
+    def mpns_for_manufacturer(self, manufacturer: str) -> List[str]:
+        """MPNs with stored chunks from a manufacturer, matched case-insensitively."""
+        key = _normalize(manufacturer)
+        with self._lock:
+            counts = self._mpns_by_manufacturer.get(key, {}) if key is not None else {}
+            return sorted(self._mpn_names[mpn] for mpn in counts)
+
+    def has_mpn(self, mpn: str) -> bool:
+        """Whether any chunk of the part is stored."""
+        key = _normalize(mpn)
+        return key is not None and key in self._by_mpn
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size statistics for the index."""
+        return {
+            "chunks": len(self._chunks),
+            "mpns": len(self._by_mpn),
+            "manufacturers": len(self._mpns_by_manufacturer),
+            "datasheets": len(self._by_file_hash),
+            "dead_log_records": self._log_records - len(self._chunks) if self.path is not None else 0,
+        }
+
+
+def group_by_component(
+    documents: List[str],
+    metadatas: List[Dict[str, Any]],
+    distances: List[float],
+    k: int,
+    aggregation: str = "max",
+    chunks_per_component: int = 3
+) -> List[Dict[str, Any]]:
+    """
+    Collapse chunk hits into the k best-scoring components.
+
+    Hits are grouped by MPN; hits without a known MPN are grouped by datasheet
+    file hash, or else stand alone. A component's distance aggregates its
+    hits' distances: "max" takes its closest hit, "mean" the mean over its
+    hits and "top_n" the mean over its chunks_per_component closest hits.
+
+    Args:
+        documents: Hit texts
+        metadatas: Hit metadata
+        distances: Hit distances (lower is closer)
+        k: Maximum number of components
+        aggregation: One of AGGREGATIONS
+        chunks_per_component: Hits kept per component (and averaged by "top_n")
+
+    Returns:
+        Components, closest first, as dicts with mpn, manufacturer, category,
+        distance, hits (number of hits) and the kept hits' documents,
+        metadatas and distances, closest first
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"Unsupported aggregation: {aggregation}")
+    if chunks_per_component < 1:
+        raise ValueError("chunks_per_component must be at least 1")
+    if not documents or k <= 0:
+        return []
+
+    group_ids: Dict[str, int] = {}
+    groups = np.empty(len(documents), dtype=np.int64)
+    for position, metadata in enumerate(metadatas):
+        metadata = metadata or {}
+        key = _normalize(metadata.get("mpn"))
+        if key is None:
+            file_hash = metadata.get("file_hash")
+            has_file = isinstance(file_hash, str) and file_hash != _UNKNOWN
+            key = f"file:{file_hash}" if has_file else f"chunk:{position}"
+        else:
+            key = f"mpn:{key}"
+        groups[position] = group_ids.setdefault(key, len(group_ids))
+
+    distances = np.asarray(distances, dtype=np.float64)
+    n_groups = len(group_ids)
+    # Hits sorted by group, closest first within each; starts[g] is group g's first hit
+    order = np.lexsort((distances, groups))
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    sorted_distances = distances[order]
+    if aggregation == "max":
+        scores = sorted_distances[starts]
+    elif aggregation == "mean":
+        scores = np.bincount(groups, weights=distances, minlength=n_groups) / counts
+    else:
+        ranks = np.arange(len(order)) - np.repeat(starts, counts)
+        top = ranks < chunks_per_component
+        scores = (
+            np.bincount(groups[order][top], weights=sorted_distances[top], minlength=n_groups)
+            / np.minimum(counts, chunks_per_component)
+        )
+
+    components = []
+    for group in np.argsort(scores, kind="stable")[:k]:
+        hits = order[starts[group]:starts[group] + min(counts[group], chunks_per_component)]
+        first = metadatas[hits[0]] or {}
+        components.append({
+            "mpn": first.get("mpn") if _normalize(first.get("mpn")) is not None else None,
+            "manufacturer": first.get("manufacturer"),
+            "category": first.get("category"),
+            "distance": float(scores[group]),
+            "hits": int(counts[group]),
+            "documents": [documents[hit] for hit in hits],
+            "metadatas": [metadatas[hit] for hit in hits],
+            "distances": [float(distances[hit]) for hit in hits],
+        })
+    return components
+
+
+def top_components(
+    search: Callable[[int], Tuple[List[str], List[Dict[str, Any]], List[float]]],
+    k: int,
+    aggregation: str = "max",
+    chunks_per_component: int = 3,
+    overfetch: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Fetch chunk hits and group them into up to k components.
+
+    k * overfetch hits are fetched. If they fill up but hold fewer than k
+    components, the fetch is widened once, sized by the hits seen per
+    component, instead of doubling until enough parts are found.
+
+    Args:
+        search: Returns (documents, metadatas, distances) for a number of hits
+        k: Maximum number of components
+        aggregation: One of AGGREGATIONS
+        chunks_per_component: Hits kept per component
+        overfetch: Hits fetched per requested component
+
+    Returns:
+        Components as returned by group_by_component
+    """
+    n_hits = k * overfetch
+    documents, metadatas, distances = search(n_hits)
+    components = group_by_component(documents, metadatas, distances, k, aggregation, chunks_per_component)
+    if 0 < len(components) < k and len(documents) >= n_hits:
+        n_hits = int(np.ceil(1.5 * k * n_hits / len(components)))
+        documents, metadatas, distances = search(n_hits)
+        components = group_by_component(documents, metadatas, distances, k, aggregation, chunks_per_component)
+    return components
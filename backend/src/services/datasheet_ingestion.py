@@ -16,7 +16,9 @@ from pdfminer.converter import TextConverter
 from pdfminer.layout import LAParams
 from io import StringIO
 
-from .vector_db import get_vector_db_service
+from .embedding_pool import EmbeddingWorkerPool
+from .spec_extraction import extract_specs
+from .vector_db import VectorDBService, get_vector_db_service
 
 logger = logging.getLogger(__name__)
 
@@ -38,6 +40,8 @@ class DatasheetIngestionService:
         self.min_chunk_size = 1000  # Minimum characters per chunk
         self.max_chunk_size = 2000  # Maximum characters per chunk
         self.overlap_size = 200     # Overlap between chunks for context
+        # New chunks embedded per worker pool call, bounding text and vectors held at once
+        self.pool_group_chunks = 4096
         
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """
@@ -164,6 +168,57 @@ class DatasheetIngestionService:
         logger.info(f"Created {len(chunks)} text chunks from {len(text)} characters")
         return chunks
     
+    def prepare_datasheet_chunks(
+        self, 
+        pdf_path: str, 
+        component_info: Dict[str, Any]
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Extract, clean and chunk a datasheet PDF without writing it anywhere.
+        
+        Args:
+            pdf_path: Path to the PDF datasheet
+            component_info: Information about the component (mpn, manufacturer, category, etc.)
+            
+        Returns:
+            Tuple of (chunks, metadata_list); both empty if no text was extracted
+        """
+        # Extract text from PDF
+        raw_text = self.extract_text_from_pdf(pdf_path)
+        if not raw_text:
+            logger.warning(f"No text extracted from {pdf_path}")
+            return [], []
+        
+        # Clean the text
+        cleaned_text = self.clean_text(raw_text)
+        
+        # Create source metadata
+        source_metadata = {
+            "source_file": os.path.basename(pdf_path),
+            "source_path": pdf_path,
+            "mpn": component_info.get("mpn", "unknown"),
+            "manufacturer": component_info.get("manufacturer", "unknown"),
+            "category": component_info.get("category", "unknown"),
+            "description": component_info.get("description", ""),
+            "datasheet_url": component_info.get("datasheet_url", ""),
+            "ingestion_timestamp": component_info.get("timestamp", ""),
+            "file_hash": self._calculate_file_hash(pdf_path),
+            # Normalized numeric specs, filterable with spec_extraction.constraints_to_where
+            **extract_specs(cleaned_text)
+        }
+        
+        # Create text chunks
+        chunks_with_metadata = self.create_text_chunks(cleaned_text, source_metadata)
+        
+        if not chunks_with_metadata:
+            logger.warning(f"No chunks created from {pdf_path}")
+            return [], []
+        
+        # Extract chunks and metadata for vector database
+        chunks = [chunk for chunk, _ in chunks_with_metadata]
+        metadata_list = [metadata for _, metadata in chunks_with_metadata]
+        return chunks, metadata_list
+    
     def ingest_datasheet(
         self, 
         pdf_path: str, 
@@ -180,39 +235,10 @@ class DatasheetIngestionService:
             List of document IDs that were added to the vector database
         """
         try:
-            # Extract text from PDF
-            raw_text = self.extract_text_from_pdf(pdf_path)
-            if not raw_text:
-                logger.warning(f"No text extracted from {pdf_path}")
+            chunks, metadata_list = self.prepare_datasheet_chunks(pdf_path, component_info)
+            if not chunks:
                 return []
             
-            # Clean the text
-            cleaned_text = self.clean_text(raw_text)
-            
-            # Create source metadata
-            source_metadata = {
-                "source_file": os.path.basename(pdf_path),
-                "source_path": pdf_path,
-                "mpn": component_info.get("mpn", "unknown"),
-                "manufacturer": component_info.get("manufacturer", "unknown"),
-                "category": component_info.get("category", "unknown"),
-                "description": component_info.get("description", ""),
-                "datasheet_url": component_info.get("datasheet_url", ""),
-                "ingestion_timestamp": component_info.get("timestamp", ""),
-                "file_hash": self._calculate_file_hash(pdf_path)
-            }
-            
-            # Create text chunks
-            chunks_with_metadata = self.create_text_chunks(cleaned_text, source_metadata)
-            
-            if not chunks_with_metadata:
-                logger.warning(f"No chunks created from {pdf_path}")
-                return []
-            
-            # Extract chunks and metadata for vector database
-            chunks = [chunk for chunk, _ in chunks_with_metadata]
-            metadata_list = [metadata for _, metadata in chunks_with_metadata]
-            
             # Add to vector database
             vector_db = get_vector_db_service()
             doc_ids = vector_db.add_document_chunks(chunks, metadata_list)
@@ -238,17 +264,22 @@ class DatasheetIngestionService:
     
     def batch_ingest_datasheets(
         self, 
-        datasheet_configs: List[Dict[str, Any]]
+        datasheet_configs: List[Dict[str, Any]],
+        worker_pool: Optional[EmbeddingWorkerPool] = None
     ) -> Dict[str, List[str]]:
         """
         Batch ingest multiple datasheets.
         
         Args:
             datasheet_configs: List of dictionaries containing pdf_path and component_info
+            worker_pool: Optional multi-process pool used to embed all chunks
             
         Returns:
             Dictionary mapping file paths to lists of document IDs
         """
+        if worker_pool is not None:
+            return self._batch_ingest_with_pool(datasheet_configs, worker_pool)
+        
         results = {}
         
         for config in datasheet_configs:
@@ -268,6 +299,95 @@ class DatasheetIngestionService:
                 results[pdf_path] = []
         
         return results
+    
+    def _batch_ingest_with_pool(
+        self, 
+        datasheet_configs: List[Dict[str, Any]],
+        worker_pool: EmbeddingWorkerPool
+    ) -> Dict[str, List[str]]:
+        """Chunk datasheets, embed their new chunks across the pool in bounded groups, then write each one."""
+        vector_db = get_vector_db_service()
+        results: Dict[str, List[str]] = {}
+        group: List[Tuple[str, List[str], List[str], List[Dict[str, Any]]]] = []
+        group_chunks = 0
+        
+        for config in datasheet_configs:
+            pdf_path = config.get("pdf_path")
+            component_info = config.get("component_info", {})
+            results[pdf_path] = []
+            
+            if not pdf_path or not os.path.exists(pdf_path):
+                logger.error(f"PDF file not found: {pdf_path}")
+                continue
+            
+            try:
+                chunks, metadata_list = self.prepare_datasheet_chunks(pdf_path, component_info)
+                if not chunks:
+                    continue
+                # Chunks already stored with identical content are not embedded again
+                doc_ids = vector_db.chunk_ids(chunks, metadata_list)
+                new_positions = vector_db.find_new_chunks(doc_ids)
+                new_ids = {doc_ids[i] for i in new_positions}
+                stored_positions = [i for i, doc_id in enumerate(doc_ids) if doc_id not in new_ids]
+                if stored_positions:
+                    # Their metadata may still have been corrected since they were stored
+                    vector_db.update_metadata(
+                        [doc_ids[i] for i in stored_positions],
+                        [metadata_list[i] for i in stored_positions]
+                    )
+            except Exception as e:
+                logger.error(f"Failed to ingest {pdf_path}: {e}")
+                continue
+            
+            if not new_positions:
+                logger.info(f"Datasheet {pdf_path} is already ingested")
+                results[pdf_path] = doc_ids
+                continue
+            group.append((
+                pdf_path,
+                doc_ids,
+                [chunks[i] for i in new_positions],
+                [metadata_list[i] for i in new_positions],
+            ))
+            group_chunks += len(new_positions)
+            if group_chunks >= self.pool_group_chunks:
+                self._write_pool_group(group, worker_pool, vector_db, results)
+                group, group_chunks = [], 0
+        
+        if group:
+            self._write_pool_group(group, worker_pool, vector_db, results)
+        return results
+    
+    def _write_pool_group(
+        self,
+        group: List[Tuple[str, List[str], List[str], List[Dict[str, Any]]]],
+        worker_pool: EmbeddingWorkerPool,
+        vector_db: VectorDBService,
+        results: Dict[str, List[str]]
+    ) -> None:
+        """Embed a group of datasheets' new chunks in one sharded call and write each datasheet."""
+        # One call keeps every worker busy across datasheet boundaries
+        all_chunks = [chunk for _, _, chunks, _ in group for chunk in chunks]
+        try:
+            embeddings = worker_pool.generate_embeddings_array(all_chunks)
+            # Empty texts are dropped, which would shift every later datasheet's vectors
+            if len(embeddings) != len(all_chunks):
+                raise ValueError("Cannot embed empty chunks")
+        except Exception as e:
+            for pdf_path, _, _, _ in group:
+                logger.error(f"Failed to ingest {pdf_path}: {e}")
+            return
+        
+        offset = 0
+        for pdf_path, doc_ids, chunks, metadata_list in group:
+            chunk_embeddings = embeddings[offset:offset + len(chunks)]
+            offset += len(chunks)
+            try:
+                vector_db.add_document_chunks(chunks, metadata_list, embeddings=chunk_embeddings)
+                results[pdf_path] = doc_ids
+                logger.info(f"Successfully ingested datasheet {pdf_path} with {len(chunks)} new chunks")
+            except Exception as e:
+                logger.error(f"Failed to ingest {pdf_path}: {e}")
 
 
 # Global datasheet ingestion service instance
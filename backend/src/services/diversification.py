@@ -0,0 +1,62 @@
+"""
+Maximal marginal relevance (MMR) re-ranking of search candidates.
+
+Overlapping chunks are near-duplicates, so a plain top-k spends much of its
+budget on copies of one passage. MMR picks results one at a time, trading
+similarity to the query against similarity to the results already picked.
+The candidates' pairwise similarities come from a single matrix product, so
+re-ranking needs the candidate vectors but no further queries.
+"""
+
+from typing import List
+
+import numpy as np
+
+
+def maximal_marginal_relevance(
+    query_vector: np.ndarray,
+    candidate_vectors: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Select k candidates in MMR order.
+
+    Each step picks the candidate maximizing
+    lambda_mult * sim(query, c) - (1 - lambda_mult) * max(sim(c, picked)),
+    using cosine similarity.
+
+    Args:
+        query_vector: Query embedding
+        candidate_vectors: One row per candidate, ordered by relevance
+        k: Number of candidates to select
+        lambda_mult: 1 keeps the relevance order; 0 maximizes diversity
+
+    Returns:
+        Row indices of the selected candidates, in selection order
+    """
+    if not 0.0 <= lambda_mult <= 1.0:
+        raise ValueError("lambda_mult must be between 0 and 1")
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    relevance = lambda_mult * (candidates @ query)
+    similarity = candidates @ candidates.T
+
+    # The first pick is the most relevant candidate; ties keep the input order
+    selected = [int(np.argmax(relevance))]
+    available = np.ones(len(candidates), dtype=bool)
+    available[selected[0]] = False
+    redundancy = similarity[selected[0]].copy()
+    for _ in range(k - 1):
+        scores = np.where(available, relevance - (1.0 - lambda_mult) * redundancy, -np.inf)
+        chosen = int(np.argmax(scores))
+        selected.append(chosen)
+        available[chosen] = False
+        np.maximum(redundancy, similarity[chosen], out=redundancy)
+    return selected
@@ -0,0 +1,193 @@
+"""
+Async micro-batching front-end for single-text embedding requests.
+
+Concurrent callers each await one embedding; the batcher collects their texts
+for a short window and runs a single model encode for the whole batch.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .embeddings import EmbeddingService, get_embedding_service
+
+logger = logging.getLogger(__name__)
+
+
+def _histogram_bucket(value: int) -> int:
+    """Round a count up to the next power of two for histogram bucketing."""
+    return 1 if value <= 1 else 1 << (value - 1).bit_length()
+
+
+class EmbeddingBatcher:
+    """Collects concurrent embedding requests into batched encode calls."""
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 3.0,
+        executor: Optional[ThreadPoolExecutor] = None
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            embedding_service: Service used to encode each batch
+            max_batch_size: Flush as soon as this many requests are queued
+            max_wait_ms: Maximum time the first request in a batch waits for company
+            executor: Executor that runs encode calls (defaults to one dedicated thread)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms cannot be negative")
+
+        self.embedding_service = embedding_service
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        # A single worker keeps encodes serialized so the next batch fills meanwhile
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="embedding-batcher"
+        )
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.requests = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.max_queue_depth = 0
+        self.batch_size_histogram: Counter = Counter()
+        self.queue_depth_histogram: Counter = Counter()
+        self.total_encode_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for the next batch."""
+        return len(self._pending)
+
+    @property
+    def requests_batched(self) -> int:
+        """Number of requests that have been dispatched in a batch."""
+        return self.requests - self.queue_depth
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed a single text as part of the next micro-batch.
+
+        Args:
+            text: Input text to embed
+
+        Returns:
+            List of float values representing the embedding
+        """
+        if not text.strip():
+            raise ValueError("Text cannot be empty")
+
+        query_cache = self.embedding_service.query_cache
+        if query_cache is not None:
+            cached = query_cache.get(text)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached.tolist()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.requests += 1
+
+        depth = len(self._pending)
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self.queue_depth_histogram[_histogram_bucket(depth)] += 1
+
+        if depth >= self.max_batch_size:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000.0, self._flush, loop)
+
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Hand the queued requests to the executor as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if self._pending:
+            self._flush_handle = loop.call_later(self.max_wait_ms / 1000.0, self._flush, loop)
+        if not batch:
+            return
+
+        self.batches += 1
+        self.batch_size_histogram[_histogram_bucket(len(batch))] += 1
+        # Keep a reference so in-flight batches are not garbage collected
+        task = loop.create_task(self._run_batch(loop, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        batch: List[Tuple[str, asyncio.Future]]
+    ) -> None:
+        """Encode a batch off the event loop and fan results out to the callers."""
+        texts = [text for text, _ in batch]
+        start_time = time.perf_counter()
+        try:
+            embeddings = await loop.run_in_executor(
+                self._executor, self.embedding_service.generate_embeddings, texts
+            )
+        except Exception as e:
+            logger.error(f"Failed to embed batch of {len(texts)} texts: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.total_encode_seconds += time.perf_counter() - start_time
+
+        query_cache = self.embedding_service.query_cache
+        for (text, future), embedding in zip(batch, embeddings):
+            if query_cache is not None:
+                query_cache.put(text, embedding)
+            if not future.done():
+                future.set_result(embedding)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and batch size statistics for tuning the window."""
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "batches": self.batches,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "mean_batch_size": self.requests_batched / self.batches if self.batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_size_histogram.items())),
+            "queue_depth_histogram": dict(sorted(self.queue_depth_histogram.items())),
+            "total_encode_seconds": self.total_encode_seconds,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the encode executor."""
+        self._executor.shutdown(wait=False)
+
+
+# Global embedding batcher instance
+_embedding_batcher: Optional[EmbeddingBatcher] = None
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Get the global embedding batcher instance."""
+    global _embedding_batcher
+    if _embedding_batcher is None:
+        _embedding_batcher = EmbeddingBatcher(get_embedding_service())
+    return _embedding_batcher
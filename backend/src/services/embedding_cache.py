@@ -0,0 +1,357 @@
+"""
+Caches for text embeddings.
+
+EmbeddingCache appends vectors to a float32 matrix on disk and reads them back
+through a memory map, so cached embeddings can be served without loading the
+model. Several processes may share a cache directory: appends hold an
+exclusive file lock and take their row numbers from the file sizes, and each
+instance picks up rows other writers appended. EmbeddingLRUCache keeps recent
+query embeddings in process memory.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_DIGEST_SIZE = hashlib.sha256().digest_size
+
+
+def text_digest(text: str) -> bytes:
+    """Return the SHA-256 digest used to address a text in the cache."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Append-only on-disk embedding cache keyed by (model_name, sha256(text))."""
+
+    def __init__(self, cache_directory: str, model_name: str):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            cache_directory: Root directory for cache files
+            model_name: Name of the model whose embeddings are cached
+        """
+        self.model_name = model_name
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.cache_directory = Path(cache_directory) / safe_name
+        self.cache_directory.mkdir(parents=True, exist_ok=True)
+
+        self._vectors_path = self.cache_directory / "vectors.f32"
+        self._keys_path = self.cache_directory / "keys.bin"
+        self._meta_path = self.cache_directory / "meta.json"
+        self._lock_path = self.cache_directory / "lock"
+
+        self._lock = threading.Lock()
+        self._index: Dict[bytes, int] = {}
+        self._dimension: Optional[int] = None
+        self._rows = 0
+        self._matrix: Optional[np.memmap] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+        self._load()
+
+    @property
+    def dimension(self) -> Optional[int]:
+        """Dimension of the cached vectors, or None if the cache is empty."""
+        return self._dimension
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @contextlib.contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold an exclusive lock on the cache directory across processes."""
+        with open(self._lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_meta(self) -> bool:
+        """Read the model and dimension recorded by the first writer, if any."""
+        if not self._meta_path.exists():
+            return False
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("model_name") != self.model_name:
+            raise ValueError(
+                f"Cache at {self.cache_directory} belongs to model {meta.get('model_name')!r}"
+            )
+        self._dimension = int(meta["dimension"])
+        return True
+
+    def _load(self) -> None:
+        """Load the hash index and repair any torn tail from an interrupted append."""
+        if not self._read_meta():
+            return
+        with self._file_lock():
+            self._repair()
+            self._refresh()
+        logger.info(f"Loaded embedding cache with {self._rows} entries from {self.cache_directory}")
+
+    def _repair(self) -> None:
+        """Truncate both files to their complete rows; the file lock must be held."""
+        row_bytes = self._dimension * 4
+        key_bytes = self._keys_path.stat().st_size if self._keys_path.exists() else 0
+        vector_bytes = self._vectors_path.stat().st_size if self._vectors_path.exists() else 0
+        rows = min(key_bytes // _DIGEST_SIZE, vector_bytes // row_bytes)
+
+        # Keys and vectors are appended separately; keep only complete rows
+        if key_bytes != rows * _DIGEST_SIZE or vector_bytes != rows * row_bytes:
+            logger.warning(f"Truncating embedding cache {self.cache_directory} to {rows} rows")
+            with open(self._keys_path, "ab") as f:
+                f.truncate(rows * _DIGEST_SIZE)
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+
+    def _refresh(self) -> None:
+        """
+        Index rows appended since this instance last looked, by any process.
+
+        Keys are written only after their vectors are synced, so every
+        complete key on disk has its vector row.
+        """
+        key_bytes = self._keys_path.stat().st_size if self._keys_path.exists() else 0
+        rows = key_bytes // _DIGEST_SIZE
+        if rows <= self._rows:
+            return
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._rows * _DIGEST_SIZE)
+            keys = f.read((rows - self._rows) * _DIGEST_SIZE)
+        for offset in range(0, len(keys), _DIGEST_SIZE):
+            # The first row holding a text wins, as in a single-writer cache
+            self._index.setdefault(keys[offset:offset + _DIGEST_SIZE], self._rows + offset // _DIGEST_SIZE)
+        self._rows = rows
+
+    def _get_matrix(self) -> np.memmap:
+        """Map the vector file, remapping if rows were appended since the last map."""
+        if self._matrix is None or self._matrix.shape[0] != self._rows:
+            self._matrix = np.memmap(
+                self._vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(self._rows, self._dimension),
+            )
+        return self._matrix
+
+    def lookup(self, texts: List[str]) -> Tuple[List[int], np.ndarray, List[int]]:
+        """
+        Look up cached embeddings for a list of texts.
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            Tuple of (hit positions, hit vectors as a float32 array, miss positions)
+        """
+        with self._lock:
+            if self._dimension is None:
+                self._read_meta()
+            if self._dimension is not None:
+                self._refresh()
+            hit_positions: List[int] = []
+            hit_rows: List[int] = []
+            miss_positions: List[int] = []
+
+            for position, text in enumerate(texts):
+                row = self._index.get(text_digest(text))
+                if row is None:
+                    miss_positions.append(position)
+                else:
+                    hit_positions.append(position)
+                    hit_rows.append(row)
+
+            if hit_rows:
+                hit_vectors = np.array(self._get_matrix()[hit_rows], dtype=np.float32)
+            else:
+                hit_vectors = np.empty((0, self._dimension or 0), dtype=np.float32)
+
+            self.hits += len(hit_positions)
+            self.misses += len(miss_positions)
+            self.bytes_read += hit_vectors.nbytes
+            return hit_positions, hit_vectors, miss_positions
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> int:
+        """
+        Append embeddings for texts that are not cached yet.
+
+        Args:
+            texts: Texts that were embedded
+            vectors: Array of shape (len(texts), dimension)
+
+        Returns:
+            Number of new entries written
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[0] != len(texts):
+            raise ValueError("Vectors must be a 2-D array with one row per text")
+
+        with self._lock, self._file_lock():
+            if self._dimension is None and not self._read_meta():
+                self._dimension = int(vectors.shape[1])
+                with open(self._meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"model_name": self.model_name, "dimension": self._dimension}, f)
+            if vectors.shape[1] != self._dimension:
+                raise ValueError(
+                    f"Expected {self._dimension}-dimensional vectors, got {vectors.shape[1]}"
+                )
+
+            # Other processes may have appended since this instance last looked
+            self._repair()
+            self._refresh()
+
+            new_digests: List[bytes] = []
+            new_rows: List[int] = []
+            seen = set()
+            for position, text in enumerate(texts):
+                digest = text_digest(text)
+                if digest in self._index or digest in seen:
+                    continue
+                seen.add(digest)
+                new_digests.append(digest)
+                new_rows.append(position)
+
+            if not new_digests:
+                return 0
+
+            block = vectors[new_rows]
+            # Vectors are written before keys so a crash never indexes missing data
+            with open(self._vectors_path, "ab") as f:
+                f.write(block.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._keys_path, "ab") as f:
+                f.write(b"".join(new_digests))
+
+            for digest in new_digests:
+                self._index[digest] = self._rows
+                self._rows += 1
+
+            self.bytes_written += block.nbytes
+            return len(new_digests)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss and size counters for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "model_name": self.model_name,
+            "entries": self._rows,
+            "dimension": self._dimension,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "size_bytes": self._rows * (self._dimension or 0) * 4,
+        }
+
+
+class EmbeddingLRUCache:
+    """In-process LRU cache of embeddings bounded by a memory budget in bytes."""
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the LRU cache.
+
+        Args:
+            max_bytes: Memory budget for cached keys and vectors
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _entry_size(text: str, vector: np.ndarray) -> int:
+        return sys.getsizeof(text) + vector.nbytes
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for a text, marking it most recently used."""
+        with self._lock:
+            vector = self._entries.get(text)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(text)
+            self.hits += 1
+            return vector
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        """
+        Cache an embedding, evicting least recently used entries over budget.
+
+        Args:
+            text: Text that was embedded
+            vector: 1-D embedding vector
+        """
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        size = self._entry_size(text, vector)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(text, None)
+            if previous is not None:
+                self.current_bytes -= self._entry_size(text, previous)
+
+            self._entries[text] = vector
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                evicted_text, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= self._entry_size(evicted_text, evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss, eviction and memory counters for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "current_bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
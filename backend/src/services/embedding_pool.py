@@ -0,0 +1,159 @@
+"""
+Multi-process embedding worker pool for bulk ingestion.
+
+Each worker process loads the embedding model once and writes its shard of
+embeddings straight into a shared-memory output matrix, so results are not
+pickled back through the pool.
+"""
+
+import logging
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from .embeddings import DEFAULT_MODEL_NAME, EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+# Per-process embedding service, created by the pool initializer
+_worker_service: Optional[EmbeddingService] = None
+
+
+def _init_worker(model_name: str, threads_per_worker: int) -> None:
+    """Pin torch thread counts and load the model once per worker process."""
+    global _worker_service
+    # Fast tokenizers would otherwise start their own thread pool in every worker
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    import torch
+
+    torch.set_num_threads(threads_per_worker)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Interop threads can only be set before any parallel work has started
+        pass
+
+    _worker_service = EmbeddingService(model_name, query_cache_bytes=0)
+    _worker_service._get_model()
+
+
+def _worker_dimension() -> int:
+    """Embedding dimension of the worker's model."""
+    return _worker_service.get_embedding_dimension()
+
+
+def _encode_shard(task: Tuple[str, int, int, int, List[str]]) -> int:
+    """Encode one shard of texts into the shared output matrix."""
+    shm_name, total_rows, dimension, start, texts = task
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        output = np.ndarray((total_rows, dimension), dtype=np.float32, buffer=shm.buf)
+        output[start:start + len(texts)] = _worker_service._model_encode(texts)
+        del output
+    finally:
+        shm.close()
+    return len(texts)
+
+
+class EmbeddingWorkerPool:
+    """Process pool where each worker holds its own copy of the embedding model."""
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        num_workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        shard_size: int = 256
+    ):
+        """
+        Start the worker processes.
+
+        Args:
+            model_name: Name of the sentence-transformers model to load in each worker
+            num_workers: Number of worker processes (defaults to one per 4 cores)
+            threads_per_worker: Torch intra-op threads per worker (defaults to
+                cores / workers so the pool does not oversubscribe the machine)
+            shard_size: Number of texts dispatched to a worker at a time
+        """
+        cpu_count = os.cpu_count() or 1
+        self.model_name = model_name
+        self.num_workers = num_workers or max(1, cpu_count // 4)
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.num_workers)
+        self.shard_size = shard_size
+        self._dimension: Optional[int] = None
+
+        logger.info(
+            f"Starting {self.num_workers} embedding workers with "
+            f"{self.threads_per_worker} threads each"
+        )
+        # Spawn avoids forking a parent that may already hold torch thread pools
+        context = multiprocessing.get_context("spawn")
+        self._pool = context.Pool(
+            self.num_workers,
+            initializer=_init_worker,
+            initargs=(model_name, self.threads_per_worker),
+        )
+
+    def get_embedding_dimension(self) -> int:
+        """Get the dimension of embeddings produced by the workers."""
+        if self._dimension is None:
+            self._dimension = self._pool.apply(_worker_dimension)
+        return self._dimension
+
+    def _shards(self, texts: List[str]) -> List[Tuple[int, List[str]]]:
+        """Split texts into (start offset, texts) shards."""
+        return [
+            (start, texts[start:start + self.shard_size])
+            for start in range(0, len(texts), self.shard_size)
+        ]
+
+    def generate_embeddings_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for many texts across the worker processes.
+
+        Args:
+            texts: List of input texts to embed (empty texts are dropped)
+
+        Returns:
+            C-contiguous float32 array of shape (n_texts, dimension)
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        valid_texts = [text for text in texts if text.strip()]
+        if not valid_texts:
+            raise ValueError("All texts are empty")
+
+        dimension = self.get_embedding_dimension()
+        rows = len(valid_texts)
+        shm = shared_memory.SharedMemory(create=True, size=rows * dimension * 4)
+        try:
+            tasks = [
+                (shm.name, rows, dimension, start, shard)
+                for start, shard in self._shards(valid_texts)
+            ]
+            # Unordered completion keeps fast workers busy; offsets place each shard
+            for _ in self._pool.imap_unordered(_encode_shard, tasks):
+                pass
+            output = np.ndarray((rows, dimension), dtype=np.float32, buffer=shm.buf)
+            embeddings = output.copy()
+            del output
+            return embeddings
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self) -> "EmbeddingWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,136 @@
+"""
+Corpus-fitted PCA projection for reducing embedding dimensionality.
+
+The projection is an orthonormal basis of the corpus's top principal
+components, so squared L2 distances between projected vectors approximate the
+distances between the original embeddings.
+"""
+
+import logging
+import os
+from typing import Any, Dict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows accumulated into the covariance per block, to bound temporary memory
+_FIT_BLOCK_ROWS = 65536
+
+
+class PCAProjection:
+    """Linear projection of embeddings onto their top principal components."""
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, explained_variance_ratio: float):
+        """
+        Initialize the projection.
+
+        Args:
+            mean: Corpus mean of shape (input_dimension,)
+            components: Orthonormal basis of shape (input_dimension, output_dimension)
+            explained_variance_ratio: Fraction of corpus variance kept by the basis
+        """
+        self.mean = np.ascontiguousarray(mean, dtype=np.float32)
+        self.components = np.ascontiguousarray(components, dtype=np.float32)
+        self.explained_variance_ratio = float(explained_variance_ratio)
+
+    @property
+    def input_dimension(self) -> int:
+        return int(self.components.shape[0])
+
+    @property
+    def output_dimension(self) -> int:
+        return int(self.components.shape[1])
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, n_components: int) -> "PCAProjection":
+        """
+        Fit a projection to a corpus of embeddings.
+
+        Args:
+            vectors: Array of shape (n_vectors, input_dimension)
+            n_components: Output dimension of the projection
+
+        Returns:
+            Fitted projection
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) < 2:
+            raise ValueError("At least two 2-D vectors are required to fit a projection")
+        dimension = vectors.shape[1]
+        if not 0 < n_components <= dimension:
+            raise ValueError(f"n_components must be between 1 and {dimension}")
+
+        # The covariance is only dimension x dimension, so accumulate it in blocks
+        # instead of decomposing the full corpus matrix
+        mean = vectors.mean(axis=0, dtype=np.float64)
+        covariance = np.zeros((dimension, dimension), dtype=np.float64)
+        for start in range(0, len(vectors), _FIT_BLOCK_ROWS):
+            block = vectors[start:start + _FIT_BLOCK_ROWS].astype(np.float64) - mean
+            covariance += block.T @ block
+
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1][:n_components]
+        total_variance = float(np.clip(eigenvalues, 0, None).sum())
+        kept_variance = float(np.clip(eigenvalues[order], 0, None).sum())
+
+        projection = cls(
+            mean,
+            eigenvectors[:, order],
+            kept_variance / total_variance if total_variance > 0 else 1.0,
+        )
+        logger.info(
+            f"Fitted {dimension}->{n_components} projection on {len(vectors)} vectors "
+            f"({projection.explained_variance_ratio:.1%} variance kept)"
+        )
+        return projection
+
+    def transform(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Project embeddings onto the fitted basis.
+
+        Args:
+            vectors: A single vector or an array of shape (n_vectors, input_dimension)
+
+        Returns:
+            C-contiguous float32 array with output_dimension columns
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[-1] != self.input_dimension:
+            raise ValueError(
+                f"Expected {self.input_dimension}-dimensional vectors, got {vectors.shape[-1]}"
+            )
+        return np.ascontiguousarray((vectors - self.mean) @ self.components)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get shape and quality statistics for the projection."""
+        return {
+            "input_dimension": self.input_dimension,
+            "output_dimension": self.output_dimension,
+            "explained_variance_ratio": self.explained_variance_ratio,
+        }
+
+    def save(self, path: str) -> None:
+        """Persist the projection to an .npz file (written atomically)."""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(
+                f,
+                mean=self.mean,
+                components=self.components,
+                explained_variance_ratio=np.array(self.explained_variance_ratio),
+            )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PCAProjection":
+        """Load a projection written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            projection = cls(
+                data["mean"], data["components"], float(data["explained_variance_ratio"])
+            )
+        logger.info(
+            f"Loaded {projection.input_dimension}->{projection.output_dimension} "
+            f"projection from {path}"
+        )
+        return projection
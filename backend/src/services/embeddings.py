@@ -2,38 +2,210 @@
 Embedding service for generating and managing text embeddings using sentence-transformers.
 """
 
+import gc
+import itertools
 import logging
-from typing import List, Optional
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 import numpy as np
 from sentence_transformers import SentenceTransformer
 import threading
 
+from .embedding_cache import EmbeddingCache, EmbeddingLRUCache
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Upper bound on an adaptive batch of very short texts
+_MAX_ADAPTIVE_BATCH_SIZE = 256
+
 
 class EmbeddingService:
     """Service for generating text embeddings using sentence-transformers."""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        cache_directory: Optional[str] = None,
+        query_cache_bytes: int = 4 * 1024 * 1024,
+        batch_size: int = 32,
+        tokens_per_batch: int = 8192
+    ):
         """
         Initialize the embedding service.
         
         Args:
             model_name: Name of the sentence-transformers model to use
+            cache_directory: Optional directory for the persistent embedding cache
+            query_cache_bytes: Memory budget of the single-query LRU cache (0 disables it)
+            batch_size: Inputs up to this size are encoded in a single call; larger
+                inputs are length-bucketed
+            tokens_per_batch: Padded-token budget used to size each length bucket
         """
         self.model_name = model_name
         self._model: Optional[SentenceTransformer] = None
         self._lock = threading.Lock()
+        self.cache: Optional[EmbeddingCache] = (
+            EmbeddingCache(cache_directory, model_name) if cache_directory else None
+        )
+        self.query_cache: Optional[EmbeddingLRUCache] = (
+            EmbeddingLRUCache(query_cache_bytes) if query_cache_bytes > 0 else None
+        )
+        self.batch_size = batch_size
+        self.tokens_per_batch = tokens_per_batch
+        self.memory_bytes = 0
+        self.last_used: Optional[float] = None
         
     def _get_model(self) -> SentenceTransformer:
         """Lazy load the embedding model (thread-safe)."""
-        if self._model is None:
+        self.last_used = time.monotonic()
+        # Read once so a concurrent unload cannot hand back None
+        model = self._model
+        if model is None:
             with self._lock:
                 if self._model is None:
                     logger.info(f"Loading embedding model: {self.model_name}")
                     self._model = SentenceTransformer(self.model_name)
-                    logger.info("Embedding model loaded successfully")
-        return self._model
+                    self.memory_bytes = self._model_memory_bytes(self._model)
+                    logger.info(
+                        f"Embedding model loaded successfully "
+                        f"({self.memory_bytes / 2**20:.1f} MiB of weights)"
+                    )
+                model = self._model
+        return model
+    
+    @staticmethod
+    def _model_memory_bytes(model: SentenceTransformer) -> int:
+        """Resident size of a model's parameters and buffers."""
+        try:
+            tensors = itertools.chain(model.parameters(), model.buffers())
+            return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+        except (AttributeError, TypeError):
+            return 0
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model is currently resident in memory."""
+        return self._model is not None
+    
+    def unload_model(self) -> bool:
+        """
+        Release the model; it is reloaded lazily on the next encode.
+        
+        Returns:
+            True if a loaded model was released
+        """
+        with self._lock:
+            if self._model is None:
+                return False
+            self._model = None
+            self.memory_bytes = 0
+        gc.collect()
+        logger.info(f"Unloaded embedding model: {self.model_name}")
+        return True
+    
+    def _token_lengths(self, model: SentenceTransformer, texts: List[str]) -> np.ndarray:
+        """Tokenized length of each text, truncated to the model's sequence limit."""
+        tokenizer = getattr(model, "tokenizer", None)
+        if tokenizer is None:
+            # Rough estimate for models without an exposed tokenizer
+            return np.array([len(text) // 4 + 2 for text in texts], dtype=np.int64)
+        
+        encoded = tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=getattr(model, "max_seq_length", None) or 512
+        )
+        return np.fromiter(
+            (len(ids) for ids in encoded["input_ids"]), dtype=np.int64, count=len(texts)
+        )
+    
+    def _length_buckets(self, lengths: np.ndarray) -> List[np.ndarray]:
+        """
+        Group text positions into batches of similar tokenized length.
+        
+        Positions are sorted by length and cut into consecutive batches whose
+        padded size (batch length x longest member) stays within tokens_per_batch,
+        so short texts get large batches and long texts small ones.
+        """
+        order = np.argsort(lengths, kind="stable")
+        sorted_lengths = np.maximum(lengths[order], 1)
+        buckets = []
+        start = 0
+        while start < len(order):
+            window = sorted_lengths[start:start + _MAX_ADAPTIVE_BATCH_SIZE]
+            # Padded size of each candidate prefix grows monotonically with its length
+            padded = np.arange(1, len(window) + 1) * window
+            end = start + max(1, int(np.count_nonzero(padded <= self.tokens_per_batch)))
+            buckets.append(order[start:end])
+            start = end
+        return buckets
+    
+    def _model_encode(self, texts: List[str]) -> np.ndarray:
+        """Run the model, length-bucketing inputs larger than one batch."""
+        model = self._get_model()
+        if len(texts) <= self.batch_size:
+            return model.encode(texts, convert_to_numpy=True)
+        
+        lengths = self._token_lengths(model, texts)
+        embeddings: Optional[np.ndarray] = None
+        for bucket in self._length_buckets(lengths):
+            encoded = model.encode(
+                [texts[i] for i in bucket],
+                batch_size=len(bucket),
+                convert_to_numpy=True
+            )
+            if embeddings is None:
+                embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            # Scatter back to the caller's order
+            embeddings[bucket] = encoded
+        return embeddings
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, serving cache hits without touching the model."""
+        if self.cache is None:
+            return self._model_encode(texts)
+        
+        hit_positions, hit_vectors, miss_positions = self.cache.lookup(texts)
+        if not miss_positions:
+            return hit_vectors
+        
+        missing_texts = [texts[i] for i in miss_positions]
+        encoded = np.asarray(self._model_encode(missing_texts), dtype=np.float32)
+        self.cache.put_many(missing_texts, encoded)
+        if not hit_positions:
+            return encoded
+        
+        embeddings = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        embeddings[hit_positions] = hit_vectors
+        embeddings[miss_positions] = encoded
+        return embeddings
+    
+    def _embed_query(self, text: str) -> np.ndarray:
+        """Embed a single text through the query LRU cache."""
+        if not text.strip():
+            raise ValueError("Text cannot be empty")
+            
+        if self.query_cache is not None:
+            cached = self.query_cache.get(text)
+            if cached is not None:
+                return cached
+        
+        embedding = self._encode([text])[0]
+        if self.query_cache is not None:
+            self.query_cache.put(text, embedding)
+        return embedding
+    
+    def _encode_valid(self, texts: List[str]) -> np.ndarray:
+        """Encode texts after dropping empty ones."""
+        # Filter out empty texts
+        valid_texts = [text for text in texts if text.strip()]
+        if not valid_texts:
+            raise ValueError("All texts are empty")
+            
+        return self._encode(valid_texts)
     
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -45,12 +217,54 @@ class EmbeddingService:
         Returns:
             List of float values representing the embedding
         """
-        if not text.strip():
-            raise ValueError("Text cannot be empty")
+        return self._embed_query(text).tolist()
+    
+    def generate_embedding_array(self, text: str) -> np.ndarray:
+        """
+        Generate embedding for a single text as a float32 array.
+        
+        Args:
+            text: Input text to embed
             
-        model = self._get_model()
-        embedding = model.encode([text], convert_to_numpy=True)[0]
-        return embedding.tolist()
+        Returns:
+            1-D float32 array (read-only when served from the query cache)
+        """
+        return np.asarray(self._embed_query(text), dtype=np.float32)
+    
+    def generate_query_embeddings_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed several query texts with one encode call for the query cache misses.
+        
+        Args:
+            texts: Query texts (repeats are encoded once)
+            
+        Returns:
+            C-contiguous float32 array of shape (n_texts, dimension)
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        if any(not text.strip() for text in texts):
+            raise ValueError("Text cannot be empty")
+        
+        rows: List[Optional[np.ndarray]] = [None] * len(texts)
+        misses: Dict[str, List[int]] = {}
+        for position, text in enumerate(texts):
+            cached = self.query_cache.get(text) if self.query_cache is not None else None
+            if cached is None:
+                misses.setdefault(text, []).append(position)
+            else:
+                rows[position] = cached
+        
+        if misses:
+            miss_texts = list(misses)
+            encoded = self._encode(miss_texts)
+            for text, embedding in zip(miss_texts, encoded):
+                if self.query_cache is not None:
+                    self.query_cache.put(text, embedding)
+                for position in misses[text]:
+                    rows[position] = embedding
+        
+        return np.ascontiguousarray(np.stack(rows), dtype=np.float32)
     
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
@@ -65,28 +279,234 @@ class EmbeddingService:
         if not texts:
             return []
             
-        # Filter out empty texts
-        valid_texts = [text for text in texts if text.strip()]
-        if not valid_texts:
-            raise ValueError("All texts are empty")
-            
-        model = self._get_model()
-        embeddings = model.encode(valid_texts, convert_to_numpy=True)
+        embeddings = self._encode_valid(texts)
         return [embedding.tolist() for embedding in embeddings]
     
+    def generate_embeddings_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Generate embeddings for multiple texts without converting to Python floats.
+        
+        Args:
+            texts: List of input texts to embed
+            
+        Returns:
+            C-contiguous float32 array of shape (n_texts, dimension)
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+            
+        embeddings = self._encode_valid(texts)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
+    
+    def embed_stream(
+        self,
+        texts: Iterable[Union[str, Tuple[str, str]]],
+        batch_size: int = 256
+    ) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """
+        Embed an unbounded stream of texts in fixed-size batches.
+        
+        Only one batch of texts and vectors is held at a time, so peak memory is
+        bounded by batch_size rather than by the length of the stream.
+        
+        Args:
+            texts: Iterable of texts, or of (id, text) pairs; plain texts are
+                identified by their position in the stream
+            batch_size: Number of texts consumed per yielded batch
+            
+        Yields:
+            Tuples of (ids, C-contiguous float32 array with one row per id);
+            empty texts are skipped
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        
+        iterator = iter(texts)
+        position = 0
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                return
+            
+            ids: List[str] = []
+            batch_texts: List[str] = []
+            for item in batch:
+                doc_id, text = (str(position), item) if isinstance(item, str) else item
+                position += 1
+                if text.strip():
+                    ids.append(doc_id)
+                    batch_texts.append(text)
+            
+            if ids:
+                embeddings = self._encode(batch_texts)
+                yield ids, np.ascontiguousarray(embeddings, dtype=np.float32)
+    
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings produced by this model."""
+        if self._model is None and self.cache is not None and self.cache.dimension:
+            return self.cache.dimension
         model = self._get_model()
         return model.get_sentence_embedding_dimension()
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get statistics for the embedding caches."""
+        return {
+            "persistent": self.cache.get_stats() if self.cache is not None else None,
+            "query": self.query_cache.get_stats() if self.query_cache is not None else None
+        }
 
 
-# Global embedding service instance
-_embedding_service: Optional[EmbeddingService] = None
+class EmbeddingModelRegistry:
+    """Embedding services for several models, keyed by model name.
+    
+    Services are created on first use and each loads its model lazily under its
+    own lock, so loading one model never blocks requests for another. Models
+    left idle past the timeout are unloaded and reload on their next encode.
+    """
+    
+    def __init__(
+        self,
+        cache_directory: Optional[str] = None,
+        idle_timeout_seconds: float = 900.0,
+        default_model_name: str = DEFAULT_MODEL_NAME
+    ):
+        """
+        Initialize the registry.
+        
+        Args:
+            cache_directory: Optional root directory for per-model persistent caches
+            idle_timeout_seconds: Unload models unused for this long
+            default_model_name: Model returned when no name is given
+        """
+        self.cache_directory = cache_directory
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.default_model_name = default_model_name
+        self._services: Dict[str, EmbeddingService] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._stop_reaper = threading.Event()
+        self.unloads = 0
+    
+    def get(self, model_name: Optional[str] = None) -> EmbeddingService:
+        """
+        Get the embedding service for a model, creating it if needed.
+        
+        Args:
+            model_name: Name of the sentence-transformers model (default model if omitted)
+            
+        Returns:
+            Embedding service for the model
+        """
+        model_name = model_name or self.default_model_name
+        service = self._services.get(model_name)
+        if service is None:
+            with self._lock:
+                service = self._services.get(model_name)
+                if service is None:
+                    service = EmbeddingService(model_name, cache_directory=self.cache_directory)
+                    self._services[model_name] = service
+        return service
+    
+    def model_names(self) -> List[str]:
+        """Names of all registered models, loaded or not."""
+        return list(self._services)
+    
+    def unload(self, model_name: str) -> bool:
+        """
+        Unload a model's weights, keeping its service and caches.
+        
+        Args:
+            model_name: Name of the model to unload
+            
+        Returns:
+            True if a loaded model was released
+        """
+        service = self._services.get(model_name)
+        if service is None or not service.unload_model():
+            return False
+        self.unloads += 1
+        return True
+    
+    def unload_idle(self, now: Optional[float] = None) -> List[str]:
+        """
+        Unload every model that has not been used within the idle timeout.
+        
+        Args:
+            now: Current time.monotonic() value (for testing)
+            
+        Returns:
+            Names of the models that were unloaded
+        """
+        now = time.monotonic() if now is None else now
+        unloaded = []
+        for model_name, service in list(self._services.items()):
+            if not service.is_loaded or service.last_used is None:
+                continue
+            if now - service.last_used >= self.idle_timeout_seconds and self.unload(model_name):
+                unloaded.append(model_name)
+        return unloaded
+    
+    def start_idle_reaper(self, interval_seconds: float = 60.0) -> None:
+        """Start a daemon thread that periodically unloads idle models."""
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        self._stop_reaper.clear()
+        
+        def reap() -> None:
+            while not self._stop_reaper.wait(interval_seconds):
+                try:
+                    self.unload_idle()
+                except Exception as e:
+                    logger.error(f"Failed to unload idle embedding models: {e}")
+        
+        self._reaper = threading.Thread(target=reap, name="embedding-model-reaper", daemon=True)
+        self._reaper.start()
+    
+    def stop_idle_reaper(self) -> None:
+        """Stop the idle reaper thread."""
+        self._stop_reaper.set()
+        if self._reaper is not None:
+            self._reaper.join()
+            self._reaper = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get load state, memory and idle time for every registered model."""
+        now = time.monotonic()
+        models = {
+            model_name: {
+                "loaded": service.is_loaded,
+                "memory_bytes": service.memory_bytes,
+                "idle_seconds": now - service.last_used if service.last_used is not None else None,
+            }
+            for model_name, service in list(self._services.items())
+        }
+        return {
+            "models": models,
+            "loaded_models": sum(1 for stats in models.values() if stats["loaded"]),
+            "total_memory_bytes": sum(stats["memory_bytes"] for stats in models.values()),
+            "idle_timeout_seconds": self.idle_timeout_seconds,
+            "unloads": self.unloads,
+        }
+
+
+# Global embedding model registry
+_embedding_registry: Optional[EmbeddingModelRegistry] = None
 
 
-def get_embedding_service() -> EmbeddingService:
-    """Get the global embedding service instance."""
-    global _embedding_service
-    if _embedding_service is None:
-        _embedding_service = EmbeddingService()
-    return _embedding_service
\ No newline at end of file
+def get_embedding_registry() -> EmbeddingModelRegistry:
+    """Get the global embedding model registry."""
+    global _embedding_registry
+    if _embedding_registry is None:
+        _embedding_registry = EmbeddingModelRegistry(cache_directory="./data/embedding_cache")
+        _embedding_registry.start_idle_reaper()
+    return _embedding_registry
+
+
+def get_embedding_service(model_name: Optional[str] = None) -> EmbeddingService:
+    """
+    Get the global embedding service for a model.
+    
+    Args:
+        model_name: Name of the model (the default model if omitted)
+    """
+    return get_embedding_registry().get(model_name)
\ No newline at end of file
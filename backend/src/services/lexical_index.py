@@ -0,0 +1,311 @@
+"""
+In-process BM25 inverted index over chunk text, for lexical and hybrid search.
+
+Exact identifiers such as manufacturer part numbers ("TMP117",
+"ESP32-WROOM-32") are poorly represented by sentence embeddings but are
+matched directly by an inverted index. The index is persisted as an
+append-only JSON-lines log of per-chunk term counts, so writes cost only
+their own size.
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Alphanumeric runs, keeping joined identifiers such as "esp32-wroom-32" whole
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./+#][a-z0-9]+)*")
+_TOKEN_SEPARATORS = re.compile(r"[-_./+#]")
+_PART_NUMBER_PATTERN = re.compile(r"[A-Za-z0-9]+(?:[-_./+#][A-Za-z0-9]+)*")
+# Quantities such as "3.3V", "100mA", "4.7uF" or "10kOhm", and value codes such as "3V3" and "4K7"
+_VALUE_WITH_UNIT_PATTERN = re.compile(
+    r"\d+(?:[.,]\d+)?(?:[munpkgµ]?(?:v|a|w|hz|f|h|ohms?|Ω|r|b|bits?|bps|s)|k|m|db|dbm|mah|ah|wh|°?c|ppm|mm|cm)"
+    r"|\d+[vrk]\d+",
+    re.IGNORECASE,
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase index terms.
+
+    Joined identifiers are indexed whole and as their parts, so "ESP32-WROOM-32"
+    is found both by its full name and by "wroom".
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if _TOKEN_SEPARATORS.search(token):
+            tokens.extend(part for part in _TOKEN_SEPARATORS.split(token) if part)
+    return tokens
+
+
+def looks_like_part_number(query: str) -> bool:
+    """
+    Whether a query is a single part-number-like token (letters and digits, no spaces).
+
+    A value with a unit ("3.3V", "100mA") also mixes letters and digits but
+    names a spec, not a part, so it is not treated as one.
+    """
+    query = query.strip()
+    return (
+        len(query) >= 4
+        and _PART_NUMBER_PATTERN.fullmatch(query) is not None
+        and any(char.isdigit() for char in query)
+        and any(char.isalpha() for char in query)
+        and _VALUE_WITH_UNIT_PATTERN.fullmatch(query) is None
+    )
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked ID lists by reciprocal rank: score(d) = sum of 1 / (k + rank).
+
+    Args:
+        rankings: Ranked lists of IDs, best first
+        k: Damping constant; larger values flatten the contribution of top ranks
+
+    Returns:
+        (ID, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """Incrementally built BM25 index keyed by chunk ID."""
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize the index, replaying its log if one exists.
+
+        Args:
+            path: Optional JSON-lines log that persists every write
+            k1: Term-frequency saturation parameter
+            b: Document-length normalization parameter
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+
+        # Each write takes a new slot; replaced and removed slots are marked dead
+        self._doc_ids: List[str] = []
+        self._slots: Dict[str, int] = {}
+        self._lengths: List[int] = []
+        self._alive: List[bool] = []
+        self._live_length = 0
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._posting_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._alive_array: Optional[np.ndarray] = None
+        self._length_array: Optional[np.ndarray] = None
+
+        if path is not None and os.path.exists(path):
+            self._replay(path)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def _replay(self, path: str) -> None:
+        valid_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                valid_bytes += len(line)
+                if record.get("deleted"):
+                    self._remove(record["id"])
+                else:
+                    self._add(record["id"], record["terms"])
+        if valid_bytes != os.path.getsize(path):
+            logger.warning(f"Truncating torn lexical index log {path}")
+            with open(path, "ab") as f:
+                f.truncate(valid_bytes)
+        logger.info(f"Loaded lexical index over {len(self)} chunks from {path}")
+
+    def _remove(self, doc_id: str) -> None:
+        slot = self._slots.pop(doc_id, None)
+        if slot is not None:
+            self._alive[slot] = False
+            self._live_length -= self._lengths[slot]
+
+    def _add(self, doc_id: str, terms: Dict[str, int]) -> None:
+        self._remove(doc_id)
+        slot = len(self._doc_ids)
+        self._doc_ids.append(doc_id)
+        self._slots[doc_id] = slot
+        length = sum(terms.values())
+        self._lengths.append(length)
+        self._alive.append(True)
+        self._live_length += length
+        for term, count in terms.items():
+            slots, counts = self._postings.setdefault(term, ([], []))
+            slots.append(slot)
+            counts.append(count)
+            self._posting_arrays.pop(term, None)
+
+    def _append_log(self, records: List[Dict[str, Any]]) -> None:
+        if self.path is not None:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def add(self, doc_ids: Sequence[str], texts: Iterable[str]) -> None:
+        """
+        Index chunks, replacing any earlier text stored under the same IDs.
+
+        Args:
+            doc_ids: Chunk IDs
+            texts: Chunk texts, one per ID
+        """
+        records = [
+            {"id": doc_id, "terms": dict(Counter(tokenize(text or "")))}
+            for doc_id, text in zip(doc_ids, texts)
+        ]
+        with self._lock:
+            self._append_log(records)
+            for record in records:
+                self._add(record["id"], record["terms"])
+            self._alive_array = None
+
+    def remove(self, doc_ids: Sequence[str]) -> None:
+        """Remove chunks from the index; unknown IDs are ignored."""
+        with self._lock:
+            known = [doc_id for doc_id in doc_ids if doc_id in self._slots]
+            self._append_log([{"id": doc_id, "deleted": True} for doc_id in known])
+            for doc_id in known:
+                self._remove(doc_id)
+            self._alive_array = None
+
+    def compact(self) -> int:
+        """
+        Drop dead slots and rewrite the log with one record per live chunk.
+
+        Returns:
+            Number of dead slots reclaimed
+        """
+        with self._lock:
+            dead_slots = len(self._doc_ids) - len(self._slots)
+            if dead_slots == 0:
+                return 0
+            live_slots = [slot for slot, alive in enumerate(self._alive) if alive]
+            new_slots = {slot: new_slot for new_slot, slot in enumerate(live_slots)}
+            terms_by_slot: List[Dict[str, int]] = [{} for _ in live_slots]
+            postings: Dict[str, Tuple[List[int], List[int]]] = {}
+            for term, (slots, counts) in self._postings.items():
+                kept_slots, kept_counts = [], []
+                for slot, count in zip(slots, counts):
+                    new_slot = new_slots.get(slot)
+                    if new_slot is not None:
+                        kept_slots.append(new_slot)
+                        kept_counts.append(count)
+                        terms_by_slot[new_slot][term] = count
+                if kept_slots:
+                    postings[term] = (kept_slots, kept_counts)
+
+            doc_ids = [self._doc_ids[slot] for slot in live_slots]
+            if self.path is not None:
+                temp_path = f"{self.path}.tmp"
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    f.write("".join(
+                        json.dumps({"id": doc_id, "terms": terms}) + "\n"
+                        for doc_id, terms in zip(doc_ids, terms_by_slot)
+                    ))
+                os.replace(temp_path, self.path)
+
+            self._doc_ids = doc_ids
+            self._slots = {doc_id: slot for slot, doc_id in enumerate(doc_ids)}
+            self._lengths = [self._lengths[slot] for slot in live_slots]
+            self._alive = [True] * len(doc_ids)
+            self._postings = postings
+            self._posting_arrays = {}
+            self._alive_array = None
+            logger.info(f"Compacted lexical index, reclaiming {dead_slots} dead slots")
+            return dead_slots
+
+    def _term_postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        arrays = self._posting_arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if postings is None:
+                return None
+            arrays = (np.array(postings[0], dtype=np.int64), np.array(postings[1], dtype=np.float32))
+            self._posting_arrays[term] = arrays
+        return arrays
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        allowed_ids: Optional[Iterable[str]] = None
+    ) -> Tuple[List[str], List[float]]:
+        """
+        Rank chunks by BM25 score against the query.
+
+        Args:
+            query: Query text
+            k: Maximum number of results
+            allowed_ids: Optional subset of chunk IDs to rank (e.g. a where filter)
+
+        Returns:
+            Tuple of (chunk IDs, scores), best first; chunks sharing no term
+            with the query are not returned
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._slots)
+            if not terms or n_docs == 0 or k <= 0:
+                return [], []
+            if self._alive_array is None:
+                self._alive_array = np.array(self._alive, dtype=bool)
+                self._length_array = np.array(self._lengths, dtype=np.float32)
+            alive = self._alive_array
+            if allowed_ids is not None:
+                alive = np.zeros(len(self._doc_ids), dtype=bool)
+                alive[[self._slots[doc_id] for doc_id in allowed_ids if doc_id in self._slots]] = True
+            lengths = self._length_array
+            average_length = self._live_length / n_docs or 1.0
+
+            scores = np.zeros(len(self._doc_ids), dtype=np.float32)
+            for term in terms:
+                postings = self._term_postings(term)
+                if postings is None:
+                    continue
+                slots, counts = postings
+                live = self._alive_array[slots]
+                document_frequency = int(live.sum())
+                if document_frequency == 0:
+                    continue
+                idf = math.log(1.0 + (n_docs - document_frequency + 0.5) / (document_frequency + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * lengths[slots] / average_length)
+                scores[slots] += idf * counts * (self.k1 + 1.0) / (counts + norm)
+
+            scores[~alive] = 0.0
+            matched = np.flatnonzero(scores > 0)
+            if len(matched) > k:
+                matched = matched[np.argpartition(scores[matched], -k)[-k:]]
+            matched = matched[np.argsort(-scores[matched], kind="stable")]
+            return [self._doc_ids[slot] for slot in matched], scores[matched].tolist()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size statistics for the index."""
+        return {
+            "documents": len(self._slots),
+            "terms": len(self._postings),
+            "dead_slots": len(self._doc_ids) - len(self._slots),
+            "average_length": self._live_length / len(self._slots) if self._slots else 0.0,
+        }
@@ -0,0 +1,705 @@
+"""
+In-process exact-search vector store backed by NumPy.
+
+NumpyVectorStore and NumpyCollection implement the subset of the ChromaDB
+client and collection interface that VectorDBService uses (get/create/delete
+collections; add, upsert, update, get, query, count, modify), so either
+backend can sit behind the service.
+
+Vectors are appended to a float32 file and read through a memory map; search
+is a brute-force matrix product with argpartition top-k, returning squared L2
+distances like Chroma's default space. Documents and metadata are replayed
+from an append-only JSON-lines log, and metadata is held as one array per key
+so where filters evaluate as boolean masks. Replaced and deleted records stay
+behind as dead rows until compact() rewrites both files.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_QUERY_INCLUDE = ("documents", "metadatas", "distances")
+_DEFAULT_GET_INCLUDE = ("documents", "metadatas")
+
+# Rows scored per block in an unfiltered search, to bound temporary memory
+_SCORE_BLOCK_ROWS = 65536
+# Rows copied per block when compaction rewrites the vector file
+_COMPACT_BLOCK_ROWS = 65536
+
+_COMPARISONS = {
+    "$eq": np.equal,
+    "$ne": np.not_equal,
+    "$gt": np.greater,
+    "$gte": np.greater_equal,
+    "$lt": np.less,
+    "$lte": np.less_equal,
+}
+
+
+class NumpyCollection:
+    """A single collection of vectors, documents and metadata."""
+
+    def __init__(
+        self,
+        directory: Path,
+        name: str,
+        embedding_function: Optional[Callable[[List[str]], Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Open or create a collection.
+
+        Args:
+            directory: Directory holding the collection's files
+            name: Collection name
+            embedding_function: Callable that embeds documents and query texts
+            metadata: Collection metadata (only used when creating)
+        """
+        self.name = name
+        self._directory = directory
+        self._embedding_function = embedding_function
+        self._vectors_path = directory / "vectors.f32"
+        self._records_path = directory / "records.jsonl"
+        self._meta_path = directory / "collection.json"
+        self._lock = threading.RLock()
+
+        self.metadata: Dict[str, Any] = dict(metadata or {})
+        self._dimension: Optional[int] = None
+        self._ids: List[Optional[str]] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[str, int] = {}
+        # Per-row buffers with spare capacity; _alive and _norms view the used rows
+        self._alive_buffer = np.zeros(0, dtype=bool)
+        self._norms_buffer = np.zeros(0, dtype=np.float32)
+        self._matrix: Optional[np.memmap] = None
+        self._columns: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        directory.mkdir(parents=True, exist_ok=True)
+        if self._meta_path.exists():
+            self._load()
+        else:
+            self._write_meta()
+
+    @property
+    def _alive(self) -> np.ndarray:
+        """Whether each row holds the live version of its record."""
+        return self._alive_buffer[:len(self._ids)]
+
+    @_alive.setter
+    def _alive(self, alive: np.ndarray) -> None:
+        self._alive_buffer = np.asarray(alive, dtype=bool)
+
+    @property
+    def _norms(self) -> np.ndarray:
+        """Squared L2 norm of each row's vector."""
+        return self._norms_buffer[:len(self._ids)]
+
+    @_norms.setter
+    def _norms(self, norms: np.ndarray) -> None:
+        self._norms_buffer = np.asarray(norms, dtype=np.float32)
+
+    def _reserve_rows(self, rows: int) -> None:
+        """Make room for more rows, doubling capacity so appends are amortized O(1)."""
+        size = len(self._ids)
+        if size + rows <= len(self._alive_buffer):
+            return
+        capacity = max(size + rows, 2 * len(self._alive_buffer), 1024)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:size] = self._alive_buffer[:size]
+        norms = np.zeros(capacity, dtype=np.float32)
+        norms[:size] = self._norms_buffer[:size]
+        self._alive_buffer, self._norms_buffer = alive, norms
+
+    def _write_meta(self) -> None:
+        temp_path = self._meta_path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"name": self.name, "metadata": self.metadata, "dimension": self._dimension}, f)
+        os.replace(temp_path, self._meta_path)
+
+    def _load(self) -> None:
+        """Replay the record log, discarding a torn tail from an interrupted write."""
+        self._finish_compaction()
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.metadata = meta.get("metadata") or {}
+        self._dimension = meta.get("dimension")
+
+        vector_rows = 0
+        if self._dimension and self._vectors_path.exists():
+            vector_rows = self._vectors_path.stat().st_size // (self._dimension * 4)
+
+        valid_bytes = 0
+        alive: List[bool] = []
+        if self._records_path.exists():
+            with open(self._records_path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if not line.endswith(b"\n"):
+                        break
+                    if "row" in record and record["row"] >= vector_rows:
+                        break
+                    valid_bytes += len(line)
+                    self._replay(record, alive)
+            if valid_bytes != self._records_path.stat().st_size:
+                logger.warning(f"Truncating torn record log of collection {self.name}")
+                with open(self._records_path, "ab") as f:
+                    f.truncate(valid_bytes)
+
+        # Rows past the last logged record were never committed
+        if self._dimension and vector_rows != len(self._ids):
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(len(self._ids) * self._dimension * 4)
+
+        self._alive = np.array(alive, dtype=bool)
+        if self._ids:
+            matrix = self._get_matrix()
+            self._norms = np.einsum("ij,ij->i", matrix, matrix).astype(np.float32)
+        logger.info(f"Loaded collection {self.name} with {self.count()} vectors from {self._directory}")
+
+    def _replay(self, record: Dict[str, Any], alive: List[bool]) -> None:
+        """Apply one logged record to the in-memory state."""
+        doc_id = record["id"]
+        previous = self._rows.pop(doc_id, None)
+        if previous is not None:
+            alive[previous] = False
+        if record.get("deleted"):
+            return
+        row = record["row"]
+        self._ids.append(doc_id)
+        self._documents.append(record.get("document"))
+        self._metadatas.append(record.get("metadata"))
+        alive.append(True)
+        self._rows[doc_id] = row
+
+    def _get_matrix(self) -> np.ndarray:
+        """Map the vector file, remapping if rows were appended since the last map."""
+        rows = len(self._ids)
+        if self._matrix is None or self._matrix.shape[0] != rows:
+            if rows == 0:
+                return np.empty((0, self._dimension or 0), dtype=np.float32)
+            self._matrix = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dimension)
+            )
+        return self._matrix
+
+    def count(self) -> int:
+        """Number of live vectors in the collection."""
+        return len(self._rows)
+
+    def modify(self, name: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Rename the collection or replace its metadata."""
+        with self._lock:
+            if metadata is not None:
+                self.metadata = dict(metadata)
+            if name is not None and name != self.name:
+                target = self._directory.parent / name
+                if target.exists():
+                    raise ValueError(f"Collection {name} already exists")
+                self._matrix = None
+                self._directory.rename(target)
+                self._directory = target
+                self._vectors_path = target / "vectors.f32"
+                self._records_path = target / "records.jsonl"
+                self._meta_path = target / "collection.json"
+                self.name = name
+            self._write_meta()
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        if self._embedding_function is None:
+            raise ValueError("Embeddings are required for a collection without an embedding function")
+        return np.asarray(self._embedding_function(texts), dtype=np.float32)
+
+    def _write(
+        self,
+        ids: List[str],
+        documents: List[Optional[str]],
+        metadatas: List[Optional[Dict[str, Any]]],
+        embeddings: np.ndarray
+    ) -> None:
+        """Append new versions of records; earlier versions become dead rows."""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or len(embeddings) != len(ids):
+            raise ValueError("Embeddings must be a 2-D array with one row per ID")
+        if len(set(ids)) != len(ids):
+            raise ValueError("IDs must be unique within a write")
+
+        with self._lock:
+            if self._dimension is None:
+                self._dimension = int(embeddings.shape[1])
+                self._write_meta()
+            elif embeddings.shape[1] != self._dimension:
+                raise ValueError(
+                    f"Expected {self._dimension}-dimensional embeddings, got {embeddings.shape[1]}"
+                )
+
+            first_row = len(self._ids)
+            records = [
+                {"id": doc_id, "row": first_row + i, "document": document, "metadata": metadata}
+                for i, (doc_id, document, metadata) in enumerate(zip(ids, documents, metadatas))
+            ]
+            # Vectors are written before records so a crash never logs missing data
+            with open(self._vectors_path, "ab") as f:
+                f.write(embeddings.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self._records_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in records))
+
+            # Superseded rows die in place; new rows are appended (see _column)
+            self._reserve_rows(len(records))
+            end = first_row + len(records)
+            self._alive_buffer[first_row:end] = True
+            self._norms_buffer[first_row:end] = np.einsum("ij,ij->i", embeddings, embeddings)
+            for record in records:
+                previous = self._rows.get(record["id"])
+                if previous is not None:
+                    self._alive_buffer[previous] = False
+                self._rows[record["id"]] = record["row"]
+                self._ids.append(record["id"])
+                self._documents.append(record["document"])
+                self._metadatas.append(record["metadata"])
+
+    def add(
+        self,
+        ids: List[str],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        embeddings: Optional[Sequence[Any]] = None
+    ) -> None:
+        """Add records; IDs that already exist are ignored, as in Chroma."""
+        new_positions = [i for i, doc_id in enumerate(ids) if doc_id not in self._rows]
+        if len(new_positions) < len(ids):
+            logger.warning(f"Ignoring {len(ids) - len(new_positions)} existing IDs in add")
+        if not new_positions:
+            return
+        self.upsert(
+            ids=[ids[i] for i in new_positions],
+            documents=[documents[i] for i in new_positions] if documents is not None else None,
+            metadatas=[metadatas[i] for i in new_positions] if metadatas is not None else None,
+            embeddings=[embeddings[i] for i in new_positions] if embeddings is not None else None,
+        )
+
+    def upsert(
+        self,
+        ids: List[str],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        embeddings: Optional[Sequence[Any]] = None
+    ) -> None:
+        """Insert records or replace existing ones."""
+        if embeddings is None:
+            if documents is None:
+                raise ValueError("Either documents or embeddings must be provided")
+            vectors = self._embed(documents)
+        else:
+            vectors = np.asarray(embeddings, dtype=np.float32)
+        self._write(
+            ids,
+            documents if documents is not None else [None] * len(ids),
+            metadatas if metadatas is not None else [None] * len(ids),
+            vectors,
+        )
+
+    def update(
+        self,
+        ids: List[str],
+        documents: Optional[List[str]] = None,
+        metadatas: Optional[List[Dict[str, Any]]] = None,
+        embeddings: Optional[Sequence[Any]] = None
+    ) -> None:
+        """Update fields of existing records; unknown IDs are ignored."""
+        with self._lock:
+            positions = [i for i, doc_id in enumerate(ids) if doc_id in self._rows]
+            if not positions:
+                return
+            rows = [self._rows[ids[i]] for i in positions]
+            if embeddings is not None:
+                vectors = np.asarray(embeddings, dtype=np.float32)[positions]
+            elif documents is not None:
+                vectors = self._embed([documents[i] for i in positions])
+            else:
+                vectors = np.array(self._get_matrix()[rows])
+            self._write(
+                [ids[i] for i in positions],
+                [documents[i] if documents is not None else self._documents[row]
+                 for i, row in zip(positions, rows)],
+                [metadatas[i] if metadatas is not None else self._metadatas[row]
+                 for i, row in zip(positions, rows)],
+                vectors,
+            )
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        """Delete records by ID and/or metadata filter."""
+        with self._lock:
+            rows = self._filter_rows(ids, where)
+            if len(rows) == 0:
+                return
+            doc_ids = [self._ids[row] for row in rows]
+            with open(self._records_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps({"id": doc_id, "deleted": True}) + "\n" for doc_id in doc_ids))
+            for doc_id in doc_ids:
+                self._alive[self._rows.pop(doc_id)] = False
+
+    def _finish_compaction(self) -> None:
+        """
+        Move a compaction's files into place once its record log is committed.
+
+        Also completes a compaction interrupted by a crash, or discards one that
+        crashed before committing.
+        """
+        compacted_vectors = self._directory / "vectors.f32.compact"
+        compacted_records = self._directory / "records.jsonl.compact"
+        if compacted_records.exists():
+            if compacted_vectors.exists():
+                os.replace(compacted_vectors, self._vectors_path)
+            os.replace(compacted_records, self._records_path)
+            return
+        for leftover in (compacted_vectors, self._directory / "records.jsonl.compact.tmp"):
+            if leftover.exists():
+                leftover.unlink()
+
+    def compact(self) -> int:
+        """
+        Rewrite the vector file and record log without dead rows.
+
+        Returns:
+            Number of dead rows reclaimed
+        """
+        with self._lock:
+            dead_rows = len(self._ids) - self.count()
+            if dead_rows == 0:
+                return 0
+            live_rows = np.flatnonzero(self._alive)
+            matrix = self._get_matrix()
+            with open(self._directory / "vectors.f32.compact", "wb") as f:
+                for start in range(0, len(live_rows), _COMPACT_BLOCK_ROWS):
+                    f.write(np.ascontiguousarray(matrix[live_rows[start:start + _COMPACT_BLOCK_ROWS]]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            temp_records = self._directory / "records.jsonl.compact.tmp"
+            with open(temp_records, "w", encoding="utf-8") as f:
+                f.write("".join(
+                    json.dumps({"id": self._ids[row], "row": new_row, "document": self._documents[row],
+                                "metadata": self._metadatas[row]}) + "\n"
+                    for new_row, row in enumerate(live_rows)
+                ))
+                f.flush()
+                os.fsync(f.fileno())
+            # Renaming the record log is the commit point (see _finish_compaction)
+            os.replace(temp_records, self._directory / "records.jsonl.compact")
+            self._matrix = None
+            self._finish_compaction()
+
+            self._norms = self._norms[live_rows]
+            self._alive = np.ones(len(live_rows), dtype=bool)
+            self._ids = [self._ids[row] for row in live_rows]
+            self._documents = [self._documents[row] for row in live_rows]
+            self._metadatas = [self._metadatas[row] for row in live_rows]
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._columns = {}
+            logger.info(f"Compacted collection {self.name}, reclaiming {dead_rows} dead rows")
+            return dead_rows
+
+    @staticmethod
+    def _column_values(raw: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+        """Column array (float64 if every present value is a number) and presence mask."""
+        present = np.fromiter((value is not None for value in raw), dtype=bool, count=len(raw))
+        if all(
+            isinstance(value, (int, float)) and not isinstance(value, bool)
+            for value in raw if value is not None
+        ):
+            values = np.array([np.nan if value is None else value for value in raw], dtype=np.float64)
+        else:
+            values = np.empty(len(raw), dtype=object)
+            values[:] = raw
+        return values, present
+
+    def _column(self, key: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Values of one metadata key across all rows, with a presence mask.
+
+        Rows are never rewritten, only appended, so a cached column is extended
+        with the rows written since it was built.
+        """
+        column = self._columns.get(key)
+        start = 0 if column is None else len(column[1])
+        if column is not None and start == len(self._metadatas):
+            return column
+        values, present = self._column_values(
+            [metadata.get(key) if metadata else None for metadata in self._metadatas[start:]]
+        )
+        if column is not None:
+            if (values.dtype == object) != (column[0].dtype == object):
+                # The new rows changed the column's type; rebuild it as a whole
+                del self._columns[key]
+                return self._column(key)
+            values = np.concatenate([column[0], values])
+            present = np.concatenate([column[1], present])
+        column = self._columns[key] = (values, present)
+        return column
+
+    def _compare(self, key: str, operator: str, operand: Any) -> np.ndarray:
+        """Boolean mask of rows whose metadata value satisfies one comparison."""
+        values, present = self._column(key)
+        numeric_column = values.dtype != object
+        numeric_operand = isinstance(operand, (int, float)) and not isinstance(operand, bool)
+
+        if operator in ("$in", "$nin"):
+            operands = list(operand)
+            if numeric_column:
+                operands = [value for value in operands
+                            if isinstance(value, (int, float)) and not isinstance(value, bool)]
+            mask = np.isin(values, np.array(operands, dtype=values.dtype)) if operands else \
+                np.zeros(len(values), dtype=bool)
+            if operator == "$nin":
+                mask = ~mask
+        elif operator not in _COMPARISONS:
+            raise ValueError(f"Unsupported where operator: {operator}")
+        elif numeric_column == numeric_operand:
+            if numeric_column:
+                mask = _COMPARISONS[operator](values, operand)
+            elif operator in ("$eq", "$ne"):
+                mask = _COMPARISONS[operator](values, operand).astype(bool)
+            else:
+                # Ordering on non-numeric values compares only matching types
+                mask = np.array([
+                    type(value) is type(operand) and bool(_COMPARISONS[operator](value, operand))
+                    for value in values
+                ], dtype=bool)
+        else:
+            # Values of a different type never compare equal
+            mask = np.full(len(values), operator == "$ne", dtype=bool)
+        # Records without the key never match a condition on it
+        return mask & present
+
+    def _where_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """Evaluate a Chroma-style where filter to a boolean row mask."""
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._where_mask(clause)
+            elif key == "$or":
+                alternatives = np.zeros(len(self._ids), dtype=bool)
+                for clause in condition:
+                    alternatives |= self._where_mask(clause)
+                mask &= alternatives
+            elif isinstance(condition, dict):
+                for operator, operand in condition.items():
+                    mask &= self._compare(key, operator, operand)
+            else:
+                mask &= self._compare(key, "$eq", condition)
+        return mask
+
+    def _filter_rows(
+        self,
+        ids: Optional[List[str]],
+        where: Optional[Dict[str, Any]]
+    ) -> np.ndarray:
+        """Live rows matching optional ID and where constraints, in insertion order."""
+        mask = self._alive.copy()
+        if where:
+            mask &= self._where_mask(where)
+        if ids is not None:
+            id_mask = np.zeros(len(mask), dtype=bool)
+            id_mask[[self._rows[doc_id] for doc_id in ids if doc_id in self._rows]] = True
+            mask &= id_mask
+        return np.flatnonzero(mask)
+
+    def get(
+        self,
+        ids: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Sequence[str] = _DEFAULT_GET_INCLUDE
+    ) -> Dict[str, Any]:
+        """Fetch records by ID and/or metadata filter."""
+        with self._lock:
+            rows = self._filter_rows(ids, where)
+            if ids is not None:
+                # Return records in the order the IDs were requested
+                order = {doc_id: i for i, doc_id in enumerate(ids)}
+                rows = np.array(sorted(rows, key=lambda row: order[self._ids[row]]), dtype=np.int64)
+            start = offset or 0
+            rows = rows[start:start + limit] if limit is not None else rows[start:]
+            return self._result(rows, include)
+
+    def _result(self, rows: np.ndarray, include: Sequence[str]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {
+            "ids": [self._ids[row] for row in rows],
+            "documents": [self._documents[row] for row in rows] if "documents" in include else None,
+            "metadatas": [self._metadatas[row] for row in rows] if "metadatas" in include else None,
+            "embeddings": None,
+        }
+        if "embeddings" in include:
+            result["embeddings"] = np.array(self._get_matrix()[rows], dtype=np.float32)
+        return result
+
+    def query(
+        self,
+        query_embeddings: Optional[Sequence[Any]] = None,
+        query_texts: Optional[List[str]] = None,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        include: Sequence[str] = _DEFAULT_QUERY_INCLUDE
+    ) -> Dict[str, Any]:
+        """Exact nearest-neighbour search, with squared L2 distances."""
+        if query_embeddings is None:
+            if query_texts is None:
+                raise ValueError("Either query_embeddings or query_texts must be provided")
+            query_embeddings = self._embed(query_texts)
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32))
+
+        with self._lock:
+            rows = self._filter_rows(None, where) if where else None
+            top_rows, top_distances = self._search(queries, n_results, rows)
+
+            response: Dict[str, Any] = {
+                "ids": [], "documents": [], "metadatas": [], "distances": [],
+                "embeddings": [] if "embeddings" in include else None
+            }
+            for query_rows, distances in zip(top_rows, top_distances):
+                result = self._result(query_rows, include)
+                response["ids"].append(result["ids"])
+                response["documents"].append(result["documents"])
+                response["metadatas"].append(result["metadatas"])
+                response["distances"].append(distances.tolist())
+                if "embeddings" in include:
+                    response["embeddings"].append(result["embeddings"])
+            for field in ("documents", "metadatas", "distances"):
+                if field not in include:
+                    response[field] = None
+            return response
+
+    def _search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        rows: Optional[np.ndarray]
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Top-k rows and squared L2 distances for each query."""
+        total = self.count() if rows is None else len(rows)
+        if total == 0 or k <= 0:
+            empty = np.empty(0, dtype=np.int64)
+            return [empty] * len(queries), [np.empty(0, dtype=np.float32)] * len(queries)
+        if queries.shape[1] != self._dimension:
+            raise ValueError(
+                f"Expected {self._dimension}-dimensional queries, got {queries.shape[1]}"
+            )
+
+        matrix = self._get_matrix()
+        if rows is None:
+            # Score every stored row in blocks; dead rows can never be selected
+            scores = np.empty((len(queries), len(self._ids)), dtype=np.float32)
+            for start in range(0, len(self._ids), _SCORE_BLOCK_ROWS):
+                end = start + _SCORE_BLOCK_ROWS
+                scores[:, start:end] = self._norms[start:end] - 2.0 * (queries @ matrix[start:end].T)
+            scores[:, ~self._alive] = np.inf
+            candidates = None
+        else:
+            scores = self._norms[rows] - 2.0 * (queries @ np.asarray(matrix[rows]).T)
+            candidates = rows
+
+        k = min(k, total)
+        query_norms = np.einsum("ij,ij->i", queries, queries)
+        top_rows, top_distances = [], []
+        for query_scores, query_norm in zip(scores, query_norms):
+            if k < len(query_scores):
+                top = np.argpartition(query_scores, k - 1)[:k]
+            else:
+                top = np.arange(len(query_scores))
+            top = top[np.argsort(query_scores[top], kind="stable")]
+            top_rows.append(top if candidates is None else candidates[top])
+            # ||q||^2 was left out of the ranking scores
+            top_distances.append(np.maximum(query_scores[top] + query_norm, 0.0))
+        return top_rows, top_distances
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size statistics for the collection."""
+        return {
+            "vectors": self.count(),
+            "rows": len(self._ids),
+            "dead_rows": len(self._ids) - self.count(),
+            "dimension": self._dimension,
+            "vector_bytes": len(self._ids) * (self._dimension or 0) * 4,
+        }
+
+
+class NumpyVectorStore:
+    """Collection registry mirroring the parts of chromadb's client API that we use."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the store.
+
+        Args:
+            path: Directory holding one subdirectory per collection
+        """
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._collections: Dict[str, NumpyCollection] = {}
+        self._lock = threading.Lock()
+
+    def _collection_directory(self, name: str) -> Path:
+        if not re.fullmatch(r"[A-Za-z0-9][A-Za-z0-9._-]{1,510}[A-Za-z0-9]", name):
+            raise ValueError(f"Invalid collection name: {name}")
+        return self.path / name
+
+    def get_collection(
+        self,
+        name: str,
+        embedding_function: Optional[Callable[[List[str]], Any]] = None
+    ) -> NumpyCollection:
+        """Open an existing collection."""
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is not None and collection.name == name:
+                return collection
+            directory = self._collection_directory(name)
+            if not (directory / "collection.json").exists():
+                raise ValueError(f"Collection {name} does not exist")
+            collection = NumpyCollection(directory, name, embedding_function)
+            self._collections[name] = collection
+            return collection
+
+    def create_collection(
+        self,
+        name: str,
+        embedding_function: Optional[Callable[[List[str]], Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> NumpyCollection:
+        """Create a new, empty collection."""
+        with self._lock:
+            directory = self._collection_directory(name)
+            if directory.exists():
+                raise ValueError(f"Collection {name} already exists")
+            collection = NumpyCollection(directory, name, embedding_function, metadata)
+            self._collections[name] = collection
+            return collection
+
+    def delete_collection(self, name: str) -> None:
+        """Delete a collection and its files."""
+        with self._lock:
+            directory = self._collection_directory(name)
+            if not directory.exists():
+                raise ValueError(f"Collection {name} does not exist")
+            self._collections.pop(name, None)
+            shutil.rmtree(directory)
+
+    def get_max_batch_size(self) -> int:
+        """Writes are plain file appends, so batch size is not limited."""
+        return 2 ** 31 - 1
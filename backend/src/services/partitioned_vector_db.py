@@ -0,0 +1,334 @@
+"""
+Vector database partitioned into one collection per component category.
+
+A single collection answers category searches by post-filtering the global
+nearest neighbours, so sparse categories can come back short and every query
+pays for neighbours it discards. Here each category has its own collection:
+category-filtered queries are routed to one partition, and other queries
+scatter to every partition and merge the per-partition top-k by distance.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .component_index import top_components
+from .embedding_pool import EmbeddingWorkerPool
+from .spec_extraction import constraints_to_where
+from .vector_db import VectorDBService, make_chunk_ids
+
+logger = logging.getLogger(__name__)
+
+SearchResult = Tuple[List[str], List[Dict[str, Any]], List[float]]
+
+# Partition for chunks whose metadata has no category
+DEFAULT_PARTITION = "uncategorized"
+
+
+def _partition_slug(category: str) -> str:
+    """Collection-name-safe form of a category."""
+    slug = re.sub(r"[^a-z0-9_-]+", "_", category.strip().lower()).strip("_-")
+    return slug or DEFAULT_PARTITION
+
+
+class PartitionedVectorDBService:
+    """Routes chunks and queries to per-category VectorDBService partitions."""
+
+    def __init__(
+        self,
+        persist_directory: str = "./data/chroma_db",
+        collection_name: str = "component_datasheets",
+        **service_options: Any
+    ):
+        """
+        Initialize the partitioned service.
+
+        Args:
+            persist_directory: Directory shared by every partition
+            collection_name: Prefix of the partition collection names
+            **service_options: Options passed to each partition's VectorDBService
+                (vector_precision, embedding_model, backend, ...)
+        """
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
+        self._service_options = service_options
+        self._partitions: Dict[str, VectorDBService] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(persist_directory, exist_ok=True)
+        # Categories are recorded so partitions are found again after a restart
+        if os.path.exists(self._manifest_path()):
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                for category in json.load(f)["categories"]:
+                    self._partitions[category] = self._create_partition(category)
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.persist_directory, f"{self.collection_name}.partitions.json")
+
+    def _save_manifest(self) -> None:
+        temp_path = f"{self._manifest_path()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"categories": sorted(self._partitions)}, f)
+        os.replace(temp_path, self._manifest_path())
+
+    def _create_partition(self, category: str) -> VectorDBService:
+        return VectorDBService(
+            persist_directory=self.persist_directory,
+            collection_name=f"{self.collection_name}.{category}",
+            **self._service_options
+        )
+
+    def _get_partition(self, category: str, create: bool = False) -> Optional[VectorDBService]:
+        """Partition for a category, optionally creating it."""
+        slug = _partition_slug(category)
+        with self._lock:
+            partition = self._partitions.get(slug)
+            if partition is None and create:
+                partition = self._partitions[slug] = self._create_partition(slug)
+                self._save_manifest()
+                logger.info(f"Created partition {slug}")
+            return partition
+
+    @property
+    def categories(self) -> List[str]:
+        """Categories that have a partition."""
+        return sorted(self._partitions)
+
+    def add_document_chunks(
+        self,
+        chunks: List[str],
+        metadata_list: List[Dict[str, Any]],
+        embeddings: Optional[Any] = None,
+        worker_pool: Optional[EmbeddingWorkerPool] = None
+    ) -> List[str]:
+        """
+        Add chunks, each to the partition of its metadata "category".
+
+        Args:
+            chunks: List of text chunks to add
+            metadata_list: List of metadata dictionaries for each chunk
+            embeddings: Optional precomputed embeddings, one row per chunk
+            worker_pool: Optional worker pool that embeds batches of large writes
+
+        Returns:
+            List of document IDs, one per chunk, in input order
+        """
+        if len(chunks) != len(metadata_list):
+            raise ValueError("Number of chunks must match number of metadata entries")
+        if embeddings is not None and len(embeddings) != len(chunks):
+            raise ValueError("Number of embeddings must match number of chunks")
+
+        positions_by_category: Dict[str, List[int]] = {}
+        for position, metadata in enumerate(metadata_list):
+            category = (metadata or {}).get("category")
+            slug = _partition_slug(category) if isinstance(category, str) else DEFAULT_PARTITION
+            positions_by_category.setdefault(slug, []).append(position)
+
+        doc_ids: List[Optional[str]] = [None] * len(chunks)
+        for category, positions in positions_by_category.items():
+            partition_ids = self._get_partition(category, create=True).add_document_chunks(
+                [chunks[position] for position in positions],
+                [metadata_list[position] for position in positions],
+                embeddings=[embeddings[position] for position in positions] if embeddings is not None else None,
+                worker_pool=worker_pool
+            )
+            for position, doc_id in zip(positions, partition_ids):
+                doc_ids[position] = doc_id
+        return doc_ids
+
+    def chunk_ids(self, chunks: List[str], metadata_list: List[Dict[str, Any]]) -> List[str]:
+        """Deterministic IDs for chunks (see make_chunk_ids)."""
+        return make_chunk_ids(chunks, metadata_list)
+
+    def find_new_chunks(self, doc_ids: List[str]) -> List[int]:
+        """Positions of IDs not stored in any partition, keeping the first of any repeats."""
+        # Partitions see each ID once, so a position they skip is a stored ID, not a repeat
+        unique_ids = list(dict.fromkeys(doc_ids))
+        stored = set()
+        for partition in list(self._partitions.values()):
+            positions = set(partition.find_new_chunks(unique_ids))
+            stored.update(doc_id for i, doc_id in enumerate(unique_ids) if i not in positions)
+        new_positions = []
+        seen = set()
+        for position, doc_id in enumerate(doc_ids):
+            if doc_id in stored or doc_id in seen:
+                continue
+            seen.add(doc_id)
+            new_positions.append(position)
+        return new_positions
+
+    def _route(
+        self,
+        where: Optional[Dict[str, Any]]
+    ) -> Tuple[List[VectorDBService], Optional[Dict[str, Any]]]:
+        """
+        Partitions a filter can match, and the filter left to apply within them.
+
+        Category equality and $in conditions, at top level or inside a top-level
+        $and, select partitions; any other filter is applied in every partition.
+        """
+        if not where:
+            return list(self._partitions.values()), None
+
+        clauses = list(where["$and"]) if set(where) == {"$and"} else [{key: value} for key, value in where.items()]
+        categories: Optional[List[str]] = None
+        remaining = []
+        for clause in clauses:
+            condition = clause.get("category") if len(clause) == 1 else None
+            if isinstance(condition, dict) and set(condition) == {"$eq"}:
+                condition = condition["$eq"]
+            if isinstance(condition, str):
+                selected = [condition]
+            elif isinstance(condition, dict) and set(condition) == {"$in"}:
+                selected = [value for value in condition["$in"] if isinstance(value, str)]
+            else:
+                remaining.append(clause)
+                continue
+            slugs = [_partition_slug(category) for category in selected]
+            categories = slugs if categories is None else [slug for slug in categories if slug in slugs]
+
+        if categories is None:
+            return list(self._partitions.values()), where
+        partitions = [self._partitions[slug] for slug in dict.fromkeys(categories) if slug in self._partitions]
+        if not remaining:
+            return partitions, None
+        return partitions, remaining[0] if len(remaining) == 1 else {"$and": remaining}
+
+    @staticmethod
+    def _merge(results: List[SearchResult], n_results: int) -> SearchResult:
+        """Merge per-partition results into one top-k by distance."""
+        merged = sorted(
+            (
+                (distance, document, metadata)
+                for documents, metadatas, distances in results
+                for document, metadata, distance in zip(documents, metadatas, distances)
+            ),
+            key=lambda result: result[0]
+        )[:n_results]
+        return (
+            [document for _, document, _ in merged],
+            [metadata for _, _, metadata in merged],
+            [distance for distance, _, _ in merged],
+        )
+
+    def search_similar(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None
+    ) -> SearchResult:
+        """
+        Search for similar document chunks across the partitions a filter selects.
+
+        Args:
+            query: Search query text
+            n_results: Number of results to return
+            where: Optional metadata filter conditions
+
+        Returns:
+            Tuple of (documents, metadata, distances)
+        """
+        partitions, partition_where = self._route(where)
+        if len(partitions) == 1:
+            return partitions[0].search_similar(query, n_results, partition_where)
+        # The query embedding is cached by the first partition, so it is computed once
+        return self._merge(
+            [partition.search_similar(query, n_results, partition_where) for partition in partitions],
+            n_results
+        )
+
+    def search_many(
+        self,
+        queries: List[Tuple[str, Optional[Dict[str, Any]], int]]
+    ) -> List[SearchResult]:
+        """
+        Run several searches, batching the queries sent to each partition.
+
+        Args:
+            queries: List of (query text, where filter or None, n_results)
+
+        Returns:
+            One (documents, metadata, distances) tuple per query, in input order
+        """
+        per_partition: Dict[int, Tuple[VectorDBService, List[int], List[Tuple[str, Any, int]]]] = {}
+        partial: List[List[SearchResult]] = [[] for _ in queries]
+        for position, (text, where, n_results) in enumerate(queries):
+            partitions, partition_where = self._route(where)
+            for partition in partitions:
+                _, positions, partition_queries = per_partition.setdefault(id(partition), (partition, [], []))
+                positions.append(position)
+                partition_queries.append((text, partition_where, n_results))
+
+        for partition, positions, partition_queries in per_partition.values():
+            for position, result in zip(positions, partition.search_many(partition_queries)):
+                partial[position].append(result)
+        return [self._merge(results, queries[position][2]) for position, results in enumerate(partial)]
+
+    def search_by_category(
+        self,
+        query: str,
+        category: str,
+        n_results: int = 5,
+        constraints: Optional[Dict[str, Any]] = None
+    ) -> SearchResult:
+        """
+        Search for components in a specific category, using only its partition.
+
+        Args:
+            query: Search query text
+            category: Component category (e.g., "microcontroller", "sensor")
+            n_results: Number of results to return
+            constraints: Prompt constraints applied as spec range filters
+
+        Returns:
+            Tuple of (documents, metadata, distances)
+        """
+        return self.search_similar(query, n_results, constraints_to_where(constraints or {}, category))
+
+    def search_components(
+        self,
+        query: str,
+        k: int = 10,
+        category: Optional[str] = None,
+        aggregation: str = "max",
+        chunks_per_component: int = 3,
+        overfetch: int = 10,
+        constraints: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for distinct components, grouping the merged chunk hits.
+
+        See VectorDBService.search_components; a category search uses only its partition.
+        """
+        where = constraints_to_where(constraints or {}, category)
+        return top_components(
+            lambda n_hits: self.search_similar(query, n_hits, where),
+            k, aggregation, chunks_per_component, overfetch
+        )
+
+    def get_collection_stats(self) -> Dict[str, Any]:
+        """Get statistics about the partitioned collections."""
+        partitions = {category: partition.get_collection_stats() for category, partition in self._partitions.items()}
+        return {
+            "total_documents": sum(stats.get("total_documents", 0) for stats in partitions.values()),
+            "collection_name": self.collection_name,
+            "persist_directory": self.persist_directory,
+            "partitions": {category: stats.get("total_documents", 0) for category, stats in partitions.items()},
+        }
+
+    def backfill_specs(self, batch_size: int = 1000) -> int:
+        """Add spec fields to older chunks in every partition (see VectorDBService.backfill_specs)."""
+        return sum(partition.backfill_specs(batch_size) for partition in list(self._partitions.values()))
+
+    def delete_collection(self) -> None:
+        """Delete every partition (use with caution)."""
+        with self._lock:
+            for partition in self._partitions.values():
+                partition.delete_collection()
+            self._partitions.clear()
+            if os.path.exists(self._manifest_path()):
+                os.remove(self._manifest_path())
+            logger.info(f"Deleted all partitions of {self.collection_name}")
@@ -0,0 +1,112 @@
+"""
+Write-invalidated LRU cache of vector search results.
+
+Entries are tagged with the collection generation they were computed at. The
+owning service bumps its generation on every write, so a lookup only returns
+an entry computed against the current contents of the collection.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+SearchResult = Tuple[List[str], List[Dict[str, Any]], List[float]]
+
+
+class SearchResultCache:
+    """In-process LRU cache of search results bounded by entry count."""
+
+    def __init__(self, max_entries: int):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, SearchResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(query: str, n_results: int, where: Optional[Dict[str, Any]]) -> str:
+        """
+        Build the cache key for a search.
+
+        Whitespace in the query is collapsed and the filter is serialized with
+        sorted keys, so equivalent searches share an entry.
+        """
+        normalized_query = " ".join(query.split())
+        return json.dumps([normalized_query, n_results, where], sort_keys=True, default=str)
+
+    def get(self, key: str, generation: int) -> Optional[SearchResult]:
+        """
+        Return a cached result if it was computed at the given generation.
+
+        Args:
+            key: Key from make_key()
+            generation: Current collection generation
+
+        Returns:
+            Copy of the cached (documents, metadata, distances), or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] != generation:
+                # Computed before a write; never serve it
+                del self._entries[key]
+                self.stale += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            documents, metadatas, distances = entry[1]
+        return list(documents), list(metadatas), list(distances)
+
+    def put(self, key: str, generation: int, result: SearchResult) -> None:
+        """
+        Cache a result, evicting the least recently used entry when full.
+
+        Args:
+            key: Key from make_key()
+            generation: Collection generation the search ran against
+            result: (documents, metadata, distances) tuple
+        """
+        documents, metadatas, distances = result
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (generation, (list(documents), list(metadatas), list(distances)))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss, staleness and eviction counters for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stale": self.stale,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,153 @@
+"""
+Numeric spec fields for datasheet chunks, and prompt constraints as filters on them.
+
+Ingestion reads each datasheet's supply voltage range, supply current and
+maximum clock frequency from its text, normalized to volts, mA and MHz, and
+stores them in every chunk's metadata. constraints_to_where turns the
+constraints PlannerService extracts from a prompt into range conditions on
+those fields, so the vector store skips infeasible parts while it searches
+instead of returning them to be discarded afterwards.
+
+A spec the text does not state is stored as a bound that passes every
+filter, so a missing value never excludes a part. Chunks ingested before
+these fields existed do not have them until VectorDBService.backfill_specs
+(or re-ingesting the datasheet) adds them.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+# Stored for unknown upper bounds (voltage, frequency); unknown lower bounds are 0
+UNBOUNDED = 1e9
+
+SPEC_FIELDS = ("supply_voltage_min", "supply_voltage_max", "supply_current_ma", "max_frequency_mhz")
+
+# Only MCU datasheets state a clock the part runs at; elsewhere a frequency
+# is usually an interface or sampling rate
+FREQUENCY_CATEGORIES = ("microcontroller",)
+
+# ICs powered from the board supply. A power part's target voltage is its
+# output, not its input range, and actuators state a rated voltage instead
+SUPPLY_CATEGORIES = ("microcontroller", "sensor", "communication", "display", "memory", "analog")
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_GAP = r"[^.;]{0,60}?"
+_VOLTAGE_KEYWORD = r"(?:(?:supply|operating|input|power)\s+voltage|\bv(?:dd|cc|in|supply)\b)"
+_VOLTAGE_RANGE = re.compile(
+    _VOLTAGE_KEYWORD + _GAP + _NUMBER + r"\s*(m?v)?\s*(?:to|-|/|\.\.\.)\s*" + _NUMBER + r"\s*(m?v)\b"
+)
+_VOLTAGE_SINGLE = re.compile(_VOLTAGE_KEYWORD + _GAP + _NUMBER + r"\s*(m?v)\b")
+_CURRENT = re.compile(
+    r"(?:(?:supply|quiescent|operating|active)\s+current|current\s+consumption|\bi(?:dd|cc|q)\b)"
+    + _GAP + _NUMBER + r"\s*(µa|μa|ua|ma|a)\b"
+)
+_FREQUENCY = re.compile(r"(?:frequency|clock|speed|up\s+to)" + _GAP + _NUMBER + r"\s*(ghz|mhz|khz)\b")
+
+_VOLTS = {"v": 1.0, "mv": 0.001}
+_MILLIAMPS = {"a": 1000.0, "ma": 1.0, "µa": 0.001, "μa": 0.001, "ua": 0.001}
+_MEGAHERTZ = {"ghz": 1000.0, "mhz": 1.0, "khz": 0.001}
+
+
+def _volts(value: str, unit: str) -> Optional[float]:
+    volts = float(value) * _VOLTS[unit]
+    return volts if 0 < volts <= 1000 else None
+
+
+def extract_specs(text: str) -> Dict[str, float]:
+    """
+    Read numeric specs from datasheet text.
+
+    The first supply voltage range stated is used (the feature list usually
+    precedes the absolute maximum ratings), the largest supply current (the
+    active rather than the sleep figure) and the highest clock frequency.
+
+    Args:
+        text: Cleaned datasheet text
+
+    Returns:
+        Every field in SPEC_FIELDS; unstated specs get bounds that pass any filter
+    """
+    text = text.lower()
+    specs = {
+        "supply_voltage_min": 0.0,
+        "supply_voltage_max": UNBOUNDED,
+        "supply_current_ma": 0.0,
+        "max_frequency_mhz": UNBOUNDED,
+    }
+
+    for match in _VOLTAGE_RANGE.finditer(text):
+        low_value, low_unit, high_value, high_unit = match.groups()
+        low = _volts(low_value, low_unit or high_unit)
+        high = _volts(high_value, high_unit)
+        if low is not None and high is not None and low <= high:
+            specs["supply_voltage_min"], specs["supply_voltage_max"] = low, high
+            break
+    else:
+        for match in _VOLTAGE_SINGLE.finditer(text):
+            volts = _volts(*match.groups())
+            if volts is not None:
+                specs["supply_voltage_min"] = specs["supply_voltage_max"] = volts
+                break
+
+    currents = [float(value) * _MILLIAMPS[unit] for value, unit in _CURRENT.findall(text)]
+    currents = [current for current in currents if 0 < current <= 100000]
+    if currents:
+        specs["supply_current_ma"] = max(currents)
+
+    frequencies = [float(value) * _MEGAHERTZ[unit] for value, unit in _FREQUENCY.findall(text)]
+    frequencies = [frequency for frequency in frequencies if 0 < frequency <= 100000]
+    if frequencies:
+        specs["max_frequency_mhz"] = max(frequencies)
+
+    return specs
+
+
+def constraints_to_where(
+    constraints: Dict[str, Any],
+    category: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Translate prompt constraints into a where filter on the spec fields.
+
+    max_voltage keeps parts that can run at or below it, min_voltage parts
+    that can run at or above it and target_voltage parts whose supply range
+    contains it. max_current_ma (or max_current_a) caps the supply current.
+    These apply only to SUPPLY_CATEGORIES. A frequency constraint is a
+    minimum clock and applies only to FREQUENCY_CATEGORIES. Other constraint
+    keys have no spec field and are ignored.
+
+    Args:
+        constraints: Constraints as extracted by PlannerService.extract_constraints
+        category: Component category to search within, added as a condition
+
+    Returns:
+        A Chroma-style where filter, or None if nothing constrains the search
+    """
+    clauses: List[Dict[str, Any]] = []
+    if category is not None:
+        clauses.append({"category": category})
+
+    if category in SUPPLY_CATEGORIES:
+        if "max_voltage" in constraints:
+            clauses.append({"supply_voltage_min": {"$lte": float(constraints["max_voltage"])}})
+        if "min_voltage" in constraints:
+            clauses.append({"supply_voltage_max": {"$gte": float(constraints["min_voltage"])}})
+        if "target_voltage" in constraints:
+            target = float(constraints["target_voltage"])
+            clauses.append({"supply_voltage_min": {"$lte": target}})
+            clauses.append({"supply_voltage_max": {"$gte": target}})
+
+        if "max_current_ma" in constraints:
+            clauses.append({"supply_current_ma": {"$lte": float(constraints["max_current_ma"])}})
+        elif "max_current_a" in constraints:
+            clauses.append({"supply_current_ma": {"$lte": float(constraints["max_current_a"]) * 1000}})
+
+    if category in FREQUENCY_CATEGORIES:
+        for key, scale in (("frequency_mhz", 1.0), ("frequency_khz", 0.001), ("frequency_hz", 1e-6)):
+            if key in constraints:
+                clauses.append({"max_frequency_mhz": {"$gte": float(constraints[key]) * scale}})
+                break
+
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
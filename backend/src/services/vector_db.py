@@ -1,41 +1,257 @@
 """
-Vector database service using ChromaDB for component search and retrieval.
+Vector database service using ChromaDB (or an in-process NumPy store) for
+component search and retrieval.
 """
 
+import bisect
+import hashlib
+import json
 import logging
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import chromadb
+import numpy as np
 from chromadb.config import Settings
 from chromadb.utils import embedding_functions
-import uuid
 
-from .embeddings import get_embedding_service
+from .embeddings import DEFAULT_MODEL_NAME, EmbeddingService, get_embedding_service
+from .embedding_pool import EmbeddingWorkerPool
+from .component_index import ComponentIndex, top_components
+from .diversification import maximal_marginal_relevance
+from .embedding_projection import PCAProjection
+from .lexical_index import BM25Index, looks_like_part_number, reciprocal_rank_fusion
+from .numpy_vector_store import NumpyVectorStore
+from .search_cache import SearchResult, SearchResultCache
+from .spec_extraction import SPEC_FIELDS, constraints_to_where, extract_specs
+from .vector_quantization import PRECISIONS, QuantizedVectorIndex
+from .vector_snapshot import Snapshot, SnapshotWriter
 
 logger = logging.getLogger(__name__)
 
+BACKENDS = ("chroma", "numpy")
+
+# "l2" searches vectors as embedded; "cosine" stores and queries unit-length
+# vectors, so a squared L2 distance d is the cosine similarity 1 - d / 2
+METRICS = ("l2", "cosine")
+
+# IDs per existence lookup; Chroma's SQLite layer caps bound variables per statement
+_ID_LOOKUP_BATCH = 10000
+
+# The quantized index is rewritten whole, so it is saved only once this many
+# rows (or this share of the index) have changed since the last save
+_QUANTIZED_SAVE_MIN_ROWS = 4096
+_QUANTIZED_SAVE_FRACTION = 0.25
+
+
+def make_chunk_id(source_hash: str, chunk_index: int, text: str) -> str:
+    """
+    Derive a deterministic chunk ID from its source, position and content.
+    
+    Args:
+        source_hash: Hash identifying the source document (e.g. the PDF's SHA-256)
+        chunk_index: Position of the chunk within the source
+        text: Chunk text
+        
+    Returns:
+        Hex SHA-256 ID; re-ingesting identical content yields the same ID
+    """
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{source_hash}:{chunk_index}:{text_hash}".encode("utf-8")).hexdigest()
+
+
+def make_chunk_ids(chunks: List[str], metadata_list: List[Dict[str, Any]]) -> List[str]:
+    """
+    Deterministic IDs for chunks, from (file_hash, chunk_index, text hash).
+    
+    Chunks without a file hash are identified by a hash of their metadata
+    and by their position in the list instead.
+    
+    Args:
+        chunks: Chunk texts
+        metadata_list: Metadata for each chunk
+        
+    Returns:
+        One ID per chunk
+    """
+    doc_ids = []
+    for position, (chunk, metadata) in enumerate(zip(chunks, metadata_list)):
+        source_hash = metadata.get("file_hash")
+        if not source_hash or source_hash == "unknown":
+            source_hash = hashlib.sha256(
+                json.dumps(metadata, sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()
+        doc_ids.append(make_chunk_id(source_hash, metadata.get("chunk_index", position), chunk))
+    return doc_ids
+
+
+def unit_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale each row (or a single vector) to unit L2 norm; zero vectors stay zero."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def similarity_from_distance(distance: float) -> float:
+    """Cosine similarity of a squared L2 distance between unit vectors."""
+    return 1.0 - distance / 2.0
+
 
 class VectorDBService:
     """Service for managing vector database operations with ChromaDB."""
     
-    def __init__(self, persist_directory: str = "./data/chroma_db"):
+    def __init__(
+        self,
+        persist_directory: str = "./data/chroma_db",
+        vector_precision: str = "float32",
+        embedding_model: str = DEFAULT_MODEL_NAME,
+        collection_name: str = "component_datasheets",
+        write_batch_size: int = 1024,
+        backend: str = "chroma",
+        result_cache_entries: int = 1024,
+        compaction_threshold: Optional[float] = 0.25,
+        metric: str = "l2",
+        similarity_threshold: Optional[float] = None
+    ):
         """
         Initialize the vector database service.
         
         Args:
             persist_directory: Directory to persist the ChromaDB data
+            vector_precision: "float32" searches Chroma directly; "float16" or "int8"
+                search a reduced-precision in-process index and rescore with the
+                float32 query, using Chroma only for documents and metadata
+            embedding_model: Model that embeds this collection's chunks and queries
+            collection_name: Name of the Chroma collection
+            write_batch_size: Larger writes are split into batches of this many
+                chunks and pipelined (must not exceed Chroma's max batch size)
+            backend: "chroma" stores vectors in ChromaDB's HNSW index; "numpy" keeps
+                them in a memory-mapped file under persist_directory/numpy and
+                answers queries by exact search
+            result_cache_entries: Number of search results kept in the
+                write-invalidated result cache (0 disables it)
+            compaction_threshold: Share of dead entries in any store at which a
+                delete starts a background compaction (None disables it)
+            metric: "l2" or "cosine"; a cosine collection stores unit-length
+                vectors and its distances are 2 - 2 * cosine similarity
+            similarity_threshold: Minimum cosine similarity of a returned chunk
+                ("cosine" only; see calibrate_similarity_threshold)
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unsupported vector backend: {backend}")
+        if metric not in METRICS:
+            raise ValueError(f"Unsupported vector metric: {metric}")
+        if vector_precision != "float32" and vector_precision not in PRECISIONS:
+            raise ValueError(f"Unsupported vector precision: {vector_precision}")
         self.persist_directory = persist_directory
+        self.vector_precision = vector_precision
+        self.backend = backend
         self._client: Optional[chromadb.Client] = None
         self._collection: Optional[chromadb.Collection] = None
-        self.collection_name = "component_datasheets"
+        self._quantized_index: Optional[QuantizedVectorIndex] = None
+        self._quantized_dirty_rows = 0
+        # Held per instance: the embedding service is shared across collections
+        self._projection: Optional[PCAProjection] = None
+        self._projection_loaded = False
+        self._lexical_index: Optional[BM25Index] = None
+        self._component_index: Optional[ComponentIndex] = None
+        # Serializes building the derived indexes, mirroring writes into them and
+        # the reduced-precision index's unsaved-row count; re-entrant since those nest
+        self._index_lock = threading.RLock()
+        self.embedding_model = embedding_model
+        self.collection_name = collection_name
+        self.write_batch_size = write_batch_size
+        self._last_write_stats: Optional[Dict[str, Any]] = None
+        # Bumped by every write so cached search results are never served stale
+        self._generation = 0
+        self._result_cache = SearchResultCache(result_cache_entries) if result_cache_entries > 0 else None
+        self.compaction_threshold = compaction_threshold
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self.metric = metric
+        self._max_distance: Optional[float] = None
+        self.similarity_threshold = similarity_threshold
         
         # Ensure the persist directory exists
         os.makedirs(persist_directory, exist_ok=True)
+    
+    @property
+    def similarity_threshold(self) -> Optional[float]:
+        """Minimum cosine similarity of a returned chunk, or None for no cut-off."""
+        return self._similarity_threshold
+    
+    @similarity_threshold.setter
+    def similarity_threshold(self, threshold: Optional[float]) -> None:
+        if threshold is not None:
+            if self.metric != "cosine":
+                raise ValueError("A similarity threshold requires the cosine metric")
+            if not -1.0 <= threshold <= 1.0:
+                raise ValueError("similarity_threshold must be between -1 and 1")
+        self._similarity_threshold = threshold
+        # Results are sorted by distance, so the cut-off is one comparison per search
+        self._max_distance = 2.0 * (1.0 - threshold) if threshold is not None else None
+    
+    def _get_projection(self) -> Optional[PCAProjection]:
+        """The projection fitted to this collection, loaded on first use."""
+        if not self._projection_loaded:
+            projection_path = self._projection_path()
+            if self._projection is None and os.path.exists(projection_path):
+                self._projection = PCAProjection.load(projection_path)
+            self._projection_loaded = True
+        return self._projection
+    
+    def _to_metric_space(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Vectors as stored and searched: projected when this collection has a
+        projection, and unit length in a cosine collection.
+        
+        Full-dimension model vectors are projected; vectors that are already in
+        the reduced space pass through.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        projection = self._get_projection()
+        if projection is not None and vectors.shape[-1] == projection.input_dimension:
+            vectors = projection.transform(vectors)
+        if self.metric == "cosine":
+            return unit_rows(vectors)
+        return vectors
+    
+    def _query_vector(self, query: str) -> np.ndarray:
+        return self._to_metric_space(self._embedding_service().generate_embedding_array(query))
+    
+    def _threshold_cut(self, distances: List[float]) -> int:
+        """Number of leading (ascending) distances within the similarity threshold."""
+        if self._max_distance is None:
+            return len(distances)
+        return bisect.bisect_right(distances, self._max_distance)
+    
+    def _within_threshold(self, result: SearchResult) -> SearchResult:
+        """Drop the results below the similarity threshold."""
+        documents, metadatas, distances = result
+        cut = self._threshold_cut(distances)
+        if cut == len(distances):
+            return result
+        return documents[:cut], metadatas[:cut], distances[:cut]
         
+    def _bump_generation(self) -> None:
+        """Invalidate cached search results after a write to the collection."""
+        self._generation += 1
+    
+    def get_search_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Counters of the search result cache, or None when it is disabled."""
+        if self._result_cache is None:
+            return None
+        return {**self._result_cache.get_stats(), "generation": self._generation}
+    
     def _get_client(self) -> chromadb.Client:
-        """Get or create the ChromaDB client."""
-        if self._client is None:
+        """Get or create the ChromaDB client (or the NumPy store standing in for it)."""
+        if self._client is None and self.backend == "numpy":
+            path = os.path.join(self.persist_directory, "numpy")
+            logger.info(f"Initializing NumPy vector store at: {path}")
+            self._client = NumpyVectorStore(path)
+        elif self._client is None:
             logger.info(f"Initializing ChromaDB client with persist directory: {self.persist_directory}")
             self._client = chromadb.PersistentClient(
                 path=self.persist_directory,
@@ -46,74 +262,648 @@ class VectorDBService:
             )
         return self._client
     
+    def _embedding_service(self) -> EmbeddingService:
+        """Embedding service for the model this collection was built with."""
+        return get_embedding_service(self.embedding_model)
+    
+    def _embedding_function(self) -> embedding_functions.EmbeddingFunction:
+        """Create a Chroma embedding function backed by our embedding service."""
+        # Use our custom embedding service
+        embedding_service = self._embedding_service()
+        
+        # Applies this collection's projection, so documents and queries share its space
+        to_metric_space = self._to_metric_space
+        
+        # Create a custom embedding function that uses our service
+        class CustomEmbeddingFunction(embedding_functions.EmbeddingFunction):
+            def __init__(self):
+                pass
+                
+            def __call__(self, input: List[str]) -> List[np.ndarray]:
+                # Single-text calls are queries; route them through the query LRU
+                if len(input) == 1:
+                    return [to_metric_space(embedding_service.generate_embedding_array(input[0]))]
+                # Rows of one float32 matrix; Chroma consumes them without list conversion
+                return list(to_metric_space(embedding_service.generate_embeddings_array(input)))
+        
+        return CustomEmbeddingFunction()
+    
     def _get_collection(self) -> chromadb.Collection:
         """Get or create the component datasheets collection."""
         if self._collection is None:
             client = self._get_client()
-            
-            # Use our custom embedding service
-            embedding_service = get_embedding_service()
-            
-            # Create a custom embedding function that uses our service
-            class CustomEmbeddingFunction(embedding_functions.EmbeddingFunction):
-                def __init__(self):
-                    pass
-                    
-                def __call__(self, input: List[str]) -> List[List[float]]:
-                    return embedding_service.generate_embeddings(input)
+            embedding_function = self._embedding_function()
             
             try:
-                self._collection = client.get_collection(
+                collection = client.get_collection(
                     name=self.collection_name,
-                    embedding_function=CustomEmbeddingFunction()
+                    embedding_function=embedding_function
                 )
                 logger.info(f"Retrieved existing collection: {self.collection_name}")
             except Exception:
                 # Collection doesn't exist, create it
                 self._collection = client.create_collection(
                     name=self.collection_name,
-                    embedding_function=CustomEmbeddingFunction(),
-                    metadata={"description": "Component datasheet chunks with embeddings"}
+                    embedding_function=embedding_function,
+                    metadata={
+                        "description": "Component datasheet chunks with embeddings",
+                        "embedding_model": self.embedding_model,
+                        "metric": self.metric
+                    }
                 )
                 logger.info(f"Created new collection: {self.collection_name}")
+            else:
+                # Vectors from different models are not comparable
+                recorded_model = (collection.metadata or {}).get("embedding_model")
+                # Collections created before models were recorded carry no name
+                if isinstance(recorded_model, str) and recorded_model != self.embedding_model:
+                    raise ValueError(
+                        f"Collection {self.collection_name} was embedded with {recorded_model}, "
+                        f"not {self.embedding_model}"
+                    )
+                # Collections created before metrics were recorded hold vectors as embedded
+                recorded_metric = (collection.metadata or {}).get("metric")
+                if not isinstance(recorded_metric, str):
+                    recorded_metric = "l2"
+                if recorded_metric != self.metric:
+                    raise ValueError(
+                        f"Collection {self.collection_name} uses the {recorded_metric} metric, not {self.metric}"
+                    )
+                self._collection = collection
                 
         return self._collection
     
+    def _projection_path(self) -> str:
+        return os.path.join(self.persist_directory, f"{self.collection_name}.projection.npz")
+    
+    def _quantized_index_path(self) -> str:
+        return os.path.join(
+            self.persist_directory, f"{self.collection_name}.{self.vector_precision}.npz"
+        )
+    
+    def _quantized_dirty_path(self) -> str:
+        # Present while the saved index lags the collection
+        return f"{self._quantized_index_path()}.dirty"
+    
+    def _lexical_index_path(self) -> str:
+        return os.path.join(self.persist_directory, f"{self.collection_name}.bm25.jsonl")
+    
+    def _component_index_path(self) -> str:
+        return os.path.join(self.persist_directory, f"{self.collection_name}.components.jsonl")
+    
+    def _open_secondary_index(
+        self,
+        path: str,
+        factory: Callable[[str], Any],
+        add_batch: Callable[[Any, List[str], List[str], List[Dict[str, Any]]], None]
+    ) -> Any:
+        """
+        Open a log-backed index, building it from the collection if it is missing.
+        
+        Called with _index_lock held, so a concurrent first use cannot build
+        into the same temporary log.
+        """
+        if os.path.exists(path):
+            return factory(path)
+        # Build under a temporary name so an interrupted build is not mistaken for a full one
+        temp_path = f"{path}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        index = factory(temp_path)
+        doc_ids: List[str] = []
+        documents: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        for doc_id, document, metadata in self.iter_documents():
+            doc_ids.append(doc_id)
+            documents.append(document)
+            metadatas.append(metadata)
+            if len(doc_ids) >= 1000:
+                add_batch(index, doc_ids, documents, metadatas)
+                doc_ids, documents, metadatas = [], [], []
+        add_batch(index, doc_ids, documents, metadatas)
+        os.replace(temp_path, path)
+        index.path = path
+        logger.info(f"Built {type(index).__name__} over {len(index)} chunks")
+        return index
+    
+    def _get_lexical_index(self) -> BM25Index:
+        """Load the BM25 index, building it from the collection if it is missing."""
+        with self._index_lock:
+            if self._lexical_index is None:
+                self._lexical_index = self._open_secondary_index(
+                    self._lexical_index_path(),
+                    BM25Index,
+                    lambda index, doc_ids, documents, _: index.add(doc_ids, documents)
+                )
+            return self._lexical_index
+    
+    def _get_component_index(self) -> ComponentIndex:
+        """Load the MPN/manufacturer/datasheet index, building it from the collection if it is missing."""
+        with self._index_lock:
+            if self._component_index is None:
+                self._component_index = self._open_secondary_index(
+                    self._component_index_path(),
+                    ComponentIndex,
+                    lambda index, doc_ids, _, metadatas: index.add(doc_ids, metadatas)
+                )
+            return self._component_index
+    
+    def _index_chunks(self, doc_ids: List[str], texts: List[str], metadata_list: List[Dict[str, Any]]) -> None:
+        """Mirror written chunks into the secondary indexes that have been built."""
+        # Until first use builds an index from the collection, there is nothing to update.
+        # The chunks are already stored, so a build in progress either reads them or
+        # finishes before this check and gets them added here.
+        with self._index_lock:
+            if self._lexical_index is not None or os.path.exists(self._lexical_index_path()):
+                self._get_lexical_index().add(doc_ids, texts)
+            if self._component_index is not None or os.path.exists(self._component_index_path()):
+                self._get_component_index().add(doc_ids, metadata_list)
+    
+    def _get_quantized_index(self) -> QuantizedVectorIndex:
+        """Load the reduced-precision index, building it from Chroma if it is missing."""
+        with self._index_lock:
+            if self._quantized_index is None:
+                path = self._quantized_index_path()
+                # An index left unsaved by a process that did not flush is rebuilt
+                if os.path.exists(path) and not os.path.exists(self._quantized_dirty_path()):
+                    self._quantized_index = QuantizedVectorIndex.load(path)
+                else:
+                    index = QuantizedVectorIndex(self.vector_precision)
+                    existing = self._get_collection().get(include=["embeddings"])
+                    if existing["ids"]:
+                        index.add(existing["ids"], np.asarray(existing["embeddings"], dtype=np.float32))
+                        index.save(path)
+                        logger.info(f"Built {self.vector_precision} index over {len(index)} vectors")
+                    if os.path.exists(self._quantized_dirty_path()):
+                        os.remove(self._quantized_dirty_path())
+                    self._quantized_index = index
+            return self._quantized_index
+    
     def add_document_chunks(
         self, 
         chunks: List[str], 
-        metadata_list: List[Dict[str, Any]]
+        metadata_list: List[Dict[str, Any]],
+        embeddings: Optional[np.ndarray] = None,
+        worker_pool: Optional[EmbeddingWorkerPool] = None
     ) -> List[str]:
         """
-        Add document chunks to the vector database.
+        Add document chunks to the vector database with upsert semantics.
         
         Args:
             chunks: List of text chunks to add
             metadata_list: List of metadata dictionaries for each chunk
+            embeddings: Optional precomputed embeddings, one row per chunk; when
+                omitted the collection's embedding function computes them
+            worker_pool: Optional worker pool that embeds batches of large writes
             
         Returns:
-            List of document IDs that were added
+            List of document IDs, one per chunk; chunks whose ID is already
+            stored (identical content) are not re-embedded, but their metadata
+            is updated where it differs
         """
         if len(chunks) != len(metadata_list):
             raise ValueError("Number of chunks must match number of metadata entries")
+        if embeddings is not None and len(embeddings) != len(chunks):
+            raise ValueError("Number of embeddings must match number of chunks")
             
         collection = self._get_collection()
         
-        # Generate unique IDs for each chunk
-        doc_ids = [str(uuid.uuid4()) for _ in chunks]
+        # Content-derived IDs make re-ingestion idempotent
+        all_ids = self.chunk_ids(chunks, metadata_list)
+        new_positions = self.find_new_chunks(all_ids)
+        new_ids = {all_ids[i] for i in new_positions}
+        stored_positions = [i for i, doc_id in enumerate(all_ids) if doc_id not in new_ids]
+        if stored_positions:
+            self.update_metadata(
+                [all_ids[i] for i in stored_positions],
+                [metadata_list[i] for i in stored_positions]
+            )
+        if not new_positions:
+            logger.info(f"All {len(chunks)} document chunks are already stored")
+            return all_ids
+        if len(new_positions) < len(chunks):
+            logger.info(f"Skipping {len(chunks) - len(new_positions)} already stored chunks")
+            chunks = [chunks[i] for i in new_positions]
+            metadata_list = [metadata_list[i] for i in new_positions]
+            if embeddings is not None:
+                embeddings = np.asarray(embeddings)[new_positions]
+        doc_ids = [all_ids[i] for i in new_positions]
+        
+        # Precomputed full-dimension vectors must land in the projected space
+        if embeddings is not None:
+            embeddings = self._to_metric_space(embeddings)
+        
+        if len(chunks) > self.write_batch_size:
+            try:
+                self._add_pipelined(collection, doc_ids, chunks, metadata_list, embeddings, worker_pool)
+            finally:
+                self._bump_generation()
+            return all_ids
+        
+        # The reduced-precision index needs the vectors, so compute them up front
+        if embeddings is None and self.vector_precision != "float32":
+            embeddings = self._to_metric_space(self._embedding_service().generate_embeddings_array(chunks))
         
         try:
-            collection.add(
-                documents=chunks,
-                metadatas=metadata_list,
-                ids=doc_ids
-            )
+            if embeddings is None:
+                collection.upsert(
+                    documents=chunks,
+                    metadatas=metadata_list,
+                    ids=doc_ids
+                )
+            else:
+                collection.upsert(
+                    documents=chunks,
+                    metadatas=metadata_list,
+                    embeddings=list(np.asarray(embeddings, dtype=np.float32)),
+                    ids=doc_ids
+                )
+                self._index_vectors(doc_ids, embeddings)
+            self._index_chunks(doc_ids, chunks, metadata_list)
             logger.info(f"Added {len(chunks)} document chunks to vector database")
-            return doc_ids
+            return all_ids
+            
+        except Exception as e:
+            logger.error(f"Failed to add document chunks: {e}")
+            raise
+        finally:
+            # Bumped even after a failed write, which may have stored part of the batch
+            self._bump_generation()
+    
+    def chunk_ids(self, chunks: List[str], metadata_list: List[Dict[str, Any]]) -> List[str]:
+        """Deterministic IDs for chunks (see make_chunk_ids)."""
+        return make_chunk_ids(chunks, metadata_list)
+    
+    def find_new_chunks(self, doc_ids: List[str]) -> List[int]:
+        """
+        Positions of IDs that are not stored yet, keeping the first of any repeats.
+        
+        Because IDs include a hash of the chunk text, a stored ID means the
+        same content is already indexed and need not be embedded again.
+        
+        Args:
+            doc_ids: Chunk IDs from chunk_ids()
             
+        Returns:
+            Positions in doc_ids that still need to be written
+        """
+        if not doc_ids:
+            return []
+        unique_ids = list(dict.fromkeys(doc_ids))
+        collection = self._get_collection()
+        existing = set()
+        for start in range(0, len(unique_ids), _ID_LOOKUP_BATCH):
+            batch = unique_ids[start:start + _ID_LOOKUP_BATCH]
+            existing.update(collection.get(ids=batch, include=[])["ids"])
+        
+        new_positions = []
+        seen = set()
+        for position, doc_id in enumerate(doc_ids):
+            if doc_id in existing or doc_id in seen:
+                continue
+            seen.add(doc_id)
+            new_positions.append(position)
+        return new_positions
+    
+    def _add_pipelined(
+        self,
+        collection: chromadb.Collection,
+        doc_ids: List[str],
+        chunks: List[str],
+        metadata_list: List[Dict[str, Any]],
+        embeddings: Optional[np.ndarray],
+        worker_pool: Optional[EmbeddingWorkerPool]
+    ) -> None:
+        """
+        Write chunks in batches, embedding the next batch in the background while
+        the current one is persisted.
+        
+        The embedded Chroma client holds the GIL while it writes, so in-process
+        embedding only overlaps with the Python side of each write; a worker
+        pool embeds in other processes and overlaps fully.
+        """
+        embedding_service = self._embedding_service()
+        embedder = worker_pool or embedding_service
+        batch_size = self.write_batch_size
+        starts = list(range(0, len(chunks), batch_size))
+        start_time = time.perf_counter()
+        embed_seconds = [0.0]
+        write_seconds = 0.0
+        
+        def embed(start: int) -> np.ndarray:
+            embed_start = time.perf_counter()
+            if embeddings is not None:
+                vectors = np.asarray(embeddings[start:start + batch_size], dtype=np.float32)
+            else:
+                batch = chunks[start:start + batch_size]
+                vectors = self._to_metric_space(embedder.generate_embeddings_array(batch))
+                if len(vectors) != len(batch):
+                    raise ValueError("Cannot embed empty chunks")
+            embed_seconds[0] += time.perf_counter() - embed_start
+            return vectors
+        
+        try:
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-db-embedder") as executor:
+                next_vectors: Future = executor.submit(embed, starts[0])
+                for position, start in enumerate(starts):
+                    vectors = next_vectors.result()
+                    # Only one batch is prefetched, so at most two are held at once
+                    if position + 1 < len(starts):
+                        next_vectors = executor.submit(embed, starts[position + 1])
+                    
+                    write_start = time.perf_counter()
+                    end = start + len(vectors)
+                    collection.upsert(
+                        documents=chunks[start:end],
+                        metadatas=metadata_list[start:end],
+                        embeddings=list(vectors),
+                        ids=doc_ids[start:end]
+                    )
+                    self._index_vectors(doc_ids[start:end], vectors, save=False)
+                    self._index_chunks(doc_ids[start:end], chunks[start:end], metadata_list[start:end])
+                    write_seconds += time.perf_counter() - write_start
+            self._save_quantized_index(force=False)
         except Exception as e:
             logger.error(f"Failed to add document chunks: {e}")
             raise
+        
+        elapsed = time.perf_counter() - start_time
+        self._last_write_stats = {
+            "chunks": len(chunks),
+            "batches": len(starts),
+            "seconds": elapsed,
+            "chunks_per_second": len(chunks) / elapsed if elapsed > 0 else 0.0,
+            "embed_seconds": embed_seconds[0],
+            "write_seconds": write_seconds,
+        }
+        logger.info(
+            f"Added {len(chunks)} document chunks to vector database in {len(starts)} batches "
+            f"({self._last_write_stats['chunks_per_second']:.0f} chunks/s)"
+        )
+    
+    def get_write_stats(self) -> Optional[Dict[str, Any]]:
+        """Get throughput statistics for the most recent pipelined bulk write."""
+        return self._last_write_stats
+    
+    def _index_vectors(self, doc_ids: List[str], embeddings: np.ndarray, save: bool = True) -> None:
+        """Mirror written vectors into the reduced-precision index, if enabled."""
+        if self.vector_precision == "float32":
+            return
+        with self._index_lock:
+            self._get_quantized_index().add(doc_ids, embeddings)
+            self._mark_quantized_dirty(len(doc_ids))
+            if save:
+                self._save_quantized_index(force=False)
+    
+    def _mark_quantized_dirty(self, rows: int) -> None:
+        """Record rows changed in memory but not yet saved."""
+        with self._index_lock:
+            if not self._quantized_dirty_rows and not os.path.exists(self._quantized_dirty_path()):
+                # A crash before the next save leaves the marker, so the stale file is rebuilt
+                open(self._quantized_dirty_path(), "w").close()
+            self._quantized_dirty_rows += rows
+    
+    def _save_quantized_index(self, force: bool = True) -> None:
+        """
+        Save the reduced-precision index if it has unsaved changes.
+        
+        Args:
+            force: Save any change; otherwise save only once the changed rows
+                reach _QUANTIZED_SAVE_MIN_ROWS or _QUANTIZED_SAVE_FRACTION of the
+                index, so a run of small writes costs time linear in its size
+        """
+        # Held across the save so rows added meanwhile are not counted as saved
+        with self._index_lock:
+            index = self._quantized_index
+            if index is None or not self._quantized_dirty_rows:
+                return
+            threshold = max(_QUANTIZED_SAVE_MIN_ROWS, _QUANTIZED_SAVE_FRACTION * len(index))
+            if not force and self._quantized_dirty_rows < threshold:
+                return
+            index.save(self._quantized_index_path())
+            self._quantized_dirty_rows = 0
+            if os.path.exists(self._quantized_dirty_path()):
+                os.remove(self._quantized_dirty_path())
+    
+    def flush(self) -> None:
+        """
+        Persist in-memory index changes.
+        
+        Writes save the reduced-precision index only every so many changed
+        rows; call this before shutting down so the next start need not
+        rebuild it from the collection.
+        """
+        self._save_quantized_index()
+    
+    def iter_documents(
+        self,
+        batch_size: int = 1000,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Iterate over stored chunks, fetching them from Chroma one page at a time.
+        
+        Args:
+            batch_size: Number of chunks fetched per page
+            where: Optional metadata filter conditions
+            
+        Yields:
+            Tuples of (document ID, document text, metadata)
+        """
+        collection = self._get_collection()
+        offset = 0
+        while True:
+            page = collection.get(
+                where=where,
+                limit=batch_size,
+                offset=offset,
+                include=["documents", "metadatas"]
+            )
+            yield from zip(page["ids"], page["documents"], page["metadatas"])
+            if len(page["ids"]) < batch_size:
+                return
+            offset += batch_size
+    
+    def update_embeddings(self, doc_ids: List[str], embeddings: np.ndarray, save: bool = True) -> None:
+        """
+        Replace the stored vectors of existing chunks.
+        
+        Args:
+            doc_ids: IDs of the chunks to update
+            embeddings: New embeddings, one row per ID
+            save: Persist the reduced-precision index after the update
+        """
+        embeddings = self._to_metric_space(embeddings)
+        if len(embeddings) != len(doc_ids):
+            raise ValueError("Number of embeddings must match number of IDs")
+        
+        try:
+            self._get_collection().update(ids=doc_ids, embeddings=list(embeddings))
+            self._index_vectors(doc_ids, embeddings, save=save)
+        except Exception as e:
+            logger.error(f"Failed to update embeddings: {e}")
+            raise
+        finally:
+            self._bump_generation()
+    
+    def update_metadata(self, doc_ids: List[str], metadata_list: List[Dict[str, Any]]) -> int:
+        """
+        Replace the metadata of stored chunks where it differs.
+        
+        Re-ingesting unchanged text does not re-embed it, so this is how
+        corrected or newly extracted metadata reaches chunks already stored.
+        Unknown IDs are ignored; for a repeated ID the first metadata is used.
+        
+        Args:
+            doc_ids: IDs of the chunks to update
+            metadata_list: Metadata for each chunk
+            
+        Returns:
+            Number of chunks whose metadata changed
+        """
+        if len(doc_ids) != len(metadata_list):
+            raise ValueError("Number of metadata entries must match number of IDs")
+        wanted: Dict[str, Dict[str, Any]] = {}
+        for doc_id, metadata in zip(doc_ids, metadata_list):
+            wanted.setdefault(doc_id, metadata or {})
+        
+        collection = self._get_collection()
+        unique_ids = list(wanted)
+        changed_ids = []
+        for start in range(0, len(unique_ids), _ID_LOOKUP_BATCH):
+            stored = collection.get(ids=unique_ids[start:start + _ID_LOOKUP_BATCH], include=["metadatas"])
+            for doc_id, metadata in zip(stored["ids"], stored["metadatas"]):
+                if (metadata or {}) != wanted[doc_id]:
+                    changed_ids.append(doc_id)
+        if not changed_ids:
+            return 0
+        
+        changed_metadata = [wanted[doc_id] for doc_id in changed_ids]
+        try:
+            for start in range(0, len(changed_ids), self.write_batch_size):
+                end = start + self.write_batch_size
+                collection.update(ids=changed_ids[start:end], metadatas=changed_metadata[start:end])
+            with self._index_lock:
+                if self._component_index is not None or os.path.exists(self._component_index_path()):
+                    self._get_component_index().add(changed_ids, changed_metadata)
+            logger.info(f"Updated metadata of {len(changed_ids)} stored chunks")
+            return len(changed_ids)
+        except Exception as e:
+            logger.error(f"Failed to update metadata: {e}")
+            raise
+        finally:
+            self._bump_generation()
+    
+    def backfill_specs(self, batch_size: int = 1000) -> int:
+        """
+        Add spec fields to chunks stored before ingestion extracted them.
+        
+        Ingestion reads specs from a datasheet's whole text, so the chunks of
+        each datasheet (by file hash) are joined in order and read together.
+        Without the fields a chunk never matches a constrained search.
+        
+        Args:
+            batch_size: Number of chunks fetched per page
+            
+        Returns:
+            Number of chunks updated
+        """
+        # Datasheet -> (chunk_index, ID, text, metadata) of its chunks lacking specs
+        datasheets: Dict[str, List[Tuple[int, str, str, Dict[str, Any]]]] = {}
+        for doc_id, document, metadata in self.iter_documents(batch_size):
+            metadata = metadata or {}
+            if all(field in metadata for field in SPEC_FIELDS):
+                continue
+            file_hash = metadata.get("file_hash")
+            key = file_hash if file_hash and file_hash != "unknown" else doc_id
+            datasheets.setdefault(key, []).append(
+                (int(metadata.get("chunk_index", 0)), doc_id, document or "", metadata)
+            )
+        
+        doc_ids: List[str] = []
+        metadata_list: List[Dict[str, Any]] = []
+        for chunks in datasheets.values():
+            chunks.sort(key=lambda chunk: chunk[0])
+            specs = extract_specs(" ".join(text for _, _, text, _ in chunks))
+            for _, doc_id, _, metadata in chunks:
+                doc_ids.append(doc_id)
+                metadata_list.append({**metadata, **specs})
+        if not doc_ids:
+            return 0
+        
+        updated = self.update_metadata(doc_ids, metadata_list)
+        logger.info(f"Backfilled spec fields of {updated} chunks from {len(datasheets)} datasheets")
+        return updated
+    
+    def write_embedding_stream(self, stream: Iterable[Tuple[List[str], np.ndarray]]) -> int:
+        """
+        Write (ids, embeddings) batches, such as EmbeddingService.embed_stream output.
+        
+        Args:
+            stream: Iterable of (chunk IDs, embeddings) batches for existing chunks
+            
+        Returns:
+            Number of chunks updated
+        """
+        written = 0
+        for doc_ids, embeddings in stream:
+            self.update_embeddings(doc_ids, embeddings, save=False)
+            written += len(doc_ids)
+        # Checked once rather than after every batch
+        self._save_quantized_index(force=False)
+        logger.info(f"Updated embeddings for {written} document chunks")
+        return written
+    
+    def reembed_from(self, source: "VectorDBService", batch_size: int = 256) -> int:
+        """
+        Copy every chunk of another collection into this one, embedding with this
+        collection's model.
+        
+        Chunks are streamed, so only one batch is in memory at a time; chunk IDs
+        are kept and writes are upserts, so an interrupted migration can be rerun.
+        
+        Args:
+            source: Service for the collection to migrate from
+            batch_size: Number of chunks embedded and written per batch
+            
+        Returns:
+            Number of chunks written
+        """
+        collection = self._get_collection()
+        pending: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        
+        def texts() -> Iterator[Tuple[str, str]]:
+            for doc_id, document, metadata in source.iter_documents(batch_size):
+                if document and document.strip():
+                    pending[doc_id] = (document, metadata)
+                    yield doc_id, document
+        
+        written = 0
+        try:
+            for doc_ids, embeddings in self._embedding_service().embed_stream(texts(), batch_size):
+                embeddings = self._to_metric_space(embeddings)
+                documents, metadatas = zip(*(pending.pop(doc_id) for doc_id in doc_ids))
+                collection.upsert(
+                    ids=doc_ids,
+                    documents=list(documents),
+                    metadatas=list(metadatas),
+                    embeddings=list(embeddings)
+                )
+                self._index_vectors(doc_ids, embeddings, save=False)
+                self._index_chunks(doc_ids, list(documents), list(metadatas))
+                written += len(doc_ids)
+            self._save_quantized_index(force=False)
+        except Exception as e:
+            logger.error(f"Failed to re-embed from {source.collection_name}: {e}")
+            raise
+        finally:
+            self._bump_generation()
+        
+        logger.info(
+            f"Re-embedded {written} chunks from {source.collection_name} "
+            f"({source.embedding_model}) into {self.collection_name} ({self.embedding_model})"
+        )
+        return written
     
     def search_similar(
         self, 
@@ -132,6 +922,29 @@ class VectorDBService:
         Returns:
             Tuple of (documents, metadata, distances)
         """
+        if self._result_cache is None:
+            return self._within_threshold(self._search_similar_uncached(query, n_results, where))
+        
+        # Capture the generation first: a write during the search makes the entry stale
+        generation = self._generation
+        key = SearchResultCache.make_key(query, n_results, where)
+        cached = self._result_cache.get(key, generation)
+        if cached is not None:
+            return self._within_threshold(cached)
+        result = self._search_similar_uncached(query, n_results, where)
+        # Cached before the cut-off, so changing the threshold needs no invalidation
+        self._result_cache.put(key, generation, result)
+        return self._within_threshold(result)
+    
+    def _search_similar_uncached(
+        self,
+        query: str,
+        n_results: int,
+        where: Optional[Dict[str, Any]]
+    ) -> SearchResult:
+        if self.vector_precision != "float32":
+            return self._search_quantized(query, n_results, where)
+        
         collection = self._get_collection()
         
         try:
@@ -153,11 +966,753 @@ class VectorDBService:
             logger.error(f"Failed to search similar documents: {e}")
             raise
     
+    def _search_quantized(
+        self, 
+        query: str, 
+        n_results: int,
+        where: Optional[Dict[str, Any]]
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[float]]:
+        """Search the reduced-precision index and fetch documents from Chroma."""
+        query_embedding = self._query_vector(query)
+        return self._search_many_quantized(
+            [(query, where, n_results)], query_embedding[None, :], [[0]]
+        )[0]
+    
+    def _search_many_quantized(
+        self,
+        queries: List[Tuple[str, Optional[Dict[str, Any]], int]],
+        query_embeddings: np.ndarray,
+        groups: List[List[int]]
+    ) -> List[Tuple[List[str], List[Dict[str, Any]], List[float]]]:
+        """Search the reduced-precision index for each query, fetching documents in one call."""
+        collection = self._get_collection()
+        index = self._get_quantized_index()
+        
+        try:
+            hits: List[Tuple[List[str], List[float]]] = [([], [])] * len(queries)
+            for positions in groups:
+                # Resolve each distinct filter once for every query that shares it
+                where = queries[positions[0]][1]
+                allowed_ids = None
+                if where is not None:
+                    allowed_ids = collection.get(where=where, include=[])["ids"]
+                for position in positions:
+                    hits[position] = index.search(
+                        query_embeddings[position], queries[position][2], allowed_ids
+                    )
+            
+            unique_ids = list(dict.fromkeys(doc_id for doc_ids, _ in hits for doc_id in doc_ids))
+            if not unique_ids:
+                return [([], [], []) for _ in queries]
+            
+            fetched = collection.get(ids=unique_ids, include=["documents", "metadatas"])
+            row = {doc_id: i for i, doc_id in enumerate(fetched["ids"])}
+            results = []
+            for doc_ids, distances in hits:
+                # Keep the index ranking; skip IDs Chroma no longer has
+                ranked = [
+                    (row[doc_id], distance)
+                    for doc_id, distance in zip(doc_ids, distances)
+                    if doc_id in row
+                ]
+                results.append((
+                    [fetched["documents"][i] for i, _ in ranked],
+                    [fetched["metadatas"][i] for i, _ in ranked],
+                    [distance for _, distance in ranked],
+                ))
+            
+            logger.info(f"Found similar documents for {len(queries)} queries")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Failed to search similar documents: {e}")
+            raise
+    
+    def search_many(
+        self,
+        queries: List[Tuple[str, Optional[Dict[str, Any]], int]]
+    ) -> List[Tuple[List[str], List[Dict[str, Any]], List[float]]]:
+        """
+        Run several searches with one embedding pass and one query per distinct filter.
+        
+        Args:
+            queries: List of (query text, where filter or None, n_results)
+            
+        Returns:
+            One (documents, metadata, distances) tuple per query, in input order
+        """
+        if not queries:
+            return []
+        if self._result_cache is None:
+            return [self._within_threshold(result) for result in self._search_many_uncached(queries)]
+        
+        generation = self._generation
+        keys = [SearchResultCache.make_key(text, n_results, where) for text, where, n_results in queries]
+        results: List[Optional[SearchResult]] = [self._result_cache.get(key, generation) for key in keys]
+        misses = [position for position, result in enumerate(results) if result is None]
+        if misses:
+            # Only queries without a cached result are embedded and searched
+            fresh = self._search_many_uncached([queries[position] for position in misses])
+            for position, result in zip(misses, fresh):
+                self._result_cache.put(keys[position], generation, result)
+                results[position] = result
+        return [self._within_threshold(result) for result in results]
+    
+    def _search_many_uncached(
+        self,
+        queries: List[Tuple[str, Optional[Dict[str, Any]], int]]
+    ) -> List[SearchResult]:
+        query_embeddings = self._to_metric_space(self._embedding_service().generate_query_embeddings_array(
+            [text for text, _, _ in queries]
+        ))
+        
+        # Queries sharing a filter are answered by the same collection.query call
+        grouped: Dict[str, List[int]] = {}
+        for position, (_, where, _) in enumerate(queries):
+            grouped.setdefault(json.dumps(where, sort_keys=True, default=str), []).append(position)
+        groups = list(grouped.values())
+        
+        if self.vector_precision != "float32":
+            return self._search_many_quantized(queries, query_embeddings, groups)
+        
+        collection = self._get_collection()
+        results: List[Tuple[List[str], List[Dict[str, Any]], List[float]]] = [([], [], [])] * len(queries)
+        
+        try:
+            for positions in groups:
+                n_results = max(queries[position][2] for position in positions)
+                response = collection.query(
+                    query_embeddings=[query_embeddings[position] for position in positions],
+                    n_results=n_results,
+                    where=queries[positions[0]][1]
+                )
+                for row, position in enumerate(positions):
+                    limit = queries[position][2]
+                    results[position] = (
+                        response['documents'][row][:limit] if response['documents'] else [],
+                        response['metadatas'][row][:limit] if response['metadatas'] else [],
+                        response['distances'][row][:limit] if response['distances'] else [],
+                    )
+            
+            logger.info(f"Found similar documents for {len(queries)} queries in {len(groups)} batches")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Failed to search similar documents: {e}")
+            raise
+    
+    def search_diverse(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        lambda_mult: float = 0.5,
+        fetch_k: Optional[int] = None
+    ) -> SearchResult:
+        """
+        Search for similar chunks, re-ranked by maximal marginal relevance.
+        
+        fetch_k candidates are fetched with their stored vectors in one query
+        and re-ranked in memory (see maximal_marginal_relevance), so near-
+        duplicate overlapping chunks do not use up the n_results budget.
+        Results are not cached.
+        
+        Args:
+            query: Search query text
+            n_results: Number of results to return
+            where: Optional metadata filter conditions
+            lambda_mult: Relevance/diversity trade-off; 1 keeps the plain ranking
+            fetch_k: Candidates fetched for re-ranking (default 4 * n_results)
+            
+        Returns:
+            Tuple of (documents, metadata, distances) in MMR order
+        """
+        fetch_k = fetch_k if fetch_k is not None else 4 * n_results
+        query_embedding = self._query_vector(query)
+        collection = self._get_collection()
+        
+        try:
+            if self.vector_precision != "float32":
+                allowed_ids = collection.get(where=where, include=[])["ids"] if where is not None else None
+                doc_ids, candidate_distances = self._get_quantized_index().search(
+                    query_embedding, fetch_k, allowed_ids
+                )
+                fetched = collection.get(ids=doc_ids, include=["documents", "metadatas", "embeddings"])
+                row = {doc_id: i for i, doc_id in enumerate(fetched["ids"])}
+                # Keep the index ranking; skip IDs the collection no longer has
+                ranked = [(row[doc_id], distance) for doc_id, distance in zip(doc_ids, candidate_distances)
+                          if doc_id in row]
+                rows = [i for i, _ in ranked]
+                documents = [fetched["documents"][i] for i in rows]
+                metadatas = [fetched["metadatas"][i] for i in rows]
+                distances = [distance for _, distance in ranked]
+                vectors = np.asarray(fetched["embeddings"], dtype=np.float32)[rows] if rows else None
+            else:
+                results = collection.query(
+                    query_embeddings=[query_embedding],
+                    n_results=fetch_k,
+                    where=where,
+                    include=["documents", "metadatas", "distances", "embeddings"]
+                )
+                documents = results["documents"][0] if results["documents"] else []
+                metadatas = results["metadatas"][0] if results["metadatas"] else []
+                distances = results["distances"][0] if results["distances"] else []
+                vectors = np.asarray(results["embeddings"][0], dtype=np.float32) if documents else None
+        except Exception as e:
+            logger.error(f"Failed to search similar documents: {e}")
+            raise
+        
+        # Candidates below the similarity threshold are never re-ranked
+        cut = self._threshold_cut(distances)
+        if not cut:
+            return [], [], []
+        documents, metadatas, distances, vectors = documents[:cut], metadatas[:cut], distances[:cut], vectors[:cut]
+        order = maximal_marginal_relevance(query_embedding, vectors, n_results, lambda_mult)
+        logger.info(f"Selected {len(order)} of {len(documents)} candidates by MMR")
+        return (
+            [documents[i] for i in order],
+            [metadatas[i] for i in order],
+            [distances[i] for i in order],
+        )
+    
+    def calibrate_similarity_threshold(
+        self,
+        queries: List[str],
+        target_recall: float = 0.95,
+        where: Optional[Dict[str, Any]] = None
+    ) -> float:
+        """
+        Set the similarity threshold from queries the collection should answer.
+        
+        Each query's best match is found without a cut-off, and the threshold
+        is placed so that target_recall of them keep it. A later query whose
+        best match scores below that returns nothing, so callers get a fast
+        "no candidate found" instead of weak matches.
+        
+        Args:
+            queries: Representative queries that have a relevant chunk stored
+            target_recall: Share of those queries that must keep their best match
+            where: Optional metadata filter the searches will use
+        
+        Returns:
+            The similarity threshold now in effect
+        """
+        if self.metric != "cosine":
+            raise ValueError("A similarity threshold requires the cosine metric")
+        if not 0.0 < target_recall <= 1.0:
+            raise ValueError("target_recall must be greater than 0 and at most 1")
+        
+        results = self._search_many_uncached([(query, where, 1) for query in queries]) if queries else []
+        best = [similarity_from_distance(distances[0]) for _, _, distances in results if distances]
+        if not best:
+            raise ValueError("No calibration query found a match")
+        
+        # A little slack so the weakest kept match survives float rounding
+        threshold = float(np.quantile(best, 1.0 - target_recall, method="lower")) - 1e-6
+        self.similarity_threshold = max(threshold, -1.0)
+        logger.info(
+            f"Calibrated similarity threshold {self.similarity_threshold:.4f} "
+            f"from {len(best)} queries (target recall {target_recall:.0%})"
+        )
+        return self.similarity_threshold
+    
+    def fit_projection(self, n_components: int, sample_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fit a PCA projection to the stored chunks and re-index them in the reduced space.
+        
+        Chroma fixes a collection's dimension, so the chunks are written to a new
+        collection with projected vectors which then replaces the current one.
+        Full-dimension vectors come from the embedding cache where available.
+        
+        Args:
+            n_components: Dimension of the projected vectors (e.g. 128 or 64)
+            sample_size: Optional number of chunks to fit on (all chunks by default)
+            
+        Returns:
+            Projection statistics
+        """
+        collection = self._get_collection()
+        existing = collection.get(include=["documents", "metadatas"])
+        doc_ids = existing["ids"]
+        if not doc_ids:
+            raise ValueError("Cannot fit a projection on an empty collection")
+        
+        embedding_service = self._embedding_service()
+        vectors = embedding_service.generate_embeddings_array(existing["documents"])
+        if len(vectors) != len(doc_ids):
+            raise ValueError("Every stored chunk must have non-empty text to fit a projection")
+        
+        sample = vectors
+        if sample_size is not None and sample_size < len(vectors):
+            rows = np.random.default_rng(0).choice(len(vectors), sample_size, replace=False)
+            sample = vectors[rows]
+        projection = PCAProjection.fit(sample, n_components)
+        projected = self._to_metric_space(projection.transform(vectors))
+        
+        # Build the replacement before touching the live collection
+        client = self._get_client()
+        rebuild_name = f"{self.collection_name}_rebuild"
+        try:
+            client.delete_collection(name=rebuild_name)
+        except Exception:
+            pass
+        rebuilt = client.create_collection(
+            name=rebuild_name,
+            embedding_function=self._embedding_function(),
+            metadata=collection.metadata
+        )
+        batch_size = client.get_max_batch_size()
+        for start in range(0, len(doc_ids), batch_size):
+            end = start + batch_size
+            rebuilt.add(
+                ids=doc_ids[start:end],
+                documents=existing["documents"][start:end],
+                metadatas=existing["metadatas"][start:end],
+                embeddings=list(projected[start:end])
+            )
+        
+        try:
+            self.delete_collection()
+            rebuilt.modify(name=self.collection_name)
+            projection.save(self._projection_path())
+            self._projection = projection
+            self._projection_loaded = True
+            self._bump_generation()
+            
+            if self.vector_precision != "float32":
+                index = QuantizedVectorIndex(self.vector_precision)
+                index.add(doc_ids, projected)
+                with self._index_lock:
+                    index.save(self._quantized_index_path())
+                    self._quantized_index = index
+            
+            logger.info(
+                f"Re-indexed {len(doc_ids)} chunks with a "
+                f"{projection.input_dimension}->{projection.output_dimension} projection"
+            )
+            return projection.get_stats()
+            
+        except Exception as e:
+            logger.error(f"Failed to replace collection with projected vectors: {e}")
+            raise
+    
+    def hybrid_search(
+        self,
+        query: str,
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        candidates: int = 50,
+        rrf_k: int = 60
+    ) -> Tuple[List[str], List[Dict[str, Any]], List[float]]:
+        """
+        Search by fusing BM25 and vector rankings with reciprocal rank fusion.
+        
+        A query that looks like a single part number (e.g. "TMP117") is answered
+        from the lexical index alone, without embedding it; if no chunk contains
+        it, the vector ranking is used after all.
+        
+        Args:
+            query: Search query text
+            n_results: Number of results to return
+            where: Optional metadata filter conditions
+            candidates: Number of results taken from each ranking before fusion
+            rrf_k: Reciprocal rank fusion damping constant
+            
+        Returns:
+            Tuple of (documents, metadata, fused scores), best first
+        """
+        collection = self._get_collection()
+        
+        try:
+            allowed_ids = None
+            if where:
+                allowed_ids = collection.get(where=where, include=[])["ids"]
+            lexical_ids, _ = self._get_lexical_index().search(query, candidates, allowed_ids)
+            rankings = [lexical_ids]
+            if not (lexical_ids and looks_like_part_number(query)):
+                rankings.append(self._vector_candidate_ids(query, candidates, where, allowed_ids))
+            
+            fused = reciprocal_rank_fusion(rankings, rrf_k)[:n_results]
+            if not fused:
+                return [], [], []
+            doc_ids = [doc_id for doc_id, _ in fused]
+            stored = collection.get(ids=doc_ids, include=["documents", "metadatas"])
+            by_id = {
+                doc_id: (document, metadata)
+                for doc_id, document, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+            }
+            
+            documents, metadatas, scores = [], [], []
+            for doc_id, score in fused:
+                if doc_id in by_id:
+                    documents.append(by_id[doc_id][0])
+                    metadatas.append(by_id[doc_id][1])
+                    scores.append(score)
+            logger.info(f"Found {len(documents)} documents for hybrid query from {len(rankings)} rankings")
+            return documents, metadatas, scores
+            
+        except Exception as e:
+            logger.error(f"Failed to run hybrid search: {e}")
+            raise
+    
+    def _vector_candidate_ids(
+        self,
+        query: str,
+        k: int,
+        where: Optional[Dict[str, Any]],
+        allowed_ids: Optional[List[str]]
+    ) -> List[str]:
+        """IDs of the k nearest chunks to the query, best first."""
+        if self.vector_precision != "float32":
+            if allowed_ids is not None and not allowed_ids:
+                return []
+            embedding = self._query_vector(query)
+            doc_ids, _ = self._get_quantized_index().search(embedding, k, allowed_ids)
+            return list(doc_ids)
+        results = self._get_collection().query(query_texts=[query], n_results=k, where=where, include=[])
+        return results["ids"][0] if results["ids"] else []
+    
+    def get_component_chunks(self, mpn: str) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """
+        Get every stored chunk of a part by exact MPN, without a vector query.
+        
+        Args:
+            mpn: Manufacturer part number (matched case-insensitively)
+            
+        Returns:
+            Tuple of (documents, metadata), in chunk order
+        """
+        doc_ids = self._get_component_index().chunks_for_mpn(mpn)
+        if not doc_ids:
+            return [], []
+        stored = self._get_collection().get(ids=doc_ids, include=["documents", "metadatas"])
+        chunks = sorted(
+            zip(stored["documents"], stored["metadatas"]),
+            key=lambda chunk: (chunk[1] or {}).get("chunk_index", 0)
+        )
+        return [document for document, _ in chunks], [metadata for _, metadata in chunks]
+    
+    def has_component(self, mpn: str) -> bool:
+        """Whether any chunk of a part is stored."""
+        return self._get_component_index().has_mpn(mpn)
+    
+    def list_components(self, manufacturer: str) -> List[str]:
+        """MPNs of a manufacturer's parts with stored datasheet chunks."""
+        return self._get_component_index().mpns_for_manufacturer(manufacturer)
+    
+    def _matching_chunk_ids(
+        self,
+        file_hash: Optional[str] = None,
+        mpn: Optional[str] = None,
+        source_path: Optional[str] = None
+    ) -> List[str]:
+        """IDs of the chunks matching exactly one of file_hash, mpn or source_path."""
+        criteria = [value for value in (file_hash, mpn, source_path) if value is not None]
+        if len(criteria) != 1:
+            raise ValueError("Exactly one of file_hash, mpn or source_path must be given")
+        if file_hash is not None:
+            return self._get_component_index().chunks_for_file(file_hash)
+        if mpn is not None:
+            return self._get_component_index().chunks_for_mpn(mpn)
+        # Source paths are not indexed, so they are matched with a metadata filter
+        return self._get_collection().get(where={"source_path": source_path}, include=[])["ids"]
+    
+    def _delete_chunks(self, doc_ids: List[str]) -> None:
+        """
+        Delete chunks from the collection and every index.
+        
+        The stores only tombstone deleted vectors, so queries stop seeing them
+        at once; their space is reclaimed by compaction (see compact).
+        """
+        try:
+            self._get_collection().delete(ids=doc_ids)
+            with self._index_lock:
+                if self._component_index is not None or os.path.exists(self._component_index_path()):
+                    self._get_component_index().remove(doc_ids)
+                if self._lexical_index is not None or os.path.exists(self._lexical_index_path()):
+                    self._get_lexical_index().remove(doc_ids)
+                if self.vector_precision != "float32":
+                    self._get_quantized_index().remove(doc_ids)
+                    self._mark_quantized_dirty(len(doc_ids))
+                    self._save_quantized_index(force=False)
+        finally:
+            self._bump_generation()
+        self._schedule_compaction()
+    
+    def delete_by(
+        self,
+        file_hash: Optional[str] = None,
+        mpn: Optional[str] = None,
+        source_path: Optional[str] = None
+    ) -> int:
+        """
+        Delete the chunks of one datasheet file, part or source path.
+        
+        Exactly one criterion must be given. Datasheet and part lookups go
+        through the component index, so no vector query is needed.
+        
+        Args:
+            file_hash: SHA-256 of a datasheet file, as recorded in chunk metadata
+            mpn: Manufacturer part number, matched case-insensitively
+            source_path: Path the datasheet was ingested from
+            
+        Returns:
+            Number of chunks deleted
+        """
+        doc_ids = self._matching_chunk_ids(file_hash, mpn, source_path)
+        if not doc_ids:
+            return 0
+        criterion = file_hash or mpn or source_path
+        try:
+            self._delete_chunks(doc_ids)
+            logger.info(f"Deleted {len(doc_ids)} chunks of {criterion}")
+            return len(doc_ids)
+        except Exception as e:
+            logger.error(f"Failed to delete chunks of {criterion}: {e}")
+            raise
+    
+    def delete_datasheet(self, file_hash: str) -> int:
+        """
+        Delete every chunk ingested from one datasheet file.
+        
+        Args:
+            file_hash: SHA-256 of the datasheet file, as recorded in chunk metadata
+            
+        Returns:
+            Number of chunks deleted
+        """
+        return self.delete_by(file_hash=file_hash)
+    
+    def replace_datasheet(
+        self,
+        chunks: List[str],
+        metadata_list: List[Dict[str, Any]],
+        embeddings: Optional[Any] = None,
+        worker_pool: Optional[EmbeddingWorkerPool] = None,
+        file_hash: Optional[str] = None,
+        mpn: Optional[str] = None,
+        source_path: Optional[str] = None
+    ) -> List[str]:
+        """
+        Add the chunks of a new datasheet revision and delete the ones it supersedes.
+        
+        The superseded chunks are selected as in delete_by. The new chunks are
+        written first, so the part never drops out of search; chunks unchanged
+        between revisions keep their IDs and are not deleted.
+        
+        Args:
+            chunks: Text chunks of the new revision
+            metadata_list: Metadata for each chunk
+            embeddings: Optional precomputed embeddings, one row per chunk
+            worker_pool: Optional worker pool that embeds batches of large writes
+            file_hash: File hash of the superseded revision
+            mpn: Part whose existing chunks are superseded
+            source_path: Source path of the superseded revision
+            
+        Returns:
+            List of document IDs of the new revision, in input order
+        """
+        superseded = self._matching_chunk_ids(file_hash, mpn, source_path)
+        doc_ids = self.add_document_chunks(chunks, metadata_list, embeddings=embeddings, worker_pool=worker_pool)
+        kept = set(doc_ids)
+        stale = [doc_id for doc_id in superseded if doc_id not in kept]
+        if stale:
+            try:
+                self._delete_chunks(stale)
+            except Exception as e:
+                logger.error(f"Failed to delete superseded chunks of {file_hash or mpn or source_path}: {e}")
+                raise
+        logger.info(f"Replaced {len(superseded)} chunks of {file_hash or mpn or source_path} with {len(doc_ids)}")
+        return doc_ids
+    
+    def _dead_fraction(self) -> float:
+        """Largest share of dead entries across the stores that keep them."""
+        fractions = []
+        if self.backend == "numpy":
+            stats = self._get_collection().get_stats()
+            if stats["rows"]:
+                fractions.append(stats["dead_rows"] / stats["rows"])
+        if self._lexical_index is not None:
+            stats = self._lexical_index.get_stats()
+            slots = stats["documents"] + stats["dead_slots"]
+            if slots:
+                fractions.append(stats["dead_slots"] / slots)
+        if self._component_index is not None:
+            stats = self._component_index.get_stats()
+            records = stats["chunks"] + stats["dead_log_records"]
+            if records:
+                fractions.append(stats["dead_log_records"] / records)
+        return max(fractions, default=0.0)
+    
+    def _schedule_compaction(self) -> None:
+        """Start a background compaction once dead entries pass the threshold."""
+        if self.compaction_threshold is None or self._dead_fraction() < self.compaction_threshold:
+            return
+        with self._compaction_lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(
+                target=self._compact_in_background, name="vector-db-compaction", daemon=True
+            )
+            self._compaction_thread.start()
+    
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Background compaction of {self.collection_name} failed: {e}")
+    
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> None:
+        """Block until a running background compaction has finished."""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def compact(self) -> Dict[str, int]:
+        """
+        Reclaim the space held by deleted and replaced entries.
+        
+        Rewrites the NumPy backend's vector file and record log and the
+        lexical and component index logs, and saves the reduced-precision
+        index. Chroma compacts its own segments. Reads and writes of each
+        store wait only while that store is rewritten.
+        
+        Returns:
+            Number of entries reclaimed per store
+        """
+        self.flush()
+        reclaimed = {"vectors": 0, "lexical": 0, "components": 0}
+        if self.backend == "numpy":
+            reclaimed["vectors"] = self._get_collection().compact()
+        if self._lexical_index is not None:
+            reclaimed["lexical"] = self._lexical_index.compact()
+        if self._component_index is not None:
+            reclaimed["components"] = self._component_index.compact()
+        logger.info(f"Compacted {self.collection_name}: {reclaimed}")
+        return reclaimed
+    
+    def export_snapshot(self, path: str, batch_size: int = 5000) -> Dict[str, Any]:
+        """
+        Write the collection to a compact snapshot file (see vector_snapshot).
+        
+        The collection is paged, so only one batch of vectors is in memory
+        at a time. Any fitted projection is stored with the vectors.
+        
+        Args:
+            path: Destination file, replaced atomically
+            batch_size: Number of chunks read per page
+            
+        Returns:
+            Snapshot footer (count, dimension, sections, ...)
+        """
+        collection = self._get_collection()
+        writer = SnapshotWriter(path)
+        try:
+            offset = 0
+            while True:
+                page = collection.get(
+                    limit=batch_size,
+                    offset=offset,
+                    include=["documents", "metadatas", "embeddings"]
+                )
+                if page["ids"]:
+                    writer.add(page["ids"], list(page["documents"]), list(page["metadatas"]),
+                               np.asarray(page["embeddings"], dtype=np.float32))
+                if len(page["ids"]) < batch_size:
+                    break
+                offset += batch_size
+            
+            arrays = {}
+            projection = self._get_projection()
+            if projection is not None:
+                arrays = {
+                    "projection_mean": projection.mean,
+                    "projection_components": projection.components,
+                    "projection_explained_variance_ratio": np.array([projection.explained_variance_ratio]),
+                }
+            footer = writer.close(
+                {"collection_name": self.collection_name, "embedding_model": self.embedding_model,
+                 "metric": self.metric},
+                arrays
+            )
+        except Exception as e:
+            writer.abort()
+            logger.error(f"Failed to export snapshot to {path}: {e}")
+            raise
+        
+        logger.info(f"Exported {footer['count']} chunks to snapshot {path} ({os.path.getsize(path)} bytes)")
+        return footer
+    
+    def import_snapshot(self, path: str, batch_size: int = 65536) -> int:
+        """
+        Replace the collection's contents with a snapshot.
+        
+        Vectors are read from a memory map of the snapshot and written as
+        stored, so nothing is re-embedded. On the NumPy backend this is a
+        sequential copy, and a replica can serve queries within seconds. Chroma
+        still has to build its HNSW index from the vectors.
+        
+        Args:
+            path: Snapshot written by export_snapshot
+            batch_size: Rows written per batch (capped at the client's max batch size)
+            
+        Returns:
+            Number of chunks imported
+        """
+        snapshot = Snapshot(path)
+        recorded_model = snapshot.footer.get("embedding_model")
+        if recorded_model != self.embedding_model:
+            raise ValueError(f"Snapshot {path} was embedded with {recorded_model}, not {self.embedding_model}")
+        recorded_metric = snapshot.footer.get("metric", "l2")
+        if recorded_metric != self.metric:
+            raise ValueError(f"Snapshot {path} uses the {recorded_metric} metric, not {self.metric}")
+        
+        client = self._get_client()
+        try:
+            client.get_collection(name=self.collection_name)
+        except Exception:
+            pass
+        else:
+            self.delete_collection()
+        
+        mean = snapshot.array("projection_mean")
+        if mean is not None:
+            projection = PCAProjection(
+                mean,
+                snapshot.array("projection_components"),
+                float(snapshot.array("projection_explained_variance_ratio")[0])
+            )
+            projection.save(self._projection_path())
+            self._projection = projection
+            self._projection_loaded = True
+        
+        collection = self._get_collection()
+        batch_size = min(batch_size, client.get_max_batch_size())
+        try:
+            for doc_ids, documents, metadatas, vectors in snapshot.batches(batch_size):
+                collection.upsert(
+                    ids=doc_ids,
+                    documents=documents,
+                    metadatas=metadatas,
+                    embeddings=list(np.asarray(vectors, dtype=np.float32))
+                )
+                self._index_vectors(doc_ids, vectors, save=False)
+            self._save_quantized_index(force=False)
+        except Exception as e:
+            logger.error(f"Failed to import snapshot {path}: {e}")
+            raise
+        finally:
+            self._bump_generation()
+        
+        logger.info(f"Imported {snapshot.count} chunks from snapshot {path}")
+        return snapshot.count
+    
     def search_by_category(
         self, 
         query: str, 
         category: str, 
-        n_results: int = 5
+        n_results: int = 5,
+        constraints: Optional[Dict[str, Any]] = None
     ) -> Tuple[List[str], List[Dict[str, Any]], List[float]]:
         """
         Search for components in a specific category.
@@ -166,13 +1721,54 @@ class VectorDBService:
             query: Search query text
             category: Component category (e.g., "microcontroller", "sensor")
             n_results: Number of results to return
+            constraints: Prompt constraints (ParsedPrompt.constraints) applied
+                as range filters on the chunks' spec fields inside the store
             
         Returns:
             Tuple of (documents, metadata, distances)
         """
-        where_filter = {"category": category}
+        where_filter = constraints_to_where(constraints or {}, category)
         return self.search_similar(query, n_results, where_filter)
     
+    def search_components(
+        self,
+        query: str,
+        k: int = 10,
+        category: Optional[str] = None,
+        aggregation: str = "max",
+        chunks_per_component: int = 3,
+        overfetch: int = 10,
+        constraints: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for distinct components rather than individual chunks.
+        
+        Overlapping chunks of one datasheet tend to fill a chunk search's top
+        results, so k * overfetch chunks are fetched and grouped by component
+        (see top_components).
+        
+        Args:
+            query: Search query text
+            k: Number of components to return
+            category: Optional component category to search within
+            aggregation: How a component is scored from its chunk distances
+                ("max", "mean" or "top_n")
+            chunks_per_component: Supporting chunks returned per component
+            overfetch: Chunks fetched per requested component; one wider fetch
+                follows if they hold fewer than k components
+            constraints: Prompt constraints applied as spec range filters
+                (see spec_extraction.constraints_to_where)
+            
+        Returns:
+            Up to k components, closest first, each with mpn, manufacturer,
+            category, distance and its best chunks' documents, metadatas and distances
+        """
+        where = constraints_to_where(constraints or {}, category)
+        return top_components(
+            lambda n_hits: self.search_similar(query, n_hits, where),
+            k, aggregation, chunks_per_component, overfetch
+        )
+    
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector database collection."""
         collection = self._get_collection()
@@ -190,10 +1786,28 @@ class VectorDBService:
     
     def delete_collection(self) -> None:
         """Delete the entire collection (use with caution)."""
+        self.wait_for_compaction()
         client = self._get_client()
         try:
             client.delete_collection(name=self.collection_name)
             self._collection = None
+            self._bump_generation()
+            with self._index_lock:
+                self._quantized_index = None
+                self._quantized_dirty_rows = 0
+                for path in (self._quantized_index_path(), self._quantized_dirty_path()):
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._lexical_index = None
+                self._component_index = None
+                for path in (self._lexical_index_path(), self._component_index_path()):
+                    if os.path.exists(path):
+                        os.remove(path)
+            # A projection is fitted to the collection's chunks, so it goes with it
+            self._projection = None
+            self._projection_loaded = False
+            if os.path.exists(self._projection_path()):
+                os.remove(self._projection_path())
             logger.info(f"Deleted collection: {self.collection_name}")
         except Exception as e:
             logger.error(f"Failed to delete collection: {e}")
@@ -0,0 +1,259 @@
+"""
+Reduced-precision vector index with full-precision rescoring.
+
+Vectors are stored as float16 or as int8 codes with a per-vector scale. A
+coarse pass scores every stored vector against a query quantized to the same
+precision, and the best candidates are rescored with the exact float32 query.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("float16", "int8")
+
+# Rows scored per block in the coarse pass, to bound temporary memory
+_SCORE_BLOCK_ROWS = 65536
+
+
+class QuantizedVectorIndex:
+    """
+    In-process vector index stored at float16 or int8 precision.
+
+    Safe to search from several threads while another adds or removes vectors.
+    """
+
+    def __init__(self, precision: str = "int8", dimension: Optional[int] = None):
+        """
+        Initialize the index.
+
+        Args:
+            precision: Storage precision, "float16" or "int8"
+            dimension: Vector dimension (inferred from the first add if omitted)
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision}")
+        self.precision = precision
+        self.dimension = dimension
+
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        # Row buffers hold len(self._ids) vectors and grow by doubling
+        dtype = np.float16 if precision == "float16" else np.int8
+        self._codes = np.empty((0, dimension or 0), dtype=dtype)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._norms = np.empty(0, dtype=np.float32)
+        # Writes replace or resize the arrays and the ID table together
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _quantize(self, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Quantize float32 vectors to (codes, per-vector scales)."""
+        if self.precision == "float16":
+            return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+
+        # Symmetric per-vector scaling keeps the index appendable without refitting
+        max_abs = np.abs(vectors).max(axis=1)
+        scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+
+    def _grow(self, rows: int) -> None:
+        """Make room for more rows, doubling capacity so appends are amortized O(1)."""
+        size = len(self._ids)
+        if size + rows <= len(self._scales):
+            return
+        capacity = max(size + rows, 2 * len(self._scales), 16)
+        codes = np.empty((capacity, self.dimension), dtype=self._codes.dtype)
+        codes[:size] = self._codes[:size]
+        scales = np.empty(capacity, dtype=np.float32)
+        scales[:size] = self._scales[:size]
+        norms = np.empty(capacity, dtype=np.float32)
+        norms[:size] = self._norms[:size]
+        self._codes, self._scales, self._norms = codes, scales, norms
+
+    def _dequantize(self, rows: np.ndarray) -> np.ndarray:
+        """Reconstruct float32 vectors for the given rows."""
+        return self._codes[rows].astype(np.float32) * self._scales[rows, None]
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """
+        Add or replace vectors.
+
+        Args:
+            ids: Document IDs, one per vector
+            vectors: Array of shape (len(ids), dimension)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("Vectors must be a 2-D array with one row per ID")
+        if self.dimension is None:
+            self.dimension = int(vectors.shape[1])
+            self._codes = self._codes.reshape(0, self.dimension)
+        elif vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dimensional vectors, got {vectors.shape[1]}")
+
+        codes, scales = self._quantize(vectors)
+        dequantized = codes.astype(np.float32) * scales[:, None]
+        norms = np.einsum("ij,ij->i", dequantized, dequantized)
+
+        with self._lock:
+            new_positions = []
+            for position, doc_id in enumerate(ids):
+                row = self._rows.get(doc_id)
+                if row is None:
+                    new_positions.append(position)
+                else:
+                    self._codes[row] = codes[position]
+                    self._scales[row] = scales[position]
+                    self._norms[row] = norms[position]
+
+            if new_positions:
+                self._grow(len(new_positions))
+                start = len(self._ids)
+                end = start + len(new_positions)
+                self._codes[start:end] = codes[new_positions]
+                self._scales[start:end] = scales[new_positions]
+                self._norms[start:end] = norms[new_positions]
+                for position in new_positions:
+                    self._rows[ids[position]] = len(self._ids)
+                    self._ids.append(ids[position])
+
+    def remove(self, ids: Sequence[str]) -> None:
+        """Remove vectors by ID; unknown IDs are ignored."""
+        with self._lock:
+            rows = [self._rows[doc_id] for doc_id in ids if doc_id in self._rows]
+            if not rows:
+                return
+            size = len(self._ids)
+            keep = np.ones(size, dtype=bool)
+            keep[rows] = False
+            self._ids = [doc_id for doc_id, kept in zip(self._ids, keep) if kept]
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._codes = self._codes[:size][keep]
+            self._scales = self._scales[:size][keep]
+            self._norms = self._norms[:size][keep]
+
+    def _coarse_scores(self, query: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """Approximate squared L2 distances computed at storage precision."""
+        if self.precision == "int8":
+            query_scale = max(float(np.abs(query).max()), 1e-12) / 127.0
+            query_codes = np.rint(query / query_scale).astype(np.int32)
+        else:
+            query_codes = query.astype(np.float16).astype(np.float32)
+            query_scale = 1.0
+
+        candidate_rows = np.arange(len(self._ids)) if rows is None else rows
+        dots = np.empty(len(candidate_rows), dtype=np.float32)
+        for start in range(0, len(candidate_rows), _SCORE_BLOCK_ROWS):
+            block = candidate_rows[start:start + _SCORE_BLOCK_ROWS]
+            work_dtype = np.int32 if self.precision == "int8" else np.float32
+            raw = self._codes[block].astype(work_dtype) @ query_codes
+            dots[start:start + len(block)] = raw * self._scales[block] * query_scale
+        # ||q||^2 is constant per query, so it is left out of the ranking score
+        return self._norms[candidate_rows] - 2.0 * dots
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        allowed_ids: Optional[Sequence[str]] = None,
+        candidate_multiplier: int = 4
+    ) -> Tuple[List[str], List[float]]:
+        """
+        Find the nearest stored vectors to a query.
+
+        Args:
+            query: float32 query vector
+            k: Number of results to return
+            allowed_ids: Optional subset of IDs to search within
+            candidate_multiplier: Coarse candidates kept per result for rescoring
+
+        Returns:
+            Tuple of (ids, squared L2 distances) ordered nearest first
+        """
+        query = np.asarray(query, dtype=np.float32).reshape(-1)
+        with self._lock:
+            return self._search(query, k, allowed_ids, candidate_multiplier)
+
+    def _search(
+        self,
+        query: np.ndarray,
+        k: int,
+        allowed_ids: Optional[Sequence[str]],
+        candidate_multiplier: int
+    ) -> Tuple[List[str], List[float]]:
+        if allowed_ids is None:
+            rows = None
+            total = len(self._ids)
+        else:
+            rows = np.fromiter(
+                (self._rows[doc_id] for doc_id in allowed_ids if doc_id in self._rows),
+                dtype=np.int64,
+            )
+            total = len(rows)
+        if total == 0 or k <= 0:
+            return [], []
+
+        coarse = self._coarse_scores(query, rows)
+        n_candidates = min(total, k * max(1, candidate_multiplier))
+        if n_candidates < total:
+            top = np.argpartition(coarse, n_candidates - 1)[:n_candidates]
+        else:
+            top = np.arange(total)
+        candidate_rows = top if rows is None else rows[top]
+
+        # Rescore the short list with the exact float32 query
+        differences = self._dequantize(candidate_rows) - query
+        distances = np.einsum("ij,ij->i", differences, differences)
+        order = np.argsort(distances)[:k]
+        return (
+            [self._ids[row] for row in candidate_rows[order]],
+            distances[order].tolist(),
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size statistics for the index."""
+        with self._lock:
+            size = len(self._ids)
+            return {
+                "precision": self.precision,
+                "vectors": size,
+                "dimension": self.dimension,
+                "vector_bytes": self._codes[:size].nbytes + self._scales[:size].nbytes + self._norms[:size].nbytes,
+                "float32_bytes": len(self._ids) * (self.dimension or 0) * 4,
+            }
+
+    def save(self, path: str) -> None:
+        """Persist the index to an .npz file (written atomically)."""
+        temp_path = f"{path}.tmp"
+        with self._lock, open(temp_path, "wb") as f:
+            np.savez(
+                f,
+                precision=np.array(self.precision),
+                ids=np.array(self._ids, dtype=np.str_),
+                codes=self._codes[:len(self._ids)],
+                scales=self._scales[:len(self._ids)],
+                norms=self._norms[:len(self._ids)],
+            )
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "QuantizedVectorIndex":
+        """Load an index written by save()."""
+        with np.load(path, allow_pickle=False) as data:
+            index = cls(str(data["precision"]), dimension=int(data["codes"].shape[1]))
+            index._ids = data["ids"].tolist()
+            index._codes = data["codes"]
+            index._scales = data["scales"]
+            index._norms = data["norms"]
+        index._rows = {doc_id: row for row, doc_id in enumerate(index._ids)}
+        logger.info(f"Loaded {index.precision} vector index with {len(index)} vectors from {path}")
+        return index
@@ -0,0 +1,207 @@
+"""
+Compact, versioned snapshot format for vector collections.
+
+Layout of a snapshot file (all integers little-endian):
+
+    magic (8 bytes) | sections ... | footer JSON | footer length (uint64) | magic
+
+The first section is the float32 vector block, C-ordered and 64-byte
+aligned so it can be memory-mapped in place. Chunk IDs, texts and each
+metadata key's column of values follow as zlib-compressed JSON arrays. The
+footer records the format version, collection details and the offset and
+length of every section; putting it last lets the vector block be streamed
+to disk before the row count is known.
+"""
+
+import json
+import os
+import struct
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"VFSNAP\x00\x01"
+FORMAT_VERSION = 1
+_ALIGNMENT = 64
+_TRAILER = struct.Struct("<Q")
+
+
+class SnapshotWriter:
+    """Writes a snapshot, streaming vectors and buffering the compressible sections."""
+
+    def __init__(self, path: str, dimension: Optional[int] = None):
+        """
+        Open a snapshot for writing; it appears at path only after close().
+
+        Args:
+            path: Destination file
+            dimension: Vector dimension (inferred from the first batch if omitted)
+        """
+        self.path = path
+        self.dimension = dimension
+        self._temp_path = f"{path}.tmp"
+        self._file = open(self._temp_path, "wb")
+        self._file.write(MAGIC)
+        self._file.write(b"\x00" * (_ALIGNMENT - len(MAGIC)))
+        self._sections: Dict[str, Dict[str, int]] = {}
+        self._ids: List[str] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+
+    def add(
+        self,
+        ids: List[str],
+        documents: List[Optional[str]],
+        metadatas: List[Optional[Dict[str, Any]]],
+        vectors: np.ndarray
+    ) -> None:
+        """Append a batch of rows."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("Vectors must be a 2-D array with one row per ID")
+        if self.dimension is None:
+            self.dimension = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dimensional vectors, got {vectors.shape[1]}")
+        self._file.write(vectors.tobytes())
+        self._ids.extend(ids)
+        self._documents.extend(documents)
+        self._metadatas.extend(metadatas)
+
+    def _write_section(self, name: str, data: bytes) -> None:
+        self._sections[name] = {"offset": self._file.tell(), "length": len(data)}
+        self._file.write(data)
+
+    @staticmethod
+    def _compress(values: Any) -> bytes:
+        return zlib.compress(json.dumps(values, separators=(",", ":")).encode("utf-8"), 6)
+
+    def close(self, info: Dict[str, Any], arrays: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+        """
+        Write the remaining sections and footer, then move the file into place.
+
+        Args:
+            info: Collection details recorded in the footer (name, model, ...)
+            arrays: Extra float32 arrays stored raw (e.g. a projection)
+
+        Returns:
+            The footer
+        """
+        self._sections["vectors"] = {
+            "offset": _ALIGNMENT,
+            "length": len(self._ids) * (self.dimension or 0) * 4,
+        }
+        self._write_section("ids", self._compress(self._ids))
+        self._write_section("documents", self._compress(self._documents))
+
+        keys = sorted({key for metadata in self._metadatas if metadata for key in metadata})
+        for key in keys:
+            column = [metadata.get(key) if metadata else None for metadata in self._metadatas]
+            self._write_section(f"metadata:{key}", self._compress(column))
+
+        array_shapes = {}
+        for name, array in (arrays or {}).items():
+            array = np.ascontiguousarray(array, dtype=np.float32)
+            self._write_section(f"array:{name}", array.tobytes())
+            array_shapes[name] = list(array.shape)
+
+        footer = {
+            "format_version": FORMAT_VERSION,
+            "count": len(self._ids),
+            "dimension": self.dimension,
+            "dtype": "float32",
+            "metadata_keys": keys,
+            "arrays": array_shapes,
+            "sections": self._sections,
+            **info,
+        }
+        footer_bytes = json.dumps(footer).encode("utf-8")
+        self._file.write(footer_bytes)
+        self._file.write(_TRAILER.pack(len(footer_bytes)))
+        self._file.write(MAGIC)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+        return footer
+
+    def abort(self) -> None:
+        """Discard a partially written snapshot."""
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+
+class Snapshot:
+    """Read access to a snapshot; vectors are memory-mapped, not loaded."""
+
+    def __init__(self, path: str):
+        """
+        Open a snapshot and validate its framing and version.
+
+        Args:
+            path: Snapshot file written by SnapshotWriter
+        """
+        self.path = path
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a vector snapshot")
+            f.seek(size - len(MAGIC) - _TRAILER.size)
+            (footer_length,) = _TRAILER.unpack(f.read(_TRAILER.size))
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Snapshot {path} is truncated")
+            f.seek(size - len(MAGIC) - _TRAILER.size - footer_length)
+            self.footer: Dict[str, Any] = json.loads(f.read(footer_length))
+        if self.footer.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version: {self.footer.get('format_version')}")
+
+        self.count: int = self.footer["count"]
+        self.dimension: Optional[int] = self.footer["dimension"]
+        vectors = self.footer["sections"]["vectors"]
+        if self.count:
+            self.vectors = np.memmap(
+                path, dtype=np.float32, mode="r", offset=vectors["offset"], shape=(self.count, self.dimension)
+            )
+        else:
+            self.vectors = np.empty((0, self.dimension or 0), dtype=np.float32)
+
+    def _read_section(self, name: str) -> bytes:
+        section = self.footer["sections"][name]
+        with open(self.path, "rb") as f:
+            f.seek(section["offset"])
+            return f.read(section["length"])
+
+    def _read_json(self, name: str) -> Any:
+        return json.loads(zlib.decompress(self._read_section(name)))
+
+    def ids(self) -> List[str]:
+        return self._read_json("ids")
+
+    def documents(self) -> List[Optional[str]]:
+        return self._read_json("documents")
+
+    def metadatas(self) -> List[Optional[Dict[str, Any]]]:
+        """Rebuild per-row metadata from the columns; rows with no values get None."""
+        rows: List[Dict[str, Any]] = [{} for _ in range(self.count)]
+        for key in self.footer["metadata_keys"]:
+            for row, value in zip(rows, self._read_json(f"metadata:{key}")):
+                if value is not None:
+                    row[key] = value
+        return [row or None for row in rows]
+
+    def array(self, name: str) -> Optional[np.ndarray]:
+        """An extra array stored with the snapshot, or None."""
+        shape = self.footer["arrays"].get(name)
+        if shape is None:
+            return None
+        return np.frombuffer(self._read_section(f"array:{name}"), dtype=np.float32).reshape(shape)
+
+    def batches(self, batch_size: int) -> Iterable[Tuple[List[str], List[Optional[str]],
+                                                         List[Optional[Dict[str, Any]]], np.ndarray]]:
+        """Yield (ids, documents, metadatas, vectors) batches; vectors are memory-mapped slices."""
+        ids, documents, metadatas = self.ids(), self.documents(), self.metadatas()
+        for start in range(0, self.count, batch_size):
+            end = start + batch_size
+            yield ids[start:end], documents[start:end], metadatas[start:end], self.vectors[start:end]
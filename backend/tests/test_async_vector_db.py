@@ -0,0 +1,191 @@
+"""
+Unit tests for the async vector database facade.
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+
+from backend.src.services.async_vector_db import (
+    AsyncVectorDBService,
+    VectorDBOverloadedError,
+    get_async_vector_db_service,
+)
+
+
+class TestAsyncVectorDBService:
+    """Tests for AsyncVectorDBService."""
+
+    @pytest.fixture
+    def service(self):
+        """Vector DB service mock with canned results."""
+        service = Mock()
+        service.search_similar.return_value = (["doc"], [{"n": 1}], [0.1])
+        service.add_document_chunks.return_value = ["id1"]
+        return service
+
+    def test_invalid_configuration(self, service):
+        """Test that pool sizes are validated."""
+        with pytest.raises(ValueError, match="max_workers must be at least 1"):
+            AsyncVectorDBService(service, search_workers=0)
+        with pytest.raises(ValueError, match="max_queued cannot be negative"):
+            AsyncVectorDBService(service, max_queued_searches=-1)
+
+    def test_calls_run_off_the_event_loop(self, service):
+        """Test that blocking calls run on pool threads and results are returned."""
+        facade = AsyncVectorDBService(service)
+        threads = []
+        service.search_similar.side_effect = lambda *args: threads.append(
+            threading.current_thread().name
+        ) or (["doc"], [{"n": 1}], [0.1])
+
+        async def run():
+            search = await facade.asearch_similar("sensor", 5, {"category": "sensor"})
+            added = await facade.aadd_document_chunks(["chunk"], [{"n": 1}], embeddings=None)
+            return search, added
+
+        search, added = asyncio.run(run())
+
+        assert search == (["doc"], [{"n": 1}], [0.1])
+        assert added == ["id1"]
+        service.search_similar.assert_called_once_with("sensor", 5, {"category": "sensor"})
+        service.add_document_chunks.assert_called_once_with(["chunk"], [{"n": 1}], embeddings=None)
+        assert threads[0].startswith("vector-db-search")
+        stats = facade.get_stats()
+        assert stats["search"]["completed"] == 1
+        assert stats["write"]["completed"] == 1
+
+    def test_deletes_run_on_the_write_thread(self, service):
+        """Test that deletes and replacements share the write pool."""
+        facade = AsyncVectorDBService(service)
+        service.delete_by.return_value = 3
+        service.replace_datasheet.return_value = ["id2"]
+
+        async def run():
+            deleted = await facade.adelete_by(mpn="TMP117")
+            replaced = await facade.areplace_datasheet(["chunk"], [{"n": 1}], file_hash="h1")
+            return deleted, replaced
+
+        assert asyncio.run(run()) == (3, ["id2"])
+        service.delete_by.assert_called_once_with(None, "TMP117", None)
+        service.replace_datasheet.assert_called_once_with(["chunk"], [{"n": 1}], file_hash="h1")
+        assert facade.get_stats()["write"]["completed"] == 2
+
+    def test_concurrency_is_bounded(self, service):
+        """Test that no more than the pool size runs at once and the rest queue."""
+        facade = AsyncVectorDBService(service, search_workers=2, max_queued_searches=1)
+        running = []
+        peak = []
+        lock = threading.Lock()
+        release = threading.Event()
+
+        def search(*args):
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            release.wait(5)
+            with lock:
+                running.pop()
+            return ([], [], [])
+        service.search_similar.side_effect = search
+
+        async def run():
+            tasks = [asyncio.ensure_future(facade.asearch_similar(f"q{i}")) for i in range(6)]
+            await asyncio.sleep(0.05)
+            stats = facade.get_stats()["search"]
+            release.set()
+            await asyncio.gather(*tasks)
+            return stats
+
+        stats = asyncio.run(run())
+
+        assert max(peak) == 2
+        assert stats["active"] == 2
+        assert stats["queued"] == 1
+        assert stats["waiting"] == 3
+        assert stats["utilization"] == 1.0
+        assert facade.get_stats()["search"]["completed"] == 6
+
+    def test_saturated_pool_rejects_after_timeout(self, service):
+        """Test that admission times out with VectorDBOverloadedError."""
+        facade = AsyncVectorDBService(service, search_workers=1, max_queued_searches=0,
+                                      admission_timeout=0.01)
+        release = threading.Event()
+        service.search_similar.side_effect = lambda *args: release.wait(5) and ([], [], [])
+
+        async def run():
+            first = asyncio.ensure_future(facade.asearch_similar("slow"))
+            await asyncio.sleep(0.01)
+            try:
+                with pytest.raises(VectorDBOverloadedError, match="saturated"):
+                    await facade.asearch_similar("rejected")
+            finally:
+                release.set()
+                await first
+
+        asyncio.run(run())
+
+        assert facade.get_stats()["search"]["rejected"] == 1
+
+    def test_cancelled_call_keeps_slot_until_it_finishes(self, service):
+        """Test that cancelling a caller does not admit more work while its call runs."""
+        facade = AsyncVectorDBService(service, search_workers=1, max_queued_searches=0)
+        release = threading.Event()
+        service.search_similar.side_effect = lambda *args: release.wait(5) and ([], [], [])
+
+        async def run():
+            first = asyncio.ensure_future(facade.asearch_similar("slow"))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            second = asyncio.ensure_future(facade.asearch_similar("next"))
+            await asyncio.sleep(0.05)
+            stats = facade.get_stats()["search"]
+            release.set()
+            await second
+            return stats
+
+        stats = asyncio.run(run())
+
+        assert stats["active"] == 1
+        assert stats["waiting"] == 1
+        assert stats["cancelled"] == 1
+        assert facade.get_stats()["search"]["completed"] == 2
+
+    def test_pool_serves_several_event_loops(self, service):
+        """Test that a facade can be awaited from one event loop after another."""
+        facade = AsyncVectorDBService(service, search_workers=1, max_queued_searches=0)
+        service.search_similar.side_effect = lambda *args: time.sleep(0.01) or ([], [], [])
+
+        async def run():
+            await asyncio.gather(*(facade.asearch_similar(f"q{i}") for i in range(3)))
+
+        asyncio.run(run())
+        asyncio.run(run())
+
+        assert facade.get_stats()["search"]["completed"] == 6
+
+    def test_errors_propagate(self, service):
+        """Test that exceptions from the service reach the caller and are counted."""
+        facade = AsyncVectorDBService(service)
+        service.search_similar.side_effect = RuntimeError("boom")
+
+        with pytest.raises(RuntimeError, match="boom"):
+            asyncio.run(facade.asearch_similar("query"))
+
+        assert facade.get_stats()["search"]["failed"] == 1
+
+
+class TestAsyncVectorDBServiceGlobal:
+    """Tests for the global async facade."""
+
+    @patch('backend.src.services.async_vector_db._async_vector_db_service', None)
+    @patch('backend.src.services.async_vector_db.get_vector_db_service')
+    def test_get_async_vector_db_service_singleton(self, mock_get_vector_db_service):
+        """Test that the global facade wraps the global service once."""
+        first = get_async_vector_db_service()
+        second = get_async_vector_db_service()
+
+        assert first is second
+        assert first.service is mock_get_vector_db_service.return_value
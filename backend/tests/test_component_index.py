@@ -0,0 +1,165 @@
+"""
+Unit tests for the component secondary index.
+"""
+
+import pytest
+import tempfile
+import shutil
+import os
+
+from backend.src.services.component_index import ComponentIndex, group_by_component, top_components
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def index():
+    """Index over chunks of two TI parts and one Espressif module."""
+    index = ComponentIndex()
+    index.add(
+        ["t0", "t1", "l0", "e0"],
+        [
+            {"mpn": "TMP117", "manufacturer": "Texas Instruments", "file_hash": "h1"},
+            {"mpn": "TMP117", "manufacturer": "Texas Instruments", "file_hash": "h1"},
+            {"mpn": "LM317", "manufacturer": "Texas Instruments", "file_hash": "h2"},
+            {"mpn": "ESP32-WROOM-32", "manufacturer": "Espressif", "file_hash": "h3"},
+        ],
+    )
+    return index
+
+
+class TestComponentIndex:
+    """Tests for ComponentIndex."""
+
+    def test_lookups(self, index):
+        """Test MPN, manufacturer and datasheet lookups, case-insensitively."""
+        assert index.chunks_for_mpn("tmp117 ") == ["t0", "t1"]
+        assert index.chunks_for_file("h2") == ["l0"]
+        assert index.mpns_for_manufacturer("texas instruments") == ["LM317", "TMP117"]
+        assert index.has_mpn("esp32-wroom-32")
+        assert not index.has_mpn("BME280")
+
+    def test_unknown_fields_are_not_indexed(self, index):
+        """Test that ingestion's "unknown" placeholders are not lookup keys."""
+        index.add(["u0"], [{"mpn": "unknown", "manufacturer": "unknown", "file_hash": "unknown"}])
+
+        assert index.chunks_for_mpn("unknown") == []
+        assert index.chunks_for_file("unknown") == []
+        assert len(index) == 5
+
+    def test_replace_and_remove(self, index):
+        """Test that re-tagged and removed chunks leave the old keys."""
+        index.add(["l0"], [{"mpn": "LM7805", "manufacturer": "Texas Instruments", "file_hash": "h4"}])
+        index.remove(["t0", "t1", "missing"])
+
+        assert index.mpns_for_manufacturer("Texas Instruments") == ["LM7805"]
+        assert index.chunks_for_file("h2") == []
+        assert index.get_stats() == {
+            "chunks": 2, "mpns": 2, "manufacturers": 2, "datasheets": 2, "dead_log_records": 0
+        }
+
+    def test_log_replay(self, temp_dir):
+        """Test that writes are replayed from the log, dropping a torn tail."""
+        path = os.path.join(temp_dir, "components.jsonl")
+        index = ComponentIndex(path)
+        index.add(["a", "b"], [{"mpn": "TMP117", "file_hash": "h1"}, {"mpn": "LM317", "file_hash": "h2"}])
+        index.remove(["b"])
+        with open(path, "a") as f:
+            f.write('{"id": "c", "mp')
+
+        reopened = ComponentIndex(path)
+
+        assert reopened.chunks_for_mpn("TMP117") == ["a"]
+        assert not reopened.has_mpn("LM317")
+        reopened.add(["c"], [{"mpn": "AHT20"}])
+        assert ComponentIndex(path).has_mpn("AHT20")
+
+    def test_compact(self, temp_dir):
+        """Test that compaction rewrites the log without superseded records."""
+        path = os.path.join(temp_dir, "components.jsonl")
+        index = ComponentIndex(path)
+        index.add(["a", "b"], [{"mpn": "TMP117", "manufacturer": "TI", "file_hash": "h1"}, {"mpn": "LM317"}])
+        index.add(["a"], [{"mpn": "TMP117", "manufacturer": "TI", "file_hash": "h2"}])
+        index.remove(["b"])
+
+        assert index.get_stats()["dead_log_records"] == 3
+        assert index.compact() == 3
+        assert index.compact() == 0
+        with open(path) as f:
+            assert len(f.readlines()) == 1
+        reopened = ComponentIndex(path)
+        assert reopened.chunks_for_file("h2") == ["a"]
+        assert reopened.mpns_for_manufacturer("ti") == ["TMP117"]
+        assert not reopened.has_mpn("LM317")
+
+
+class TestGroupByComponent:
+    """Tests for group_by_component."""
+
+    @pytest.fixture
+    def hits(self):
+        """Hits, closest first: three TMP117 chunks, one LM317 chunk and two without an MPN."""
+        return (
+            ["tmp a", "lm", "tmp b", "tmp c", "app note", "loose"],
+            [
+                {"mpn": "TMP117", "manufacturer": "TI", "category": "sensor"},
+                {"mpn": "LM317", "manufacturer": "TI", "category": "power"},
+                {"mpn": "tmp117"},
+                {"mpn": "TMP117"},
+                {"mpn": "unknown", "file_hash": "h9"},
+                None,
+            ],
+            [0.1, 0.2, 0.35, 0.9, 0.25, 0.26],
+        )
+
+    def test_max_keeps_distinct_components(self, hits):
+        """Test that chunks of one part collapse into one component ranked by its best hit."""
+        components = group_by_component(*hits, k=10, chunks_per_component=2)
+
+        assert [component["mpn"] for component in components] == ["TMP117", "LM317", None, None]
+        assert components[0]["documents"] == ["tmp a", "tmp b"]
+        assert components[0]["distances"] == [0.1, 0.35]
+        assert components[0]["hits"] == 3
+        assert components[0]["manufacturer"] == "TI"
+        assert components[2]["documents"] == ["app note"]
+        assert len(group_by_component(*hits, k=2)) == 2
+
+    def test_mean_and_top_n(self, hits):
+        """Test that mean and top_n aggregate a component's hit distances."""
+        mean = group_by_component(*hits, k=10, aggregation="mean")
+        top_n = group_by_component(*hits, k=10, aggregation="top_n", chunks_per_component=2)
+
+        assert [component["mpn"] for component in mean][:2] == ["LM317", None]
+        assert mean[-1]["mpn"] == "TMP117"
+        assert mean[-1]["distance"] == pytest.approx((0.1 + 0.35 + 0.9) / 3)
+        assert [component["mpn"] for component in top_n][:2] == ["LM317", "TMP117"]
+        assert top_n[1]["distance"] == pytest.approx((0.1 + 0.35) / 2)
+
+    def test_invalid_arguments(self, hits):
+        """Test that unknown aggregations and empty input are handled."""
+        with pytest.raises(ValueError, match="Unsupported aggregation"):
+            group_by_component(*hits, k=3, aggregation="sum")
+        assert group_by_component([], [], [], k=3) == []
+
+    def test_top_components_widens_once(self):
+        """Test that a fetch holding too few components is widened once, by the hits per component."""
+        hits = [(f"doc {i}", {"mpn": f"P{i // 5}"}, float(i)) for i in range(100)]
+        requested = []
+
+        def search(n_hits):
+            requested.append(n_hits)
+            found = hits[:n_hits]
+            return [hit[0] for hit in found], [hit[1] for hit in found], [hit[2] for hit in found]
+
+        components = top_components(search, k=4, overfetch=2)
+
+        assert requested == [8, 24]
+        assert [component["mpn"] for component in components] == ["P0", "P1", "P2", "P3"]
+        assert len(top_components(search, k=4, overfetch=5)) == 4
+        assert requested[2:] == [20]
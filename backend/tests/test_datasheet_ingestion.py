@@ -7,9 +7,11 @@ import tempfile
 import shutil
 import os
 from unittest.mock import Mock, patch, mock_open
+import numpy as np
 from pathlib import Path
 
 from backend.src.services.datasheet_ingestion import DatasheetIngestionService, get_datasheet_ingestion_service
+from backend.src.services.spec_extraction import UNBOUNDED
 
 
 class TestDatasheetIngestionService:
@@ -232,6 +234,7 @@ class TestDatasheetIngestionService:
             assert metadata["category"] == "microcontroller"
             assert metadata["source_file"] == "test.pdf"
             assert metadata["file_hash"] == "abc123hash"
+            assert metadata["supply_voltage_max"] == UNBOUNDED
     
     @patch.object(DatasheetIngestionService, 'extract_text_from_pdf')
     def test_ingest_datasheet_no_text(self, mock_extract, ingestion_service):
@@ -293,6 +296,104 @@ class TestDatasheetIngestionService:
         assert result == expected
         assert mock_ingest.call_count == 3
     
+    @patch('backend.src.services.datasheet_ingestion.get_vector_db_service')
+    @patch('os.path.exists')
+    @patch.object(DatasheetIngestionService, 'prepare_datasheet_chunks')
+    def test_batch_ingest_datasheets_with_worker_pool(self, mock_prepare, mock_exists, mock_get_vector_db, ingestion_service):
+        """Test that pooled ingestion embeds all chunks in one call and slices per datasheet."""
+        mock_exists.side_effect = lambda path: path != "missing.pdf"
+        mock_prepare.side_effect = [
+            (["a1", "a2"], [{"mpn": "A"}, {"mpn": "A"}]),
+            Exception("Extraction failed"),
+            (["c1"], [{"mpn": "C"}]),
+        ]
+        worker_pool = Mock()
+        worker_pool.generate_embeddings_array.return_value = np.array([[1.0], [2.0], [3.0]])
+        mock_vector_db = Mock()
+        mock_vector_db.chunk_ids.side_effect = [["id1", "id2"], ["id3"]]
+        mock_vector_db.find_new_chunks.side_effect = lambda doc_ids: list(range(len(doc_ids)))
+        mock_get_vector_db.return_value = mock_vector_db
+        
+        configs = [
+            {"pdf_path": "a.pdf", "component_info": {"mpn": "A"}},
+            {"pdf_path": "b.pdf", "component_info": {"mpn": "B"}},
+            {"pdf_path": "missing.pdf", "component_info": {"mpn": "M"}},
+            {"pdf_path": "c.pdf", "component_info": {"mpn": "C"}},
+        ]
+        
+        result = ingestion_service.batch_ingest_datasheets(configs, worker_pool=worker_pool)
+        
+        assert result == {"a.pdf": ["id1", "id2"], "b.pdf": [], "missing.pdf": [], "c.pdf": ["id3"]}
+        worker_pool.generate_embeddings_array.assert_called_once_with(["a1", "a2", "c1"])
+        second_call = mock_vector_db.add_document_chunks.call_args_list[1]
+        assert second_call[0] == (["c1"], [{"mpn": "C"}])
+        np.testing.assert_array_equal(second_call[1]["embeddings"], [[3.0]])
+    
+    @patch('backend.src.services.datasheet_ingestion.get_vector_db_service')
+    @patch('os.path.exists')
+    @patch.object(DatasheetIngestionService, 'prepare_datasheet_chunks')
+    def test_batch_ingest_with_worker_pool_skips_stored_chunks(self, mock_prepare, mock_exists, mock_get_vector_db, ingestion_service):
+        """Test that pooled re-ingestion only embeds chunks that are not stored yet."""
+        mock_exists.return_value = True
+        mock_prepare.side_effect = [
+            (["a1", "a2"], [{"mpn": "A"}, {"mpn": "A"}]),
+            (["b1", "b2"], [{"mpn": "B"}, {"mpn": "B"}]),
+        ]
+        worker_pool = Mock()
+        worker_pool.generate_embeddings_array.return_value = np.array([[1.0]])
+        mock_vector_db = Mock()
+        mock_vector_db.chunk_ids.side_effect = [["a-1", "a-2"], ["b-1", "b-2"]]
+        mock_vector_db.find_new_chunks.side_effect = [[], [1]]
+        mock_get_vector_db.return_value = mock_vector_db
+        
+        configs = [
+            {"pdf_path": "a.pdf", "component_info": {"mpn": "A"}},
+            {"pdf_path": "b.pdf", "component_info": {"mpn": "B"}},
+        ]
+        
+        result = ingestion_service.batch_ingest_datasheets(configs, worker_pool=worker_pool)
+        
+        assert result == {"a.pdf": ["a-1", "a-2"], "b.pdf": ["b-1", "b-2"]}
+        worker_pool.generate_embeddings_array.assert_called_once_with(["b2"])
+        assert [call[0] for call in mock_vector_db.update_metadata.call_args_list] == [
+            (["a-1", "a-2"], [{"mpn": "A"}, {"mpn": "A"}]),
+            (["b-1"], [{"mpn": "B"}]),
+        ]
+        mock_vector_db.add_document_chunks.assert_called_once()
+        assert mock_vector_db.add_document_chunks.call_args[0] == (["b2"], [{"mpn": "B"}])
+    
+    @patch('backend.src.services.datasheet_ingestion.get_vector_db_service')
+    @patch('os.path.exists')
+    @patch.object(DatasheetIngestionService, 'prepare_datasheet_chunks')
+    def test_batch_ingest_with_worker_pool_embeds_bounded_groups(self, mock_prepare, mock_exists, mock_get_vector_db, ingestion_service):
+        """Test that pooled ingestion embeds per group and contains a group's failure."""
+        mock_exists.return_value = True
+        mock_prepare.side_effect = [
+            (["a1", "a2"], [{"mpn": "A"}, {"mpn": "A"}]),
+            (["b1", ""], [{"mpn": "B"}, {"mpn": "B"}]),
+            (["c1"], [{"mpn": "C"}]),
+        ]
+        worker_pool = Mock()
+        worker_pool.generate_embeddings_array.side_effect = [
+            np.array([[1.0], [2.0]]),
+            np.array([[3.0]]),
+            RuntimeError("worker died"),
+        ]
+        mock_vector_db = Mock()
+        mock_vector_db.chunk_ids.side_effect = [["a-1", "a-2"], ["b-1", "b-2"], ["c-1"]]
+        mock_vector_db.find_new_chunks.side_effect = lambda doc_ids: list(range(len(doc_ids)))
+        mock_get_vector_db.return_value = mock_vector_db
+        ingestion_service.pool_group_chunks = 2
+        
+        configs = [{"pdf_path": f"{name}.pdf", "component_info": {}} for name in "abc"]
+        result = ingestion_service.batch_ingest_datasheets(configs, worker_pool=worker_pool)
+        
+        assert result == {"a.pdf": ["a-1", "a-2"], "b.pdf": [], "c.pdf": []}
+        assert [call[0][0] for call in worker_pool.generate_embeddings_array.call_args_list] == [
+            ["a1", "a2"], ["b1", ""], ["c1"]
+        ]
+        mock_vector_db.add_document_chunks.assert_called_once()
+    
     @patch('os.path.exists')
     def test_batch_ingest_datasheets_missing_file(self, mock_exists, ingestion_service):
         """Test batch ingestion with missing file."""
@@ -0,0 +1,38 @@
+"""
+Unit tests for MMR re-ranking.
+"""
+
+import pytest
+import numpy as np
+
+from backend.src.services.diversification import maximal_marginal_relevance
+
+
+@pytest.fixture
+def candidates():
+    """Two near-duplicate chunks close to the query, then a distinct one."""
+    return np.array([[1.0, 0.0, 0.0], [0.99, 0.01, 0.0], [0.7, 0.0, 0.7]], dtype=np.float32)
+
+
+class TestMaximalMarginalRelevance:
+    """Tests for maximal_marginal_relevance."""
+
+    def test_skips_near_duplicates(self, candidates):
+        """Test that a distinct candidate is preferred over a near-duplicate of a pick."""
+        assert maximal_marginal_relevance(np.array([1.0, 0.0, 0.2]), candidates, 2) == [0, 2]
+
+    def test_lambda_one_keeps_relevance_order(self, candidates):
+        """Test that lambda_mult=1 reproduces the plain ranking."""
+        assert maximal_marginal_relevance(np.array([1.0, 0.0, 0.0]), candidates, 3, lambda_mult=1.0) == [0, 1, 2]
+
+    def test_scale_invariant_and_bounded(self, candidates):
+        """Test that vector norms do not matter and k is capped at the candidate count."""
+        scaled = candidates * np.array([[10.0], [0.1], [3.0]], dtype=np.float32)
+
+        assert maximal_marginal_relevance(np.array([5.0, 0.0, 1.0]), scaled, 10) == [0, 2, 1]
+        assert maximal_marginal_relevance(np.array([1.0, 0.0, 0.0]), candidates[:0], 3) == []
+
+    def test_invalid_lambda(self, candidates):
+        """Test that lambda_mult must lie in [0, 1]."""
+        with pytest.raises(ValueError, match="between 0 and 1"):
+            maximal_marginal_relevance(np.array([1.0, 0.0, 0.0]), candidates, 2, lambda_mult=1.5)
@@ -0,0 +1,116 @@
+"""
+Unit tests for the async embedding batcher.
+"""
+
+import asyncio
+import pytest
+from unittest.mock import Mock, patch
+
+from backend.src.services.embedding_batcher import EmbeddingBatcher, get_embedding_batcher
+from backend.src.services.embedding_cache import EmbeddingLRUCache
+
+
+def _fake_embeddings(texts):
+    """Return one distinguishable embedding per text."""
+    return [[float(len(text)), 1.0] for text in texts]
+
+
+class TestEmbeddingBatcher:
+    """Unit tests for EmbeddingBatcher."""
+    
+    @pytest.fixture
+    def embedding_service(self):
+        """Create a mock embedding service without a query cache."""
+        service = Mock()
+        service.query_cache = None
+        service.generate_embeddings.side_effect = _fake_embeddings
+        return service
+    
+    def test_invalid_configuration(self, embedding_service):
+        """Test that invalid window settings are rejected."""
+        with pytest.raises(ValueError, match="max_batch_size"):
+            EmbeddingBatcher(embedding_service, max_batch_size=0)
+        with pytest.raises(ValueError, match="max_wait_ms"):
+            EmbeddingBatcher(embedding_service, max_wait_ms=-1)
+    
+    def test_concurrent_requests_share_one_encode(self, embedding_service):
+        """Test that requests within the window are encoded together."""
+        batcher = EmbeddingBatcher(embedding_service, max_batch_size=32, max_wait_ms=20)
+        texts = ["a", "bb", "ccc", "dddd"]
+        
+        async def run():
+            return await asyncio.gather(*(batcher.embed(text) for text in texts))
+        
+        results = asyncio.run(run())
+        
+        assert results == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0], [4.0, 1.0]]
+        embedding_service.generate_embeddings.assert_called_once_with(texts)
+        assert batcher.get_stats()["batch_size_histogram"] == {4: 1}
+    
+    def test_full_batch_flushes_immediately(self, embedding_service):
+        """Test that reaching max_batch_size splits requests into batches."""
+        batcher = EmbeddingBatcher(embedding_service, max_batch_size=2, max_wait_ms=1000)
+        
+        async def run():
+            return await asyncio.wait_for(
+                asyncio.gather(*(batcher.embed(text) for text in ["a", "b", "c", "d"])),
+                timeout=5
+            )
+        
+        results = asyncio.run(run())
+        
+        assert len(results) == 4
+        assert embedding_service.generate_embeddings.call_count == 2
+        stats = batcher.get_stats()
+        assert stats["batches"] == 2
+        assert stats["max_queue_depth"] == 2
+        assert stats["mean_batch_size"] == 2.0
+    
+    def test_errors_propagate_to_all_callers(self, embedding_service):
+        """Test that an encode failure is raised in every awaiting caller."""
+        embedding_service.generate_embeddings.side_effect = RuntimeError("model failed")
+        batcher = EmbeddingBatcher(embedding_service, max_wait_ms=1)
+        
+        async def run():
+            return await asyncio.gather(
+                batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+            )
+        
+        results = asyncio.run(run())
+        
+        assert all(isinstance(result, RuntimeError) for result in results)
+    
+    def test_empty_text_rejected(self, embedding_service):
+        """Test that empty text raises ValueError."""
+        batcher = EmbeddingBatcher(embedding_service)
+        
+        with pytest.raises(ValueError, match="Text cannot be empty"):
+            asyncio.run(batcher.embed("   "))
+    
+    def test_query_cache_hits_skip_batching(self, embedding_service):
+        """Test that cached queries are answered without queuing."""
+        embedding_service.query_cache = EmbeddingLRUCache(1024 * 1024)
+        batcher = EmbeddingBatcher(embedding_service, max_wait_ms=1)
+        
+        first = asyncio.run(batcher.embed("sensor"))
+        second = asyncio.run(batcher.embed("sensor"))
+        
+        assert first == second == [6.0, 1.0]
+        embedding_service.generate_embeddings.assert_called_once()
+        assert batcher.get_stats()["cache_hits"] == 1
+
+
+class TestEmbeddingBatcherGlobal:
+    """Test global embedding batcher instance."""
+    
+    @patch('backend.src.services.embedding_batcher.get_embedding_service')
+    @patch('backend.src.services.embedding_batcher._embedding_batcher', None)
+    def test_get_embedding_batcher_singleton(self, mock_get_embedding_service):
+        """Test that get_embedding_batcher returns singleton."""
+        batcher1 = get_embedding_batcher()
+        batcher2 = get_embedding_batcher()
+        batcher1.shutdown()
+        
+        assert batcher1 is batcher2
+        assert isinstance(batcher1, EmbeddingBatcher)
+        assert batcher1.embedding_service is mock_get_embedding_service.return_value
@@ -0,0 +1,237 @@
+"""
+Unit tests for the persistent embedding cache.
+"""
+
+import pytest
+import tempfile
+import shutil
+import multiprocessing
+import zlib
+import numpy as np
+
+from backend.src.services.embedding_cache import EmbeddingCache, EmbeddingLRUCache
+
+
+def _vector_for(text):
+    """Vector derived from the text, so any key/row mix-up is detectable."""
+    return np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(8).astype(np.float32)
+
+
+def _write_entries(directory, prefix, count):
+    """Writer process: append entries one call at a time to interleave with others."""
+    cache = EmbeddingCache(directory, "test-model")
+    for i in range(count):
+        text = f"{prefix}-{i}"
+        cache.put_many([text, "shared"], np.stack([_vector_for(text), _vector_for("shared")]))
+
+
+class TestEmbeddingCache:
+    """Unit tests for EmbeddingCache."""
+
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+
+    @pytest.fixture
+    def cache(self, temp_dir):
+        """Create an embedding cache for testing."""
+        return EmbeddingCache(temp_dir, "test-model")
+
+    def test_empty_cache_lookup(self, cache):
+        """Test that an empty cache reports every text as a miss."""
+        hit_positions, hit_vectors, miss_positions = cache.lookup(["a", "b"])
+
+        assert hit_positions == []
+        assert hit_vectors.shape[0] == 0
+        assert miss_positions == [0, 1]
+        assert cache.dimension is None
+
+    def test_put_and_lookup(self, cache):
+        """Test that stored vectors are returned for matching texts."""
+        vectors = np.array([[0.1, 0.2], [0.3, 0.4]], dtype=np.float32)
+        written = cache.put_many(["text1", "text2"], vectors)
+
+        hit_positions, hit_vectors, miss_positions = cache.lookup(["text2", "other", "text1"])
+
+        assert written == 2
+        assert hit_positions == [0, 2]
+        assert miss_positions == [1]
+        np.testing.assert_array_equal(hit_vectors, vectors[[1, 0]])
+        assert hit_vectors.dtype == np.float32
+
+    def test_put_skips_duplicates(self, cache):
+        """Test that existing and repeated texts are not appended twice."""
+        cache.put_many(["text1"], np.array([[1.0, 2.0]]))
+        written = cache.put_many(["text1", "text2", "text2"], np.ones((3, 2)))
+
+        assert written == 1
+        assert len(cache) == 2
+
+    def test_dimension_mismatch(self, cache):
+        """Test that vectors of a different dimension are rejected."""
+        cache.put_many(["text1"], np.array([[1.0, 2.0]]))
+
+        with pytest.raises(ValueError, match="Expected 2-dimensional"):
+            cache.put_many(["text2"], np.array([[1.0, 2.0, 3.0]]))
+
+    def test_persistence_across_instances(self, temp_dir):
+        """Test that a reopened cache serves previously written vectors."""
+        vectors = np.array([[0.5, 0.25, 0.125]], dtype=np.float32)
+        EmbeddingCache(temp_dir, "test-model").put_many(["persisted"], vectors)
+
+        reopened = EmbeddingCache(temp_dir, "test-model")
+        hit_positions, hit_vectors, _ = reopened.lookup(["persisted"])
+
+        assert reopened.dimension == 3
+        assert hit_positions == [0]
+        np.testing.assert_array_equal(hit_vectors, vectors)
+
+    def test_models_are_isolated(self, temp_dir):
+        """Test that caches for different models do not share entries."""
+        EmbeddingCache(temp_dir, "model-a").put_many(["text"], np.ones((1, 2)))
+
+        _, _, miss_positions = EmbeddingCache(temp_dir, "model-b").lookup(["text"])
+
+        assert miss_positions == [0]
+
+    def test_torn_append_is_truncated(self, temp_dir):
+        """Test that a partially written row is discarded on reload."""
+        cache = EmbeddingCache(temp_dir, "test-model")
+        cache.put_many(["text1"], np.ones((1, 2)))
+        with open(cache.cache_directory / "vectors.f32", "ab") as f:
+            f.write(b"\x00" * 5)
+
+        reopened = EmbeddingCache(temp_dir, "test-model")
+
+        assert len(reopened) == 1
+        assert (reopened.cache_directory / "vectors.f32").stat().st_size == 8
+
+    def test_two_writers_share_a_directory(self, temp_dir):
+        """Test that instances opened before each other's writes keep keys matched to rows."""
+        cache_a = EmbeddingCache(temp_dir, "test-model")
+        cache_b = EmbeddingCache(temp_dir, "test-model")
+        cache_a.put_many(["a"], _vector_for("a")[None, :])
+        cache_b.put_many(["b", "a"], np.stack([_vector_for("b"), _vector_for("a")]))
+
+        hit_positions, hit_vectors, _ = cache_b.lookup(["a", "b"])
+        _, vectors_seen_by_a, _ = cache_a.lookup(["b"])
+
+        assert hit_positions == [0, 1]
+        np.testing.assert_array_equal(hit_vectors, np.stack([_vector_for("a"), _vector_for("b")]))
+        np.testing.assert_array_equal(vectors_seen_by_a, _vector_for("b")[None, :])
+        assert len(EmbeddingCache(temp_dir, "test-model")) == 2
+
+    def test_concurrent_writer_processes(self, temp_dir):
+        """Test that processes appending at the same time never mismatch keys and vectors."""
+        context = multiprocessing.get_context("fork")
+        writers = [context.Process(target=_write_entries, args=(temp_dir, prefix, 200)) for prefix in "xyz"]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        assert all(writer.exitcode == 0 for writer in writers)
+
+        texts = [f"{prefix}-{i}" for prefix in "xyz" for i in range(200)] + ["shared"]
+        cache = EmbeddingCache(temp_dir, "test-model")
+        hit_positions, hit_vectors, miss_positions = cache.lookup(texts)
+
+        assert miss_positions == []
+        assert len(cache) == len(texts)
+        np.testing.assert_array_equal(hit_vectors, np.stack([_vector_for(text) for text in texts]))
+
+    def test_stats(self, cache):
+        """Test hit/miss and byte counters."""
+        cache.put_many(["text1"], np.ones((1, 4)))
+        cache.lookup(["text1", "text2"])
+
+        stats = cache.get_stats()
+
+        assert stats["entries"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["bytes_read"] == 16
+        assert stats["bytes_written"] == 16
+        assert stats["size_bytes"] == 16
+
+
+class TestEmbeddingLRUCache:
+    """Unit tests for EmbeddingLRUCache."""
+
+    def test_invalid_budget(self):
+        """Test that a non-positive budget is rejected."""
+        with pytest.raises(ValueError, match="max_bytes must be positive"):
+            EmbeddingLRUCache(0)
+
+    def test_get_and_put(self):
+        """Test basic hit and miss behaviour."""
+        cache = EmbeddingLRUCache(1024 * 1024)
+        cache.put("query", np.array([0.1, 0.2]))
+
+        assert cache.get("missing") is None
+        np.testing.assert_allclose(cache.get("query"), [0.1, 0.2], rtol=1e-6)
+        assert cache.get("query").dtype == np.float32
+
+    def test_cached_vectors_are_read_only(self):
+        """Test that callers cannot mutate cached vectors."""
+        cache = EmbeddingLRUCache(1024 * 1024)
+        cache.put("query", np.array([0.1, 0.2]))
+
+        with pytest.raises(ValueError):
+            cache.get("query")[0] = 1.0
+
+    def test_evicts_least_recently_used(self):
+        """Test that the least recently used entry is evicted over budget."""
+        vector = np.zeros(256, dtype=np.float32)
+        entry_size = EmbeddingLRUCache._entry_size("q1", vector)
+        cache = EmbeddingLRUCache(entry_size * 2)
+
+        cache.put("q1", vector)
+        cache.put("q2", vector)
+        cache.get("q1")
+        cache.put("q3", vector)
+
+        assert cache.get("q2") is None
+        assert cache.get("q1") is not None
+        assert cache.get("q3") is not None
+        assert cache.evictions == 1
+        assert cache.current_bytes <= cache.max_bytes
+
+    def test_oversized_entry_is_not_cached(self):
+        """Test that an entry larger than the whole budget is skipped."""
+        cache = EmbeddingLRUCache(64)
+        cache.put("query", np.zeros(1024))
+
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
+
+    def test_replace_entry(self):
+        """Test that re-putting a key does not double-count its bytes."""
+        cache = EmbeddingLRUCache(1024 * 1024)
+        cache.put("query", np.zeros(4))
+        size = cache.current_bytes
+        cache.put("query", np.ones(4))
+
+        assert cache.current_bytes == size
+        assert len(cache) == 1
+
+    def test_stats_and_clear(self):
+        """Test statistics reporting and clearing."""
+        cache = EmbeddingLRUCache(4096)
+        cache.put("query", np.zeros(4))
+        cache.get("query")
+        cache.get("other")
+
+        stats = cache.get_stats()
+        assert stats["entries"] == 1
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["max_bytes"] == 4096
+
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.current_bytes == 0
@@ -0,0 +1,136 @@
+"""
+Unit tests for the multi-process embedding worker pool.
+
+Worker functions are exercised in-process; the pool's process management is
+replaced by a synchronous stand-in so no model is loaded.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+import numpy as np
+
+from backend.src.services import embedding_pool
+from backend.src.services.embedding_pool import EmbeddingWorkerPool, _encode_shard, _init_worker
+
+
+def _fake_model_encode(texts):
+    """Encode each text as [len(text), 1, 2]."""
+    return np.array([[float(len(text)), 1.0, 2.0] for text in texts], dtype=np.float32)
+
+
+class _InlinePool:
+    """Synchronous stand-in for multiprocessing.Pool."""
+    
+    def apply(self, function, args=()):
+        return function(*args)
+    
+    def imap_unordered(self, function, tasks):
+        return [function(task) for task in reversed(tasks)]
+    
+    def close(self):
+        pass
+    
+    def join(self):
+        pass
+
+
+@pytest.fixture
+def worker_service():
+    """Install a fake per-process embedding service."""
+    service = Mock()
+    service._model_encode.side_effect = _fake_model_encode
+    service.get_embedding_dimension.return_value = 3
+    with patch.object(embedding_pool, "_worker_service", service):
+        yield service
+
+
+@pytest.fixture
+def inline_pool(worker_service):
+    """Create a worker pool whose workers run in the test process."""
+    with patch.object(embedding_pool.multiprocessing, "get_context") as mock_get_context:
+        mock_get_context.return_value.Pool.return_value = _InlinePool()
+        pool = EmbeddingWorkerPool(num_workers=2, threads_per_worker=1, shard_size=2)
+    return pool
+
+
+class TestEmbeddingWorkerPool:
+    """Unit tests for EmbeddingWorkerPool."""
+    
+    def test_thread_defaults_avoid_oversubscription(self):
+        """Test that workers x threads does not exceed the core count."""
+        with patch.object(embedding_pool.multiprocessing, "get_context"), \
+                patch.object(embedding_pool.os, "cpu_count", return_value=32):
+            pool = EmbeddingWorkerPool()
+        
+        assert pool.num_workers == 8
+        assert pool.threads_per_worker == 4
+        assert pool.num_workers * pool.threads_per_worker <= 32
+    
+    def test_pool_started_with_spawn_and_initializer(self):
+        """Test that workers are spawned with the model initializer."""
+        with patch.object(embedding_pool.multiprocessing, "get_context") as mock_get_context:
+            EmbeddingWorkerPool(model_name="custom-model", num_workers=3, threads_per_worker=2)
+        
+        mock_get_context.assert_called_once_with("spawn")
+        mock_get_context.return_value.Pool.assert_called_once_with(
+            3, initializer=_init_worker, initargs=("custom-model", 2)
+        )
+    
+    def test_shards(self, inline_pool):
+        """Test that texts are split into offset shards."""
+        shards = inline_pool._shards(["a", "b", "c", "d", "e"])
+        
+        assert shards == [(0, ["a", "b"]), (2, ["c", "d"]), (4, ["e"])]
+    
+    def test_generate_embeddings_array(self, inline_pool):
+        """Test that shards completed out of order land in input order."""
+        result = inline_pool.generate_embeddings_array(["a", "bb", "", "ccc", "dddd", "eeeee"])
+        
+        assert result.dtype == np.float32
+        assert result.shape == (5, 3)
+        np.testing.assert_array_equal(result[:, 0], [1, 2, 3, 4, 5])
+    
+    def test_generate_embeddings_array_empty(self, inline_pool):
+        """Test empty and all-empty inputs."""
+        assert inline_pool.generate_embeddings_array([]).shape == (0, 0)
+        with pytest.raises(ValueError, match="All texts are empty"):
+            inline_pool.generate_embeddings_array([" "])
+    
+    def test_get_embedding_dimension_cached(self, inline_pool, worker_service):
+        """Test that the dimension is fetched from a worker once."""
+        assert inline_pool.get_embedding_dimension() == 3
+        assert inline_pool.get_embedding_dimension() == 3
+        worker_service.get_embedding_dimension.assert_called_once()
+
+
+class TestWorkerFunctions:
+    """Tests for the functions that run inside worker processes."""
+    
+    def test_encode_shard_writes_shared_memory(self, worker_service):
+        """Test that a shard is written at its offset in the shared matrix."""
+        shm = embedding_pool.shared_memory.SharedMemory(create=True, size=4 * 3 * 4)
+        try:
+            output = np.ndarray((4, 3), dtype=np.float32, buffer=shm.buf)
+            output[:] = 0
+            
+            written = _encode_shard((shm.name, 4, 3, 2, ["xy", "xyz"]))
+            
+            assert written == 2
+            np.testing.assert_array_equal(output[:, 0], [0, 0, 2, 3])
+            del output
+        finally:
+            shm.close()
+            shm.unlink()
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_init_worker_sets_threads_and_loads_model(self, mock_sentence_transformer):
+        """Test that the initializer pins torch threads and loads the model once."""
+        with patch("torch.set_num_threads") as mock_set_threads, \
+                patch("torch.set_num_interop_threads"), \
+                patch.object(embedding_pool, "_worker_service", None):
+            _init_worker("custom-model", 4)
+            service = embedding_pool._worker_service
+        
+        mock_set_threads.assert_called_once_with(4)
+        mock_sentence_transformer.assert_called_once_with("custom-model")
+        assert service.query_cache is None
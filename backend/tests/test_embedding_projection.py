@@ -0,0 +1,86 @@
+"""
+Unit tests for the PCA embedding projection.
+"""
+
+import pytest
+import tempfile
+import shutil
+import os
+import numpy as np
+
+from backend.src.services.embedding_projection import PCAProjection
+
+
+class TestPCAProjection:
+    """Unit tests for PCAProjection."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @pytest.fixture
+    def corpus(self):
+        """Vectors whose variance lies almost entirely in two directions."""
+        rng = np.random.default_rng(0)
+        vectors = np.zeros((200, 6), dtype=np.float32)
+        vectors[:, 0] = rng.standard_normal(200) * 5.0
+        vectors[:, 3] = rng.standard_normal(200) * 2.0
+        vectors += rng.standard_normal((200, 6)).astype(np.float32) * 0.01
+        return vectors + 1.0
+    
+    def test_fit_keeps_dominant_directions(self, corpus):
+        """Test that the basis spans the high-variance directions."""
+        projection = PCAProjection.fit(corpus, 2)
+        
+        assert projection.input_dimension == 6
+        assert projection.output_dimension == 2
+        assert projection.explained_variance_ratio > 0.99
+        np.testing.assert_allclose(
+            projection.components.T @ projection.components, np.eye(2), atol=1e-5
+        )
+    
+    def test_transform_preserves_distances(self, corpus):
+        """Test that distances in the projected space match the originals."""
+        projection = PCAProjection.fit(corpus, 2)
+        projected = projection.transform(corpus)
+        
+        original = np.linalg.norm(corpus[0] - corpus[1:], axis=1)
+        reduced = np.linalg.norm(projected[0] - projected[1:], axis=1)
+        
+        assert projected.shape == (200, 2)
+        assert projected.dtype == np.float32
+        np.testing.assert_allclose(reduced, original, atol=0.05)
+    
+    def test_transform_single_vector(self, corpus):
+        """Test projecting a 1-D query vector."""
+        projection = PCAProjection.fit(corpus, 3)
+        
+        assert projection.transform(corpus[0]).shape == (3,)
+    
+    def test_transform_dimension_mismatch(self, corpus):
+        """Test that vectors of the wrong dimension are rejected."""
+        projection = PCAProjection.fit(corpus, 2)
+        
+        with pytest.raises(ValueError, match="Expected 6-dimensional"):
+            projection.transform(np.ones((1, 4)))
+    
+    def test_invalid_fit(self, corpus):
+        """Test argument validation when fitting."""
+        with pytest.raises(ValueError, match="n_components"):
+            PCAProjection.fit(corpus, 7)
+        with pytest.raises(ValueError, match="At least two"):
+            PCAProjection.fit(corpus[:1], 1)
+    
+    def test_save_and_load(self, corpus, temp_dir):
+        """Test that a saved projection reloads identically."""
+        path = os.path.join(temp_dir, "projection.npz")
+        projection = PCAProjection.fit(corpus, 2)
+        projection.save(path)
+        
+        loaded = PCAProjection.load(path)
+        
+        np.testing.assert_array_equal(loaded.transform(corpus), projection.transform(corpus))
+        assert loaded.get_stats() == projection.get_stats()
@@ -3,10 +3,17 @@ Unit tests for the embedding service.
 """
 
 import pytest
+import tempfile
+import shutil
 from unittest.mock import Mock, patch
 import numpy as np
 
-from backend.src.services.embeddings import EmbeddingService, get_embedding_service
+import backend.src.services.embeddings as embeddings_module
+from backend.src.services.embeddings import (
+    EmbeddingModelRegistry,
+    EmbeddingService,
+    get_embedding_service,
+)
 
 
 class TestEmbeddingService:
@@ -118,6 +125,69 @@ class TestEmbeddingService:
         assert result == expected
         mock_model.encode.assert_called_once_with(["text1", "text2"], convert_to_numpy=True)
     
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_generate_embeddings_array(self, mock_sentence_transformer, embedding_service):
+        """Test that the array API returns a contiguous float32 matrix."""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.asfortranarray([[0.1, 0.2], [0.3, 0.4]])
+        mock_sentence_transformer.return_value = mock_model
+        
+        result = embedding_service.generate_embeddings_array(["text1", "", "text2"])
+        
+        assert isinstance(result, np.ndarray)
+        assert result.dtype == np.float32
+        assert result.flags["C_CONTIGUOUS"]
+        np.testing.assert_allclose(result, [[0.1, 0.2], [0.3, 0.4]], rtol=1e-6)
+        mock_model.encode.assert_called_once_with(["text1", "text2"], convert_to_numpy=True)
+    
+    def test_generate_embeddings_array_empty(self, embedding_service):
+        """Test the array API with empty and all-empty inputs."""
+        assert embedding_service.generate_embeddings_array([]).shape == (0, 0)
+        with pytest.raises(ValueError, match="All texts are empty"):
+            embedding_service.generate_embeddings_array(["", " "])
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_generate_embedding_array(self, mock_sentence_transformer, embedding_service):
+        """Test the single-text array API."""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[0.1, 0.2, 0.3]])
+        mock_sentence_transformer.return_value = mock_model
+        
+        result = embedding_service.generate_embedding_array("test text")
+        
+        assert result.dtype == np.float32
+        assert result.shape == (3,)
+        with pytest.raises(ValueError, match="Text cannot be empty"):
+            embedding_service.generate_embedding_array(" ")
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_generate_embedding_uses_query_cache(self, mock_sentence_transformer, embedding_service):
+        """Test that repeated single-text queries skip the model."""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[0.1, 0.2, 0.3]])
+        mock_sentence_transformer.return_value = mock_model
+        
+        first = embedding_service.generate_embedding("temperature sensor")
+        second = embedding_service.generate_embedding("temperature sensor")
+        
+        np.testing.assert_allclose(second, first, rtol=1e-6)
+        mock_model.encode.assert_called_once()
+        assert embedding_service.get_cache_stats()["query"]["hits"] == 1
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_query_cache_disabled(self, mock_sentence_transformer):
+        """Test that a zero budget disables the query cache."""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[0.1, 0.2]])
+        mock_sentence_transformer.return_value = mock_model
+        service = EmbeddingService(query_cache_bytes=0)
+        
+        service.generate_embedding("text")
+        service.generate_embedding("text")
+        
+        assert service.query_cache is None
+        assert mock_model.encode.call_count == 2
+    
     @patch('backend.src.services.embeddings.SentenceTransformer')
     def test_get_embedding_dimension(self, mock_sentence_transformer, embedding_service):
         """Test getting embedding dimension."""
@@ -131,20 +201,318 @@ class TestEmbeddingService:
         mock_model.get_sentence_embedding_dimension.assert_called_once()
 
 
+class TestEmbeddingServiceQueryBatch:
+    """Tests for batched query embedding."""
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_misses_are_encoded_together(self, mock_sentence_transformer):
+        """Test that uncached queries share one encode call and repeats are encoded once."""
+        mock_model = Mock()
+        mock_model.encode.side_effect = [
+            np.array([[1.0, 0.0]]),
+            np.array([[0.0, 1.0], [0.5, 0.5]]),
+        ]
+        mock_sentence_transformer.return_value = mock_model
+        service = EmbeddingService()
+        service.generate_embedding("cached")
+        
+        result = service.generate_query_embeddings_array(["q1", "cached", "q2", "q1"])
+        
+        assert result.shape == (4, 2)
+        assert result.dtype == np.float32
+        np.testing.assert_allclose(result, [[0.0, 1.0], [1.0, 0.0], [0.5, 0.5], [0.0, 1.0]])
+        assert mock_model.encode.call_args_list[1][0][0] == ["q1", "q2"]
+        assert service.query_cache.get("q2") is not None
+    
+    def test_empty_query_rejected(self):
+        """Test that an empty query text is rejected like a single query."""
+        service = EmbeddingService()
+        
+        with pytest.raises(ValueError, match="Text cannot be empty"):
+            service.generate_query_embeddings_array(["ok", "  "])
+
+
+class TestEmbeddingServiceLengthBucketing:
+    """Tests for length-bucketed encoding of large inputs."""
+    
+    @staticmethod
+    def _length_encoder(texts, batch_size=32, convert_to_numpy=True):
+        """Encode each text as [len(text), 1] so order can be checked."""
+        return np.array([[float(len(text)), 1.0] for text in texts])
+    
+    def test_length_buckets_respect_token_budget(self):
+        """Test that bucket padded size stays within tokens_per_batch."""
+        service = EmbeddingService(tokens_per_batch=100)
+        lengths = np.array([50, 5, 10, 45, 5, 30, 10, 5])
+        
+        buckets = service._length_buckets(lengths)
+        
+        flattened = np.concatenate(buckets)
+        assert sorted(flattened.tolist()) == list(range(len(lengths)))
+        for bucket in buckets:
+            assert len(bucket) == 1 or len(bucket) * lengths[bucket].max() <= 100
+        # Sorted by length: the short texts share the first bucket
+        assert set(buckets[0].tolist()) == {1, 4, 7, 2, 6}
+    
+    def test_length_buckets_adaptive_batch_size(self):
+        """Test that short texts get larger batches than long texts."""
+        service = EmbeddingService(tokens_per_batch=1000)
+        lengths = np.array([10] * 200 + [250] * 20)
+        
+        buckets = service._length_buckets(lengths)
+        
+        assert len(buckets[0]) == 100
+        assert len(buckets[-1]) == 4
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_bucketed_encode_restores_order(self, mock_sentence_transformer):
+        """Test that bucketed embeddings come back in input order."""
+        mock_model = Mock(spec=["encode"])
+        mock_model.encode.side_effect = self._length_encoder
+        mock_sentence_transformer.return_value = mock_model
+        service = EmbeddingService(batch_size=4, tokens_per_batch=64)
+        texts = ["x" * n for n in [400, 8, 120, 16, 400, 8, 60]]
+        
+        result = service.generate_embeddings_array(texts)
+        
+        np.testing.assert_array_equal(result[:, 0], [400, 8, 120, 16, 400, 8, 60])
+        assert mock_model.encode.call_count > 1
+        for call in mock_model.encode.call_args_list:
+            assert call[1]["batch_size"] == len(call[0][0])
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_bucketing_uses_tokenizer_lengths(self, mock_sentence_transformer):
+        """Test that the model tokenizer determines bucket lengths."""
+        mock_model = Mock(spec=["encode", "tokenizer", "max_seq_length"])
+        mock_model.encode.side_effect = self._length_encoder
+        mock_model.max_seq_length = 256
+        mock_model.tokenizer.return_value = {"input_ids": [[0] * 3, [0] * 300, [0] * 3]}
+        mock_sentence_transformer.return_value = mock_model
+        service = EmbeddingService(batch_size=2, tokens_per_batch=300)
+        
+        service.generate_embeddings_array(["a", "b", "c"])
+        
+        mock_model.tokenizer.assert_called_once_with(
+            ["a", "b", "c"], add_special_tokens=True, truncation=True, max_length=256
+        )
+        assert [call[0][0] for call in mock_model.encode.call_args_list] == [["a", "c"], ["b"]]
+
+
+class TestEmbeddingServiceCache:
+    """Tests for EmbeddingService with the persistent cache enabled."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_only_misses_are_encoded(self, mock_sentence_transformer, temp_dir):
+        """Test that cached texts are not sent to the model."""
+        mock_model = Mock()
+        mock_model.encode.side_effect = [
+            np.array([[0.1, 0.2], [0.3, 0.4]]),
+            np.array([[0.5, 0.6]]),
+        ]
+        mock_sentence_transformer.return_value = mock_model
+        service = EmbeddingService(cache_directory=temp_dir)
+        
+        service.generate_embeddings(["text1", "text2"])
+        result = service.generate_embeddings(["text2", "text3", "text1"])
+        
+        np.testing.assert_allclose(result, [[0.3, 0.4], [0.5, 0.6], [0.1, 0.2]], rtol=1e-6)
+        assert mock_model.encode.call_args_list[1][0][0] == ["text3"]
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_hits_do_not_load_model(self, mock_sentence_transformer, temp_dir):
+        """Test that a fully cached request never loads the model."""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[0.1, 0.2]])
+        mock_sentence_transformer.return_value = mock_model
+        EmbeddingService(cache_directory=temp_dir).generate_embedding("text")
+        mock_sentence_transformer.reset_mock()
+        
+        service = EmbeddingService(cache_directory=temp_dir)
+        result = service.generate_embedding("text")
+        
+        np.testing.assert_allclose(result, [0.1, 0.2], rtol=1e-6)
+        assert service.get_embedding_dimension() == 2
+        assert service._model is None
+        mock_sentence_transformer.assert_not_called()
+    
+    def test_cache_stats(self, temp_dir):
+        """Test cache statistics reporting."""
+        assert EmbeddingService(query_cache_bytes=0).get_cache_stats() == {
+            "persistent": None,
+            "query": None,
+        }
+        
+        stats = EmbeddingService(cache_directory=temp_dir).get_cache_stats()
+        assert stats["persistent"]["hits"] == 0
+        assert stats["persistent"]["model_name"] == "all-MiniLM-L6-v2"
+
+
+class TestEmbeddingServiceStream:
+    """Tests for the streaming embedding API."""
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_embed_stream_batches(self, mock_sentence_transformer):
+        """Test that a generator is consumed in fixed-size batches."""
+        mock_model = Mock()
+        mock_model.encode.side_effect = lambda texts, **kwargs: np.ones((len(texts), 2))
+        mock_sentence_transformer.return_value = mock_model
+        service = EmbeddingService(query_cache_bytes=0)
+        
+        batches = list(service.embed_stream((f"text {i}" for i in range(5)), batch_size=2))
+        
+        assert [ids for ids, _ in batches] == [["0", "1"], ["2", "3"], ["4"]]
+        assert batches[0][1].shape == (2, 2)
+        assert batches[0][1].dtype == np.float32
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_embed_stream_pairs_and_empty_texts(self, mock_sentence_transformer):
+        """Test that (id, text) pairs keep their IDs and empty texts are skipped."""
+        mock_model = Mock()
+        mock_model.encode.side_effect = lambda texts, **kwargs: np.ones((len(texts), 2))
+        mock_sentence_transformer.return_value = mock_model
+        service = EmbeddingService(query_cache_bytes=0)
+        
+        batches = list(service.embed_stream([("a", "x"), ("b", "  "), ("c", "y")], batch_size=3))
+        
+        assert len(batches) == 1
+        assert batches[0][0] == ["a", "c"]
+        assert batches[0][1].shape == (2, 2)
+    
+    def test_embed_stream_invalid_batch_size(self):
+        """Test that a non-positive batch size is rejected."""
+        service = EmbeddingService()
+        
+        with pytest.raises(ValueError, match="batch_size"):
+            list(service.embed_stream(["text"], batch_size=0))
+
+
+class TestEmbeddingModelRegistry:
+    """Tests for the multi-model embedding registry."""
+    
+    def test_services_are_created_per_model(self):
+        """Test that each model name gets one lazily created service."""
+        registry = EmbeddingModelRegistry(default_model_name="model-a")
+        
+        default = registry.get()
+        other = registry.get("model-b")
+        
+        assert default.model_name == "model-a"
+        assert other.model_name == "model-b"
+        assert registry.get("model-a") is default
+        assert registry.model_names() == ["model-a", "model-b"]
+        assert not default.is_loaded
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_unload_idle_models(self, mock_sentence_transformer):
+        """Test that only models idle past the timeout are unloaded."""
+        mock_sentence_transformer.return_value = Mock()
+        registry = EmbeddingModelRegistry(idle_timeout_seconds=60.0)
+        stale = registry.get("stale")
+        fresh = registry.get("fresh")
+        stale._get_model()
+        fresh._get_model()
+        stale.last_used -= 120.0
+        
+        unloaded = registry.unload_idle()
+        
+        assert unloaded == ["stale"]
+        assert not stale.is_loaded
+        assert fresh.is_loaded
+        assert registry.unloads == 1
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_unloaded_model_reloads_on_use(self, mock_sentence_transformer):
+        """Test that an unloaded model is loaded again by the next encode."""
+        mock_model = Mock()
+        mock_model.encode.return_value = np.array([[0.1, 0.2]])
+        mock_sentence_transformer.return_value = mock_model
+        registry = EmbeddingModelRegistry()
+        service = registry.get("model")
+        service.generate_embeddings(["a"])
+        
+        assert registry.unload("model") is True
+        assert registry.unload("model") is False
+        service.generate_embeddings(["b"])
+        
+        assert mock_sentence_transformer.call_count == 2
+        assert service.is_loaded
+    
+    @patch('backend.src.services.embeddings.SentenceTransformer')
+    def test_stats_report_memory(self, mock_sentence_transformer):
+        """Test that resident weight sizes are reported per model."""
+        weights = Mock()
+        weights.numel.return_value = 1000
+        weights.element_size.return_value = 4
+        mock_model = Mock()
+        mock_model.parameters.return_value = [weights]
+        mock_model.buffers.return_value = []
+        mock_sentence_transformer.return_value = mock_model
+        registry = EmbeddingModelRegistry()
+        registry.get("loaded")._get_model()
+        registry.get("idle")
+        
+        stats = registry.get_stats()
+        
+        assert stats["models"]["loaded"]["loaded"] is True
+        assert stats["models"]["loaded"]["memory_bytes"] == 4000
+        assert stats["models"]["idle"] == {"loaded": False, "memory_bytes": 0, "idle_seconds": None}
+        assert stats["loaded_models"] == 1
+        assert stats["total_memory_bytes"] == 4000
+    
+    def test_idle_reaper_thread(self):
+        """Test starting and stopping the background reaper."""
+        registry = EmbeddingModelRegistry()
+        registry.start_idle_reaper(interval_seconds=0.01)
+        
+        assert registry._reaper.is_alive()
+        registry.stop_idle_reaper()
+        assert registry._reaper is None
+
+
 class TestEmbeddingServiceGlobal:
     """Test global embedding service instance."""
     
-    def test_get_embedding_service_singleton(self):
+    @pytest.fixture
+    def global_registry(self, tmp_path):
+        """Install a global registry with its caches under tmp_path, stopping its reaper afterwards."""
+        registry = EmbeddingModelRegistry(cache_directory=str(tmp_path / "embedding_cache"))
+        registry.start_idle_reaper()
+        with patch('backend.src.services.embeddings._embedding_registry', registry):
+            yield registry
+        registry.stop_idle_reaper()
+    
+    def test_get_embedding_service_singleton(self, global_registry):
         """Test that get_embedding_service returns singleton."""
         service1 = get_embedding_service()
         service2 = get_embedding_service()
         
         assert service1 is service2
         assert isinstance(service1, EmbeddingService)
+        assert global_registry.model_names() == ["all-MiniLM-L6-v2"]
     
-    @patch('backend.src.services.embeddings._embedding_service', None)
-    def test_get_embedding_service_creates_new_instance(self):
+    @patch('backend.src.services.embeddings._embedding_registry', None)
+    def test_get_embedding_service_creates_new_instance(self, tmp_path, monkeypatch):
         """Test that get_embedding_service creates new instance when needed."""
-        service = get_embedding_service()
+        monkeypatch.chdir(tmp_path)
+        try:
+            service = get_embedding_service()
+        finally:
+            embeddings_module._embedding_registry.stop_idle_reaper()
         assert isinstance(service, EmbeddingService)
-        assert service.model_name == "all-MiniLM-L6-v2"
\ No newline at end of file
+        assert service.model_name == "all-MiniLM-L6-v2"
+        assert (tmp_path / "data" / "embedding_cache").is_dir()
+    
+    def test_get_embedding_service_by_model_name(self, global_registry):
+        """Test that services for other models come from the same registry."""
+        service = get_embedding_service("paraphrase-MiniLM-L3-v2")
+        
+        assert service.model_name == "paraphrase-MiniLM-L3-v2"
+        assert get_embedding_service("paraphrase-MiniLM-L3-v2") is service
+        assert get_embedding_service() is not service
@@ -0,0 +1,145 @@
+"""
+Unit tests for the BM25 lexical index and rank fusion.
+"""
+
+import pytest
+import tempfile
+import shutil
+import os
+
+from backend.src.services.lexical_index import (
+    BM25Index,
+    looks_like_part_number,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+class TestTokenization:
+    """Tests for tokenization and part-number detection."""
+
+    def test_joined_identifiers_are_kept_whole(self):
+        """Test that part numbers are indexed whole and by their parts."""
+        assert tokenize("The ESP32-WROOM-32 module") == [
+            "the", "esp32-wroom-32", "esp32", "wroom", "32", "module"
+        ]
+
+    @pytest.mark.parametrize("query,expected", [
+        ("TMP117", True),
+        ("ESP32-WROOM-32", True),
+        ("  LM317T ", True),
+        ("2N3904", True),
+        ("1N4148", True),
+        ("i2c", False),
+        ("temperature", False),
+        ("TMP117 breakout", False),
+        ("1234", False),
+        ("3.3V", False),
+        ("100mA", False),
+        ("4.7uF", False),
+        ("2.4GHz", False),
+        ("10kOhm", False),
+        ("470R", False),
+        ("10K5", False),
+    ])
+    def test_looks_like_part_number(self, query, expected):
+        """Test part-number detection on single tokens and phrases."""
+        assert looks_like_part_number(query) is expected
+
+
+class TestReciprocalRankFusion:
+    """Tests for reciprocal_rank_fusion."""
+
+    def test_agreeing_rankings_win(self):
+        """Test that documents ranked by both lists outrank single-list hits."""
+        fused = reciprocal_rank_fusion([["a", "b"], ["c", "b"]], k=60)
+
+        assert [doc_id for doc_id, _ in fused] == ["b", "a", "c"]
+        assert fused[0][1] == pytest.approx(2 / 62)
+
+
+class TestBM25Index:
+    """Tests for BM25Index."""
+
+    @pytest.fixture
+    def index(self):
+        """Index over a few datasheet-like chunks."""
+        index = BM25Index()
+        index.add(
+            ["a", "b", "c"],
+            [
+                "TMP117 high accuracy digital temperature sensor with I2C",
+                "ESP32-WROOM-32 Wi-Fi module with I2C and SPI",
+                "Low dropout regulator with thermal shutdown",
+            ],
+        )
+        return index
+
+    def test_exact_part_number_match(self, index):
+        """Test that a part number finds only the chunk containing it."""
+        assert index.search("tmp117")[0] == ["a"]
+        assert index.search("ESP32-WROOM-32")[0] == ["b"]
+
+    def test_rare_terms_score_higher(self, index):
+        """Test that a rarer matching term ranks its chunk first."""
+        doc_ids, scores = index.search("i2c temperature")
+
+        assert doc_ids == ["a", "b"]
+        assert scores[0] > scores[1] > 0
+
+    def test_allowed_ids_and_no_match(self, index):
+        """Test candidate restriction and queries sharing no terms."""
+        assert index.search("i2c", allowed_ids=["b", "c"])[0] == ["b"]
+        assert index.search("bluetooth") == ([], [])
+
+    def test_replace_and_remove(self, index):
+        """Test that replaced text and removed chunks are no longer matched."""
+        index.add(["a"], ["Humidity sensor"])
+        index.remove(["b", "missing"])
+
+        assert index.search("tmp117") == ([], [])
+        assert index.search("i2c") == ([], [])
+        assert index.search("humidity")[0] == ["a"]
+        assert index.get_stats()["documents"] == 2
+
+    def test_log_replay(self, temp_dir):
+        """Test that writes are replayed from the log, dropping a torn tail."""
+        path = os.path.join(temp_dir, "index.bm25.jsonl")
+        index = BM25Index(path)
+        index.add(["a", "b"], ["TMP117 sensor", "LM317 regulator"])
+        index.remove(["b"])
+        with open(path, "a") as f:
+            f.write('{"id": "c", "ter')
+
+        reopened = BM25Index(path)
+
+        assert len(reopened) == 1
+        assert reopened.search("tmp117")[0] == ["a"]
+        reopened.add(["c"], ["AHT20 humidity"])
+        assert BM25Index(path).search("aht20")[0] == ["c"]
+
+    def test_compact(self, temp_dir):
+        """Test that compaction drops dead slots without changing scores."""
+        path = os.path.join(temp_dir, "index.bm25.jsonl")
+        index = BM25Index(path)
+        index.add(["a", "b", "c"], ["TMP117 sensor", "LM317 regulator", "AHT20 humidity sensor"])
+        index.add(["a"], ["TMP117 temperature sensor"])
+        index.remove(["b"])
+        before = index.search("temperature sensor")
+
+        assert index.compact() == 2
+        assert index.compact() == 0
+        assert index.get_stats()["dead_slots"] == 0
+        assert index.search("temperature sensor") == before
+        reopened = BM25Index(path)
+        assert reopened.search("temperature sensor") == before
+        with open(path) as f:
+            assert len(f.readlines()) == 2
@@ -0,0 +1,214 @@
+"""
+Unit tests for the NumPy exact-search vector store.
+"""
+
+import pytest
+import tempfile
+import shutil
+import numpy as np
+
+from backend.src.services.numpy_vector_store import NumpyVectorStore
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def collection(temp_dir):
+    """A small collection of 2-D vectors with mixed metadata."""
+    collection = NumpyVectorStore(temp_dir).create_collection(name="parts")
+    collection.add(
+        ids=["a", "b", "c", "d"],
+        documents=["mcu", "sensor", "regulator", "sensor 2"],
+        metadatas=[
+            {"category": "microcontroller", "voltage": 3.3},
+            {"category": "sensor", "voltage": 5},
+            {"category": "power"},
+            {"category": "sensor", "voltage": 1.8},
+        ],
+        embeddings=[[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [2.0, 0.0]],
+    )
+    return collection
+
+
+class TestNumpyCollection:
+    """Tests for NumpyCollection."""
+
+    def test_query_returns_exact_neighbours(self, collection):
+        """Test that results are ordered by squared L2 distance."""
+        result = collection.query(query_embeddings=[[1.1, 0.0]], n_results=3)
+
+        assert result["ids"] == [["b", "d", "a"]]
+        assert result["documents"] == [["sensor", "sensor 2", "mcu"]]
+        assert result["distances"][0] == pytest.approx([0.01, 0.81, 1.21], abs=1e-5)
+        embeddings = collection.query(query_embeddings=[[1.1, 0.0]], n_results=2,
+                                      include=["embeddings"])["embeddings"]
+        np.testing.assert_array_equal(embeddings[0], [[1.0, 0.0], [2.0, 0.0]])
+
+    def test_query_multiple_with_filter(self, collection):
+        """Test that where filters restrict candidates for every query."""
+        result = collection.query(
+            query_embeddings=[[0.0, 0.0], [3.0, 0.0]],
+            n_results=5,
+            where={"category": "sensor"},
+        )
+
+        assert result["ids"] == [["b", "d"], ["d", "b"]]
+
+    @pytest.mark.parametrize("where,expected", [
+        ({"category": {"$ne": "sensor"}}, ["a", "c"]),
+        ({"voltage": {"$gte": 3.3}}, ["a", "b"]),
+        ({"voltage": {"$lt": 2}}, ["d"]),
+        ({"category": {"$in": ["power", "microcontroller"]}}, ["a", "c"]),
+        ({"category": {"$nin": ["sensor"]}}, ["a", "c"]),
+        ({"$and": [{"category": "sensor"}, {"voltage": {"$gt": 2}}]}, ["b"]),
+        ({"$or": [{"category": "power"}, {"voltage": 1.8}]}, ["c", "d"]),
+        ({"voltage": {"$ne": 5}}, ["a", "d"]),
+        ({"voltage": "5"}, []),
+    ])
+    def test_where_filters(self, collection, where, expected):
+        """Test the supported where operators; records missing a key never match."""
+        assert collection.get(where=where, include=[])["ids"] == expected
+
+    def test_unsupported_operator(self, collection):
+        """Test that unknown operators are rejected."""
+        with pytest.raises(ValueError, match="Unsupported where operator"):
+            collection.get(where={"voltage": {"$regex": "3"}})
+
+    def test_upsert_update_and_delete(self, collection):
+        """Test that replaced and deleted records disappear from reads and searches."""
+        collection.upsert(ids=["a"], documents=["mcu v2"], metadatas=[{"category": "mcu"}],
+                          embeddings=[[5.0, 5.0]])
+        collection.update(ids=["b"], metadatas=[{"category": "power"}])
+        collection.delete(ids=["c"])
+
+        assert collection.count() == 3
+        assert collection.get(ids=["a"])["documents"] == ["mcu v2"]
+        assert collection.get(where={"category": "power"}, include=[])["ids"] == ["b"]
+        result = collection.query(query_embeddings=[[0.0, 1.0]], n_results=4)
+        assert result["ids"] == [["b", "d", "a"]]
+        assert collection.get_stats()["dead_rows"] == 3
+
+    def test_small_writes_extend_cached_columns(self, collection):
+        """Test that writes after a filtered read extend, rather than drop, cached columns."""
+        assert collection.get(where={"voltage": {"$gt": 2}}, include=[])["ids"] == ["a", "b"]
+        voltage = collection._columns["voltage"]
+
+        collection.upsert(ids=["a"], metadatas=[{"voltage": 1.0}], embeddings=[[5.0, 5.0]])
+        for i in range(50):
+            collection.add(ids=[f"n{i}"], metadatas=[{"voltage": 10.0 + i}], embeddings=[[float(i), 1.0]])
+
+        assert collection._columns["voltage"] is voltage
+        assert len(collection.get(where={"voltage": {"$gt": 2}}, include=[])["ids"]) == 51
+        assert collection.get(where={"voltage": {"$lt": 2}}, include=[])["ids"] == ["d", "a"]
+        assert collection.query(query_embeddings=[[49.0, 1.0]], n_results=1)["ids"] == [["n49"]]
+
+        collection.add(ids=["s"], metadatas=[{"voltage": "high"}], embeddings=[[0.0, 9.0]])
+        assert collection.get(where={"voltage": "high"}, include=[])["ids"] == ["s"]
+
+    def test_add_ignores_existing_ids(self, collection):
+        """Test that add keeps the stored version of an existing ID, as in Chroma."""
+        collection.add(ids=["a", "e"], documents=["other", "new"], embeddings=[[9.0, 9.0], [3.0, 3.0]])
+
+        assert collection.count() == 5
+        assert collection.get(ids=["a"])["documents"] == ["mcu"]
+
+    def test_get_pages_and_embeddings(self, collection):
+        """Test limit/offset paging and returning stored vectors."""
+        page = collection.get(limit=2, offset=1, include=["embeddings"])
+
+        assert page["ids"] == ["b", "c"]
+        np.testing.assert_array_equal(page["embeddings"], [[1.0, 0.0], [0.0, 1.0]])
+        assert collection.get(ids=["d", "a"], include=[])["ids"] == ["d", "a"]
+
+    def test_dimension_mismatch(self, collection):
+        """Test that vectors of another dimension are rejected."""
+        with pytest.raises(ValueError, match="2-dimensional"):
+            collection.add(ids=["e"], embeddings=[[1.0, 2.0, 3.0]])
+
+    def test_embedding_function_used_for_texts(self, temp_dir):
+        """Test that documents and query texts are embedded when no vectors are given."""
+        def embed(texts):
+            return [[float(len(text)), 0.0] for text in texts]
+        collection = NumpyVectorStore(temp_dir).create_collection(name="parts", embedding_function=embed)
+
+        collection.add(ids=["a", "b"], documents=["ab", "abcd"])
+
+        assert collection.query(query_texts=["abc"], n_results=1)["ids"] == [["a"]]
+
+
+class TestNumpyVectorStore:
+    """Tests for NumpyVectorStore persistence and collection management."""
+
+    def test_reopen_after_writes(self, temp_dir, collection):
+        """Test that records, deletes and metadata survive reopening."""
+        collection.delete(ids=["b"])
+
+        reopened = NumpyVectorStore(temp_dir).get_collection(name="parts")
+
+        assert reopened.count() == 3
+        assert reopened.get(where={"category": "sensor"}, include=[])["ids"] == ["d"]
+        assert reopened.query(query_embeddings=[[0.0, 1.0]], n_results=1)["ids"] == [["c"]]
+
+    def test_torn_record_log_is_truncated(self, temp_dir, collection):
+        """Test that a partially written record is discarded on load."""
+        with open(f"{temp_dir}/parts/records.jsonl", "a") as f:
+            f.write('{"id": "e", "row"')
+
+        reopened = NumpyVectorStore(temp_dir).get_collection(name="parts")
+
+        assert reopened.count() == 4
+        reopened.add(ids=["e"], embeddings=[[3.0, 3.0]])
+        assert NumpyVectorStore(temp_dir).get_collection(name="parts").count() == 5
+
+    def test_compact_drops_dead_rows(self, temp_dir, collection):
+        """Test that compaction rewrites the files without replaced or deleted rows."""
+        collection.delete(ids=["b"])
+        collection.upsert(ids=["a"], documents=["mcu v2"], embeddings=[[0.5, 0.5]])
+
+        assert collection.compact() == 2
+        assert collection.compact() == 0
+        assert collection.get_stats()["rows"] == collection.count() == 3
+        assert collection.query(query_embeddings=[[0.5, 0.4]], n_results=1)["documents"] == [["mcu v2"]]
+        reopened = NumpyVectorStore(temp_dir).get_collection(name="parts")
+        assert reopened.get_stats()["dead_rows"] == 0
+        assert reopened.get(include=["documents"])["documents"] == ["regulator", "sensor 2", "mcu v2"]
+        assert reopened.query(query_embeddings=[[2.0, 0.1]], n_results=1)["ids"] == [["d"]]
+
+    def test_interrupted_compaction(self, temp_dir, collection, monkeypatch):
+        """Test that a committed compaction is completed on load and an uncommitted one discarded."""
+        collection.delete(ids=["a"])
+        with open(f"{temp_dir}/parts/vectors.f32.compact", "wb") as f:
+            f.write(b"partial")
+
+        assert NumpyVectorStore(temp_dir).get_collection(name="parts").count() == 3
+
+        # Crash after the commit point, before the files were moved into place
+        monkeypatch.setattr(type(collection), "_finish_compaction", lambda self: None)
+        collection.compact()
+        monkeypatch.undo()
+        reopened = NumpyVectorStore(temp_dir).get_collection(name="parts")
+        assert reopened.get(include=[])["ids"] == ["b", "c", "d"]
+        assert reopened.get_stats()["dead_rows"] == 0
+        assert reopened.query(query_embeddings=[[0.0, 0.9]], n_results=1)["ids"] == [["c"]]
+
+    def test_collection_lifecycle(self, temp_dir):
+        """Test create, rename, delete and missing-collection errors."""
+        store = NumpyVectorStore(temp_dir)
+        collection = store.create_collection(name="parts_rebuild", metadata={"embedding_model": "m"})
+
+        with pytest.raises(ValueError, match="already exists"):
+            store.create_collection(name="parts_rebuild")
+        collection.modify(name="parts")
+
+        assert store.get_collection(name="parts").metadata == {"embedding_model": "m"}
+        with pytest.raises(ValueError, match="does not exist"):
+            store.get_collection(name="parts_rebuild")
+        store.delete_collection(name="parts")
+        with pytest.raises(ValueError, match="does not exist"):
+            store.get_collection(name="parts")
@@ -0,0 +1,145 @@
+"""
+Unit tests for the per-category partitioned vector database service.
+"""
+
+import pytest
+import tempfile
+import shutil
+from unittest.mock import Mock, patch
+import numpy as np
+
+from backend.src.services.partitioned_vector_db import PartitionedVectorDBService
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+@pytest.fixture
+def mock_embedding_service():
+    """Embedding service that embeds every query as [1, 0]."""
+    with patch('backend.src.services.vector_db.get_embedding_service') as mock_get_embedding_service:
+        service = Mock()
+        service.generate_embedding_array.return_value = np.array([1.0, 0.0], dtype=np.float32)
+        service.generate_query_embeddings_array.side_effect = lambda texts: np.tile(
+            np.array([1.0, 0.0], dtype=np.float32), (len(texts), 1)
+        )
+        mock_get_embedding_service.return_value = service
+        yield service
+
+
+@pytest.fixture
+def service(temp_dir, mock_embedding_service):
+    """Partitioned NumPy-backed service with two sensors, an MCU and an uncategorized chunk."""
+    service = PartitionedVectorDBService(persist_directory=temp_dir, backend="numpy")
+    service.add_document_chunks(
+        ["mcu", "temp sensor", "humidity sensor", "misc"],
+        [
+            {"category": "microcontroller", "voltage": 3.3},
+            {"category": "sensor", "voltage": 3.3},
+            {"category": "Sensor", "voltage": 5.0},
+            {},
+        ],
+        embeddings=np.array([[1.0, 0.0], [0.9, 0.0], [0.0, 1.0], [0.5, 0.0]], dtype=np.float32)
+    )
+    return service
+
+
+class TestPartitionedVectorDBService:
+    """Tests for PartitionedVectorDBService."""
+
+    def test_chunks_are_partitioned_by_category(self, service):
+        """Test that each category gets its own collection."""
+        stats = service.get_collection_stats()
+
+        assert service.categories == ["microcontroller", "sensor", "uncategorized"]
+        assert stats["partitions"] == {"microcontroller": 1, "sensor": 2, "uncategorized": 1}
+        assert stats["total_documents"] == 4
+
+    def test_category_search_uses_one_partition(self, service):
+        """Test that a category filter is routed to its partition."""
+        with patch.object(service._partitions["microcontroller"], "search_similar") as other:
+            documents, metadatas, _ = service.search_by_category("query", "sensor", n_results=5)
+
+        assert documents == ["temp sensor", "humidity sensor"]
+        other.assert_not_called()
+
+    def test_remaining_filter_applies_within_partition(self, service):
+        """Test that non-category conditions are kept when routing."""
+        documents, _, _ = service.search_similar(
+            "query", 5, {"$and": [{"category": "sensor"}, {"voltage": {"$gt": 4}}]}
+        )
+
+        assert documents == ["humidity sensor"]
+
+    def test_unfiltered_search_merges_partitions(self, service):
+        """Test that scatter-gather returns the global top-k by distance."""
+        documents, _, distances = service.search_similar("query", n_results=3)
+
+        assert documents == ["mcu", "temp sensor", "misc"]
+        assert distances == sorted(distances)
+
+    def test_in_filter_and_unknown_category(self, service):
+        """Test $in routing across partitions and categories without a partition."""
+        documents, _, _ = service.search_similar(
+            "query", 5, {"category": {"$in": ["microcontroller", "power"]}}
+        )
+
+        assert documents == ["mcu"]
+        assert service.search_by_category("query", "power") == ([], [], [])
+
+    def test_search_components(self, service):
+        """Test that component search groups hits merged across partitions."""
+        service.add_document_chunks(
+            ["TMP117 page 1", "TMP117 page 2"],
+            [{"category": "sensor", "mpn": "TMP117"}, {"category": "sensor", "mpn": "TMP117"}],
+            embeddings=np.array([[0.98, 0.0], [0.97, 0.0]], dtype=np.float32)
+        )
+
+        components = service.search_components("query", k=2)
+
+        assert [component["documents"] for component in components] == [
+            ["mcu"], ["TMP117 page 1", "TMP117 page 2"]
+        ]
+        assert service.search_components("query", k=5, category="microcontroller")[0]["documents"] == ["mcu"]
+
+    def test_search_many(self, service):
+        """Test batch search mixing routed and scattered queries."""
+        results = service.search_many([("a", {"category": "sensor"}, 1), ("b", None, 2)])
+
+        assert results[0][0] == ["temp sensor"]
+        assert results[1][0] == ["mcu", "temp sensor"]
+
+    def test_reopen_and_find_new_chunks(self, service, temp_dir):
+        """Test that partitions are rediscovered and stored chunks recognized."""
+        reopened = PartitionedVectorDBService(persist_directory=temp_dir, backend="numpy")
+        metadata = [{"category": "sensor", "voltage": 3.3}, {"category": "power"}]
+        doc_ids = reopened.chunk_ids(["temp sensor", "regulator"], metadata)
+
+        assert reopened.categories == service.categories
+        assert reopened.find_new_chunks(doc_ids) == [1]
+
+    def test_find_new_chunks_with_repeats(self, service):
+        """Test that a repeated unstored ID is new at its first position only."""
+        doc_id = service.chunk_ids(["regulator"], [{"category": "power"}])[0]
+
+        assert service.find_new_chunks([doc_id, doc_id]) == [0]
+
+    def test_backfill_specs(self, service):
+        """Test that every partition's chunks get spec fields."""
+        assert service.backfill_specs() == 4
+        assert service.backfill_specs() == 0
+
+        _, metadatas, _ = service.search_similar("sensor", 5, {"category": "sensor"})
+        assert all(metadata["supply_voltage_min"] == 0.0 for metadata in metadatas)
+
+    def test_delete_collection(self, service, temp_dir):
+        """Test that deleting removes every partition."""
+        service.delete_collection()
+
+        assert service.categories == []
+        assert PartitionedVectorDBService(persist_directory=temp_dir, backend="numpy").categories == []
@@ -0,0 +1,58 @@
+"""
+Unit tests for the search result cache.
+"""
+
+import pytest
+
+from backend.src.services.search_cache import SearchResultCache
+
+
+class TestSearchResultCache:
+    """Tests for SearchResultCache."""
+
+    def test_invalid_size(self):
+        """Test that a non-positive size is rejected."""
+        with pytest.raises(ValueError, match="max_entries must be positive"):
+            SearchResultCache(0)
+
+    def test_key_normalization(self):
+        """Test that whitespace and filter key order do not change the key."""
+        key = SearchResultCache.make_key("temp  sensor ", 5, {"a": 1, "b": 2})
+
+        assert key == SearchResultCache.make_key("temp sensor", 5, {"b": 2, "a": 1})
+        assert key != SearchResultCache.make_key("temp sensor", 6, {"a": 1, "b": 2})
+        assert key != SearchResultCache.make_key("temp sensor", 5, None)
+
+    def test_hit_returns_copy(self):
+        """Test that callers cannot mutate the cached result."""
+        cache = SearchResultCache(4)
+        cache.put("k", 0, (["doc"], [{"n": 1}], [0.5]))
+
+        documents, _, _ = cache.get("k", 0)
+        documents.append("other")
+
+        assert cache.get("k", 0) == (["doc"], [{"n": 1}], [0.5])
+        assert cache.get_stats()["hits"] == 2
+
+    def test_stale_generation_is_dropped(self):
+        """Test that entries from an older generation are never served."""
+        cache = SearchResultCache(4)
+        cache.put("k", 0, (["doc"], [{}], [0.5]))
+
+        assert cache.get("k", 1) is None
+        assert len(cache) == 0
+        stats = cache.get_stats()
+        assert stats["stale"] == 1
+        assert stats["misses"] == 1
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        cache = SearchResultCache(2)
+        cache.put("a", 0, ([], [], []))
+        cache.put("b", 0, ([], [], []))
+        cache.get("a", 0)
+        cache.put("c", 0, ([], [], []))
+
+        assert cache.get("b", 0) is None
+        assert cache.get("a", 0) is not None
+        assert cache.get_stats()["evictions"] == 1
@@ -0,0 +1,88 @@
+"""
+Unit tests for datasheet spec extraction and constraint filters.
+"""
+
+import pytest
+
+from backend.src.services.spec_extraction import (
+    SPEC_FIELDS,
+    UNBOUNDED,
+    constraints_to_where,
+    extract_specs,
+)
+
+
+class TestExtractSpecs:
+    """Tests for extract_specs."""
+
+    def test_mcu_feature_list(self):
+        """Test that voltage range, active current and CPU clock are normalized."""
+        text = (
+            "Features: Xtensa dual-core CPU up to 240 MHz. Operating voltage 3.0 V to 3.6 V. "
+            "Active current 95 mA; deep sleep current 10 µA. Absolute maximum ratings: VDD -0.3 to 3.9 V."
+        )
+
+        assert extract_specs(text) == {
+            "supply_voltage_min": 3.0,
+            "supply_voltage_max": 3.6,
+            "supply_current_ma": 95.0,
+            "max_frequency_mhz": 240.0,
+        }
+
+    def test_units_are_converted(self):
+        """Test mV, µA and GHz conversion and a single supply voltage."""
+        specs = extract_specs("VDD 1800 mV. Quiescent current 3.5 uA. Clock frequency 1.2 GHz")
+
+        assert specs["supply_voltage_min"] == specs["supply_voltage_max"] == pytest.approx(1.8)
+        assert specs["supply_current_ma"] == pytest.approx(0.0035)
+        assert specs["max_frequency_mhz"] == pytest.approx(1200.0)
+
+    def test_unstated_specs_pass_every_filter(self):
+        """Test that missing specs get permissive bounds."""
+        specs = extract_specs("2-pin header, 2.54 mm pitch")
+
+        assert set(specs) == set(SPEC_FIELDS)
+        assert specs["supply_voltage_min"] == 0.0
+        assert specs["supply_voltage_max"] == UNBOUNDED
+        assert specs["supply_current_ma"] == 0.0
+        assert specs["max_frequency_mhz"] == UNBOUNDED
+
+
+class TestConstraintsToWhere:
+    """Tests for constraints_to_where."""
+
+    def test_no_constraints(self):
+        """Test that an unconstrained search has no filter beyond its category."""
+        assert constraints_to_where({}) is None
+        assert constraints_to_where({"battery_type": "lipo"}, "power") == {"category": "power"}
+
+    def test_voltage_and_current(self):
+        """Test range clauses for voltage limits and a current budget in amps."""
+        where = constraints_to_where({"max_voltage": 5, "target_voltage": 3.3, "max_current_a": 0.5}, "sensor")
+
+        assert where == {"$and": [
+            {"category": "sensor"},
+            {"supply_voltage_min": {"$lte": 5.0}},
+            {"supply_voltage_min": {"$lte": 3.3}},
+            {"supply_voltage_max": {"$gte": 3.3}},
+            {"supply_current_ma": {"$lte": 500.0}},
+        ]}
+
+    def test_supply_constraints_skip_other_categories(self):
+        """Test that power parts and actuators are not filtered by the board supply."""
+        constraints = {"target_voltage": 3.3, "max_current_ma": 10}
+
+        assert constraints_to_where(constraints, "power") == {"category": "power"}
+        assert constraints_to_where(constraints, "actuator") == {"category": "actuator"}
+        assert constraints_to_where(constraints) is None
+
+    def test_frequency_applies_to_microcontrollers_only(self):
+        """Test that a clock constraint does not filter other categories."""
+        constraints = {"frequency_khz": 80000}
+
+        assert constraints_to_where(constraints, "microcontroller") == {"$and": [
+            {"category": "microcontroller"},
+            {"max_frequency_mhz": {"$gte": 80.0}},
+        ]}
+        assert constraints_to_where(constraints, "sensor") == {"category": "sensor"}
+        assert constraints_to_where(constraints) is None
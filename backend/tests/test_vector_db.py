@@ -7,8 +7,17 @@ import tempfile
 import shutil
 from unittest.mock import Mock, patch, MagicMock
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
-from backend.src.services.vector_db import VectorDBService, get_vector_db_service
+from backend.src.services.vector_db import (
+    VectorDBService, get_vector_db_service, make_chunk_id, similarity_from_distance
+)
+from backend.src.services.embedding_projection import PCAProjection
+from backend.src.services.vector_quantization import QuantizedVectorIndex
+from backend.src.services.spec_extraction import extract_specs
 
 
 class TestVectorDBService:
@@ -111,10 +120,58 @@ class TestVectorDBService:
         mock_client.get_collection.assert_called_once()
         mock_client.create_collection.assert_called_once()
     
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch('backend.src.services.vector_db.chromadb.PersistentClient')
+    def test_new_collection_records_embedding_model(self, mock_client_class, mock_get_embedding_service, temp_dir):
+        """Test that created collections record the model that embeds them."""
+        service = VectorDBService(persist_directory=temp_dir, embedding_model="model-b", collection_name="parts_b")
+        mock_client = Mock()
+        mock_client.get_collection.side_effect = ValueError("Collection not found")
+        mock_client_class.return_value = mock_client
+        
+        service._get_collection()
+        
+        create_kwargs = mock_client.create_collection.call_args[1]
+        assert create_kwargs["name"] == "parts_b"
+        assert create_kwargs["metadata"]["embedding_model"] == "model-b"
+        mock_get_embedding_service.assert_called_with("model-b")
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch('backend.src.services.vector_db.chromadb.PersistentClient')
+    def test_collection_model_mismatch(self, mock_client_class, mock_get_embedding_service, vector_db_service):
+        """Test that opening a collection with a different model is rejected."""
+        mock_client = Mock()
+        mock_client.get_collection.return_value.metadata = {"embedding_model": "other-model"}
+        mock_client_class.return_value = mock_client
+        
+        with pytest.raises(ValueError, match="embedded with other-model"):
+            vector_db_service._get_collection()
+        assert vector_db_service._collection is None
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch('backend.src.services.vector_db.chromadb.PersistentClient')
+    def test_embedding_function_routes_queries(self, mock_client_class, mock_get_embedding_service, vector_db_service):
+        """Test that single-text calls use the cached query embedding path."""
+        mock_client = Mock()
+        mock_embedding_service = Mock()
+        mock_embedding_service.generate_embedding_array.return_value = np.array([0.1, 0.2], dtype=np.float32)
+        mock_embedding_service.generate_embeddings_array.return_value = np.array([[0.1], [0.2]], dtype=np.float32)
+        mock_client_class.return_value = mock_client
+        mock_get_embedding_service.return_value = mock_embedding_service
+        
+        vector_db_service._get_collection()
+        embedding_function = mock_client.get_collection.call_args[1]["embedding_function"]
+        
+        np.testing.assert_allclose(embedding_function(["query"]), [[0.1, 0.2]], rtol=1e-6)
+        np.testing.assert_allclose(embedding_function(["a", "b"]), [[0.1], [0.2]], rtol=1e-6)
+        mock_embedding_service.generate_embedding_array.assert_called_once_with("query")
+        mock_embedding_service.generate_embeddings_array.assert_called_once_with(["a", "b"])
+    
     @patch.object(VectorDBService, '_get_collection')
     def test_add_document_chunks(self, mock_get_collection, vector_db_service):
         """Test adding document chunks."""
         mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": []}
         mock_get_collection.return_value = mock_collection
         
         chunks = ["chunk1", "chunk2", "chunk3"]
@@ -125,12 +182,33 @@ class TestVectorDBService:
         assert len(doc_ids) == 3
         assert all(isinstance(doc_id, str) for doc_id in doc_ids)
         
-        mock_collection.add.assert_called_once()
-        call_args = mock_collection.add.call_args
+        mock_collection.upsert.assert_called_once()
+        mock_collection.add.assert_not_called()
+        call_args = mock_collection.upsert.call_args
         assert call_args[1]["documents"] == chunks
         assert call_args[1]["metadatas"] == metadata_list
         assert len(call_args[1]["ids"]) == 3
     
+    @patch.object(VectorDBService, '_get_collection')
+    def test_add_document_chunks_with_embeddings(self, mock_get_collection, vector_db_service):
+        """Test that precomputed embeddings are passed straight to the collection."""
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": []}
+        mock_get_collection.return_value = mock_collection
+        embeddings = np.array([[0.1, 0.2], [0.3, 0.4]])
+        
+        vector_db_service.add_document_chunks(["c1", "c2"], [{}, {}], embeddings=embeddings)
+        
+        passed = mock_collection.upsert.call_args[1]["embeddings"]
+        assert len(passed) == 2
+        assert passed[0].dtype == np.float32
+        np.testing.assert_allclose(passed[1], [0.3, 0.4], rtol=1e-6)
+    
+    def test_add_document_chunks_mismatched_embeddings(self, vector_db_service):
+        """Test that an embedding count mismatch raises ValueError."""
+        with pytest.raises(ValueError, match="Number of embeddings must match"):
+            vector_db_service.add_document_chunks(["c1", "c2"], [{}, {}], embeddings=np.ones((1, 2)))
+    
     def test_add_document_chunks_mismatched_lengths(self, vector_db_service):
         """Test that mismatched chunk and metadata lengths raise ValueError."""
         chunks = ["chunk1", "chunk2"]
@@ -239,6 +317,1214 @@ class TestVectorDBService:
         assert vector_db_service._collection is None
 
 
+class TestVectorDBServiceChunkIds:
+    """Tests for deterministic chunk IDs and idempotent writes."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    def test_make_chunk_id_is_deterministic(self):
+        """Test that IDs depend on source, position and content only."""
+        chunk_id = make_chunk_id("abc", 0, "text")
+        
+        assert chunk_id == make_chunk_id("abc", 0, "text")
+        assert chunk_id != make_chunk_id("abd", 0, "text")
+        assert chunk_id != make_chunk_id("abc", 1, "text")
+        assert chunk_id != make_chunk_id("abc", 0, "text!")
+    
+    def test_chunk_ids_use_file_hash(self, temp_dir):
+        """Test that ingestion metadata is used to derive IDs."""
+        service = VectorDBService(persist_directory=temp_dir)
+        metadata = {"file_hash": "abc", "chunk_index": 3, "ingestion_timestamp": "today"}
+        
+        doc_ids = service.chunk_ids(["text"], [metadata])
+        later = service.chunk_ids(["text"], [{**metadata, "ingestion_timestamp": "tomorrow"}])
+        
+        assert doc_ids == [make_chunk_id("abc", 3, "text")]
+        assert later == doc_ids
+    
+    def test_chunk_ids_without_file_hash(self, temp_dir):
+        """Test that chunks without a file hash are told apart by metadata and position."""
+        service = VectorDBService(persist_directory=temp_dir)
+        
+        doc_ids = service.chunk_ids(["same", "same", "same"], [{"mpn": "A"}, {"mpn": "A"}, {"mpn": "B"}])
+        
+        assert len(set(doc_ids)) == 3
+    
+    @patch.object(VectorDBService, '_get_collection')
+    def test_stored_chunks_are_skipped(self, mock_get_collection, temp_dir):
+        """Test that only chunks missing from the collection are written."""
+        service = VectorDBService(persist_directory=temp_dir)
+        metadata_list = [{"file_hash": "abc", "chunk_index": i} for i in range(3)]
+        stored_id = make_chunk_id("abc", 1, "c2")
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": [stored_id], "metadatas": [metadata_list[1]]}
+        mock_get_collection.return_value = mock_collection
+        
+        doc_ids = service.add_document_chunks(
+            ["c1", "c2", "c3"], metadata_list, embeddings=np.ones((3, 2))
+        )
+        
+        assert doc_ids[1] == stored_id
+        upsert_kwargs = mock_collection.upsert.call_args[1]
+        assert upsert_kwargs["documents"] == ["c1", "c3"]
+        assert upsert_kwargs["ids"] == [doc_ids[0], doc_ids[2]]
+        assert len(upsert_kwargs["embeddings"]) == 2
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_reingesting_unchanged_chunks_is_a_no_op(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test that a fully stored datasheet is neither embedded nor written."""
+        service = VectorDBService(persist_directory=temp_dir, vector_precision="int8")
+        metadata_list = [{"file_hash": "abc", "chunk_index": i} for i in range(2)]
+        mock_collection = Mock()
+        mock_collection.get.return_value = {
+            "ids": service.chunk_ids(["c1", "c2"], metadata_list), "metadatas": metadata_list
+        }
+        mock_get_collection.return_value = mock_collection
+        
+        service.add_document_chunks(["c1", "c2"], metadata_list)
+        
+        mock_collection.upsert.assert_not_called()
+        mock_collection.update.assert_not_called()
+        mock_get_embedding_service.return_value.generate_embeddings_array.assert_not_called()
+    
+    @patch.object(VectorDBService, '_get_collection')
+    def test_find_new_chunks_drops_repeats(self, mock_get_collection, temp_dir):
+        """Test that repeated IDs within one write are only kept once."""
+        service = VectorDBService(persist_directory=temp_dir)
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": ["b"]}
+        mock_get_collection.return_value = mock_collection
+        
+        assert service.find_new_chunks(["a", "b", "a", "c"]) == [0, 3]
+        mock_collection.get.assert_called_once_with(ids=["a", "b", "c"], include=[])
+
+
+class TestVectorDBServicePipelinedWrites:
+    """Tests for batched, pipelined bulk writes."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_large_write_is_batched(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test that large inputs are embedded and written batch by batch."""
+        service = VectorDBService(persist_directory=temp_dir, write_batch_size=2)
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": []}
+        mock_get_collection.return_value = mock_collection
+        mock_embedding_service = Mock()
+        mock_embedding_service.generate_embeddings_array.side_effect = (
+            lambda texts: np.ones((len(texts), 3), dtype=np.float32)
+        )
+        mock_embedding_service.project.side_effect = lambda vectors: vectors
+        mock_get_embedding_service.return_value = mock_embedding_service
+        chunks = [f"chunk{i}" for i in range(5)]
+        
+        doc_ids = service.add_document_chunks(chunks, [{"i": i} for i in range(5)])
+        
+        calls = mock_collection.upsert.call_args_list
+        assert [call[1]["documents"] for call in calls] == [chunks[0:2], chunks[2:4], chunks[4:5]]
+        assert sum((call[1]["ids"] for call in calls), []) == doc_ids
+        assert len(calls[2][1]["embeddings"]) == 1
+        stats = service.get_write_stats()
+        assert stats["chunks"] == 5
+        assert stats["batches"] == 3
+        assert stats["chunks_per_second"] > 0
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_precomputed_embeddings_skip_encoding(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test that precomputed vectors are sliced straight into each batch."""
+        service = VectorDBService(persist_directory=temp_dir, write_batch_size=2)
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": []}
+        mock_get_collection.return_value = mock_collection
+        embeddings = np.arange(9, dtype=np.float32).reshape(3, 3)
+        
+        service.add_document_chunks(["a", "b", "c"], [{}, {}, {}], embeddings=embeddings)
+        
+        mock_get_embedding_service.return_value.generate_embeddings_array.assert_not_called()
+        np.testing.assert_array_equal(mock_collection.upsert.call_args[1]["embeddings"], embeddings[2:])
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_worker_pool_embeds_batches(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test that a worker pool replaces in-process embedding."""
+        service = VectorDBService(persist_directory=temp_dir, write_batch_size=2)
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": []}
+        mock_get_collection.return_value = mock_collection
+        mock_embedding_service = Mock()
+        mock_embedding_service.project.side_effect = lambda vectors: vectors
+        mock_get_embedding_service.return_value = mock_embedding_service
+        pool = Mock()
+        pool.generate_embeddings_array.side_effect = lambda texts: np.ones((len(texts), 3))
+        
+        service.add_document_chunks(["a", "b", "c"], [{}, {}, {}], worker_pool=pool)
+        
+        assert pool.generate_embeddings_array.call_count == 2
+        mock_embedding_service.generate_embeddings_array.assert_not_called()
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_write_failure_propagates(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test that a failed batch write stops the pipeline with its error."""
+        service = VectorDBService(persist_directory=temp_dir, write_batch_size=1)
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": []}
+        mock_collection.upsert.side_effect = RuntimeError("disk full")
+        mock_get_collection.return_value = mock_collection
+        
+        with pytest.raises(RuntimeError, match="disk full"):
+            service.add_document_chunks(["a", "b"], [{}, {}], embeddings=np.ones((2, 3)))
+        assert mock_collection.upsert.call_count == 1
+
+
+class TestVectorDBServiceStreaming:
+    """Tests for paged reads and streamed embedding writes."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @patch.object(VectorDBService, '_get_collection')
+    def test_iter_documents_pages(self, mock_get_collection, temp_dir):
+        """Test that documents are fetched one page at a time."""
+        service = VectorDBService(persist_directory=temp_dir)
+        mock_collection = Mock()
+        mock_collection.get.side_effect = [
+            {"ids": ["a", "b"], "documents": ["A", "B"], "metadatas": [{}, {}]},
+            {"ids": ["c"], "documents": ["C"], "metadatas": [{"n": 3}]},
+        ]
+        mock_get_collection.return_value = mock_collection
+        
+        documents = list(service.iter_documents(batch_size=2))
+        
+        assert documents == [("a", "A", {}), ("b", "B", {}), ("c", "C", {"n": 3})]
+        assert mock_collection.get.call_args_list[1][1]["offset"] == 2
+        assert mock_collection.get.call_args_list[1][1]["limit"] == 2
+    
+    @patch.object(VectorDBService, '_get_collection')
+    def test_write_embedding_stream(self, mock_get_collection, temp_dir):
+        """Test that each streamed batch updates the stored vectors."""
+        service = VectorDBService(persist_directory=temp_dir)
+        mock_collection = Mock()
+        mock_get_collection.return_value = mock_collection
+        stream = iter([(["a", "b"], np.ones((2, 3))), (["c"], np.zeros((1, 3)))])
+        
+        written = service.write_embedding_stream(stream)
+        
+        assert written == 3
+        assert mock_collection.update.call_count == 2
+        assert mock_collection.update.call_args[1]["ids"] == ["c"]
+    
+    def test_update_embeddings_mismatched_lengths(self, temp_dir):
+        """Test that IDs and embeddings must line up."""
+        service = VectorDBService(persist_directory=temp_dir)
+        
+        with pytest.raises(ValueError, match="Number of embeddings must match number of IDs"):
+            service.update_embeddings(["a", "b"], np.ones((1, 3)))
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_reembed_from_copies_chunks(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test migrating chunks into a collection embedded by another model."""
+        source = Mock()
+        source.iter_documents.return_value = iter([
+            ("a", "first", {"n": 1}),
+            ("b", "", {"n": 2}),
+            ("c", "third", {"n": 3}),
+        ])
+        target = VectorDBService(persist_directory=temp_dir, embedding_model="model-b")
+        mock_collection = Mock()
+        mock_get_collection.return_value = mock_collection
+        mock_embedding_service = Mock()
+        mock_embedding_service.embed_stream.side_effect = lambda texts, batch_size: iter(
+            [(["a", "c"], np.ones((2, 2), dtype=np.float32))] if list(texts) else []
+        )
+        mock_get_embedding_service.return_value = mock_embedding_service
+        
+        written = target.reembed_from(source, batch_size=8)
+        
+        assert written == 2
+        upsert_kwargs = mock_collection.upsert.call_args[1]
+        assert upsert_kwargs["ids"] == ["a", "c"]
+        assert upsert_kwargs["documents"] == ["first", "third"]
+        assert upsert_kwargs["metadatas"] == [{"n": 1}, {"n": 3}]
+        mock_get_embedding_service.assert_called_with("model-b")
+
+
+class TestVectorDBServiceSearchMany:
+    """Tests for multi-query batch search."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_queries_are_grouped_by_filter(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test one embedding pass and one collection query per distinct filter."""
+        service = VectorDBService(persist_directory=temp_dir)
+        mock_embedding_service = Mock()
+        mock_embedding_service.generate_query_embeddings_array.return_value = np.eye(3, dtype=np.float32)
+        mock_get_embedding_service.return_value = mock_embedding_service
+        mock_collection = Mock()
+        mock_collection.query.side_effect = [
+            {
+                "documents": [["s1", "s2"], ["s3", "s4"]],
+                "metadatas": [[{"n": 1}, {"n": 2}], [{"n": 3}, {"n": 4}]],
+                "distances": [[0.1, 0.2], [0.3, 0.4]],
+            },
+            {"documents": [["m1"]], "metadatas": [[{"n": 5}]], "distances": [[0.5]]},
+        ]
+        mock_get_collection.return_value = mock_collection
+        
+        results = service.search_many([
+            ("temp sensor", {"category": "sensor"}, 2),
+            ("mcu", {"category": "microcontroller"}, 1),
+            ("humidity sensor", {"category": "sensor"}, 1),
+        ])
+        
+        mock_embedding_service.generate_query_embeddings_array.assert_called_once_with(
+            ["temp sensor", "mcu", "humidity sensor"]
+        )
+        assert mock_collection.query.call_count == 2
+        first_call = mock_collection.query.call_args_list[0][1]
+        assert first_call["where"] == {"category": "sensor"}
+        assert first_call["n_results"] == 2
+        assert len(first_call["query_embeddings"]) == 2
+        assert results[0] == (["s1", "s2"], [{"n": 1}, {"n": 2}], [0.1, 0.2])
+        assert results[1] == (["m1"], [{"n": 5}], [0.5])
+        assert results[2] == (["s3"], [{"n": 3}], [0.3])
+    
+    def test_search_many_empty(self, temp_dir):
+        """Test that no queries give no results."""
+        service = VectorDBService(persist_directory=temp_dir)
+        
+        assert service.search_many([]) == []
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_quantized_search_many_fetches_once(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test that reduced-precision batch search resolves filters and documents once."""
+        service = VectorDBService(persist_directory=temp_dir, vector_precision="int8")
+        index = service._quantized_index = Mock()
+        index.search.side_effect = [(["a", "b"], [0.1, 0.2]), (["b"], [0.3])]
+        mock_embedding_service = Mock()
+        mock_embedding_service.generate_query_embeddings_array.return_value = np.eye(2, dtype=np.float32)
+        mock_get_embedding_service.return_value = mock_embedding_service
+        mock_collection = Mock()
+        mock_collection.get.side_effect = [
+            {"ids": ["a", "b", "c"]},
+            {"ids": ["b", "a"], "documents": ["B", "A"], "metadatas": [{"id": "b"}, {"id": "a"}]},
+        ]
+        mock_get_collection.return_value = mock_collection
+        
+        results = service.search_many([
+            ("q1", {"category": "sensor"}, 2),
+            ("q2", {"category": "sensor"}, 1),
+        ])
+        
+        assert results == [
+            (["A", "B"], [{"id": "a"}, {"id": "b"}], [0.1, 0.2]),
+            (["B"], [{"id": "b"}], [0.3]),
+        ]
+        assert mock_collection.get.call_count == 2
+        assert index.search.call_args_list[1][0][2] == ["a", "b", "c"]
+
+
+class TestVectorDBServiceReducedPrecision:
+    """Tests for VectorDBService with a reduced-precision search index."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    def test_invalid_precision(self, temp_dir):
+        """Test that unsupported precisions are rejected."""
+        with pytest.raises(ValueError, match="Unsupported vector precision"):
+            VectorDBService(persist_directory=temp_dir, vector_precision="int4")
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_add_and_search_int8(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test that writes feed the quantized index and searches rescore from it."""
+        service = VectorDBService(persist_directory=temp_dir, vector_precision="int8")
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": []}
+        mock_get_collection.return_value = mock_collection
+        mock_embedding_service = Mock()
+        mock_embedding_service.generate_embeddings_array.return_value = np.array(
+            [[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]], dtype=np.float32
+        )
+        mock_embedding_service.generate_embedding_array.return_value = np.array([0.0, 1.0], dtype=np.float32)
+        mock_get_embedding_service.return_value = mock_embedding_service
+        
+        doc_ids = service.add_document_chunks(["c1", "c2", "c3"], [{"n": 1}, {"n": 2}, {"n": 3}])
+        
+        assert len(mock_collection.upsert.call_args[1]["embeddings"]) == 3
+        assert os.path.exists(service._quantized_dirty_path())
+        service.flush()
+        assert os.path.exists(service._quantized_index_path())
+        assert not os.path.exists(service._quantized_dirty_path())
+        
+        mock_collection.get.return_value = {
+            "ids": [doc_ids[2], doc_ids[1]],
+            "documents": ["c3", "c2"],
+            "metadatas": [{"n": 3}, {"n": 2}],
+        }
+        documents, metadatas, distances = service.search_similar("query", n_results=2)
+        
+        assert documents == ["c2", "c3"]
+        assert metadatas == [{"n": 2}, {"n": 3}]
+        assert distances[0] < distances[1]
+        mock_collection.query.assert_not_called()
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    def test_small_writes_save_index_amortized(self, mock_get_embedding_service, temp_dir):
+        """Test that per-datasheet writes do not rewrite the index file every time."""
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy", vector_precision="int8")
+        vectors = np.random.default_rng(0).standard_normal((400, 4)).astype(np.float32)
+        
+        with patch('backend.src.services.vector_db._QUANTIZED_SAVE_MIN_ROWS', 20), \
+                patch.object(QuantizedVectorIndex, 'save', autospec=True,
+                             side_effect=QuantizedVectorIndex.save) as save:
+            for start in range(0, 400, 4):
+                service.add_document_chunks(
+                    [f"chunk {i}" for i in range(start, start + 4)],
+                    [{"chunk_index": i} for i in range(start, start + 4)],
+                    embeddings=vectors[start:start + 4]
+                )
+        
+        # Saves follow the index's growth geometrically, not every one of the 100 writes
+        assert 1 <= save.call_count <= 12
+        assert len(service._quantized_index) == 400
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    def test_unflushed_index_is_rebuilt(self, mock_get_embedding_service, temp_dir):
+        """Test that an index left unsaved is rebuilt from the collection on reopen."""
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy", vector_precision="int8")
+        vectors = np.eye(4, dtype=np.float32)
+        service.add_document_chunks(["a", "b"], [{"n": 1}, {"n": 2}], embeddings=vectors[:2])
+        service.flush()
+        service.add_document_chunks(["c", "d"], [{"n": 3}, {"n": 4}], embeddings=vectors[2:])
+        
+        reopened = VectorDBService(persist_directory=temp_dir, backend="numpy", vector_precision="int8")
+        
+        assert len(reopened._get_quantized_index()) == 4
+        assert not os.path.exists(reopened._quantized_dirty_path())
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_search_with_filter_restricts_candidates(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test that where filters are resolved to an ID subset before searching."""
+        service = VectorDBService(persist_directory=temp_dir, vector_precision="float16")
+        index = service._quantized_index = Mock()
+        index.search.return_value = ([], [])
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": ["a", "b"]}
+        mock_get_collection.return_value = mock_collection
+        
+        result = service.search_similar("query", n_results=3, where={"category": "sensor"})
+        
+        assert result == ([], [], [])
+        mock_collection.get.assert_called_once_with(where={"category": "sensor"}, include=[])
+        assert index.search.call_args[0][2] == ["a", "b"]
+
+
+class TestVectorDBServiceProjection:
+    """Tests for VectorDBService with a corpus-fitted projection."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch('backend.src.services.vector_db.chromadb.PersistentClient')
+    def test_saved_projection_is_installed(self, mock_client_class, mock_get_embedding_service, temp_dir):
+        """Test that the persisted projection is loaded onto the service, not the shared embedder."""
+        service = VectorDBService(persist_directory=temp_dir)
+        PCAProjection(np.zeros(3), np.eye(3)[:, :2], 0.9).save(service._projection_path())
+        mock_embedding_service = Mock()
+        mock_get_embedding_service.return_value = mock_embedding_service
+        
+        service._get_collection()
+        
+        assert service._get_projection().output_dimension == 2
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_precomputed_embeddings_are_projected(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test that full-dimension embeddings are projected before they are stored."""
+        service = VectorDBService(persist_directory=temp_dir)
+        PCAProjection(np.zeros(3), np.eye(3)[:, :2], 0.9).save(service._projection_path())
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": []}
+        mock_get_collection.return_value = mock_collection
+        
+        service.add_document_chunks(["c1"], [{"n": 1}], embeddings=np.array([[1.0, 2.0, 3.0]]))
+        
+        np.testing.assert_allclose(mock_collection.upsert.call_args[1]["embeddings"], [[1.0, 2.0]])
+    
+    def test_reduced_vectors_pass_through(self, temp_dir):
+        """Test that vectors already in the projected space are not projected again."""
+        service = VectorDBService(persist_directory=temp_dir)
+        PCAProjection(np.zeros(3), np.eye(3)[:, :2], 0.9).save(service._projection_path())
+        
+        np.testing.assert_array_equal(service._to_metric_space(np.array([[5.0, 6.0]])), [[5.0, 6.0]])
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_fit_projection_empty_collection(self, mock_get_collection, mock_get_embedding_service, temp_dir):
+        """Test that fitting requires stored chunks."""
+        service = VectorDBService(persist_directory=temp_dir)
+        mock_collection = Mock()
+        mock_collection.get.return_value = {"ids": [], "documents": [], "metadatas": []}
+        mock_get_collection.return_value = mock_collection
+        
+        with pytest.raises(ValueError, match="empty collection"):
+            service.fit_projection(2)
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_client')
+    def test_delete_collection_removes_projection(self, mock_get_client, mock_get_embedding_service, temp_dir):
+        """Test that deleting the collection drops its projection."""
+        service = VectorDBService(persist_directory=temp_dir)
+        PCAProjection(np.zeros(3), np.eye(3)[:, :2], 0.9).save(service._projection_path())
+        service._projection = Mock()
+        mock_embedding_service = Mock()
+        mock_get_embedding_service.return_value = mock_embedding_service
+        
+        service.delete_collection()
+        
+        assert service._get_projection() is None
+        assert not os.path.exists(service._projection_path())
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    def test_projection_stays_with_its_collection(self, mock_get_embedding_service, temp_dir):
+        """Test that projecting one collection leaves another on the same embedder intact."""
+        rng = np.random.default_rng(0)
+        vectors = {f"chunk {i}": rng.standard_normal(4).astype(np.float32) for i in range(20)}
+        mock_embedding_service = Mock()
+        mock_embedding_service.generate_embeddings_array.side_effect = (
+            lambda texts: np.stack([vectors[text] for text in texts])
+        )
+        mock_embedding_service.generate_embedding_array.side_effect = lambda text: vectors[text]
+        mock_embedding_service.generate_query_embeddings_array.side_effect = (
+            lambda texts: np.stack([vectors[text] for text in texts])
+        )
+        mock_get_embedding_service.return_value = mock_embedding_service
+        chunks = list(vectors)
+        metadata = [{"chunk_index": i} for i in range(len(chunks))]
+        projected = VectorDBService(persist_directory=temp_dir, backend="numpy", collection_name="projected")
+        plain = VectorDBService(persist_directory=temp_dir, backend="numpy", collection_name="plain")
+        projected.add_document_chunks(chunks, metadata)
+        plain.add_document_chunks(chunks, metadata)
+        
+        projected.fit_projection(2)
+        plain.add_document_chunks(["chunk 3"], [{"chunk_index": 100}])
+        reopened = VectorDBService(persist_directory=temp_dir, backend="numpy", collection_name="plain")
+        
+        for service in (plain, reopened):
+            documents, _, distances = service.search_similar("chunk 3", n_results=1)
+            assert documents == ["chunk 3"]
+            assert distances[0] == pytest.approx(0.0, abs=1e-5)
+        assert projected.search_similar("chunk 3", n_results=1)[0] == ["chunk 3"]
+        stored = projected._get_collection().get(ids=projected.chunk_ids(["chunk 3"], [metadata[3]]),
+                                                  include=["embeddings"])
+        assert len(stored["embeddings"][0]) == 2
+
+
+class TestVectorDBServiceNumpyBackend:
+    """Tests for VectorDBService on the in-process NumPy backend."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    def test_invalid_backend(self, temp_dir):
+        """Test that unknown backends are rejected."""
+        with pytest.raises(ValueError, match="Unsupported vector backend"):
+            VectorDBService(persist_directory=temp_dir, backend="faiss")
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    def test_add_search_and_reopen(self, mock_get_embedding_service, temp_dir):
+        """Test that chunks written through the service are searchable after reopening."""
+        mock_embedding_service = Mock()
+        mock_embedding_service.generate_embeddings_array.return_value = np.array(
+            [[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]], dtype=np.float32
+        )
+        mock_embedding_service.generate_embedding_array.return_value = np.array([0.0, 1.0], dtype=np.float32)
+        mock_get_embedding_service.return_value = mock_embedding_service
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy")
+        
+        service.add_document_chunks(
+            ["mcu", "temp sensor", "humidity sensor"],
+            [{"category": "microcontroller"}, {"category": "sensor"}, {"category": "sensor"}]
+        )
+        reopened = VectorDBService(persist_directory=temp_dir, backend="numpy")
+        documents, metadatas, distances = reopened.search_by_category("sensor", "sensor", n_results=5)
+        
+        assert documents == ["temp sensor", "humidity sensor"]
+        assert distances[0] == pytest.approx(0.0)
+        assert reopened.get_collection_stats()["total_documents"] == 3
+        assert os.path.isdir(os.path.join(temp_dir, "numpy", "component_datasheets"))
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    def test_reingest_applies_corrected_metadata(self, mock_get_embedding_service, temp_dir):
+        """Test that re-adding unchanged text updates its metadata without re-embedding it."""
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy")
+        embeddings = np.array([[1.0, 0.0], [0.0, 1.0]], dtype=np.float32)
+        metadata_list = [{"file_hash": "abc", "chunk_index": i, "mpn": "LM358"} for i in range(2)]
+        doc_ids = service.add_document_chunks(["c1", "c2"], metadata_list, embeddings=embeddings)
+        assert service.has_component("LM358A") is False
+        
+        corrected = [dict(metadata_list[0]), dict(metadata_list[1], mpn="LM358A")]
+        assert service.add_document_chunks(["c1", "c2"], corrected) == doc_ids
+        
+        stored = service._get_collection().get(ids=doc_ids, include=["metadatas", "embeddings"])
+        assert stored["metadatas"] == corrected
+        np.testing.assert_array_equal(stored["embeddings"], embeddings)
+        mock_get_embedding_service.return_value.generate_embeddings_array.assert_not_called()
+        assert service.get_component_chunks("LM358A")[0] == ["c2"]
+        assert service.update_metadata(doc_ids, corrected) == 0
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    def test_delete_collection(self, mock_get_embedding_service, temp_dir):
+        """Test that deleting the collection removes its files."""
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy")
+        service.add_document_chunks(["mcu"], [{"n": 1}], embeddings=np.ones((1, 2), dtype=np.float32))
+        
+        service.delete_collection()
+        
+        assert not os.path.exists(os.path.join(temp_dir, "numpy", "component_datasheets"))
+
+
+class TestVectorDBServiceResultCache:
+    """Tests for the write-invalidated search result cache."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @pytest.fixture
+    def mock_collection(self):
+        """Collection mock answering every query with one document."""
+        collection = Mock()
+        collection.get.return_value = {"ids": []}
+        collection.query.return_value = {
+            "documents": [["doc"]], "metadatas": [[{"n": 1}]], "distances": [[0.1]]
+        }
+        return collection
+    
+    @patch.object(VectorDBService, '_get_collection')
+    def test_repeat_search_is_served_from_cache(self, mock_get_collection, mock_collection, temp_dir):
+        """Test that an identical search skips the collection entirely."""
+        mock_get_collection.return_value = mock_collection
+        service = VectorDBService(persist_directory=temp_dir)
+        
+        first = service.search_similar("temp sensor", 5, {"category": "sensor"})
+        second = service.search_similar("temp  sensor", 5, {"category": "sensor"})
+        
+        assert first == second == (["doc"], [{"n": 1}], [0.1])
+        assert mock_collection.query.call_count == 1
+        assert service.get_search_cache_stats()["hits"] == 1
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_writes_invalidate_cached_results(self, mock_get_collection, mock_get_embedding_service,
+                                              mock_collection, temp_dir):
+        """Test that a search after a write goes back to the collection."""
+        mock_get_collection.return_value = mock_collection
+        service = VectorDBService(persist_directory=temp_dir)
+        
+        service.search_similar("temp sensor")
+        service.add_document_chunks(["chunk"], [{"n": 1}])
+        service.search_similar("temp sensor")
+        service.update_embeddings(["id"], np.ones((1, 2), dtype=np.float32))
+        service.search_similar("temp sensor")
+        
+        assert mock_collection.query.call_count == 3
+        assert service.get_search_cache_stats()["stale"] == 2
+    
+    @patch.object(VectorDBService, '_get_client')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_delete_collection_invalidates(self, mock_get_collection, mock_get_client, mock_collection, temp_dir):
+        """Test that deleting the collection drops cached results."""
+        mock_get_collection.return_value = mock_collection
+        service = VectorDBService(persist_directory=temp_dir)
+        
+        service.search_similar("temp sensor")
+        service.delete_collection()
+        service.search_similar("temp sensor")
+        
+        assert mock_collection.query.call_count == 2
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    @patch.object(VectorDBService, '_get_collection')
+    def test_search_many_embeds_only_misses(self, mock_get_collection, mock_get_embedding_service,
+                                            mock_collection, temp_dir):
+        """Test that batch search reuses cached results and searches the rest."""
+        mock_get_collection.return_value = mock_collection
+        mock_embedding_service = Mock()
+        mock_embedding_service.generate_query_embeddings_array.return_value = np.ones((1, 2), dtype=np.float32)
+        mock_get_embedding_service.return_value = mock_embedding_service
+        service = VectorDBService(persist_directory=temp_dir)
+        service.search_similar("mcu", 3)
+        
+        results = service.search_many([("mcu", None, 3), ("sensor", None, 3)])
+        
+        mock_embedding_service.generate_query_embeddings_array.assert_called_once_with(["sensor"])
+        assert results == [(["doc"], [{"n": 1}], [0.1])] * 2
+    
+    @patch.object(VectorDBService, '_get_collection')
+    def test_cache_disabled(self, mock_get_collection, mock_collection, temp_dir):
+        """Test that a zero-size cache searches every time."""
+        mock_get_collection.return_value = mock_collection
+        service = VectorDBService(persist_directory=temp_dir, result_cache_entries=0)
+        
+        service.search_similar("temp sensor")
+        service.search_similar("temp sensor")
+        
+        assert mock_collection.query.call_count == 2
+        assert service.get_search_cache_stats() is None
+
+
+class TestVectorDBServiceHybridSearch:
+    """Tests for hybrid BM25 + vector search."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @pytest.fixture
+    def mock_embedding_service(self):
+        """Embedding service placing "sensor" queries next to the humidity chunk."""
+        with patch('backend.src.services.vector_db.get_embedding_service') as mock_get_embedding_service:
+            service = Mock()
+            service.generate_embedding_array.return_value = np.array([0.0, 1.0], dtype=np.float32)
+            mock_get_embedding_service.return_value = service
+            yield service
+    
+    @pytest.fixture
+    def service(self, temp_dir, mock_embedding_service):
+        """NumPy-backed service with three chunks."""
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy")
+        service.add_document_chunks(
+            ["TMP117 digital temperature sensor", "AHT20 humidity sensor", "LM317 regulator"],
+            [{"category": "sensor"}, {"category": "sensor"}, {"category": "power"}],
+            embeddings=np.array([[1.0, 0.0], [0.0, 1.0], [-1.0, 0.0]], dtype=np.float32)
+        )
+        return service
+    
+    def test_search_components(self, service, mock_embedding_service):
+        """Test that component search groups chunk hits by part within a category."""
+        service.add_document_chunks(
+            ["AHT20 pinout", "AHT20 timing"],
+            [{"category": "sensor", "mpn": "AHT20", "chunk_index": 0},
+             {"category": "sensor", "mpn": "AHT20", "chunk_index": 1}],
+            embeddings=np.array([[0.1, 1.0], [0.2, 0.9]], dtype=np.float32)
+        )
+        
+        components = service.search_components("humidity", k=2, category="sensor", chunks_per_component=2)
+        
+        assert [component["mpn"] for component in components] == [None, "AHT20"]
+        assert components[0]["documents"] == ["AHT20 humidity sensor"]
+        assert components[1]["documents"] == ["AHT20 pinout", "AHT20 timing"]
+        assert components[1]["hits"] == 2
+
+    @pytest.mark.parametrize("backend", ["chroma", "numpy"])
+    def test_constraints_filter_inside_store(self, temp_dir, mock_embedding_service, backend):
+        """Test that prompt constraints exclude parts whose specs cannot meet them."""
+        service = VectorDBService(persist_directory=temp_dir, backend=backend)
+        specs = extract_specs("")
+        service.add_document_chunks(
+            ["AHT20 humidity sensor", "BME680 gas sensor", "SHT40 humidity sensor", "LM317 regulator"],
+            [
+                {"category": "sensor", "mpn": "AHT20", **specs, "supply_voltage_min": 2.2,
+                 "supply_voltage_max": 5.5, "supply_current_ma": 0.98},
+                {"category": "sensor", "mpn": "BME680", **specs, "supply_voltage_min": 1.71,
+                 "supply_voltage_max": 3.6, "supply_current_ma": 18.0},
+                {"category": "sensor", "mpn": "SHT40", **specs},
+                {"category": "power", "mpn": "LM317", **specs, "supply_voltage_min": 4.2},
+            ],
+            embeddings=np.array([[0.0, 1.0], [0.1, 1.0], [0.5, 1.0], [0.2, 1.0]], dtype=np.float32)
+        )
+        constraints = {"min_voltage": 5.0, "max_current_ma": 10}
+    
+        documents, _, _ = service.search_by_category("humidity", "sensor", 5, constraints=constraints)
+        components = service.search_components("humidity", k=5, category="sensor", constraints={"max_voltage": 3.3})
+        regulators, _, _ = service.search_by_category("regulator", "power", 5, constraints={"max_voltage": 3.3})
+    
+        assert documents == ["AHT20 humidity sensor", "SHT40 humidity sensor"]
+        assert [component["mpn"] for component in components] == ["AHT20", "BME680", "SHT40"]
+        assert regulators == ["LM317 regulator"]
+    
+    def test_backfill_specs(self, temp_dir, mock_embedding_service):
+        """Test that chunks stored without spec fields get them from their datasheet's text."""
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy")
+        current = {"category": "sensor", "file_hash": "new", "chunk_index": 0, **extract_specs("VDD 5 V")}
+        doc_ids = service.add_document_chunks(
+            ["TMP117 features: operating voltage 1.8 V to", "5.5 V. Active current 0.22 mA", "TMP117 pinout",
+             "LM75 datasheet", "LM75 features: supply voltage 5 V"],
+            [
+                {"category": "sensor", "file_hash": "tmp117", "chunk_index": 0},
+                {"category": "sensor", "file_hash": "tmp117", "chunk_index": 1},
+                current,
+                {"category": "sensor", "file_hash": "lm75", "chunk_index": 0},
+                {"category": "sensor", "file_hash": "lm75", "chunk_index": 1},
+            ],
+            embeddings=np.array([[0.0, 1.0], [0.1, 1.0], [0.2, 1.0], [0.3, 1.0], [0.4, 1.0]], dtype=np.float32)
+        )
+        constraints = {"target_voltage": 3.3}
+        assert service.search_by_category("temperature", "sensor", 5, constraints=constraints)[0] == []
+        
+        assert service.backfill_specs(batch_size=2) == 4
+        
+        metadatas = service._get_collection().get(ids=doc_ids, include=["metadatas"])["metadatas"]
+        assert metadatas[0]["supply_voltage_min"] == metadatas[1]["supply_voltage_min"] == 1.8
+        assert metadatas[0]["supply_current_ma"] == metadatas[1]["supply_current_ma"] == 0.22
+        assert metadatas[3]["supply_voltage_max"] == metadatas[4]["supply_voltage_max"] == 5.0
+        assert metadatas[2] == current
+        documents, _, _ = service.search_by_category("temperature", "sensor", 5, constraints=constraints)
+        assert documents == ["TMP117 features: operating voltage 1.8 V to", "5.5 V. Active current 0.22 mA"]
+        assert service.backfill_specs() == 0
+    
+    @pytest.mark.parametrize("vector_precision", ["float32", "int8"])
+    def test_search_diverse(self, temp_dir, mock_embedding_service, vector_precision):
+        """Test that MMR re-ranking skips a near-duplicate of the best chunk."""
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy", vector_precision=vector_precision)
+        service.add_document_chunks(
+            ["AHT20 overview", "AHT20 overview (overlap)", "AHT20 timing", "LM317 regulator"],
+            [{"category": "sensor"}, {"category": "sensor"}, {"category": "sensor"}, {"category": "power"}],
+            embeddings=np.array([[0.0, 1.0], [0.02, 1.0], [0.6, 0.8], [1.0, 0.0]], dtype=np.float32)
+        )
+        
+        documents, _, distances = service.search_similar("humidity", n_results=2)
+        diverse, metadatas, diverse_distances = service.search_diverse(
+            "humidity", n_results=2, where={"category": "sensor"}, lambda_mult=0.3
+        )
+        
+        assert documents == ["AHT20 overview", "AHT20 overview (overlap)"]
+        assert diverse == ["AHT20 overview", "AHT20 timing"]
+        assert metadatas == [{"category": "sensor"}, {"category": "sensor"}]
+        assert diverse_distances[0] == pytest.approx(distances[0], abs=1e-2)
+        assert service.search_diverse("humidity", where={"category": "missing"}) == ([], [], [])
+    
+    def test_part_number_skips_embedding(self, service, mock_embedding_service):
+        """Test that a part-number query is answered lexically without embedding."""
+        documents, metadatas, scores = service.hybrid_search("TMP117", n_results=3)
+        
+        assert documents == ["TMP117 digital temperature sensor"]
+        assert metadatas == [{"category": "sensor"}]
+        mock_embedding_service.generate_embedding_array.assert_not_called()
+    
+    def test_fuses_lexical_and_vector_ranks(self, service, mock_embedding_service):
+        """Test that chunks found by both rankings come first."""
+        documents, _, scores = service.hybrid_search("humidity sensor", n_results=3)
+        
+        assert documents[0] == "AHT20 humidity sensor"
+        assert set(documents) == {"AHT20 humidity sensor", "TMP117 digital temperature sensor",
+                                  "LM317 regulator"}
+        assert scores == sorted(scores, reverse=True)
+        mock_embedding_service.generate_embedding_array.assert_called_once()
+    
+    def test_where_filter_applies_to_both_rankings(self, service):
+        """Test that filtered-out chunks are excluded from the fused results."""
+        documents, _, _ = service.hybrid_search("LM317 regulator sensor", where={"category": "sensor"})
+        
+        assert "LM317 regulator" not in documents
+    
+    def test_unknown_part_number_falls_back_to_vectors(self, service, mock_embedding_service):
+        """Test that a part number with no lexical match still returns vector results."""
+        documents, _, _ = service.hybrid_search("XYZ999", n_results=1)
+        
+        assert documents == ["AHT20 humidity sensor"]
+    
+    def test_index_built_from_existing_collection_and_updated(self, service, temp_dir):
+        """Test that the index is built on first use, persisted, and kept current by writes."""
+        service.hybrid_search("TMP117")
+        service.add_document_chunks(["SHT40 humidity sensor"], [{"category": "sensor"}],
+                                    embeddings=np.array([[0.0, 0.5]], dtype=np.float32))
+        reopened = VectorDBService(persist_directory=temp_dir, backend="numpy")
+        
+        assert reopened.hybrid_search("SHT40")[0] == ["SHT40 humidity sensor"]
+        service.delete_collection()
+        assert not os.path.exists(service._lexical_index_path())
+    
+    def test_concurrent_first_use_builds_index_once(self, service):
+        """Test that concurrent first searches share one index build."""
+        iter_documents = service.iter_documents
+        builds = []
+        
+        def slow_iter_documents(*args, **kwargs):
+            builds.append(1)
+            time.sleep(0.1)
+            return iter_documents(*args, **kwargs)
+        
+        with patch.object(service, "iter_documents", side_effect=slow_iter_documents):
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                indexes = list(executor.map(lambda _: service._get_lexical_index(), range(4)))
+        
+        assert len(builds) == 1
+        assert all(index is indexes[0] for index in indexes)
+        assert len(indexes[0]) == 3
+    
+    def test_write_during_index_build_is_indexed(self, service):
+        """Test that chunks written while the index is being built end up in it."""
+        stored = list(service.iter_documents())
+        index_chunks = service._index_chunks
+        mirroring = threading.Event()
+        
+        def signalled_index_chunks(*args):
+            mirroring.set()
+            index_chunks(*args)
+        
+        def write():
+            service.add_document_chunks(["SHT40 humidity sensor"], [{"category": "sensor"}],
+                                        embeddings=np.array([[0.0, 0.5]], dtype=np.float32))
+        
+        def iter_documents_with_write(*args, **kwargs):
+            # The build reads the collection before the write lands
+            writer.start()
+            mirroring.wait(5)
+            time.sleep(0.1)
+            return iter(stored)
+        
+        writer = threading.Thread(target=write)
+        with patch.object(service, "_index_chunks", side_effect=signalled_index_chunks), \
+                patch.object(service, "iter_documents", side_effect=iter_documents_with_write):
+            service._get_lexical_index()
+            writer.join(5)
+        
+        assert len(service._get_lexical_index()) == 4
+        assert service.hybrid_search("SHT40")[0][0] == "SHT40 humidity sensor"
+
+
+class TestVectorDBServiceComponentIndex:
+    """Tests for exact component lookups and datasheet deletes."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @pytest.fixture
+    def mock_embedding_service(self):
+        """Embedding service placing every query next to the TMP117 chunks."""
+        with patch('backend.src.services.vector_db.get_embedding_service') as mock_get_embedding_service:
+            service = Mock()
+            service.generate_embedding_array.return_value = np.array([1.0, 0.0], dtype=np.float32)
+            mock_get_embedding_service.return_value = service
+            yield service
+    
+    @pytest.fixture
+    def service(self, temp_dir, mock_embedding_service):
+        """NumPy-backed int8 service with chunks from two datasheets."""
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy", vector_precision="int8")
+        service.add_document_chunks(
+            ["TMP117 page 2", "TMP117 page 1", "LM317 page 1"],
+            [
+                {"mpn": "TMP117", "manufacturer": "TI", "file_hash": "h1", "chunk_index": 1},
+                {"mpn": "TMP117", "manufacturer": "TI", "file_hash": "h1", "chunk_index": 0},
+                {"mpn": "LM317", "manufacturer": "TI", "file_hash": "h2", "chunk_index": 0},
+            ],
+            embeddings=np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]], dtype=np.float32)
+        )
+        yield service
+        service.wait_for_compaction()
+    
+    def test_exact_lookups(self, service, temp_dir):
+        """Test MPN and manufacturer lookups built from the collection and persisted."""
+        documents, metadatas = service.get_component_chunks("tmp117")
+        
+        assert documents == ["TMP117 page 1", "TMP117 page 2"]
+        assert [metadata["chunk_index"] for metadata in metadatas] == [0, 1]
+        assert service.list_components("TI") == ["LM317", "TMP117"]
+        assert service.has_component("LM317")
+        assert os.path.exists(service._component_index_path())
+    
+    def test_writes_update_built_index(self, service):
+        """Test that chunks written after the index is built are found."""
+        service.has_component("TMP117")
+        service.add_document_chunks(
+            ["AHT20 page 1"], [{"mpn": "AHT20", "manufacturer": "Aosong", "file_hash": "h3"}],
+            embeddings=np.array([[0.5, 0.5]], dtype=np.float32)
+        )
+        
+        assert service.get_component_chunks("AHT20")[0] == ["AHT20 page 1"]
+    
+    def test_delete_datasheet(self, service):
+        """Test that deleting a datasheet removes its chunks from every index."""
+        service.hybrid_search("TMP117")
+        
+        assert service.delete_datasheet("h1") == 2
+        
+        assert not service.has_component("TMP117")
+        assert service.get_collection_stats()["total_documents"] == 1
+        assert service._get_lexical_index().search("TMP117") == ([], [])
+        assert len(service._get_quantized_index()) == 1
+        assert service.delete_datasheet("h1") == 0
+    
+    def test_delete_by_mpn_and_source_path(self, service):
+        """Test deletes by part number and by source path."""
+        service.add_document_chunks(
+            ["AHT20 page 1"], [{"mpn": "AHT20", "file_hash": "h3", "source_path": "/data/aht20.pdf"}],
+            embeddings=np.array([[0.5, 0.5]], dtype=np.float32)
+        )
+        
+        assert service.delete_by(mpn="tmp117") == 2
+        assert service.delete_by(source_path="/data/aht20.pdf") == 1
+        assert service.delete_by(source_path="/data/aht20.pdf") == 0
+        assert service._get_collection().get(include=["documents"])["documents"] == ["LM317 page 1"]
+    
+    def test_delete_by_requires_one_criterion(self, service):
+        """Test that delete_by refuses zero or several criteria."""
+        with pytest.raises(ValueError, match="Exactly one"):
+            service.delete_by()
+        with pytest.raises(ValueError, match="Exactly one"):
+            service.delete_by(file_hash="h1", mpn="TMP117")
+    
+    def test_replace_datasheet(self, service):
+        """Test that a new revision supersedes the old chunks, keeping unchanged ones."""
+        service.hybrid_search("TMP117")
+        metadata = {"mpn": "TMP117", "manufacturer": "TI", "file_hash": "h1"}
+        unchanged_id = service.chunk_ids(["TMP117 page 1"], [{**metadata, "chunk_index": 0}])[0]
+        
+        doc_ids = service.replace_datasheet(
+            ["TMP117 page 1", "TMP117 page 2 rev B"],
+            [{**metadata, "chunk_index": 0}, {**metadata, "chunk_index": 1}],
+            embeddings=np.array([[0.9, 0.1], [0.8, 0.2]], dtype=np.float32),
+            mpn="TMP117"
+        )
+        
+        assert doc_ids[0] == unchanged_id
+        assert service.get_component_chunks("TMP117")[0] == ["TMP117 page 1", "TMP117 page 2 rev B"]
+        assert service.get_collection_stats()["total_documents"] == 3
+        assert service._get_lexical_index().search("rev")[0] == [doc_ids[1]]
+        results = service._get_collection().query(query_embeddings=[[1.0, 0.0]], n_results=3)
+        assert "TMP117 page 2" not in results["documents"][0]
+    
+    def test_background_compaction(self, temp_dir, mock_embedding_service):
+        """Test that deletes past the threshold compact the stores in the background."""
+        mock_embedding_service.generate_embedding_array.return_value = np.eye(5, dtype=np.float32)[4]
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy", compaction_threshold=0.5)
+        service.add_document_chunks(
+            [f"TMP117 page {i}" for i in range(4)] + ["LM317 page 0"],
+            [{"mpn": "TMP117", "file_hash": "h1", "chunk_index": i} for i in range(4)]
+            + [{"mpn": "LM317", "file_hash": "h2", "chunk_index": 0}],
+            embeddings=np.eye(5, dtype=np.float32)
+        )
+        service.hybrid_search("LM317")
+        
+        service.delete_by(mpn="LM317")
+        service.wait_for_compaction()
+        assert service._get_collection().get_stats()["dead_rows"] == 1
+        
+        service.delete_by(file_hash="h1")
+        service.wait_for_compaction()
+        
+        assert service._get_collection().get_stats()["rows"] == 0
+        assert service._get_lexical_index().get_stats()["dead_slots"] == 0
+        assert service._get_component_index().get_stats()["dead_log_records"] == 0
+
+
+class TestVectorDBServiceCosineMetric:
+    """Tests for the normalized cosine metric and the similarity threshold."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @pytest.fixture
+    def mock_embedding_service(self):
+        """Embedding service embedding every query as an unnormalized [0, 3]."""
+        with patch('backend.src.services.vector_db.get_embedding_service') as mock_get_embedding_service:
+            service = Mock()
+            service.generate_embedding_array.return_value = np.array([0.0, 3.0], dtype=np.float32)
+            service.generate_query_embeddings_array.side_effect = lambda texts: np.tile(
+                np.array([0.0, 3.0], dtype=np.float32), (len(texts), 1)
+            )
+            mock_get_embedding_service.return_value = service
+            yield service
+    
+    def make_service(self, temp_dir, **options):
+        service = VectorDBService(persist_directory=temp_dir, backend="numpy", metric="cosine", **options)
+        service.add_document_chunks(
+            ["AHT20 humidity sensor", "SHT40 humidity sensor", "LM317 regulator"],
+            [{"category": "sensor", "mpn": "AHT20"}, {"category": "sensor", "mpn": "SHT40"},
+             {"category": "power", "mpn": "LM317"}],
+            # Lengths differ; only direction counts under the cosine metric
+            embeddings=np.array([[0.0, 10.0], [0.6, 0.8], [5.0, -1.0]], dtype=np.float32)
+        )
+        return service
+    
+    @pytest.mark.parametrize("vector_precision", ["float32", "int8"])
+    def test_distances_are_cosine(self, temp_dir, mock_embedding_service, vector_precision):
+        """Test that stored and query vectors are unit length, so distance is 2 - 2 cos."""
+        service = self.make_service(temp_dir, vector_precision=vector_precision)
+        
+        documents, _, distances = service.search_similar("humidity", n_results=3)
+        stored = np.asarray(service._get_collection().get(include=["embeddings"])["embeddings"])
+        
+        assert documents == ["AHT20 humidity sensor", "SHT40 humidity sensor", "LM317 regulator"]
+        np.testing.assert_allclose(np.linalg.norm(stored, axis=1), 1.0, rtol=1e-5)
+        np.testing.assert_allclose(
+            [similarity_from_distance(distance) for distance in distances],
+            [1.0, 0.8, -1 / np.sqrt(26)], atol=2e-2
+        )
+    
+    def test_threshold_cuts_weak_matches(self, temp_dir, mock_embedding_service):
+        """Test that chunks below the threshold are dropped from every search path."""
+        service = self.make_service(temp_dir, similarity_threshold=0.9)
+        
+        assert service.search_similar("humidity", n_results=3)[0] == ["AHT20 humidity sensor"]
+        assert service.search_many([("humidity", None, 3)])[0][0] == ["AHT20 humidity sensor"]
+        assert service.search_diverse("humidity", n_results=3)[0] == ["AHT20 humidity sensor"]
+        assert [component["mpn"] for component in service.search_components("humidity", k=3)] == ["AHT20"]
+        
+        service.similarity_threshold = 0.5
+        assert len(service.search_similar("humidity", n_results=3)[0]) == 2
+        
+        service.similarity_threshold = 0.99
+        assert service.search_by_category("humidity", "power") == ([], [], [])
+        assert service.search_components("humidity", k=3, category="power") == []
+    
+    def test_calibrate_similarity_threshold(self, temp_dir, mock_embedding_service):
+        """Test that calibration keeps the best match of the calibration queries."""
+        service = self.make_service(temp_dir)
+        
+        threshold = service.calibrate_similarity_threshold(["humidity"], where={"category": "power"})
+        
+        assert threshold == service.similarity_threshold == pytest.approx(-1 / np.sqrt(26), abs=1e-4)
+        assert service.search_by_category("humidity", "power")[0] == ["LM317 regulator"]
+        with pytest.raises(ValueError, match="found a match"):
+            service.calibrate_similarity_threshold(["humidity"], where={"category": "missing"})
+    
+    def test_threshold_requires_cosine(self, temp_dir):
+        """Test that the threshold is rejected for an L2 collection."""
+        with pytest.raises(ValueError, match="cosine"):
+            VectorDBService(persist_directory=temp_dir, similarity_threshold=0.5)
+        with pytest.raises(ValueError, match="Unsupported vector metric"):
+            VectorDBService(persist_directory=temp_dir, metric="dot")
+    
+    def test_metric_is_recorded(self, temp_dir, mock_embedding_service):
+        """Test that a collection and its snapshots cannot be opened with another metric."""
+        service = self.make_service(temp_dir)
+        snapshot_path = os.path.join(temp_dir, "collection.snap")
+        service.export_snapshot(snapshot_path)
+        
+        with pytest.raises(ValueError, match="uses the cosine metric"):
+            VectorDBService(persist_directory=temp_dir, backend="numpy").search_similar("humidity")
+        replica = VectorDBService(persist_directory=os.path.join(temp_dir, "replica"), backend="numpy")
+        with pytest.raises(ValueError, match="uses the cosine metric"):
+            replica.import_snapshot(snapshot_path)
+
+
+class TestVectorDBServiceSnapshots:
+    """Tests for snapshot export and import."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    def test_round_trip_with_projection(self, mock_get_embedding_service, temp_dir):
+        """Test that a replica imports vectors, texts, metadata and the projection."""
+        vectors = np.random.default_rng(0).standard_normal((50, 4)).astype(np.float32)
+        source = VectorDBService(persist_directory=os.path.join(temp_dir, "source"), backend="numpy")
+        source.add_document_chunks(
+            [f"chunk {i}" for i in range(50)],
+            [{"category": "sensor", "chunk_index": i} for i in range(50)],
+            embeddings=vectors
+        )
+        PCAProjection(np.zeros(4), np.eye(4)[:, :2], 0.5).save(source._projection_path())
+        snapshot_path = os.path.join(temp_dir, "collection.snap")
+        
+        # A reopened service has not loaded the projection until it is needed
+        reopened = VectorDBService(persist_directory=os.path.join(temp_dir, "source"), backend="numpy")
+        footer = reopened.export_snapshot(snapshot_path, batch_size=16)
+        replica = VectorDBService(persist_directory=os.path.join(temp_dir, "replica"),
+                                  backend="numpy", vector_precision="int8")
+        imported = replica.import_snapshot(snapshot_path)
+        
+        assert footer["count"] == imported == 50
+        assert replica.get_collection_stats()["total_documents"] == 50
+        stored = replica._get_collection().get(ids=source.chunk_ids(["chunk 7"], [{"category": "sensor",
+                                                                                  "chunk_index": 7}]),
+                                               include=["documents", "metadatas", "embeddings"])
+        assert stored["documents"] == ["chunk 7"]
+        assert stored["metadatas"] == [{"category": "sensor", "chunk_index": 7}]
+        np.testing.assert_array_equal(stored["embeddings"][0], vectors[7])
+        assert PCAProjection.load(replica._projection_path()).output_dimension == 2
+        assert len(replica._get_quantized_index()) == 50
+    
+    @patch('backend.src.services.vector_db.get_embedding_service')
+    def test_import_replaces_contents(self, mock_get_embedding_service, temp_dir):
+        """Test that importing into a populated collection replaces it."""
+        source = VectorDBService(persist_directory=os.path.join(temp_dir, "source"), backend="numpy")
+        source.add_document_chunks(["a"], [{"n": 1}], embeddings=np.ones((1, 2), dtype=np.float32))
+        snapshot_path = os.path.join(temp_dir, "collection.snap")
+        source.export_snapshot(snapshot_path)
+        replica = VectorDBService(persist_directory=os.path.join(temp_dir, "replica"), backend="numpy")
+        replica.add_document_chunks(["b", "c"], [{"n": 2}, {"n": 3}], embeddings=np.zeros((2, 2), dtype=np.float32))
+        
+        replica.import_snapshot(snapshot_path)
+        
+        assert replica._get_collection().get(include=["documents"])["documents"] == ["a"]
+    
+    def test_model_mismatch_rejected(self, temp_dir):
+        """Test that snapshots from another embedding model are refused."""
+        snapshot_path = os.path.join(temp_dir, "collection.snap")
+        from backend.src.services.vector_snapshot import SnapshotWriter
+        SnapshotWriter(snapshot_path).close({"embedding_model": "other-model"})
+        replica = VectorDBService(persist_directory=temp_dir, backend="numpy")
+        
+        with pytest.raises(ValueError, match="was embedded with other-model"):
+            replica.import_snapshot(snapshot_path)
+
+
 class TestVectorDBServiceGlobal:
     """Test global vector database service instance."""
     
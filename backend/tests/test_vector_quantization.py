@@ -0,0 +1,192 @@
+"""
+Unit tests for the reduced-precision vector index.
+"""
+
+import pytest
+import tempfile
+import shutil
+import os
+import threading
+import numpy as np
+
+from backend.src.services.vector_quantization import QuantizedVectorIndex
+
+
+def _corpus(n=500, dimension=32, seed=0):
+    """Random unit vectors with string IDs."""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dimension)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [f"doc{i}" for i in range(n)], vectors
+
+
+def _exact_top_k(vectors, query, k):
+    distances = ((vectors - query) ** 2).sum(axis=1)
+    return set(np.argsort(distances)[:k].tolist())
+
+
+class TestQuantizedVectorIndex:
+    """Unit tests for QuantizedVectorIndex."""
+    
+    @pytest.fixture
+    def temp_dir(self):
+        """Create a temporary directory for testing."""
+        temp_dir = tempfile.mkdtemp()
+        yield temp_dir
+        shutil.rmtree(temp_dir)
+    
+    def test_invalid_precision(self):
+        """Test that unsupported precisions are rejected."""
+        with pytest.raises(ValueError, match="Unsupported precision"):
+            QuantizedVectorIndex("int4")
+    
+    @pytest.mark.parametrize("precision", ["float16", "int8"])
+    def test_recall_against_exact_search(self, precision):
+        """Test that rescored results closely match exact float32 search."""
+        ids, vectors = _corpus()
+        index = QuantizedVectorIndex(precision)
+        index.add(ids, vectors)
+        rng = np.random.default_rng(1)
+        
+        recalls = []
+        for _ in range(20):
+            query = vectors[rng.integers(len(vectors))] + 0.1 * rng.standard_normal(32).astype(np.float32)
+            result_ids, distances = index.search(query, k=10)
+            expected = _exact_top_k(vectors, query, 10)
+            recalls.append(len({int(doc_id[3:]) for doc_id in result_ids} & expected) / 10)
+            assert distances == sorted(distances)
+        
+        assert np.mean(recalls) >= 0.95
+    
+    @pytest.mark.parametrize("precision,max_ratio", [("float16", 0.6), ("int8", 0.35)])
+    def test_memory_reduction(self, precision, max_ratio):
+        """Test that stored vectors use a fraction of float32 memory."""
+        ids, vectors = _corpus(dimension=384)
+        index = QuantizedVectorIndex(precision)
+        index.add(ids, vectors)
+        
+        stats = index.get_stats()
+        
+        assert stats["vectors"] == 500
+        assert stats["vector_bytes"] / stats["float32_bytes"] <= max_ratio
+    
+    def test_exact_match_is_first(self):
+        """Test that a stored vector is its own nearest neighbour."""
+        ids, vectors = _corpus()
+        index = QuantizedVectorIndex("int8")
+        index.add(ids, vectors)
+        
+        result_ids, distances = index.search(vectors[42], k=3)
+        
+        assert result_ids[0] == "doc42"
+        assert distances[0] < 1e-3
+    
+    def test_allowed_ids_restricts_search(self):
+        """Test that search only considers allowed IDs."""
+        ids, vectors = _corpus()
+        index = QuantizedVectorIndex("float16")
+        index.add(ids, vectors)
+        
+        result_ids, _ = index.search(vectors[0], k=5, allowed_ids=["doc7", "doc8", "missing"])
+        
+        assert sorted(result_ids) == ["doc7", "doc8"]
+        assert index.search(vectors[0], k=5, allowed_ids=[]) == ([], [])
+    
+    def test_add_replaces_existing_ids(self):
+        """Test that re-adding an ID overwrites its vector."""
+        index = QuantizedVectorIndex("int8")
+        index.add(["a", "b"], np.array([[1.0, 0.0], [0.0, 1.0]]))
+        index.add(["a"], np.array([[0.0, -1.0]]))
+        
+        result_ids, _ = index.search(np.array([0.0, -1.0]), k=1)
+        
+        assert len(index) == 2
+        assert result_ids == ["a"]
+    
+    def test_small_adds_grow_geometrically(self, temp_dir):
+        """Test that one-vector adds reallocate rarely and match a bulk-built index."""
+        ids, vectors = _corpus(n=1000)
+        bulk = QuantizedVectorIndex("int8")
+        bulk.add(ids, vectors)
+        index = QuantizedVectorIndex("int8")
+        reallocations = 0
+        
+        for doc_id, vector in zip(ids, vectors):
+            buffer = index._scales
+            index.add([doc_id], vector[None, :])
+            reallocations += index._scales is not buffer
+        index.remove(["doc5"])
+        bulk.remove(["doc5"])
+        path = os.path.join(temp_dir, "index.npz")
+        index.save(path)
+        
+        assert reallocations <= 8
+        assert index.get_stats() == bulk.get_stats()
+        assert index.search(vectors[3], k=5) == bulk.search(vectors[3], k=5)
+        assert len(QuantizedVectorIndex.load(path)) == 999
+    
+    def test_dimension_mismatch(self):
+        """Test that vectors of a different dimension are rejected."""
+        index = QuantizedVectorIndex("int8")
+        index.add(["a"], np.ones((1, 4)))
+        
+        with pytest.raises(ValueError, match="Expected 4-dimensional"):
+            index.add(["b"], np.ones((1, 3)))
+    
+    def test_concurrent_writes_and_searches(self):
+        """Test that searches running alongside adds and removes see a consistent index."""
+        ids, vectors = _corpus(n=2000)
+        index = QuantizedVectorIndex("int8")
+        index.add(ids[:1000], vectors[:1000])
+        errors = []
+        done = threading.Event()
+        
+        def write():
+            try:
+                rng = np.random.default_rng(1)
+                for _ in range(50):
+                    batch = rng.choice(len(ids), 50, replace=False)
+                    index.remove([ids[i] for i in batch[:25]])
+                    index.add([ids[i] for i in batch], vectors[batch])
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done.set()
+        
+        def search(seed):
+            rng = np.random.default_rng(seed)
+            try:
+                while not done.is_set():
+                    query = vectors[rng.integers(len(ids))]
+                    allowed = [ids[i] for i in rng.choice(len(ids), 200, replace=False)]
+                    result_ids, distances = index.search(query, k=10, allowed_ids=allowed)
+                    assert set(result_ids) <= set(allowed)
+                    assert distances == sorted(distances)
+                    index.search(query, k=10)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=write)] + [
+            threading.Thread(target=search, args=(seed,)) for seed in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert all(index._ids[row] == doc_id for doc_id, row in index._rows.items())
+    
+    def test_save_and_load(self, temp_dir):
+        """Test that a saved index loads with identical results."""
+        ids, vectors = _corpus(n=50)
+        index = QuantizedVectorIndex("int8")
+        index.add(ids, vectors)
+        path = os.path.join(temp_dir, "index.npz")
+        
+        index.save(path)
+        loaded = QuantizedVectorIndex.load(path)
+        
+        assert loaded.precision == "int8"
+        assert len(loaded) == 50
+        assert loaded.search(vectors[3], k=5) == index.search(vectors[3], k=5)
@@ -0,0 +1,90 @@
+"""
+Unit tests for the vector snapshot format.
+"""
+
+import pytest
+import tempfile
+import shutil
+import os
+import numpy as np
+
+from backend.src.services.vector_snapshot import FORMAT_VERSION, Snapshot, SnapshotWriter
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory for testing."""
+    temp_dir = tempfile.mkdtemp()
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+
+class TestSnapshot:
+    """Tests for SnapshotWriter and Snapshot."""
+
+    def test_round_trip(self, temp_dir):
+        """Test that rows, columns and extra arrays survive a round trip."""
+        path = os.path.join(temp_dir, "collection.snap")
+        vectors = np.arange(12, dtype=np.float32).reshape(4, 3)
+        writer = SnapshotWriter(path)
+        writer.add(["a", "b"], ["doc a", "doc b"], [{"mpn": "TMP117", "page": 1}, None], vectors[:2])
+        writer.add(["c", "d"], ["doc c", None], [{"page": 2}, {"mpn": "LM317"}], vectors[2:])
+        footer = writer.close({"embedding_model": "model"}, {"extra": np.ones((2, 2))})
+
+        snapshot = Snapshot(path)
+
+        assert footer["format_version"] == FORMAT_VERSION
+        assert snapshot.footer["embedding_model"] == "model"
+        assert snapshot.count == 4
+        assert isinstance(snapshot.vectors, np.memmap)
+        assert snapshot.footer["sections"]["vectors"]["offset"] % 64 == 0
+        np.testing.assert_array_equal(snapshot.vectors, vectors)
+        assert snapshot.ids() == ["a", "b", "c", "d"]
+        assert snapshot.documents() == ["doc a", "doc b", "doc c", None]
+        assert snapshot.metadatas() == [{"mpn": "TMP117", "page": 1}, None, {"page": 2}, {"mpn": "LM317"}]
+        np.testing.assert_array_equal(snapshot.array("extra"), np.ones((2, 2)))
+        assert snapshot.array("missing") is None
+        batches = list(snapshot.batches(3))
+        assert [batch[0] for batch in batches] == [["a", "b", "c"], ["d"]]
+
+    def test_empty_snapshot(self, temp_dir):
+        """Test that an empty collection gives a readable snapshot."""
+        path = os.path.join(temp_dir, "empty.snap")
+        SnapshotWriter(path).close({})
+
+        snapshot = Snapshot(path)
+
+        assert snapshot.count == 0
+        assert list(snapshot.batches(10)) == []
+
+    def test_dimension_mismatch(self, temp_dir):
+        """Test that batches must share one dimension."""
+        writer = SnapshotWriter(os.path.join(temp_dir, "bad.snap"))
+        writer.add(["a"], ["doc"], [None], np.zeros((1, 3)))
+
+        with pytest.raises(ValueError, match="3-dimensional"):
+            writer.add(["b"], ["doc"], [None], np.zeros((1, 4)))
+        writer.abort()
+        assert os.listdir(temp_dir) == []
+
+    def test_invalid_files(self, temp_dir):
+        """Test that foreign, truncated and future-version files are rejected."""
+        path = os.path.join(temp_dir, "collection.snap")
+        writer = SnapshotWriter(path)
+        writer.add(["a"], ["doc"], [None], np.zeros((1, 3)))
+        writer.close({})
+        with open(path, "rb") as f:
+            data = f.read()
+
+        with open(path, "wb") as f:
+            f.write(data[:-4])
+        with pytest.raises(ValueError, match="truncated"):
+            Snapshot(path)
+        with open(path, "wb") as f:
+            f.write(b"not a snapshot at all")
+        with pytest.raises(ValueError, match="not a vector snapshot"):
+            Snapshot(path)
+        with open(path, "wb") as f:
+            f.write(data.replace(b'"format_version": 1', b'"format_version": 9'))
+        with pytest.raises(ValueError, match="Unsupported snapshot format version"):
+            Snapshot(path)